@@ -7,6 +7,7 @@ from django.contrib.auth import get_user_model
 from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import date, timedelta
+from common.audit import record
 from .models import UserLoginSession, UserActivityLog
 
 User = get_user_model()
@@ -304,7 +305,10 @@ def log_user_activity(user, action, description, target_type='', target_id='',
         else:
             ip_address = request.META.get('REMOTE_ADDR')
     
-    UserActivityLog.objects.create(
+    # Buffered: written with the rest of the request's audit rows once the
+    # surrounding transaction commits (common.audit).
+    record(
+        UserActivityLog,
         user=user,
         action=action,
         description=description,
@@ -356,11 +360,7 @@ def log_login(user, request):
 def log_logout(user, request):
     """Log user logout"""
     # Mark active sessions as inactive
-    active_sessions = user.login_sessions.filter(is_active=True)
-    for session in active_sessions:
-        session.is_active = False
-        session.logout_time = timezone.now()
-        session.save()
+    user.login_sessions.filter(is_active=True).update(is_active=False, logout_time=timezone.now())
     
     # Log activity
     log_user_activity(
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+from .user_cache import cached_user
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the logged-in user through accounts.user_cache,
+    or straight from the database when settings.USER_CACHE is off.
+    """
+
+    def get_user(self, user_id):
+        if not getattr(settings, 'USER_CACHE', False):
+            return super().get_user(user_id)
+        user = cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
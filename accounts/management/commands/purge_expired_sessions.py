@@ -0,0 +1,42 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired sessions from the session table in small batches, so the purge '
+        'never holds long locks on django_session (run nightly; replaces clearsessions)'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Sessions deleted per DELETE statement (default: 5000)'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between batches to leave room for live traffic (default: 0)'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = max(1, options['batch_size'])
+        expired = Session.objects.filter(expire_date__lt=now).order_by('expire_date')
+        purged = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:batch_size])
+            if not keys:
+                break
+            Session.objects.filter(session_key__in=keys).delete()
+            purged += len(keys)
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired session(s)'))
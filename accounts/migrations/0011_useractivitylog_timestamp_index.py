@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_add_login_tracking'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='useractivitylog',
+            index=models.Index(fields=['timestamp'], name='accounts_ua_timestamp_idx'),
+        ),
+    ]
@@ -474,6 +474,8 @@ class UserActivityLog(models.Model):
             models.Index(fields=['action', '-timestamp']),
             models.Index(fields=['severity', '-timestamp']),
             models.Index(fields=['target_type', 'target_id']),
+            # Month-by-month retention (common.audit.archive_month)
+            models.Index(fields=['timestamp'], name='accounts_ua_timestamp_idx'),
         ]
     
     def __str__(self):
@@ -0,0 +1,22 @@
+"""
+Signal handlers for accounts app
+
+Invalidate cached users (accounts.user_cache) whenever the user row changes.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+from .user_cache import invalidate_user
+
+
+@receiver(post_save, sender=User)
+def invalidate_saved_user(sender, instance, created, **kwargs):
+    # A new user has no cached copy yet.
+    if not created:
+        invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
@@ -1,3 +1,137 @@
-from django.test import TestCase
+"""
+Tests for the cached user loader, the batched session purge and buffered
+audit logging.
+"""
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.audit_views import log_user_activity
+from accounts.backends import CachedModelBackend
+from accounts.models import UserActivityLog
+from clients.models import AdminAuditLog
+from common import audit
+
+
+@pytest.mark.django_db
+class TestCachedModelBackend:
+
+    def test_second_load_skips_the_database(self, django_user_model):
+        user = django_user_model.objects.create_user(username='cashier', password='x')
+        backend = CachedModelBackend()
+        assert backend.get_user(user.pk) == user
+
+        with CaptureQueriesContext(connection) as queries:
+            assert backend.get_user(user.pk) == user
+        assert len(queries) == 0
+
+    def test_deactivation_is_picked_up_on_next_load(self, django_user_model, django_capture_on_commit_callbacks):
+        user = django_user_model.objects.create_user(username='cashier', password='x')
+        backend = CachedModelBackend()
+        backend.get_user(user.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.is_active = False
+            user.save()
+        assert backend.get_user(user.pk) is None
+
+    def test_role_change_replaces_cached_copy(self, django_user_model, django_capture_on_commit_callbacks):
+        user = django_user_model.objects.create_user(username='cashier', password='x', role='loan_officer')
+        backend = CachedModelBackend()
+        backend.get_user(user.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.role = 'manager'
+            user.save(update_fields=['role'])
+        assert backend.get_user(user.pk).role == 'manager'
+
+    def test_missing_user_is_none(self):
+        assert CachedModelBackend().get_user(987654) is None
+
+    def test_without_user_cache_every_load_queries(self, django_user_model, settings):
+        settings.USER_CACHE = False
+        user = django_user_model.objects.create_user(username='cashier', password='x')
+        backend = CachedModelBackend()
+        assert backend.get_user(user.pk) == user
+
+        with CaptureQueriesContext(connection) as queries:
+            assert backend.get_user(user.pk) == user
+        assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_purge_expired_sessions_in_batches():
+    now = timezone.now()
+    for number in range(7):
+        Session.objects.create(
+            session_key=f'expired{number}', session_data='', expire_date=now - timedelta(days=1),
+        )
+    Session.objects.create(session_key='live', session_data='', expire_date=now + timedelta(days=1))
+
+    call_command('purge_expired_sessions', batch_size=3, verbosity=0)
+
+    assert list(Session.objects.values_list('session_key', flat=True)) == ['live']
+
+
+@pytest.fixture
+def auditor(django_user_model):
+    return django_user_model.objects.create_user(username='auditor', password='x', role='admin')
+
+
+@pytest.mark.django_db
+class TestAuditBuffer:
+
+    def test_buffered_rows_are_written_in_one_insert_per_model(self, auditor, django_capture_on_commit_callbacks):
+        with CaptureQueriesContext(connection) as queries:
+            with audit.buffered():
+                with django_capture_on_commit_callbacks(execute=True):
+                    for number in range(3):
+                        log_user_activity(auditor, 'other', f'Action {number}')
+                    audit.record(AdminAuditLog, admin_user=auditor, action='other', description='Admin action')
+
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        assert len(inserts) == 2
+        assert UserActivityLog.objects.filter(user=auditor).count() == 3
+        assert AdminAuditLog.objects.filter(admin_user=auditor).count() == 1
+
+    def test_rolled_back_action_leaves_no_row(self, auditor, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    log_user_activity(auditor, 'other', 'Never happened')
+                    raise RuntimeError
+
+        assert callbacks == []
+        assert not UserActivityLog.objects.exists()
+
+    def test_archive_moves_expired_months(self, auditor, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            for number in range(5):
+                log_user_activity(auditor, 'other', f'Action {number}')
+        old = timezone.now() - timedelta(days=500)
+        expired = list(UserActivityLog.objects.values_list('pk', flat=True)[:3])
+        UserActivityLog.objects.filter(pk__in=expired).update(timestamp=old)
+
+        call_command('archive_audit_logs', keep_months=12, batch_size=2, stdout=StringIO())
+
+        assert UserActivityLog.objects.count() == 2
+        table = f'accounts_useractivitylog_{timezone.localtime(old):%Y_%m}'
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM {table} ORDER BY id')
+            assert [row[0] for row in cursor.fetchall()] == sorted(expired)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_background_writer(auditor, settings):
+    settings.AUDIT_LOG_WRITER = 'background'
+    for number in range(3):
+        log_user_activity(auditor, 'other', f'Action {number}')
+
+    audit.background_writer().wait()
+    assert UserActivityLog.objects.filter(user=auditor).count() == 3
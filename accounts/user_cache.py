@@ -0,0 +1,50 @@
+"""
+Cached user loading for authenticated requests.
+
+AuthenticationMiddleware loads request.user from the database on every
+request. cached_user() serves it from the cache instead, under a key that
+includes a per-user version stamp. accounts.signals bumps the stamp after
+every committed save or delete of the user, so a deactivation, role change
+or password change is picked up on the very next request. The stamp is
+bumped on commit, so a request that read the old row mid-transaction
+cannot re-cache it under the new version. USER_CACHE_TIMEOUT (default 300
+seconds) bounds staleness for writes that bypass signals, such as
+QuerySet.update().
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+CACHE_PREFIX = 'auth_user'
+
+
+def _version_key(user_id):
+    return f'{CACHE_PREFIX}:version:{user_id}'
+
+
+def _bump(user_id):
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def invalidate_user(*user_ids):
+    """Drop the cached copies of the given users once the current transaction commits."""
+    for user_id in {pk for pk in user_ids if pk}:
+        transaction.on_commit(lambda user_id=user_id: _bump(user_id))
+
+
+def cached_user(user_id):
+    """The user with ``user_id`` (cached), or None if there is no such user."""
+    version = cache.get(_version_key(user_id)) or 0
+    key = f'{CACHE_PREFIX}:{user_id}:{version}'
+    user = cache.get(key)
+    if user is None:
+        user = get_user_model()._default_manager.filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(key, user, getattr(settings, 'USER_CACHE_TIMEOUT', 300))
+    return user
@@ -157,14 +157,8 @@ class UsersManageView(LoginRequiredMixin, TemplateView):
         
         # Apply search filter
         if search_query:
-            users = users.filter(
-                Q(first_name__icontains=search_query) |
-                Q(last_name__icontains=search_query) |
-                Q(username__icontains=search_query) |
-                Q(email__icontains=search_query) |
-                Q(phone_number__icontains=search_query) |
-                Q(national_id__icontains=search_query)
-            )
+            from search.services import filter_ids
+            users = users.filter(pk__in=filter_ids(search_query, 'user'))
         
         # Apply branch filter (for admins)
         if branch_filter and user.role == 'admin':
@@ -332,7 +326,15 @@ class UserDetailView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user_id = self.kwargs.get('pk')
-        client = User.objects.get(pk=user_id)
+        from django.db.models import Prefetch
+        from clients.models import GroupMembership
+        # Everything the template shows is loaded here, so rendering runs no queries
+        client = User.objects.select_related(
+            'assigned_officer', 'verification__verified_by',
+        ).prefetch_related(
+            Prefetch('group_memberships', queryset=GroupMembership.objects.select_related('group')),
+            'loans',
+        ).get(pk=user_id)
         
         context['client'] = client
         
@@ -0,0 +1,492 @@
+"""
+Bulk transfer engine for branch reorganisations.
+
+A transfer is a batch of moves, each one of:
+
+    Move('client', <client>, <group>)     move a borrower into another group
+    Move('group', <group>, <officer>)     hand a group and its active members to another officer
+    Move('officer', <officer>, <branch>)  move an officer and their active groups to another branch
+
+Sources and destinations are instances, ids or names (username, group
+name, branch name). plan() resolves and validates the whole batch with a
+fixed number of queries, whatever its size: destination officers are
+checked against OfficerAssignment.max_groups/max_clients with one
+aggregate, destination groups against max_members. The returned
+TransferPlan's report() is the dry run.
+
+apply() performs a valid plan in one transaction with set-based updates
+(one UPDATE per destination, not per row) and writes the ClientTransferLog,
+OfficerTransferLog, ClientAssignmentAuditLog and AdminAuditLog rows with
+bulk_create. As when a member is added to a group, a client's
+assigned_officer follows the officer of the group they end up in. The
+updates send no signals, so apply() re-indexes the groups that changed
+officer and, on commit, invalidates the cached dashboards of every officer
+who gained or lost groups, clients or loans.
+"""
+import csv
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+KINDS = ('client', 'group', 'officer')
+CLOSED_LOAN_STATUSES = ('completed', 'rejected')
+BATCH_SIZE = 500
+
+Move = namedtuple('Move', ['kind', 'source', 'destination', 'line'], defaults=[None])
+
+
+class TransferError(Exception):
+    """A transfer that cannot be read or applied; ``errors`` lists why."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__('; '.join(self.errors))
+
+
+class TransferPlan:
+    """A resolved, validated batch of moves (see plan())."""
+
+    def __init__(self, transfer_loans):
+        self.transfer_loans = transfer_loans
+        self.clients = []    # (client, previous group or None, new group, inactive membership id or None)
+        self.groups = []     # (group, previous officer or None, new officer, new branch or None)
+        self.officers = []   # (officer, previous branch, new branch, [ids of groups that move with them])
+        self.reassigned = {}  # client id -> (previous officer id, new officer id)
+        self.loans = {}      # new officer id -> [(loan id, application number, client id)]
+        self.capacity = []
+        self.errors = []
+        self.skipped = []
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+    def report(self):
+        """Dry-run report lines."""
+        loans = sum(len(rows) for rows in self.loans.values())
+        lines = [
+            f'Clients moving to another group: {len(self.clients)}',
+            f'Groups changing officer: {len(self.groups)}',
+            f'Officers changing branch: {len(self.officers)}',
+            f'Clients changing officer: {len(self.reassigned)}',
+            f'Loans changing officer: {loans}' if self.transfer_loans else 'Loans: not transferred',
+        ]
+        if self.capacity:
+            lines.append('Destination officer capacity (now -> after / max):')
+            for row in self.capacity:
+                lines.append(
+                    f'  {row["officer"]}: groups {row["groups"]} -> {row["groups_after"]} / {row["max_groups"]}, '
+                    f'clients {row["clients"]} -> {row["clients_after"]} / {row["max_clients"]}'
+                )
+        lines += [f'Skipped {note}' for note in self.skipped]
+        lines += [f'Error {error}' for error in self.errors]
+        return lines
+
+
+def read_csv(file):
+    """Moves from CSV with a header row of ``type,source,destination``."""
+    reader = csv.DictReader(file)
+    missing = {'type', 'source', 'destination'} - set(reader.fieldnames or [])
+    if missing:
+        raise TransferError([f'CSV is missing column(s): {", ".join(sorted(missing))}'])
+    return [
+        Move(row['type'].strip().lower(), row['source'].strip(), row['destination'].strip(), reader.line_num)
+        for row in reader
+        if any((value or '').strip() for value in row.values())
+    ]
+
+
+def _key(value):
+    return str(value.pk) if hasattr(value, 'pk') else str(value).strip()
+
+
+def _lookup(queryset, name_field, keys):
+    """{key: instance} for keys that are primary keys or ``name_field`` values."""
+    keys = set(keys)
+    if not keys:
+        return {}
+    ids = [int(key) for key in keys if key.isdigit()]
+    names = [key for key in keys if not key.isdigit()]
+    found = {}
+    for obj in queryset.filter(Q(pk__in=ids) | Q(**{f'{name_field}__in': names})):
+        found[str(obj.pk)] = obj
+        found[getattr(obj, name_field)] = obj
+    return found
+
+
+def _where(move):
+    return f'line {move.line}' if move.line else f'{move.kind} {_key(move.source)}'
+
+
+def _name(user):
+    return user.full_name or user.username if user else 'unassigned'
+
+
+def _count(queryset, field):
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def plan(moves, transfer_loans=False):
+    """Resolve and validate ``moves``; returns a TransferPlan."""
+    from accounts.models import User
+    from loans.models import Loan
+
+    from .models import Branch, BorrowerGroup, GroupMembership, OfficerAssignment
+
+    result = TransferPlan(transfer_loans)
+    by_kind = defaultdict(list)
+    for move in moves:
+        move = Move(*move)
+        if move.kind not in KINDS:
+            result.errors.append(f'{_where(move)}: unknown transfer type {move.kind!r}')
+        else:
+            by_kind[move.kind].append(move._replace(source=_key(move.source), destination=_key(move.destination)))
+
+    borrowers = _lookup(
+        User.objects.filter(role='borrower'), 'username',
+        [move.source for move in by_kind['client']],
+    )
+    groups = _lookup(
+        BorrowerGroup.objects.select_related('assigned_officer').annotate(members_total=Count('members')),
+        'name',
+        [move.destination for move in by_kind['client']] + [move.source for move in by_kind['group']],
+    )
+    officers = _lookup(
+        User.objects.filter(role='loan_officer').select_related('officer_assignment'), 'username',
+        [move.destination for move in by_kind['group']] + [move.source for move in by_kind['officer']],
+    )
+    branches = _lookup(
+        Branch.objects.filter(is_active=True), 'name',
+        [move.destination for move in by_kind['officer']],
+    )
+
+    seen = set()
+
+    def resolve(move, sources, destinations, label, target_label):
+        if (move.kind, move.source) in seen:
+            result.errors.append(f'{_where(move)}: {label} {move.source} is listed more than once')
+            return None, None
+        seen.add((move.kind, move.source))
+        source, destination = sources.get(move.source), destinations.get(move.destination)
+        if source is None:
+            result.errors.append(f'{_where(move)}: {label} {move.source} not found')
+        elif destination is None:
+            result.errors.append(f'{_where(move)}: {target_label} {move.destination} not found')
+        else:
+            return source, destination
+        return None, None
+
+    officer_moves = []
+    for move in by_kind['officer']:
+        officer, branch = resolve(move, officers, branches, 'officer', 'active branch')
+        if officer is None:
+            continue
+        assignment = getattr(officer, 'officer_assignment', None)
+        current = assignment.branch if assignment else 'Unassigned'
+        if current.lower() == branch.name.lower():
+            result.skipped.append(f'{_where(move)}: {_name(officer)} is already in {branch.name}')
+        else:
+            officer_moves.append((officer, current, branch.name))
+    new_branch = {officer.pk: branch for officer, _, branch in officer_moves}
+
+    for move in by_kind['group']:
+        group, officer = resolve(move, groups, officers, 'group', 'loan officer')
+        if group is None:
+            continue
+        if not group.is_active:
+            result.errors.append(f'{_where(move)}: group {group.name} is not active')
+        elif not officer.is_active:
+            result.errors.append(f'{_where(move)}: {_name(officer)} is not active')
+        elif group.assigned_officer_id == officer.pk:
+            result.skipped.append(f'{_where(move)}: {group.name} is already managed by {_name(officer)}')
+        else:
+            assignment = getattr(officer, 'officer_assignment', None)
+            branch = new_branch.get(officer.pk) or (assignment.branch if assignment else None)
+            result.groups.append((group, group.assigned_officer, officer, branch))
+
+    client_moves = []
+    for move in by_kind['client']:
+        client, group = resolve(move, borrowers, groups, 'client', 'group')
+        if group is None:
+            continue
+        if not group.is_active:
+            result.errors.append(f'{_where(move)}: group {group.name} is not active')
+        else:
+            client_moves.append((move, client, group))
+
+    moved_group_ids = [group.pk for group, _, _, _ in result.groups]
+    memberships = list(
+        GroupMembership.objects.filter(
+            Q(borrower_id__in=[client.pk for _, client, _ in client_moves])
+            | Q(group_id__in=moved_group_ids, is_active=True)
+        ).order_by('-joined_date', '-pk').values(
+            'pk', 'borrower_id', 'group_id', 'group__name', 'is_active', 'borrower__assigned_officer_id',
+        )
+    )
+    current_group, existing = {}, {}
+    for row in memberships:
+        if row['is_active']:
+            current_group.setdefault(row['borrower_id'], BorrowerGroup(pk=row['group_id'], name=row['group__name']))
+        existing[row['borrower_id'], row['group_id']] = row
+
+    incoming = Counter()
+    for move, client, group in client_moves:
+        row = existing.get((client.pk, group.pk))
+        if row and row['is_active']:
+            result.skipped.append(f'{_where(move)}: {_name(client)} is already in {group.name}')
+            continue
+        if not row:
+            incoming[group.pk] += 1
+        result.clients.append((client, current_group.get(client.pk), group, row['pk'] if row else None))
+    for group_id, count in incoming.items():
+        group = groups[str(group_id)]
+        if group.max_members and group.members_total + count > group.max_members:
+            result.errors.append(
+                f'group {group.name} would have {group.members_total + count} members (max {group.max_members})'
+            )
+
+    # Which officer every affected client ends up with.
+    officer_of = {group.pk: officer.pk for group, _, officer, _ in result.groups}
+    final, previous = {}, {}
+    for row in memberships:
+        if row['group_id'] in officer_of and row['is_active']:
+            final[row['borrower_id']] = officer_of[row['group_id']]
+            previous[row['borrower_id']] = row['borrower__assigned_officer_id']
+    for client, _, group, _ in result.clients:
+        final[client.pk] = officer_of.get(group.pk, group.assigned_officer_id)
+        previous[client.pk] = client.assigned_officer_id
+    result.reassigned = {
+        client_id: (previous[client_id], officer_id)
+        for client_id, officer_id in final.items()
+        if officer_id and officer_id != previous[client_id]
+    }
+
+    group_delta, client_delta = Counter(), Counter()
+    for group, old, new, _ in result.groups:
+        group_delta[new.pk] += 1
+        if old:
+            group_delta[old.pk] -= 1
+    for old, new in result.reassigned.values():
+        client_delta[new] += 1
+        if old:
+            client_delta[old] -= 1
+    receiving = [pk for pk in set(group_delta) | set(client_delta) if group_delta[pk] > 0 or client_delta[pk] > 0]
+    if receiving:
+        defaults = {name: OfficerAssignment._meta.get_field(name).default for name in ('max_groups', 'max_clients')}
+        loads = User.objects.filter(pk__in=receiving).annotate(
+            active_groups=_count(BorrowerGroup.objects.filter(is_active=True), 'assigned_officer'),
+            active_clients=_count(User.objects.filter(role='borrower', is_active=True), 'assigned_officer'),
+        ).values(
+            'pk', 'username', 'first_name', 'last_name', 'active_groups', 'active_clients',
+            'officer_assignment__max_groups', 'officer_assignment__max_clients',
+            'officer_assignment__is_accepting_assignments',
+        ).order_by('username')
+        for row in loads:
+            name = f'{row["first_name"]} {row["last_name"]}'.strip() or row['username']
+            load = {
+                'officer': name,
+                'groups': row['active_groups'],
+                'groups_after': row['active_groups'] + group_delta[row['pk']],
+                'max_groups': row['officer_assignment__max_groups'] or defaults['max_groups'],
+                'clients': row['active_clients'],
+                'clients_after': row['active_clients'] + client_delta[row['pk']],
+                'max_clients': row['officer_assignment__max_clients'] or defaults['max_clients'],
+            }
+            result.capacity.append(load)
+            if row['officer_assignment__is_accepting_assignments'] is False:
+                result.errors.append(f'{name} is not accepting assignments')
+            if group_delta[row['pk']] > 0 and load['groups_after'] > load['max_groups']:
+                result.errors.append(f'{name} would manage {load["groups_after"]} groups (max {load["max_groups"]})')
+            if client_delta[row['pk']] > 0 and load['clients_after'] > load['max_clients']:
+                result.errors.append(f'{name} would have {load["clients_after"]} clients (max {load["max_clients"]})')
+
+    if officer_moves:
+        staying = defaultdict(list)
+        for row in (
+            BorrowerGroup.objects.filter(assigned_officer__in=[officer for officer, _, _ in officer_moves], is_active=True)
+            .exclude(pk__in=moved_group_ids).order_by('pk').values('pk', 'assigned_officer_id')
+        ):
+            staying[row['assigned_officer_id']].append(row['pk'])
+        result.officers = [(officer, old, new, staying[officer.pk]) for officer, old, new in officer_moves]
+
+    if transfer_loans and final:
+        for loan in (
+            Loan.objects.filter(borrower_id__in=list(final)).exclude(status__in=CLOSED_LOAN_STATUSES)
+            .order_by('pk').values('pk', 'application_number', 'borrower_id', 'loan_officer_id')
+        ):
+            officer_id = final[loan['borrower_id']]
+            if officer_id and loan['loan_officer_id'] != officer_id:
+                result.loans.setdefault(officer_id, []).append((loan['pk'], loan['application_number'], loan['borrower_id']))
+    return result
+
+
+def _affected_officers(transfer):
+    """
+    Ids of the officers whose dashboards a transfer changes, read before
+    it is applied: both sides of every group move, reassignment and loan
+    transfer, the officers of the groups clients leave or join, and the
+    officers changing branch.
+    """
+    from loans.models import Loan
+
+    from .models import BorrowerGroup
+
+    officer_ids = {officer.pk for officer, _, _, _ in transfer.officers}
+    for _, old, new, _ in transfer.groups:
+        officer_ids.update((old.pk if old else None, new.pk))
+    for old, new in transfer.reassigned.values():
+        officer_ids.update((old, new))
+    officer_ids.update(transfer.loans)
+    officer_ids.update(group.assigned_officer_id for _, _, group, _ in transfer.clients)
+    left = [old.pk for _, old, _, _ in transfer.clients if old]
+    loan_ids = [loan_id for loans in transfer.loans.values() for loan_id, _, _ in loans]
+    if left:
+        officer_ids.update(BorrowerGroup.objects.filter(pk__in=left).values_list('assigned_officer_id', flat=True))
+    if loan_ids:
+        officer_ids.update(Loan.objects.filter(pk__in=loan_ids).values_list('loan_officer_id', flat=True))
+    officer_ids.discard(None)
+    return officer_ids
+
+
+def apply(transfer, performed_by=None, reason=''):
+    """
+    Carry out a valid TransferPlan in one transaction; returns the counts
+    from its report. Raises TransferError if the plan has errors.
+    """
+    from accounts.models import User
+    from accounts.user_cache import invalidate_user
+    from dashboard.officer_snapshot import invalidate_officer_dashboard
+    from loans.models import Loan
+    from search.documents import index_groups
+
+    from .models import (
+        AdminAuditLog, BorrowerGroup, ClientAssignmentAuditLog, ClientTransferLog, GroupMembership,
+        OfficerAssignment, OfficerTransferLog,
+    )
+
+    if transfer.errors:
+        raise TransferError(transfer.errors)
+    now = timezone.now()
+    audit = []
+    officer_names = {
+        officer.pk: _name(officer)
+        for officer in [new for _, _, new, _ in transfer.groups] + [group.assigned_officer for _, _, group, _ in transfer.clients]
+        if officer
+    }
+
+    with transaction.atomic():
+        officer_ids = _affected_officers(transfer)
+        by_branch = defaultdict(list)
+        for officer, _, branch, _ in transfer.officers:
+            by_branch[branch].append(officer.pk)
+        for branch, officer_ids in by_branch.items():
+            OfficerAssignment.objects.filter(officer_id__in=officer_ids).update(branch=branch, updated_at=now)
+            BorrowerGroup.objects.filter(assigned_officer_id__in=officer_ids, is_active=True).exclude(
+                pk__in=[group.pk for group, _, _, _ in transfer.groups],
+            ).update(branch=branch, updated_at=now)
+        OfficerAssignment.objects.bulk_create([
+            OfficerAssignment(officer=officer, branch=branch)
+            for officer, _, branch, _ in transfer.officers
+            if getattr(officer, 'officer_assignment', None) is None
+        ])
+        OfficerTransferLog.objects.bulk_create([
+            OfficerTransferLog(
+                officer=officer, previous_branch=old, new_branch=new, transferred_groups=group_ids,
+                reason=reason, performed_by=performed_by,
+            )
+            for officer, old, new, group_ids in transfer.officers
+        ], batch_size=BATCH_SIZE)
+        audit += [
+            AdminAuditLog(
+                admin_user=performed_by, action='officer_transfer', affected_user=officer,
+                description=f'Transferred officer {_name(officer)} from {old} to {new}. {len(group_ids)} group(s) transferred.',
+                old_value=f'branch: {old}', new_value=f'branch: {new}',
+            )
+            for officer, old, new, group_ids in transfer.officers
+        ]
+
+        by_officer = defaultdict(list)
+        for group, _, officer, branch in transfer.groups:
+            by_officer[officer.pk, branch].append(group.pk)
+        for (officer_id, branch), group_ids in by_officer.items():
+            changes = {'assigned_officer_id': officer_id, 'updated_at': now}
+            if branch:
+                changes['branch'] = branch
+            BorrowerGroup.objects.filter(pk__in=group_ids).update(**changes)
+        # Group documents carry the officer's name.
+        if transfer.groups:
+            index_groups([group.pk for group, _, _, _ in transfer.groups])
+        audit += [
+            AdminAuditLog(
+                admin_user=performed_by, action='group_transfer', affected_group=group, affected_user=officer,
+                description=f'Transferred group {group.name} from {_name(old)} to {_name(officer)}',
+                old_value=f'officer: {_name(old)}', new_value=f'officer: {_name(officer)}',
+            )
+            for group, old, officer, _ in transfer.groups
+        ]
+
+        client_ids = [client.pk for client, _, _, _ in transfer.clients]
+        GroupMembership.objects.filter(borrower_id__in=client_ids, is_active=True).update(is_active=False, updated_at=now)
+        GroupMembership.objects.filter(
+            pk__in=[membership for _, _, _, membership in transfer.clients if membership],
+        ).update(is_active=True, updated_at=now)
+        GroupMembership.objects.bulk_create([
+            GroupMembership(borrower=client, group=group, added_by=performed_by)
+            for client, _, group, membership in transfer.clients
+            if not membership
+        ], batch_size=BATCH_SIZE)
+        ClientTransferLog.objects.bulk_create([
+            ClientTransferLog(client=client, previous_group=old, new_group=new, reason=reason, performed_by=performed_by)
+            for client, old, new, _ in transfer.clients
+        ], batch_size=BATCH_SIZE)
+        audit += [
+            AdminAuditLog(
+                admin_user=performed_by, action='client_transfer', affected_user=client, affected_group=new,
+                description=f'Transferred client {_name(client)} from {old.name if old else "no group"} to {new.name}',
+                old_value=f'group: {old.name if old else "none"}', new_value=f'group: {new.name}',
+            )
+            for client, old, new, _ in transfer.clients
+        ]
+
+        by_officer = defaultdict(list)
+        for client_id, (_, officer_id) in transfer.reassigned.items():
+            by_officer[officer_id].append(client_id)
+        for officer_id, ids in by_officer.items():
+            User.objects.filter(pk__in=ids).update(assigned_officer_id=officer_id, updated_at=now)
+        ClientAssignmentAuditLog.objects.bulk_create([
+            ClientAssignmentAuditLog(
+                client_id=client_id, previous_officer_id=old, new_officer_id=new,
+                action='reassign' if old else 'assign', performed_by=performed_by, reason=reason,
+            )
+            for client_id, (old, new) in transfer.reassigned.items()
+        ], batch_size=BATCH_SIZE)
+        invalidate_user(*transfer.reassigned)
+
+        for officer_id, loans in transfer.loans.items():
+            Loan.objects.filter(pk__in=[loan_id for loan_id, _, _ in loans]).update(loan_officer_id=officer_id, updated_at=now)
+            by_client = defaultdict(list)
+            for _, number, client_id in loans:
+                by_client[client_id].append(number)
+            audit += [
+                AdminAuditLog(
+                    admin_user=performed_by, action='loan_transfer_batch', affected_user_id=client_id,
+                    description=f'Transferred {len(numbers)} loan(s) to {officer_names.get(officer_id, "new officer")}',
+                    old_value=f'loans: {numbers}', new_value=f'new_officer: {officer_names.get(officer_id, "unassigned")}',
+                )
+                for client_id, numbers in by_client.items()
+            ]
+
+        AdminAuditLog.objects.bulk_create(audit, batch_size=BATCH_SIZE)
+        transaction.on_commit(lambda: invalidate_officer_dashboard(*officer_ids))
+
+    return {
+        'clients': len(transfer.clients),
+        'groups': len(transfer.groups),
+        'officers': len(transfer.officers),
+        'reassigned': len(transfer.reassigned),
+        'loans': sum(len(loans) for loans in transfer.loans.values()),
+    }
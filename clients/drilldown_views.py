@@ -9,24 +9,7 @@ from django.contrib import messages
 from django.db.models import Count, Q
 from accounts.models import User
 from clients.models import BorrowerGroup, GroupMembership
-
-
-def _annotate_groups(groups):
-    from loans.models import Loan
-    from payments.models import PaymentSchedule
-    for group in groups:
-        borrower_ids = list(
-            group.members.filter(is_active=True).values_list('borrower_id', flat=True)
-        )
-        group.active_loans_count = Loan.objects.filter(
-            borrower_id__in=borrower_ids,
-            status__in=['active', 'disbursed']
-        ).count()
-        group.pending_payments_count = PaymentSchedule.objects.filter(
-            loan__borrower_id__in=borrower_ids,
-            is_paid=False
-        ).count()
-    return groups
+from clients.group_metrics import annotate_group_metrics, annotate_membership_metrics
 
 
 @login_required
@@ -101,14 +84,10 @@ def clients_drilldown_groups(request, officer_id):
             messages.error(request, 'No branch assigned.')
             return redirect('dashboard:dashboard')
 
-    groups = list(BorrowerGroup.objects.filter(
+    groups = annotate_group_metrics(BorrowerGroup.objects.filter(
         assigned_officer=officer,
         is_active=True
-    ).annotate(
-        member_count_db=Count('members', filter=Q(members__is_active=True))
-    ).order_by('name'))
-
-    groups = _annotate_groups(groups)
+    )).order_by('name')
 
     direct_clients = User.objects.filter(
         role='borrower',
@@ -156,24 +135,10 @@ def clients_drilldown_clients(request, group_id):
             messages.error(request, 'No branch assigned.')
             return redirect('dashboard:dashboard')
 
-    from loans.models import Loan
-    from payments.models import PaymentSchedule
-
-    memberships = GroupMembership.objects.filter(
+    memberships = annotate_membership_metrics(GroupMembership.objects.filter(
         group=group,
         is_active=True
-    ).select_related('borrower').order_by('borrower__first_name', 'borrower__last_name')
-
-    # Annotate each membership with loan stats
-    for m in memberships:
-        m.active_loans_count = Loan.objects.filter(
-            borrower=m.borrower,
-            status__in=['active', 'disbursed']
-        ).count()
-        m.pending_payments_count = PaymentSchedule.objects.filter(
-            loan__borrower=m.borrower,
-            is_paid=False
-        ).count()
+    )).select_related('borrower').order_by('borrower__first_name', 'borrower__last_name')
 
     breadcrumbs = []
     if user.role == 'manager':
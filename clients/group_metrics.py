@@ -0,0 +1,95 @@
+"""
+Per-group roll-ups computed in SQL.
+
+annotate_group_metrics() adds correlated subqueries to a BorrowerGroup
+queryset, so a page of groups and all of its member/loan figures come
+back in one statement instead of several queries per group:
+
+    members_total           all memberships
+    members_active          active memberships
+    active_loans_count      active/disbursed loans of active members
+    pending_payments_count  unpaid installments on active members' loans
+    outstanding_balance     balance remaining on active members' active loans
+    total_disbursed         principal of active members' active/completed loans
+
+BorrowerGroup.member_count, active_member_count, get_active_loans_count()
+and get_total_disbursed_amount() use these values when present.
+"""
+
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+LIVE_LOAN_STATUSES = ('active', 'disbursed')
+
+
+def _scalar(queryset, group_by, aggregate, output_field):
+    """Wrap a per-row aggregate as a correlated subquery defaulting to zero."""
+    subquery = (
+        queryset.order_by()
+        .values(group_by)
+        .annotate(value=aggregate)
+        .values('value')
+    )
+    zero = Value(Decimal('0') if isinstance(output_field, DecimalField) else 0)
+    return Coalesce(Subquery(subquery, output_field=output_field), zero, output_field=output_field)
+
+
+def _member_loans(**filters):
+    from loans.models import Loan
+
+    return Loan.objects.filter(
+        borrower__group_memberships__group=OuterRef('pk'),
+        borrower__group_memberships__is_active=True,
+        **filters
+    )
+
+
+def annotate_group_metrics(queryset):
+    """Annotate a BorrowerGroup queryset with member and loan roll-ups."""
+    from payments.models import PaymentSchedule
+    from .models import GroupMembership
+
+    group_key = 'borrower__group_memberships__group'
+    money = DecimalField(max_digits=14, decimal_places=2)
+    members = GroupMembership.objects.filter(group=OuterRef('pk'))
+
+    return queryset.annotate(
+        members_total=_scalar(members, 'group', Count('id'), IntegerField()),
+        members_active=_scalar(members.filter(is_active=True), 'group', Count('id'), IntegerField()),
+        active_loans_count=_scalar(
+            _member_loans(status__in=LIVE_LOAN_STATUSES), group_key, Count('id'), IntegerField()
+        ),
+        pending_payments_count=_scalar(
+            PaymentSchedule.objects.filter(
+                loan__borrower__group_memberships__group=OuterRef('pk'),
+                loan__borrower__group_memberships__is_active=True,
+                is_paid=False,
+            ),
+            'loan__' + group_key, Count('id'), IntegerField()
+        ),
+        outstanding_balance=_scalar(
+            _member_loans(status='active'), group_key, Sum('balance_remaining'), money
+        ),
+        total_disbursed=_scalar(
+            _member_loans(status__in=['active', 'completed']), group_key, Sum('principal_amount'), money
+        ),
+    )
+
+
+def annotate_membership_metrics(queryset):
+    """Annotate a GroupMembership queryset with the member's loan counts."""
+    from loans.models import Loan
+    from payments.models import PaymentSchedule
+
+    return queryset.annotate(
+        active_loans_count=_scalar(
+            Loan.objects.filter(borrower=OuterRef('borrower_id'), status__in=LIVE_LOAN_STATUSES),
+            'borrower', Count('id'), IntegerField()
+        ),
+        pending_payments_count=_scalar(
+            PaymentSchedule.objects.filter(loan__borrower=OuterRef('borrower_id'), is_paid=False),
+            'loan__borrower', Count('id'), IntegerField()
+        ),
+    )
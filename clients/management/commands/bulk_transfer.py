@@ -0,0 +1,91 @@
+"""
+Move many clients, groups and officers at once (branch reorganisations).
+
+Usage:
+    python manage.py bulk_transfer --csv moves.csv --performed-by admin --reason "Split of Main Branch" --dry-run
+    python manage.py bulk_transfer --clients 12,13,alice --to-group "Kabwata B" --performed-by admin --reason "..."
+    python manage.py bulk_transfer --groups "Kabwata A,Kabwata B" --to-officer jbanda --performed-by admin --reason "..."
+    python manage.py bulk_transfer --officers jbanda --to-branch Kabwata --performed-by admin --reason "..."
+
+The CSV has a header row ``type,source,destination`` and one move per row:
+``client,<client>,<group>``, ``group,<group>,<officer>`` or
+``officer,<officer>,<branch>`` (ids or usernames/names). Nothing is
+changed if any move fails validation.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from clients.bulk_transfer import Move, TransferError, apply, plan, read_csv
+
+User = get_user_model()
+
+SELECTIONS = (
+    ('clients', 'to_group', 'client'),
+    ('groups', 'to_officer', 'group'),
+    ('officers', 'to_branch', 'officer'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Transfer clients between groups, groups between officers and officers between branches in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--csv', help='CSV file of moves (columns: type, source, destination)')
+        parser.add_argument('--clients', help='Comma-separated client ids or usernames (with --to-group)')
+        parser.add_argument('--to-group', help='Destination group for --clients')
+        parser.add_argument('--groups', help='Comma-separated group ids or names (with --to-officer)')
+        parser.add_argument('--to-officer', help='Destination loan officer for --groups')
+        parser.add_argument('--officers', help='Comma-separated officer ids or usernames (with --to-branch)')
+        parser.add_argument('--to-branch', help='Destination branch for --officers')
+        parser.add_argument('--reason', required=True, help='Reason recorded on every transfer log')
+        parser.add_argument('--performed-by', help='Username of the admin performing the transfer')
+        parser.add_argument(
+            '--transfer-loans',
+            action='store_true',
+            help='Also move open loans of reassigned clients to their new officer'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without changing anything')
+
+    def handle(self, *args, **options):
+        moves = []
+        if options['csv']:
+            try:
+                with open(options['csv'], newline='', encoding='utf-8-sig') as file:
+                    moves += read_csv(file)
+            except OSError as exc:
+                raise CommandError(f'Cannot read {options["csv"]}: {exc}')
+            except TransferError as exc:
+                raise CommandError(str(exc))
+        for selection, destination, kind in SELECTIONS:
+            if not options[selection]:
+                continue
+            if not options[destination]:
+                raise CommandError(f'--{selection} needs --{destination.replace("_", "-")}')
+            moves += [
+                Move(kind, source.strip(), options[destination])
+                for source in options[selection].split(',') if source.strip()
+            ]
+        if not moves:
+            raise CommandError('Nothing to transfer: give --csv or a selection')
+
+        performed_by = None
+        if options['performed_by']:
+            performed_by = User.objects.filter(username=options['performed_by']).first()
+            if performed_by is None:
+                raise CommandError(f'User {options["performed_by"]} not found')
+
+        transfer = plan(moves, transfer_loans=options['transfer_loans'])
+        for line in transfer.report():
+            self.stdout.write(line)
+        if not transfer.is_valid:
+            raise CommandError(f'{len(transfer.errors)} move(s) failed validation; nothing was changed')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was changed'))
+            return
+
+        counts = apply(transfer, performed_by=performed_by, reason=options['reason'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Transferred {counts["clients"]} client(s), {counts["groups"]} group(s) and '
+            f'{counts["officers"]} officer(s); {counts["reassigned"]} client(s) and '
+            f'{counts["loans"]} loan(s) changed officer'
+        ))
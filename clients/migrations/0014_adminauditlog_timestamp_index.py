@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0013_rename_clients_adm_admin_u_idx_clients_adm_admin_u_b673c4_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminauditlog',
+            index=models.Index(fields=['timestamp'], name='clients_adm_timestamp_idx'),
+        ),
+    ]
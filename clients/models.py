@@ -122,14 +122,22 @@ class BorrowerGroup(models.Model):
         officer_name = self.assigned_officer.full_name if self.assigned_officer else 'Unassigned'
         return f"{self.name} (Officer: {officer_name})"
     
+    # The properties below use the values added by
+    # clients.group_metrics.annotate_group_metrics when the group was loaded
+    # through it, and fall back to a query otherwise.
+
     @property
     def member_count(self):
         """Get current number of members"""
+        if hasattr(self, 'members_total'):
+            return self.members_total
         return self.members.count()
     
     @property
     def active_member_count(self):
         """Get number of active members"""
+        if hasattr(self, 'members_active'):
+            return self.members_active
         return self.members.filter(is_active=True).count()
     
     @property
@@ -145,16 +153,21 @@ class BorrowerGroup(models.Model):
     
     def get_active_loans_count(self):
         """Get count of active loans for group members"""
+        if hasattr(self, 'active_loans_count'):
+            return self.active_loans_count
         from loans.models import Loan
+        from .group_metrics import LIVE_LOAN_STATUSES
         # Get borrowers from group memberships
         borrowers = self.members.filter(is_active=True).values_list('borrower', flat=True)
         return Loan.objects.filter(
             borrower__in=borrowers,
-            status='active'
+            status__in=LIVE_LOAN_STATUSES
         ).count()
     
     def get_total_disbursed_amount(self):
         """Get total amount disbursed to group members"""
+        if hasattr(self, 'total_disbursed'):
+            return self.total_disbursed
         from loans.models import Loan
         from django.db.models import Sum
         
@@ -487,6 +500,8 @@ class AdminAuditLog(models.Model):
             models.Index(fields=['admin_user', '-timestamp']),
             models.Index(fields=['action', '-timestamp']),
             models.Index(fields=['affected_user', '-timestamp']),
+            # Month-by-month retention (common.audit.archive_month)
+            models.Index(fields=['timestamp'], name='clients_adm_timestamp_idx'),
         ]
     
     def __str__(self):
@@ -0,0 +1,174 @@
+"""
+Tests for the bulk transfer engine and the bulk_transfer command.
+"""
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from clients.bulk_transfer import Move, TransferError, apply, plan, read_csv
+from clients.models import (
+    AdminAuditLog, BorrowerGroup, ClientAssignmentAuditLog, ClientTransferLog, GroupMembership, OfficerAssignment,
+    OfficerTransferLog,
+)
+from dashboard.officer_snapshot import _version_key
+from dashboard.tests.factories import (
+    AdminFactory, BorrowerGroupFactory, BranchFactory, GroupMembershipFactory, LoanFactory, OfficerAssignmentFactory,
+)
+from loans.models import Loan
+from search.services import search
+
+
+def _members(group, count):
+    return [GroupMembershipFactory(group=group).borrower for _ in range(count)]
+
+
+@pytest.mark.django_db
+class TestBulkTransfer:
+
+    def test_clients_move_with_their_loans(self):
+        source, dest = BorrowerGroupFactory(), BorrowerGroupFactory()
+        clients = _members(source, 3)
+        loan = LoanFactory(borrower=clients[0], loan_officer=source.assigned_officer)
+        admin = AdminFactory()
+
+        transfer = plan([Move('client', client, dest) for client in clients], transfer_loans=True)
+        counts = apply(transfer, performed_by=admin, reason='Branch split')
+
+        assert counts == {'clients': 3, 'groups': 0, 'officers': 0, 'reassigned': 3, 'loans': 1}
+        assert set(GroupMembership.objects.filter(group=dest, is_active=True).values_list('borrower', flat=True)) == {
+            client.pk for client in clients
+        }
+        assert not GroupMembership.objects.filter(group=source, is_active=True).exists()
+        assert Loan.objects.get(pk=loan.pk).loan_officer == dest.assigned_officer
+        assert ClientTransferLog.objects.filter(previous_group=source, new_group=dest, performed_by=admin).count() == 3
+        assert ClientAssignmentAuditLog.objects.filter(new_officer=dest.assigned_officer).count() == 3
+        assert AdminAuditLog.objects.filter(action='client_transfer').count() == 3
+        assert AdminAuditLog.objects.filter(action='loan_transfer_batch').count() == 1
+
+    def test_inactive_membership_is_reactivated(self):
+        source, dest = BorrowerGroupFactory(), BorrowerGroupFactory()
+        client = _members(source, 1)[0]
+        old = GroupMembershipFactory(borrower=client, group=dest, is_active=False)
+
+        apply(plan([Move('client', client.username, dest.name)]))
+
+        assert GroupMembership.objects.get(pk=old.pk).is_active
+        assert GroupMembership.objects.filter(borrower=client).count() == 2
+
+    def test_group_move_follows_officer_branch(self):
+        group = BorrowerGroupFactory(branch='Old Branch')
+        members = _members(group, 2)
+        assignment = OfficerAssignmentFactory()
+
+        apply(plan([Move('group', group, assignment.officer)]))
+
+        group.refresh_from_db()
+        assert group.assigned_officer == assignment.officer
+        assert group.branch == assignment.branch
+        assert {member.pk for member in assignment.officer.assigned_clients.all()} == {member.pk for member in members}
+        assert AdminAuditLog.objects.filter(action='group_transfer', affected_group=group).exists()
+
+    def test_dashboards_and_search_follow_the_move(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            group, other = BorrowerGroupFactory(), BorrowerGroupFactory()
+            client = _members(group, 1)[0]
+            loan = LoanFactory(borrower=client, loan_officer=group.assigned_officer)
+            assignment = OfficerAssignmentFactory(officer__last_name='Mwansa')
+        officers = [group.assigned_officer, assignment.officer, other.assigned_officer]
+        keys = [_version_key(officer.pk) for officer in officers]
+        versions = cache.get_many(keys)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            apply(plan([Move('group', group, assignment.officer)], transfer_loans=True))
+        assert cache.get_many(keys[:2]) == {key: versions.get(key, 0) + 1 for key in keys[:2]}
+        assert search('mwansa', 'group') == [group.pk]
+        assert Loan.objects.get(pk=loan.pk).loan_officer == assignment.officer
+
+        with django_capture_on_commit_callbacks(execute=True):
+            apply(plan([Move('client', client, other)]))
+        assert cache.get_many(keys) == {
+            keys[0]: versions.get(keys[0], 0) + 1,
+            keys[1]: versions.get(keys[1], 0) + 2,
+            keys[2]: versions.get(keys[2], 0) + 1,
+        }
+
+    def test_officer_move_takes_groups_along(self):
+        assignment = OfficerAssignmentFactory()
+        groups = [BorrowerGroupFactory(assigned_officer=assignment.officer, branch=assignment.branch) for _ in range(2)]
+        branch = BranchFactory()
+
+        apply(plan([Move('officer', assignment.officer, branch.name)]), reason='Branch split')
+
+        assert OfficerAssignment.objects.get(pk=assignment.pk).branch == branch.name
+        assert set(BorrowerGroup.objects.filter(pk__in=[g.pk for g in groups]).values_list('branch', flat=True)) == {
+            branch.name
+        }
+        log = OfficerTransferLog.objects.get(officer=assignment.officer)
+        assert sorted(log.transferred_groups) == sorted(g.pk for g in groups)
+
+    def test_capacity_is_checked_before_anything_changes(self):
+        assignment = OfficerAssignmentFactory(max_groups=2)
+        BorrowerGroupFactory(assigned_officer=assignment.officer)
+        groups = [BorrowerGroupFactory() for _ in range(2)]
+
+        transfer = plan([Move('group', group, assignment.officer) for group in groups])
+
+        assert not transfer.is_valid
+        assert 'would manage 3 groups (max 2)' in transfer.errors[0]
+        with pytest.raises(TransferError):
+            apply(transfer)
+        assert not BorrowerGroup.objects.filter(pk__in=[g.pk for g in groups], assigned_officer=assignment.officer).exists()
+
+    def test_full_group_and_unknown_rows_are_errors(self):
+        dest = BorrowerGroupFactory(max_members=1)
+        _members(dest, 1)
+        client = _members(BorrowerGroupFactory(), 1)[0]
+
+        transfer = plan([Move('client', client, dest), Move('client', 'nobody', dest), Move('team', 'x', 'y')])
+
+        assert len(transfer.errors) == 3
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def run(size):
+            source, dest = BorrowerGroupFactory(), BorrowerGroupFactory(max_members=50)
+            clients = _members(source, size)
+            for client in clients:
+                LoanFactory(borrower=client)
+            with CaptureQueriesContext(connection) as queries:
+                apply(plan([Move('client', client, dest) for client in clients], transfer_loans=True))
+            return len(queries)
+
+        assert run(2) == run(8)
+
+
+@pytest.mark.django_db
+def test_command_dry_run_changes_nothing(tmp_path):
+    source, dest = BorrowerGroupFactory(), BorrowerGroupFactory()
+    clients = _members(source, 2)
+    moves = tmp_path / 'moves.csv'
+    moves.write_text('type,source,destination\n' + ''.join(f'client,{c.username},{dest.name}\n' for c in clients))
+    out = StringIO()
+
+    call_command('bulk_transfer', csv=str(moves), reason='Split', dry_run=True, stdout=out)
+
+    assert 'Clients moving to another group: 2' in out.getvalue()
+    assert not GroupMembership.objects.filter(group=dest).exists()
+
+    call_command('bulk_transfer', csv=str(moves), reason='Split', stdout=StringIO())
+    assert GroupMembership.objects.filter(group=dest, is_active=True).count() == 2
+
+
+@pytest.mark.django_db
+def test_command_rejects_invalid_selection():
+    with pytest.raises(CommandError, match='failed validation'):
+        call_command('bulk_transfer', clients='missing', to_group='nowhere', reason='x', stdout=StringIO())
+
+
+def test_read_csv_requires_columns():
+    with pytest.raises(TransferError):
+        read_csv(StringIO('kind,from,to\nclient,1,2\n'))
@@ -0,0 +1,83 @@
+"""
+Tests for the SQL group roll-ups used by group listings and drilldowns.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from clients.group_metrics import annotate_group_metrics
+from clients.models import BorrowerGroup
+from dashboard.tests.factories import (
+    AdminFactory, BorrowerGroupFactory, GroupMembershipFactory, LoanFactory, PaymentScheduleFactory,
+)
+from loans.models import Loan
+
+
+def _member_with_loan(group, balance='1500.00', is_active=True, unpaid=2):
+    membership = GroupMembershipFactory(group=group, is_active=is_active)
+    loan = LoanFactory(borrower=membership.borrower)
+    Loan.objects.filter(pk=loan.pk).update(balance_remaining=Decimal(balance))
+    for number in range(1, unpaid + 1):
+        PaymentScheduleFactory(
+            loan=loan, installment_number=number, due_date=date.today() + timedelta(days=7 * number),
+        )
+    return membership
+
+
+@pytest.mark.django_db
+class TestGroupMetrics:
+
+    def test_roll_up(self):
+        group = BorrowerGroupFactory()
+        _member_with_loan(group, '1500.00')
+        _member_with_loan(group, '500.00')
+        _member_with_loan(group, '900.00', is_active=False)
+        empty = BorrowerGroupFactory()
+
+        groups = annotate_group_metrics(BorrowerGroup.objects.all()).in_bulk()
+
+        rolled_up = groups[group.pk]
+        assert (rolled_up.members_total, rolled_up.members_active) == (3, 2)
+        assert rolled_up.active_loans_count == 2
+        assert rolled_up.pending_payments_count == 4
+        assert rolled_up.outstanding_balance == Decimal('2000.00')
+        assert rolled_up.total_disbursed == Decimal('4000.00')
+        assert (groups[empty.pk].members_total, groups[empty.pk].outstanding_balance) == (0, 0)
+
+    def test_model_helpers_use_annotations(self):
+        group = BorrowerGroupFactory()
+        _member_with_loan(group)
+        annotated = annotate_group_metrics(BorrowerGroup.objects.filter(pk=group.pk)).get()
+
+        with CaptureQueriesContext(connection) as ctx:
+            values = (
+                annotated.member_count, annotated.active_member_count,
+                annotated.get_active_loans_count(), annotated.get_total_disbursed_amount(),
+            )
+        assert len(ctx.captured_queries) == 0
+        assert values == (group.member_count, group.active_member_count,
+                          group.get_active_loans_count(), group.get_total_disbursed_amount())
+
+    def test_group_list_queries_do_not_grow_with_groups(self, client):
+        client.force_login(AdminFactory())
+
+        def run():
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(reverse('clients:group_list'))
+            assert response.status_code == 200
+            return len(ctx.captured_queries), response
+
+        _member_with_loan(BorrowerGroupFactory())
+        run()  # warm the cached user
+        small, _ = run()
+        for _ in range(4):
+            _member_with_loan(BorrowerGroupFactory(), '250.00')
+        large, response = run()
+
+        assert large == small
+        assert response.context['total_groups'] == 5
+        assert response.context['total_outstanding_balance'] == Decimal('2500.00')
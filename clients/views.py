@@ -28,11 +28,13 @@ class GroupListView(LoginRequiredMixin, ListView):
         return super().dispatch(request, *args, **kwargs)
     
     def get_queryset(self):
-        queryset = BorrowerGroup.objects.annotate(
-            annotated_member_count=Count('members', filter=Q(members__is_active=True)),
+        from .group_metrics import annotate_group_metrics
+        queryset = annotate_group_metrics(
+            BorrowerGroup.objects.select_related('assigned_officer')
+        ).annotate(
             capacity_percentage=Case(
                 When(max_members__isnull=False, max_members__gt=0,
-                     then=Cast(F('annotated_member_count') * 100.0 / F('max_members'), FloatField())),
+                     then=Cast(F('members_active') * 100.0 / F('max_members'), FloatField())),
                 default=0.0,
                 output_field=FloatField()
             )
@@ -66,12 +68,8 @@ class GroupListView(LoginRequiredMixin, ListView):
             queryset = queryset.filter(id=group_filter)
         
         if search_filter:
-            queryset = queryset.filter(
-                Q(name__icontains=search_filter) |
-                Q(description__icontains=search_filter) |
-                Q(assigned_officer__first_name__icontains=search_filter) |
-                Q(assigned_officer__last_name__icontains=search_filter)
-            )
+            from search.services import filter_ids
+            queryset = queryset.filter(id__in=filter_ids(search_filter, 'group'))
         
         if status_filter:
             queryset = queryset.filter(is_active=(status_filter == 'active'))
@@ -103,8 +101,12 @@ class GroupListView(LoginRequiredMixin, ListView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['total_groups'] = self.get_queryset().count()
-        context['active_groups'] = self.get_queryset().filter(is_active=True).count()
+        totals = self.object_list.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+        )
+        context['total_groups'] = totals['total']
+        context['active_groups'] = totals['active']
         context['current_sort'] = self.request.GET.get('sort', '-capacity_percentage')
         context['branch_filter'] = self.request.GET.get('branch', '')
         context['officer_filter'] = self.request.GET.get('officer', '')
@@ -142,19 +144,10 @@ class GroupListView(LoginRequiredMixin, ListView):
                 is_active=True
             ).order_by('name')
         
-        # Compute outstanding balance per group
-        from loans.models import Loan
-        from django.db.models import Sum
-        groups_qs = context['groups']
-        total_outstanding = 0
-        for group in groups_qs:
-            member_ids = group.members.filter(is_active=True).values_list('borrower_id', flat=True)
-            group.outstanding_balance = Loan.objects.filter(
-                borrower_id__in=member_ids,
-                status='active'
-            ).aggregate(t=Sum('balance_remaining'))['t'] or 0
-            total_outstanding += group.outstanding_balance
-        context['total_outstanding_balance'] = total_outstanding
+        # Outstanding balances come from annotate_group_metrics
+        context['total_outstanding_balance'] = sum(
+            group.outstanding_balance for group in context['groups']
+        )
         
         return context
 
@@ -175,7 +168,11 @@ class GroupDetailView(LoginRequiredMixin, DetailView):
         return super().dispatch(request, *args, **kwargs)
     
     def get_queryset(self):
-        queryset = BorrowerGroup.objects.all()
+        # Member counts are annotated so the template's member_count / active_member_count don't query
+        queryset = BorrowerGroup.objects.select_related('assigned_officer').annotate(
+            members_total=Count('members', distinct=True),
+            members_active=Count('members', filter=Q(members__is_active=True), distinct=True),
+        )
         
         # Loan officers only see their assigned groups
         if self.request.user.role == 'loan_officer':
@@ -185,11 +182,11 @@ class GroupDetailView(LoginRequiredMixin, DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        group = self.get_object()
+        group = self.object
         
         # Get active members
-        context['members'] = group.members.filter(is_active=True).select_related('borrower')
-        context['inactive_members'] = group.members.filter(is_active=False).select_related('borrower')
+        context['members'] = list(group.members.filter(is_active=True).select_related('borrower'))
+        context['inactive_members'] = list(group.members.filter(is_active=False).select_related('borrower'))
         
         # Get available borrowers (not in this group) — only for officers/admins who can add members
         if self.request.user.role in ['admin', 'loan_officer']:
@@ -214,8 +211,9 @@ class GroupDetailView(LoginRequiredMixin, DetailView):
                     group_memberships__group=group,
                     group_memberships__is_active=True
                 )
+            context['available_borrowers'] = list(context['available_borrowers'])
         else:
-            context['available_borrowers'] = User.objects.none()
+            context['available_borrowers'] = []
         context['can_modify_members'] = self.request.user.role in ['manager', 'loan_officer']
         
         # Get recent actual payments grouped by borrower
@@ -232,9 +230,9 @@ class GroupDetailView(LoginRequiredMixin, DetailView):
         ).count()
 
         # Get recent loans for group members
-        context['group_members_loans'] = Loan.objects.filter(
+        context['group_members_loans'] = list(Loan.objects.filter(
             borrower__in=member_borrowers
-        ).select_related('borrower').order_by('-created_at')[:10]
+        ).select_related('borrower').order_by('-created_at')[:10])
 
         # Group payments by borrower: total paid, count, last payment date
         from collections import defaultdict
@@ -872,10 +870,11 @@ class OfficerWorkloadDetailView(LoginRequiredMixin, DetailView):
         context['assignment'] = assignment
         
         # Get groups and clients
-        context['groups'] = BorrowerGroup.objects.filter(
+        from .group_metrics import annotate_group_metrics
+        context['groups'] = annotate_group_metrics(BorrowerGroup.objects.filter(
             assigned_officer=officer,
             is_active=True
-        ).order_by('name')
+        )).order_by('name')
         
         context['clients'] = User.objects.filter(
             role='borrower',
@@ -1529,7 +1528,8 @@ class TransferMemberView(LoginRequiredMixin, View):
     def get(self, request, pk, membership_id):
         group = get_object_or_404(BorrowerGroup, pk=pk)
         membership = get_object_or_404(GroupMembership, pk=membership_id, group=group)
-        dest_groups = BorrowerGroup.objects.filter(is_active=True).exclude(pk=group.pk)
+        from .group_metrics import annotate_group_metrics
+        dest_groups = annotate_group_metrics(BorrowerGroup.objects.filter(is_active=True).exclude(pk=group.pk))
         return render(request, 'clients/transfer_member.html', {
             'group': group,
             'membership': membership,
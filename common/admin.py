@@ -2,8 +2,10 @@ from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
 
+from palmcash.admin_site import PalmCashAdminSite
 
-class CustomAdminSite(admin.AdminSite):
+
+class CustomAdminSite(PalmCashAdminSite):
     """Custom admin site with back link to main system"""
     
     site_header = "Palm Cash Administration"
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'common'
+
+    def ready(self):
+        from . import commit_batch, fragment_cache
+
+        commit_batch.connect_signals()
+        fragment_cache.connect_signals()
@@ -0,0 +1,226 @@
+"""
+Buffered audit log writes.
+
+record() queues a UserActivityLog / AdminAuditLog row instead of inserting
+it inline. The row is queued through transaction.on_commit, so an action
+that rolls back leaves no audit row and a committed one always gets one.
+
+Inside buffered() (which AuditBufferMiddleware wraps around every request)
+queued rows are held until the block ends and then written with one
+bulk_create per model, after the response has been produced. Outside a
+buffer (management commands, the shell) they are written as soon as they
+are queued. With settings.AUDIT_LOG_WRITER = 'background' flushed rows go
+to a writer thread instead, which batches inserts across requests; rows
+still queued when the process is killed are lost.
+
+archive_month() implements retention: rows of a month older than
+AUDIT_LOG_RETENTION_MONTHS are moved, in batches, into a per-month archive
+table (<table>_YYYY_MM) so the live tables only hold recent activity.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+_buffer = ContextVar('palmcash_audit_buffer', default=None)
+
+
+def record(model, **fields):
+    """Queue one ``model(**fields)`` audit row; returns the unsaved instance."""
+    entry = model(**fields)
+    transaction.on_commit(lambda: _queue(entry))
+    return entry
+
+
+def _queue(entry):
+    entries = _buffer.get()
+    if entries is None:
+        write([entry])
+    else:
+        entries.append(entry)
+
+
+@contextmanager
+def buffered():
+    """Hold queued audit rows until the block exits, then write them together."""
+    entries = []
+    token = _buffer.set(entries)
+    try:
+        yield entries
+    finally:
+        _buffer.reset(token)
+        write(entries)
+
+
+def write(entries):
+    """Insert ``entries`` now, or hand them to the background writer."""
+    if not entries:
+        return
+    if getattr(settings, 'AUDIT_LOG_WRITER', 'request') == 'background':
+        background_writer().put(list(entries))
+    else:
+        _insert(entries)
+
+
+def _insert(entries):
+    by_model = defaultdict(list)
+    for entry in entries:
+        by_model[type(entry)].append(entry)
+    for model, rows in by_model.items():
+        try:
+            model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        except Exception:
+            # The audited action has already committed; never fail the request over its log.
+            logger.exception('Could not write %d %s row(s)', len(rows), model.__name__)
+
+
+class BackgroundWriter(threading.Thread):
+    """Daemon thread that inserts queued audit rows in batches."""
+
+    def __init__(self):
+        super().__init__(name='audit-log-writer', daemon=True)
+        self.pid = os.getpid()
+        self.queue = queue.Queue()
+        atexit.register(self.drain)
+
+    def put(self, entries):
+        self.queue.put(entries)
+
+    def _take(self, block):
+        """Up to BATCH_SIZE rows from as many queued flushes as are waiting."""
+        entries, taken = [], 0
+        try:
+            entries.extend(self.queue.get(block=block))
+            taken += 1
+            while len(entries) < BATCH_SIZE:
+                entries.extend(self.queue.get_nowait())
+                taken += 1
+        except queue.Empty:
+            pass
+        return entries, taken
+
+    def _write(self, entries, taken):
+        try:
+            close_old_connections()
+            _insert(entries)
+        finally:
+            for _ in range(taken):
+                self.queue.task_done()
+
+    def run(self):
+        while True:
+            self._write(*self._take(block=True))
+
+    def drain(self):
+        """Write whatever is still queued (at interpreter exit)."""
+        while True:
+            entries, taken = self._take(block=False)
+            if not taken:
+                return
+            self._write(entries, taken)
+
+    def wait(self):
+        """Block until every queued row has been written."""
+        self.queue.join()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def background_writer():
+    """The process's writer thread, started on first use (and again after a fork)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = BackgroundWriter()
+            _writer.start()
+        return _writer
+
+
+def retention_cutoff(months, today=None):
+    """First day of the oldest month kept when retaining ``months`` months (including this one)."""
+    today = today or timezone.localdate()
+    index = today.year * 12 + today.month - 1 - (months - 1)
+    return today.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def _start_of(day):
+    start = datetime.combine(day, time.min)
+    return timezone.make_aware(start) if settings.USE_TZ else start
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def archive_table(model, month):
+    """Create (if needed) and return the archive table name for ``month``."""
+    live = model._meta.db_table
+    name = f'{live}_{month:%Y_%m}'
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {quote(name)} LIKE {quote(live)}')
+        else:
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {quote(name)} AS SELECT * FROM {quote(live)} WHERE 0')
+    return name
+
+
+def archive_month(model, month, archive=True, batch_size=5000):
+    """
+    Move ``model`` rows timestamped in ``month`` (a first-of-month date) out
+    of the live table, copying them into archive_table() first unless
+    ``archive`` is False. Returns the number of rows moved.
+    """
+    rows = model.objects.filter(
+        timestamp__gte=_start_of(month), timestamp__lt=_start_of(_next_month(month)),
+    ).order_by('pk')
+    quote = connection.ops.quote_name
+    target = archive_table(model, month) if archive else None
+    moved = 0
+    while True:
+        ids = list(rows.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return moved
+        with transaction.atomic():
+            if target:
+                placeholders = ', '.join(['%s'] * len(ids))
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'INSERT INTO {quote(target)} SELECT * FROM {quote(model._meta.db_table)} '
+                        f'WHERE {quote(model._meta.pk.column)} IN ({placeholders})',
+                        ids,
+                    )
+            model.objects.filter(pk__in=ids).delete()
+        moved += len(ids)
+
+
+def expired_months(model, months, today=None):
+    """First-of-month dates of every month in ``model`` older than the retention window."""
+    cutoff = retention_cutoff(months, today)
+    oldest = (
+        model.objects.filter(timestamp__lt=_start_of(cutoff))
+        .order_by('timestamp').values_list('timestamp', flat=True).first()
+    )
+    if oldest is None:
+        return []
+    month = (timezone.localtime(oldest) if settings.USE_TZ else oldest).date().replace(day=1)
+    result = []
+    while month < cutoff:
+        result.append(month)
+        month = _next_month(month)
+    return result
@@ -0,0 +1,78 @@
+"""
+Deferred, de-duplicated work triggered by model signals.
+
+A CommitBatch collects items (ids, (model, pk) pairs, ...) as rows change
+and hands them to its flush function once:
+
+- inside a transaction, when the transaction commits; a rolled back
+  transaction (or savepoint) discards its items with the on_commit
+  callback that carries them;
+- outside a transaction while a request is being served, when the request
+  finishes, so a view that saves many rows in autocommit mode still
+  flushes once;
+- anywhere else (management commands, the shell), immediately.
+
+connect_signals() (called from CommonConfig.ready()) hooks the request
+scope up to request_started and request_finished.
+"""
+import threading
+
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+
+_request = threading.local()
+
+
+class _Pending:
+    """The on_commit callback of one batch in one transaction; holds its items."""
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.items = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        self.batch.flush(self.items)
+
+
+class CommitBatch:
+
+    def __init__(self, flush):
+        self.flush = flush
+
+    def _pending(self, connection):
+        # The batch's callback is found in the connection's own on_commit list,
+        # which Django clears on rollback, so no stale state can outlive one.
+        for _, callback, _ in reversed(connection.run_on_commit):
+            if isinstance(callback, _Pending) and callback.batch is self and not callback.done:
+                return callback
+        pending = _Pending(self)
+        transaction.on_commit(pending)
+        return pending
+
+    def add(self, *items):
+        connection = transaction.get_connection()
+        if connection.in_atomic_block:
+            self._pending(connection).items.update(items)
+            return
+        batches = getattr(_request, 'batches', None)
+        if batches is not None:
+            batches.setdefault(self, set()).update(items)
+            return
+        self.flush(set(items))
+
+
+def _request_started(**kwargs):
+    _request.batches = {}
+
+
+def _request_finished(**kwargs):
+    batches, _request.batches = getattr(_request, 'batches', None), None
+    for batch, items in (batches or {}).items():
+        batch.flush(items)
+
+
+def connect_signals():
+    request_started.connect(_request_started, dispatch_uid='commit_batch:request_started')
+    request_finished.connect(_request_finished, dispatch_uid='commit_batch:request_finished')
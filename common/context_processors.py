@@ -1,19 +1,49 @@
 """
 Context processors for common functionality
+
+They run on every render that has a request, AJAX partials included, so
+values that need a query are LazyValues: the template engine calls it the first time a
+template looks the variable up, and a partial that never mentions it
+costs nothing.
 """
+from common.template_guard import allow_queries
+
+
+class LazyValue:
+    """
+    A context value computed on first use and remembered for the rest of the
+    render. Its queries are expected, so they are allowed under
+    TEMPLATE_QUERY_GUARD.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.evaluated = False
+        self.value = None
+
+    def __call__(self):
+        if not self.evaluated:
+            with allow_queries():
+                self.value = self.func()
+            self.evaluated = True
+        return self.value
+
+
+def _unread_count(user):
+    from notifications.models import Notification
+    return Notification.objects.filter(
+        recipient=user,
+        status__in=['pending', 'sent', 'delivered']
+    ).count()
+
 
 def unread_notifications(request):
     """
     Add unread notifications count to template context
     """
     if request.user.is_authenticated:
-        from notifications.models import Notification
-        count = Notification.objects.filter(
-            recipient=request.user,
-            status__in=['pending', 'sent', 'delivered']
-        ).count()
         return {
-            'unread_notifications_count': count,
+            'unread_notifications_count': LazyValue(lambda: _unread_count(request.user)),
         }
     return {
         'unread_notifications_count': 0,
@@ -22,8 +52,26 @@ def unread_notifications(request):
 
 def acting_as_officer(request):
     """
-    Add acting_as_officer to template context
+    Add acting_as_officer to template context (already loaded by
+    ActingAsOfficerMiddleware, so nothing to defer)
     """
     return {
         'acting_as_officer': getattr(request, 'acting_as_officer', None),
     }
+
+
+def _can_view_payroll(user):
+    if user.is_authenticated and (user.is_superuser or user.role in ('loan_officer', 'manager')):
+        return user.has_perm('payroll.can_view_payroll')
+    return False
+
+
+def navigation(request):
+    """
+    Per-user navigation flags. The role links in base_tailwind.html are a
+    cached fragment shared by everyone with the same role; links that depend
+    on the user's own permissions are decided here instead.
+    """
+    return {
+        'can_view_payroll': LazyValue(lambda: _can_view_payroll(request.user)),
+    }
@@ -0,0 +1,141 @@
+"""
+Versioned template fragment caching.
+
+{% cachefragment %} (common.templatetags.fragment_cache) caches a rendered
+block under a key made of the fragment name, the template release and the
+tag's vary-on values. A model instance among those values stands for its
+version(): label, primary key, updated_at and a stamp. bump() advances the
+stamp when a row the fragment shows changes without touching the
+instance's own updated_at (a loan's payments, a group's memberships);
+DEPENDENCIES lists those relations and CommonConfig.ready() connects them.
+Stamps are bumped on commit (see common.commit_batch), so a request that
+read the old rows cannot cache them under the new stamp.
+
+Writes made with QuerySet.update() send no signals, so every fragment also
+expires after settings.TEMPLATE_FRAGMENT_TIMEOUT seconds (default 600).
+The release is computed once per process from the template files' mtimes
+(or set with settings.TEMPLATE_FRAGMENT_RELEASE), so a deploy never serves
+fragments rendered by old templates; runserver recomputes it when a
+template is edited.
+"""
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+
+from .commit_batch import CommitBatch
+
+KEY_PREFIX = 'fragment'
+
+# model label -> foreign keys to the instances whose fragments show its rows
+DEPENDENCIES = {
+    'payments.Payment': ('loan',),
+    'payments.PaymentSchedule': ('loan',),
+    'loans.SecurityDeposit': ('loan',),
+    'loans.Loan': ('borrower',),
+    'clients.GroupMembership': ('group', 'borrower'),
+}
+
+
+def _stamp_key(label, pk):
+    return f'{KEY_PREFIX}:stamp:{label}:{pk}'
+
+
+def bump(model, pk):
+    """Expire the fragments that vary on the ``model`` instance with ``pk``."""
+    key = _stamp_key(model._meta.label_lower, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def versions(instances):
+    """One version string per instance, with a single cache round trip."""
+    keys = [_stamp_key(instance._meta.label_lower, instance.pk) for instance in instances]
+    stamps = cache.get_many(keys)
+    result = []
+    for instance, key in zip(instances, keys):
+        updated_at = getattr(instance, 'updated_at', None)
+        changed = updated_at.isoformat() if updated_at else ''
+        result.append(f'{instance._meta.label_lower}.{instance.pk}.{changed}.{stamps.get(key, 0)}')
+    return result
+
+
+def version(instance):
+    return versions([instance])[0]
+
+
+def _template_files():
+    from django.template import engines
+    from django.template.utils import get_app_template_dirs
+
+    directories = [*get_app_template_dirs('templates')]
+    for engine in engines.all():
+        directories += getattr(engine, 'template_dirs', ())
+    for directory in directories:
+        yield from Path(directory).rglob('*.html')
+
+
+@lru_cache(maxsize=None)
+def _release_from_files():
+    latest = max((path.stat().st_mtime_ns for path in _template_files()), default=0)
+    return hashlib.md5(str(latest).encode()).hexdigest()[:8]
+
+
+def release():
+    configured = getattr(settings, 'TEMPLATE_FRAGMENT_RELEASE', '')
+    if configured:
+        return configured
+    return _release_from_files()
+
+
+def _template_changed(sender, file_path, **kwargs):
+    # runserver's autoreloader: templates edited in place get a new release.
+    if file_path.suffix == '.html':
+        _release_from_files.cache_clear()
+
+
+def fragment_key(name, vary_on=()):
+    """The cache key of fragment ``name`` for the given vary-on values."""
+    vary_on = list(vary_on)
+    positions = [index for index, value in enumerate(vary_on) if isinstance(value, Model)]
+    for index, stamp in zip(positions, versions([vary_on[index] for index in positions])):
+        vary_on[index] = stamp
+    digest = hashlib.md5(':'.join(str(value) for value in vary_on).encode()).hexdigest()
+    return f'{KEY_PREFIX}:{release()}:{name}:{digest}'
+
+
+def timeout():
+    return getattr(settings, 'TEMPLATE_FRAGMENT_TIMEOUT', 600)
+
+
+def _bump_all(items):
+    for model, pk in items:
+        bump(model, pk)
+
+
+_bump_batch = CommitBatch(_bump_all)
+
+
+def _bump_parents(sender, instance, fields, **kwargs):
+    for name in fields:
+        pk = getattr(instance, f'{name}_id', None)
+        if pk is not None:
+            _bump_batch.add((sender._meta.get_field(name).related_model, pk))
+
+
+def connect_signals():
+    from django.utils.autoreload import file_changed
+
+    file_changed.connect(_template_changed, dispatch_uid='fragment_cache:template_changed')
+    for label, fields in DEPENDENCIES.items():
+        model = apps.get_model(label)
+        handler = lambda sender, instance, fields=fields, **kwargs: _bump_parents(sender, instance, fields)
+        post_save.connect(handler, sender=model, weak=False, dispatch_uid=f'fragment_cache:{label}:save')
+        post_delete.connect(handler, sender=model, weak=False, dispatch_uid=f'fragment_cache:{label}:delete')
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.models import UserActivityLog
+from clients.models import AdminAuditLog
+from common.audit import archive_month, expired_months
+
+
+class Command(BaseCommand):
+    help = (
+        'Move UserActivityLog and AdminAuditLog rows older than the retention window into '
+        'per-month archive tables (<table>_YYYY_MM), in batches (run monthly)'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months',
+            type=int,
+            default=settings.AUDIT_LOG_RETENTION_MONTHS,
+            help='Months kept in the live tables, including the current one '
+                 '(default: AUDIT_LOG_RETENTION_MONTHS)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows moved per transaction (default: 5000)'
+        )
+        parser.add_argument(
+            '--no-archive',
+            action='store_true',
+            help='Delete expired rows instead of copying them to archive tables'
+        )
+
+    def handle(self, *args, **options):
+        keep = max(1, options['keep_months'])
+        for model in (UserActivityLog, AdminAuditLog):
+            for month in expired_months(model, keep):
+                moved = archive_month(
+                    model, month, archive=not options['no_archive'], batch_size=options['batch_size'],
+                )
+                verb = 'Deleted' if options['no_archive'] else 'Archived'
+                self.stdout.write(f'{verb} {moved} {model.__name__} row(s) from {month:%B %Y}')
+        self.stdout.write(self.style.SUCCESS(f'Audit logs now hold the last {keep} month(s)'))
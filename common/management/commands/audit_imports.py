@@ -0,0 +1,85 @@
+"""
+Audit what a fresh PalmCash process imports at startup and how long it takes.
+
+Runs the target under ``python -X importtime`` and reports the wall time of
+the process, the total import time, the slowest imports (cumulative and
+self) and, for every heavy library (PDF, image, report and task-queue
+packages, pkg_resources) that got loaded, the chain of modules that
+imported it.
+
+With --enforce the command fails when the wall time is over the target's
+budget in settings.STARTUP_BUDGET_MS, so CI can hold the line.
+
+Usage:
+    python manage.py audit_imports
+    python manage.py audit_imports worker --top 25
+    python manage.py audit_imports dashboard.views
+    python manage.py audit_imports check --enforce
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from palmcash.import_audit import audit, heavy_imports, slowest
+
+
+class Command(BaseCommand):
+    help = 'Report the import time of a fresh process (manage.py check, a worker or a module)'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'target',
+            nargs='?',
+            default='check',
+            help='"check", "worker" or a module name (default: check)'
+        )
+        parser.add_argument('--top', type=int, default=15, help='Imports to list (default: 15)')
+        parser.add_argument(
+            '--enforce',
+            action='store_true',
+            help='Fail if the wall time exceeds the budget in settings.STARTUP_BUDGET_MS'
+        )
+
+    def handle(self, *args, **options):
+        target = options['target']
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'palmcash.settings'),
+            TEMPLATE_PRECOMPILE='0',
+        )
+        try:
+            result = audit(target, env=env)
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        records = result.records
+        top_level = sum(record.cumulative_us for record in records if record.depth == 0)
+        self.stdout.write(f'{target}: {result.wall * 1000:.0f}ms wall, {top_level / 1000:.0f}ms importing '
+                          f'{len(records)} modules')
+
+        for title, key in (('Slowest imports (cumulative)', 'cumulative_us'), ('Slowest modules (self)', 'self_us')):
+            self.stdout.write(f'\n{title}')
+            for record in slowest(records, options['top'], key):
+                self.stdout.write(f'{getattr(record, key) / 1000:>9.1f}ms  {record.name}')
+
+        heavy = heavy_imports(records)
+        self.stdout.write('\nHeavy libraries loaded at startup')
+        if not heavy:
+            self.stdout.write('  none')
+        for record, chain in heavy:
+            self.stdout.write(self.style.WARNING(
+                f'{record.cumulative_us / 1000:>9.1f}ms  {record.name}  <- {" <- ".join(reversed(chain)) or "(top level)"}'
+            ))
+
+        budget = getattr(settings, 'STARTUP_BUDGET_MS', {}).get(target)
+        if budget is None:
+            return
+        if result.wall * 1000 > budget:
+            message = f'{target} took {result.wall * 1000:.0f}ms, over its {budget}ms budget'
+            if options['enforce']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Within the {budget}ms budget'))
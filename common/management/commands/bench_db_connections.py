@@ -0,0 +1,97 @@
+"""
+Benchmark per-request database connection overhead.
+
+Simulates requests the way Django serves them (request_started, one query,
+request_finished, which closes obsolete connections) and reports the time
+per request and the number of connections opened under:
+
+    per-request  CONN_MAX_AGE = 0, a new connection for every request
+    persistent   CONN_MAX_AGE = 600 (with the configured health checks)
+    pooled       the palmcash.db.mysql_pooled backend (only when enabled)
+
+Usage:
+    python manage.py bench_db_connections
+    python manage.py bench_db_connections --requests 500 --thread-per-request
+"""
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request database connection overhead with and without connection reuse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Simulated requests per mode (default: 200)')
+        parser.add_argument('--database', default='default', help='Database alias to benchmark')
+        parser.add_argument(
+            '--thread-per-request',
+            action='store_true',
+            help='Serve every request on a new thread, like thread-churning worker models'
+        )
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        settings_dict = connections.settings[alias]
+        pooled = settings_dict['ENGINE'] == 'palmcash.db.mysql_pooled'
+        original = {key: settings_dict.get(key) for key in ('CONN_MAX_AGE', 'POOL')}
+
+        modes = [('per-request', 0, 0), ('persistent', 600, None)]
+        if pooled:
+            modes.append(('pooled', 0, None))
+
+        self.stdout.write(f'{"mode":<12} {"requests":>8} {"connects":>8} {"mean ms":>9} {"p95 ms":>9}')
+        try:
+            for label, max_age, pool_size in modes:
+                settings_dict['CONN_MAX_AGE'] = max_age
+                if pooled:
+                    pool = connections[alias].pool
+                    pool.clear()
+                    pool.size = pool_size if pool_size is not None else int(original['POOL']['SIZE'])
+                connections[alias].close()
+                timings, connects = self._run(alias, options['requests'], options['thread_per_request'])
+                timings.sort()
+                mean = sum(timings) / len(timings)
+                p95 = timings[int(len(timings) * 0.95) - 1]
+                self.stdout.write(f'{label:<12} {len(timings):>8} {connects:>8} {mean:>9.2f} {p95:>9.2f}')
+        finally:
+            settings_dict.update(original)
+            connections[alias].close()
+            if pooled:
+                connections[alias].pool.size = int(original['POOL']['SIZE'])
+
+    def _run(self, alias, requests, thread_per_request):
+        timings = []
+        connects = []
+
+        def count(sender, connection, **kwargs):
+            if connection.alias == alias:
+                connects.append(1)
+
+        def serve():
+            started = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            try:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            finally:
+                request_finished.send(sender=self.__class__)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        connection_created.connect(count)
+        try:
+            for _ in range(max(1, requests)):
+                if thread_per_request:
+                    worker = threading.Thread(target=serve)
+                    worker.start()
+                    worker.join()
+                else:
+                    serve()
+        finally:
+            connection_created.disconnect(count)
+        return timings, len(connects)
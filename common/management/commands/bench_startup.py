@@ -0,0 +1,94 @@
+"""
+Benchmark worker startup: time to the first rendered dashboard.
+
+Each run starts a fresh Python process that loads the WSGI application the
+way a worker does (palmcash.wsgi, including template precompilation when
+enabled), logs in as --username and requests the dashboard twice. Runs are
+made with TEMPLATE_PRECOMPILE off and on and the report shows, per mode:
+
+    process      wall time from spawning the process to its exit
+    setup        django.setup()
+    worker       importing palmcash.wsgi (application + precompilation)
+    first        the first dashboard request
+    second       the same request again, with everything warm
+
+The requests run against the configured database and cache; logging in
+creates one session per run.
+
+Usage:
+    python manage.py bench_startup --username manager1
+    python manage.py bench_startup --username officer1 --url /dashboard/loan-officer/ --runs 5
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PHASES = ('process', 'setup', 'worker', 'first', 'second')
+
+
+def measure(username, url):
+    """Run in the child process: start a worker, render ``url`` twice and print the timings as JSON."""
+    started = time.perf_counter()
+    import django
+    django.setup()
+    timings = {'setup': time.perf_counter() - started}
+
+    mark = time.perf_counter()
+    import palmcash.wsgi  # noqa: F401
+    timings['worker'] = time.perf_counter() - mark
+
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    client = Client(HTTP_HOST='localhost')
+    client.force_login(get_user_model().objects.get(username=username))
+    for phase in ('first', 'second'):
+        mark = time.perf_counter()
+        response = client.get(url, secure=True)
+        timings[phase] = time.perf_counter() - mark
+        if response.status_code != 200:
+            raise SystemExit(f'{url} returned {response.status_code}')
+    print(json.dumps(timings))
+
+
+class Command(BaseCommand):
+    help = 'Measure the time from worker start to the first rendered dashboard, with and without template precompilation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='User to log in as (their role picks the dashboard)')
+        parser.add_argument('--url', default='/dashboard/', help='Page to render (default: /dashboard/)')
+        parser.add_argument('--runs', type=int, default=3, help='Fresh processes per mode (default: 3)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{options["runs"]} fresh process(es) per mode, rendering {options["url"]}')
+        self.stdout.write(f'{"mode":<14}' + ''.join(f'{phase:>10}' for phase in PHASES))
+        for precompile in (False, True):
+            runs = [self._run(options['username'], options['url'], precompile) for _ in range(options['runs'])]
+            medians = [statistics.median(run[phase] for run in runs) * 1000 for phase in PHASES]
+            label = 'precompiled' if precompile else 'on demand'
+            self.stdout.write(f'{label:<14}' + ''.join(f'{value:>8.0f}ms' for value in medians))
+
+    def _run(self, username, url, precompile):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'palmcash.settings'),
+            TEMPLATE_PRECOMPILE='1' if precompile else '0',
+        )
+        code = f'from {__name__} import measure; measure({username!r}, {url!r})'
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - started
+        if result.returncode != 0:
+            raise CommandError(f'Benchmark process failed:\n{result.stderr or result.stdout}')
+        # settings.py prints diagnostics of its own; the timings are the last line.
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        timings['process'] = elapsed
+        return timings
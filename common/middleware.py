@@ -1,8 +1,10 @@
 """
-Middleware for handling "Act As Officer" functionality
+Middleware for handling "Act As Officer" functionality and buffered audit logging
 """
 from django.utils.deprecation import MiddlewareMixin
 
+from .audit import buffered
+
 
 class ActAsOfficerMiddleware(MiddlewareMixin):
     """
@@ -73,3 +75,17 @@ class ActAsOfficerMiddleware(MiddlewareMixin):
                         del request.session['acting_as_officer_name']
         
         return None
+
+
+class AuditBufferMiddleware:
+    """
+    Collect the audit rows recorded while handling a request (common.audit)
+    and write them together once the response is ready.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered():
+            return self.get_response(request)
@@ -0,0 +1,86 @@
+"""
+Template query guard.
+
+With settings.TEMPLATE_QUERY_GUARD on, rendering a template through the
+DjangoTemplates backend below raises TemplateQueryError on the first
+database query, so lazy lookups made from a template (a model property
+that counts related rows, a foreign key the view did not select) fail
+loudly in tests instead of turning into N+1 queries in production.
+
+Context processors run before the guard is armed, and allow_queries()
+lifts it for code that is expected to query while a template renders.
+Meant for development and tests; leave it off in production.
+"""
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+from django.template.context import make_context
+
+
+class TemplateQueryError(RuntimeError):
+    """A template ran a database query while the guard was on."""
+
+
+_allowed = ContextVar('palmcash_template_queries_allowed', default=False)
+
+
+def is_enabled():
+    return getattr(settings, 'TEMPLATE_QUERY_GUARD', False)
+
+
+@contextmanager
+def allow_queries():
+    """Let the enclosed code query the database while a template renders."""
+    token = _allowed.set(True)
+    try:
+        yield
+    finally:
+        _allowed.reset(token)
+
+
+@contextmanager
+def guard(template_name):
+    """Raise TemplateQueryError if the enclosed code queries the database."""
+    def block(execute, sql, params, many, context):
+        if _allowed.get():
+            return execute(sql, params, many, context)
+        raise TemplateQueryError(f'{template_name} queried the database while rendering: {sql}')
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(block))
+        yield
+
+
+class Template(django_backend.Template):
+
+    def render(self, context=None, request=None):
+        if not is_enabled():
+            return super().render(context, request)
+        context = make_context(context, request, autoescape=self.backend.engine.autoescape)
+        template = self.template
+        try:
+            # Template.render(), with the guard armed after bind_template() has run the context processors.
+            with context.render_context.push_state(template), context.bind_template(template):
+                context.template_name = template.name
+                with guard(template.name):
+                    return template._render(context)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self.backend)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """The stock backend, with TEMPLATE_QUERY_GUARD support."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
@@ -0,0 +1,62 @@
+"""
+Template precompilation at worker start.
+
+With the cached loader (see TEMPLATES in settings) a template is parsed on
+the first request that renders it and kept for the life of the worker.
+precompile() does that parsing up front for every template of the project
+(the templates directory and the project's own apps, not Django's admin),
+so the first requests after a deploy or a worker restart are not the slow
+ones. wsgi.py and asgi.py call warm_up() when settings.TEMPLATE_PRECOMPILE
+is on.
+"""
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+
+def template_names():
+    """Names of the project's templates, relative to their template directory."""
+    from django.template.utils import get_app_template_dirs
+
+    base_dir = Path(settings.BASE_DIR).resolve()
+    directories = [Path(directory) for directory in get_app_template_dirs('templates')]
+    directories = [directory for directory in directories if base_dir in directory.resolve().parents]
+    for engine in engines.all():
+        directories += [Path(directory) for directory in getattr(engine, 'template_dirs', ())]
+    names = set()
+    for directory in directories:
+        names.update(path.relative_to(directory).as_posix() for path in directory.rglob('*.html'))
+    return sorted(names)
+
+
+def precompile(names=None):
+    """
+    Compile ``names`` (default: template_names()) into each engine's cached
+    loader. Returns (compiled, failed, seconds); a template that does not
+    compile is logged and left for its first request to report.
+    """
+    started = time.perf_counter()
+    compiled = failed = 0
+    for name in template_names() if names is None else names:
+        for engine in engines.all():
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as exc:
+                failed += 1
+                logger.warning('Template %s does not compile: %s', name, exc)
+            else:
+                compiled += 1
+    return compiled, failed, time.perf_counter() - started
+
+
+def warm_up():
+    """precompile() if settings.TEMPLATE_PRECOMPILE is on; called once per worker."""
+    if not getattr(settings, 'TEMPLATE_PRECOMPILE', False):
+        return
+    compiled, failed, seconds = precompile()
+    logger.info('Precompiled %d templates in %.2fs (%d failed)', compiled, seconds, failed)
@@ -0,0 +1,45 @@
+"""
+{% cachefragment %}: versioned template fragment caching (see common.fragment_cache).
+
+    {% load fragment_cache %}
+    {% cachefragment 'loan_summary' loan %}...{% endcachefragment %}
+    {% cachefragment 'nav_links' user.role user.is_superuser %}...{% endcachefragment %}
+
+The first argument names the fragment; the rest are vary-on values. Model
+instances vary on their version, so the fragment is re-rendered after the
+object (or a row listed in fragment_cache.DEPENDENCIES) changes.
+"""
+from django import template
+from django.core.cache import cache
+
+from common import fragment_cache
+
+register = template.Library()
+
+
+class CacheFragmentNode(template.Node):
+
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        key = fragment_cache.fragment_key(
+            self.name.resolve(context), [value.resolve(context) for value in self.vary_on],
+        )
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, fragment_cache.timeout())
+        return content
+
+
+@register.tag
+def cachefragment(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return CacheFragmentNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]])
@@ -0,0 +1,176 @@
+"""
+Tests for template fragment caching, commit batches, the template query
+guard and template startup (lazy context processors, precompilation).
+"""
+import json
+from decimal import Decimal
+
+import pytest
+from django.db import connection, transaction
+from django.template import engines
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from common.commit_batch import CommitBatch
+from common.management.commands.bench_startup import measure
+from common.template_guard import TemplateQueryError, allow_queries
+from common.template_warmup import precompile, template_names
+from dashboard.tests.factories import (
+    BorrowerFactory, BorrowerGroupFactory, GroupMembershipFactory, LoanFactory, ManagerFactory,
+    PaymentScheduleFactory,
+)
+from loans.models import Loan
+
+
+def _render(source, **context):
+    return engines['django'].from_string(source).render(context)
+
+
+@pytest.mark.django_db
+class TestTemplateQueryGuard:
+
+    def test_lazy_lookup_raises(self, no_template_queries):
+        group = BorrowerGroupFactory()
+        group = type(group).objects.get(pk=group.pk)
+
+        with pytest.raises(TemplateQueryError):
+            _render('{{ group.assigned_officer.username }}', group=group)
+
+    def test_allow_queries_lifts_the_guard(self, no_template_queries):
+        group = BorrowerGroupFactory()
+        group = type(group).objects.get(pk=group.pk)
+
+        with allow_queries():
+            assert _render('{{ group.assigned_officer.username }}', group=group) == group.assigned_officer.username
+
+    def test_off_by_default(self):
+        group = BorrowerGroupFactory()
+        group = type(group).objects.get(pk=group.pk)
+
+        assert _render('{{ group.assigned_officer.username }}', group=group) == group.assigned_officer.username
+
+
+@pytest.mark.django_db
+def test_heavy_pages_render_without_queries(client, no_template_queries):
+    group = BorrowerGroupFactory()
+    memberships = [GroupMembershipFactory(group=group) for _ in range(3)]
+    loans = [LoanFactory(borrower=membership.borrower) for membership in memberships]
+    for loan in loans:
+        for number in range(1, 4):
+            PaymentScheduleFactory(loan=loan, installment_number=number)
+
+    assert client.get(reverse('home')).status_code == 200
+    client.force_login(ManagerFactory())
+    for url in (
+        reverse('clients:group_detail', args=[group.pk]),
+        reverse('accounts:user_detail', args=[memberships[0].borrower.pk]),
+        reverse('loans:detail', args=[loans[0].pk]),
+    ):
+        assert client.get(url).status_code == 200
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCommitBatch:
+
+    def test_items_are_flushed_once_on_commit(self):
+        flushed = []
+        batch = CommitBatch(lambda items: flushed.append(sorted(items)))
+
+        with transaction.atomic():
+            batch.add(1, 2)
+            with transaction.atomic():
+                batch.add(2, 3)
+            assert flushed == []
+
+        assert flushed == [[1, 2, 3]]
+
+    def test_rollbacks_discard_their_items(self):
+        flushed = []
+        batch = CommitBatch(lambda items: flushed.append(sorted(items)))
+        atomic = transaction.atomic()
+
+        with pytest.raises(ValueError), atomic:
+            batch.add(1)
+            raise ValueError
+        with atomic:
+            with pytest.raises(ValueError), transaction.atomic():
+                batch.add(2)
+                raise ValueError
+            batch.add(3)
+
+        assert flushed == [[3]]
+
+
+@pytest.mark.django_db
+class TestFragmentCache:
+    source = "{% load fragment_cache %}{% cachefragment 'balance' loan %}{{ loan.balance_remaining }}{% endcachefragment %}"
+
+    def test_fragment_is_reused_until_the_object_changes(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            loan = LoanFactory()
+        loan.balance_remaining = Decimal('100.00')
+        assert _render(self.source, loan=loan) == '100.00'
+
+        loan.balance_remaining = Decimal('50.00')
+        assert _render(self.source, loan=loan) == '100.00'
+
+        with django_capture_on_commit_callbacks(execute=True):
+            PaymentScheduleFactory(loan=loan)
+        assert _render(self.source, loan=loan) == '50.00'
+
+    def test_saving_the_object_changes_its_version(self):
+        loan = LoanFactory()
+        first = _render(self.source, loan=loan)
+
+        loan.balance_remaining = Decimal('75.00')
+        loan.save()
+        assert _render(self.source, loan=Loan.objects.get(pk=loan.pk)) == '75.00' != first
+
+    def test_navigation_is_cached_per_role(self, client):
+        client.force_login(BorrowerFactory())
+        assert 'My Loans' in client.get(reverse('accounts:profile')).content.decode()
+
+        client.force_login(ManagerFactory())
+        page = client.get(reverse('accounts:profile')).content.decode()
+        assert 'My Loans' not in page
+        assert 'Securities' in page
+
+
+@pytest.mark.django_db
+class TestTemplateStartup:
+
+    def _request(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        request.acting_as_officer = None
+        return request
+
+    def test_context_processors_query_only_when_used(self, no_template_queries):
+        request = self._request(ManagerFactory())
+
+        with CaptureQueriesContext(connection) as queries:
+            assert engines['django'].from_string('partial').render({}, request) == 'partial'
+        assert len(queries) == 0
+
+        with CaptureQueriesContext(connection) as queries:
+            source = '{{ unread_notifications_count }}{{ unread_notifications_count }}'
+            assert engines['django'].from_string(source).render({}, request) == '00'
+        assert len(queries) == 1
+
+    def test_precompile_fills_the_cached_loader(self):
+        loader = engines['django'].engine.template_loaders[0]
+        loader.reset()
+
+        compiled, failed, _ = precompile(['base_tailwind.html', 'dashboard/manager_enhanced.html'])
+
+        assert (compiled, failed) == (2, 0)
+        assert {'base_tailwind.html', 'dashboard/manager_enhanced.html'} <= set(loader.get_template_cache)
+        assert 'base_tailwind.html' in template_names()
+        assert 'admin/actions.html' not in template_names()
+
+    def test_startup_benchmark_renders_the_dashboard(self, capsys):
+        measure(ManagerFactory().username, '/dashboard/')
+
+        timings = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+        assert set(timings) == {'setup', 'worker', 'first', 'second'}
@@ -0,0 +1,16 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cached dashboard snapshots and users must not leak between tests (primary keys are reused)."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def no_template_queries(settings):
+    """Make templates that query the database while rendering fail the test (common.template_guard)."""
+    settings.TEMPLATE_QUERY_GUARD = True
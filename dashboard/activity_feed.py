@@ -0,0 +1,414 @@
+"""
+Financial activity feed for the performance reports.
+
+activity_union() projects the five activity sources onto one row shape
+and combines them with UNION ALL:
+
+    (activity_date, kind_rank, row_id, client_ref, officer_ref, target_ref,
+     reference, amount, expected, flag)
+
+    disbursement   loans disbursed in the range           principal
+    collection     non-zero payment collections           collected amount
+    default        default collections                    amount paid
+    completion     loans completed (by updated_at)        total (or principal)
+    fee            applications with a processing fee     processing fee
+
+``target_ref`` is the loan (or application, for fees) the row links to and
+``flag`` is is_partial for collections and processing_fee_verified for
+fees. Everything that scales with the data happens in SQL: ordering and
+keyset pagination (activity_page, client_page), per-client totals and the
+summary figures (one GROUP BY each). Only the rows shown are decorated with
+names, in one extra query.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import BooleanField, DecimalField, F, IntegerField, Q, Value
+from django.db.models.functions import Coalesce, NullIf, TruncDate
+
+from palmcash.db.routers import compile_for_read
+
+# kind: (rank, label, colour). Rank breaks ties between kinds on the same day.
+KINDS = {
+    'disbursement': (1, 'Disbursement', 'blue'),
+    'collection': (2, 'Collection', 'green'),
+    'default': (3, 'Default Collection', 'red'),
+    'completion': (4, 'Loan Completion', 'teal'),
+    'fee': (5, 'Processing Fee', 'violet'),
+}
+KIND_BY_RANK = {rank: kind for kind, (rank, _label, _colour) in KINDS.items()}
+
+COLUMNS = (
+    'activity_date', 'kind_rank', 'row_id', 'client_ref', 'officer_ref', 'target_ref',
+    'reference', 'amount', 'expected', 'flag',
+)
+
+CENT = Decimal('0.01')
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _money(value):
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def _as_date(value):
+    """Dates read back from raw SQL arrive as strings on SQLite."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def activity_filters(params, today=None):
+    """
+    Report filters from a GET dict: date_from/date_to (defaulting to this
+    month so far), activity_type, search, branch and officer.
+    """
+    today = today or date.today()
+    try:
+        date_from = datetime.strptime(params.get('date_from', today.replace(day=1).isoformat()), '%Y-%m-%d').date()
+        date_to = datetime.strptime(params.get('date_to', today.isoformat()), '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        date_from, date_to = today.replace(day=1), today
+    activity_type = params.get('activity_type', '')
+    return {
+        'date_from': date_from,
+        'date_to': date_to,
+        'activity_type': activity_type if activity_type in KINDS else '',
+        'search': params.get('search', '').strip(),
+        'branch': params.get('branch', ''),
+        'officer': params.get('officer', ''),
+    }
+
+
+def _sources(filters, search_loan_ids):
+    """{kind: queryset projected onto COLUMNS} for every activity source."""
+    from loans.models import Loan, LoanApplication
+    from payments.models import DefaultCollection, PaymentCollection
+
+    date_from, date_to = filters['date_from'], filters['date_to']
+
+    def scoped(queryset, officer_path, loan_path):
+        if filters['branch']:
+            queryset = queryset.filter(**{f'{officer_path}__officer_assignment__branch__iexact': filters['branch']})
+        if filters['officer']:
+            queryset = queryset.filter(**{f'{officer_path}_id': filters['officer']})
+        if search_loan_ids is not None and loan_path:
+            queryset = queryset.filter(**{f'{loan_path}__in': search_loan_ids})
+        return queryset
+
+    def project(queryset, kind, activity_date, client, officer, reference, amount,
+                expected=None, flag=None):
+        return queryset.order_by().annotate(
+            activity_date=activity_date,
+            kind_rank=Value(KINDS[kind][0], output_field=IntegerField()),
+            row_id=F('pk'),
+            client_ref=F(client),
+            officer_ref=F(officer),
+            target_ref=F('pk') if kind in ('disbursement', 'completion', 'fee') else F('loan_id'),
+            reference=F(reference),
+            amount=amount,
+            expected=expected if expected is not None else Value(Decimal('0'), output_field=MONEY),
+            flag=flag if flag is not None else Value(False, output_field=BooleanField()),
+        )
+
+    loans = Loan.objects.all()
+    disbursed = TruncDate('disbursement_date')
+    completed = TruncDate('updated_at')
+    fees = LoanApplication.objects.filter(
+        processing_fee__gt=0, created_at__date__gte=date_from, created_at__date__lte=date_to,
+    )
+    if filters['search']:
+        search = filters['search']
+        fees = fees.filter(
+            Q(borrower__first_name__icontains=search) | Q(borrower__last_name__icontains=search)
+            | Q(application_number__icontains=search)
+        )
+    return {
+        'disbursement': project(
+            scoped(loans.filter(disbursement_date__date__gte=date_from, disbursement_date__date__lte=date_to),
+                   'loan_officer', 'pk'),
+            'disbursement', disbursed, 'borrower_id', 'loan_officer_id', 'application_number',
+            F('principal_amount'),
+        ),
+        'collection': project(
+            scoped(PaymentCollection.objects.filter(
+                collection_date__gte=date_from, collection_date__lte=date_to, collected_amount__gt=0,
+            ), 'loan__loan_officer', 'loan_id'),
+            'collection', F('collection_date'), 'loan__borrower_id', 'loan__loan_officer_id',
+            'loan__application_number', F('collected_amount'),
+            expected=F('expected_amount'), flag=F('is_partial'),
+        ),
+        'default': project(
+            scoped(DefaultCollection.objects.filter(
+                collection_date__gte=date_from, collection_date__lte=date_to,
+            ), 'loan__loan_officer', 'loan_id'),
+            'default', F('collection_date'), 'loan__borrower_id', 'loan__loan_officer_id',
+            'loan__application_number', F('amount_paid'),
+        ),
+        'completion': project(
+            scoped(loans.filter(
+                status='completed', updated_at__date__gte=date_from, updated_at__date__lte=date_to,
+            ), 'loan_officer', 'pk'),
+            'completion', completed, 'borrower_id', 'loan_officer_id', 'application_number',
+            Coalesce(NullIf('total_amount', Value(0, output_field=MONEY)), 'principal_amount', output_field=MONEY),
+        ),
+        'fee': project(
+            scoped(fees, 'loan_officer', None),
+            'fee', TruncDate('created_at'), 'borrower_id', 'loan_officer_id', 'application_number',
+            F('processing_fee'), flag=F('processing_fee_verified'),
+        ),
+    }
+
+
+def activity_union(filters, summary=False, after=None, client_ids=None):
+    """
+    The filtered activities as one UNION ALL queryset of COLUMNS.
+
+    ``summary`` ignores the activity type and search filters (the report's
+    headline figures cover the whole period). ``after`` is a keyset
+    position (activity_date, kind_rank, row_id): only rows that sort after
+    it are kept, with the condition pushed into each source. ``client_ids``
+    keeps only those borrowers' activities.
+    """
+    search_loan_ids = None
+    if filters['search'] and not summary:
+        from search.services import filter_ids
+        search_loan_ids = filter_ids(filters['search'], 'loan')
+
+    sources = _sources(filters, search_loan_ids)
+    if not summary and filters['activity_type']:
+        sources = {filters['activity_type']: sources[filters['activity_type']]}
+    elif summary:
+        # The headline figures are search-independent, fees included.
+        sources.pop('fee')
+
+    querysets = []
+    for kind, queryset in sources.items():
+        if after is not None:
+            after_date, after_rank, after_id = after
+            rank = KINDS[kind][0]
+            if rank > after_rank:
+                queryset = queryset.filter(activity_date__lte=after_date)
+            elif rank < after_rank:
+                queryset = queryset.filter(activity_date__lt=after_date)
+            else:
+                queryset = queryset.filter(
+                    Q(activity_date__lt=after_date) | Q(activity_date=after_date, row_id__lt=after_id)
+                )
+        if client_ids is not None:
+            queryset = queryset.filter(client_ref__in=client_ids)
+        querysets.append(queryset.values_list(*COLUMNS))
+    first, *rest = querysets
+    return first.union(*rest, all=True) if rest else first
+
+
+def _row(values):
+    row = dict(zip(COLUMNS, values))
+    row['activity_date'] = _as_date(row['activity_date'])
+    row['amount'] = _money(row['amount'])
+    row['kind'] = KIND_BY_RANK[row['kind_rank']]
+    return row
+
+
+def encode_cursor(row):
+    return f"{row['activity_date'].isoformat()}.{row['kind_rank']}.{row['row_id']}"
+
+
+def decode_cursor(value):
+    try:
+        day, rank, row_id = value.split('.')
+        return date.fromisoformat(day), int(rank), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def activity_page(filters, after=None, limit=100, client_ids=None):
+    """
+    Up to ``limit`` activities sorted newest first (then by kind and row),
+    starting after the keyset position ``after``. Returns (rows, next
+    position or None).
+    """
+    union = activity_union(filters, after=after, client_ids=client_ids)
+    ordered = union.order_by('-activity_date', 'kind_rank', '-row_id')
+    if limit is not None:
+        ordered = ordered[:limit + 1]
+    rows = [_row(values) for values in ordered]
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, (last['activity_date'], last['kind_rank'], last['row_id'])
+    return rows, None
+
+
+def iter_activities(filters, chunk_size=2000):
+    """Every filtered activity in feed order, fetched one keyset page at a time."""
+    after = None
+    while True:
+        rows, after = activity_page(filters, after=after, limit=chunk_size)
+        yield from rows
+        if after is None:
+            return
+
+
+def _fetch(alias, sql, params):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def client_page(filters, after=None, limit=25):
+    """
+    Per-client totals for the filtered activities, newest client first.
+
+    One GROUP BY over the union, keyset-paginated on (last activity date,
+    client). Returns (rows, next position or None); each row has client_ref,
+    last_date, count and total.
+    """
+    alias, union_sql, params = compile_for_read(activity_union(filters))
+    params = list(params)
+    having = ''
+    if after is not None:
+        having = 'HAVING MAX(u.activity_date) < %s OR (MAX(u.activity_date) = %s AND u.client_ref < %s)'
+        last_date = connections[alias].ops.adapt_datefield_value(after[0])
+        params += [last_date, last_date, after[1]]
+    sql = (
+        f"SELECT u.client_ref, MAX(u.activity_date), COUNT(*), SUM(u.amount) "
+        f"FROM ({union_sql}) u GROUP BY u.client_ref {having} "
+        f"ORDER BY MAX(u.activity_date) DESC, u.client_ref DESC LIMIT %s"
+    )
+    rows = [
+        {'client_ref': client, 'last_date': _as_date(last), 'count': count, 'total': _money(total)}
+        for client, last, count, total in _fetch(alias, sql, params + [limit + 1])
+    ]
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, (rows[-1]['last_date'], rows[-1]['client_ref'])
+    return rows, None
+
+
+def encode_client_cursor(position):
+    return f'{position[0].isoformat()}.{position[1]}'
+
+
+def decode_client_cursor(value):
+    try:
+        day, client = value.split('.')
+        return date.fromisoformat(day), int(client)
+    except (AttributeError, ValueError):
+        return None
+
+
+def feed_totals(filters):
+    """Activity count, amount and client count for the filtered feed, in one query."""
+    alias, union_sql, params = compile_for_read(activity_union(filters))
+    sql = f"SELECT COUNT(*), SUM(u.amount), COUNT(DISTINCT u.client_ref) FROM ({union_sql}) u"
+    count, total, clients = _fetch(alias, sql, params)[0]
+    return {'activity_count': count, 'total_amount': _money(total), 'client_count': clients}
+
+
+def summary(filters):
+    """
+    Headline figures for the whole period, ignoring type and search: one
+    GROUP BY over the union per kind.
+    """
+    alias, union_sql, params = compile_for_read(activity_union(filters, summary=True))
+    sql = (
+        f"SELECT u.kind_rank, COUNT(*), SUM(u.amount), SUM(u.expected) "
+        f"FROM ({union_sql}) u GROUP BY u.kind_rank"
+    )
+    by_kind = {
+        KIND_BY_RANK[rank]: (count, _money(amount), _money(expected))
+        for rank, count, amount, expected in _fetch(alias, sql, params)
+    }
+    empty = (0, Decimal('0.00'), Decimal('0.00'))
+    disbursed = by_kind.get('disbursement', empty)
+    collected = by_kind.get('collection', empty)
+    return {
+        'disbursed_count': disbursed[0],
+        'disbursed_amount': disbursed[1],
+        'total_collected': collected[1],
+        'total_expected': collected[2],
+        'completed_count': by_kind.get('completion', empty)[0],
+        'defaults_collected': by_kind.get('default', empty)[1],
+    }
+
+
+def decorate(rows):
+    """
+    Add the display fields the report templates use (type, colours,
+    client/officer names, branch, links) to activity rows in place, with one
+    user query for all of them.
+    """
+    from accounts.models import User
+
+    user_ids = {row['client_ref'] for row in rows} | {row['officer_ref'] for row in rows if row['officer_ref']}
+    users = User.objects.select_related('officer_assignment').in_bulk(user_ids)
+
+    def branch_of(officer):
+        assignment = getattr(officer, 'officer_assignment', None) if officer else None
+        return assignment.branch if assignment else '—'
+
+    for row in rows:
+        kind = row['kind']
+        _rank, label, colour = KINDS[kind]
+        client = users.get(row['client_ref'])
+        officer = users.get(row['officer_ref'])
+        if kind == 'collection':
+            status, status_colour = ('Partial', 'yellow') if row['flag'] else ('Paid', 'green')
+        elif kind == 'fee':
+            status, status_colour = ('Verified', 'green') if row['flag'] else ('Pending', 'amber')
+        else:
+            status, status_colour = {
+                'disbursement': ('Disbursed', 'blue'),
+                'default': ('Collected', 'red'),
+                'completion': ('Completed', 'teal'),
+            }[kind]
+        row.update({
+            'date': row['activity_date'],
+            'type': label,
+            'type_color': colour,
+            'reference': row['reference'],
+            'reference_url': (
+                f"/loans/applications/{row['target_ref']}/approve/" if kind == 'fee'
+                else f"/loans/{row['target_ref']}/"
+            ),
+            'client': client.get_full_name() if client else '—',
+            'officer': officer.get_full_name() if officer else '—',
+            'branch': branch_of(officer),
+            'status': status,
+            'status_color': status_colour,
+        })
+    return rows
+
+
+def client_groups(filters, after=None, limit=25):
+    """
+    One page of the by-client report: (groups, next position). Each group
+    has the client's name, the officer and branch of their latest activity,
+    their total and all their activities in the range.
+    """
+    page, next_position = client_page(filters, after=after, limit=limit)
+    client_ids = [row['client_ref'] for row in page]
+    items = {client: [] for client in client_ids}
+    if client_ids:
+        rows, _ = activity_page(filters, limit=None, client_ids=client_ids)
+        for row in decorate(rows):
+            items[row['client_ref']].append(row)
+
+    groups = []
+    for row in page:
+        activities = items[row['client_ref']]
+        latest = activities[0] if activities else {}
+        groups.append({
+            'client_ref': row['client_ref'],
+            'client': latest.get('client', '—'),
+            'officer': latest.get('officer', '—'),
+            'branch': latest.get('branch', '—'),
+            'items': activities,
+            'total': row['total'],
+        })
+    return groups, next_position
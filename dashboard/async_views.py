@@ -0,0 +1,351 @@
+"""
+Async report pages: system reports, analytics and the financial summary.
+
+Each page is a set of sections, plain functions that run read-only
+aggregate queries and return a dict of template context. The sections of
+a page do not depend on each other, so the views run them concurrently,
+each in a worker thread (sync_to_async with thread_sensitive=False) with
+its own database connection on the read replica. The page then takes as
+long as its slowest section instead of the sum of all of them.
+settings.ASYNC_REPORT_CONCURRENCY (default 4) caps the sections, and so
+the database connections, a single request runs at once.
+
+The URLs are the same as before. With ``?format=json`` a page streams its
+sections as newline-delimited JSON, one ``{"section": ..., "data": ...}``
+line per section in the order they complete. The views work under WSGI
+too, but the sections only overlap when served by an ASGI server (see
+palmcash/asgi.py).
+"""
+import asyncio
+import json
+from datetime import date, datetime, timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.db.models import Count, Model, Q, Sum
+from django.forms.models import model_to_dict
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.utils import timezone
+
+from accounts.models import User
+from loans.models import Loan
+from palmcash.db.routers import use_replica
+from payments.models import PaymentCollection
+
+
+class ReportEncoder(DjangoJSONEncoder):
+
+    def default(self, o):
+        if isinstance(o, Model):
+            return {'id': o.pk, **model_to_dict(o)}
+        return super().default(o)
+
+
+def _run_section(section, *args):
+    # Runs in a worker thread: give it the replica and clean up its connection
+    # the way request_started/request_finished do for a request thread.
+    close_old_connections()
+    try:
+        with use_replica():
+            return section(*args)
+    finally:
+        close_old_connections()
+
+
+async def _iterate_sections(sections):
+    """Yield (name, data) for each (name, function, args) as it completes."""
+    limit = asyncio.Semaphore(getattr(settings, 'ASYNC_REPORT_CONCURRENCY', 4))
+
+    async def run(name, section, args):
+        async with limit:
+            data = await sync_to_async(_run_section, thread_sensitive=False)(section, *args)
+        return name, data
+
+    for task in asyncio.as_completed([run(*section) for section in sections]):
+        yield await task
+
+
+async def _gather_sections(sections):
+    context = {}
+    async for _, data in _iterate_sections(sections):
+        context.update(data)
+    return context
+
+
+async def _stream_sections(sections):
+    async for name, data in _iterate_sections(sections):
+        yield json.dumps({'section': name, 'data': data}, cls=ReportEncoder) + '\n'
+
+
+def async_role_required(*roles):
+    """login_required plus a role check, for async views (Django 4.2's decorators are sync only)."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            # Loads request.user (session and user queries) on the request thread.
+            authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+            if not authenticated:
+                return redirect_to_login(request.get_full_path())
+            if request.user.role not in roles:
+                return await sync_to_async(render)(request, 'dashboard/access_denied.html')
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def _respond(request, template_name, sections, extra_context=None, finish=None):
+    if request.GET.get('format') == 'json':
+        return StreamingHttpResponse(_stream_sections(sections), content_type='application/x-ndjson')
+    context = await _gather_sections(sections)
+    context.update(extra_context or {})
+    if finish:
+        finish(context)
+    return await sync_to_async(render)(request, template_name, context)
+
+
+# ── System reports ───────────────────────────────────────────────────────────
+
+def _user_activity(since):
+    counts = User.objects.aggregate(
+        total_users=Count('id'),
+        new_users_30d=Count('id', filter=Q(date_joined__gte=since)),
+        active_users_30d=Count('id', filter=Q(last_login__gte=since)),
+        total_logins=Count('id', filter=Q(last_login__isnull=False)),
+    )
+    return {
+        'total_users': counts.pop('total_users'),
+        'user_activity': counts,
+    }
+
+
+def _loan_performance(since):
+    counts = Loan.objects.aggregate(
+        total_loans=Count('id'),
+        applications_30d=Count('id', filter=Q(application_date__gte=since)),
+        approvals_30d=Count('id', filter=Q(approval_date__gte=since, approval_date__isnull=False)),
+    )
+    applications, approvals = counts['applications_30d'], counts['approvals_30d']
+    return {
+        'total_loans': counts['total_loans'],
+        'loan_performance': {
+            'applications_30d': applications,
+            'approvals_30d': approvals,
+            'approval_rate': (approvals / applications * 100) if applications > 0 else 0,
+        },
+    }
+
+
+def _pending_documents():
+    from documents.models import ClientDocument
+    return {'pending_documents': ClientDocument.objects.filter(status='pending').count()}
+
+
+def _system_health(context):
+    context['system_health'] = {
+        'total_users': context.pop('total_users'),
+        'total_loans': context.pop('total_loans'),
+        'pending_documents': context.pop('pending_documents'),
+    }
+
+
+@async_role_required('admin')
+async def system_reports(request):
+    """System Reports View"""
+    thirty_days_ago = timezone.now() - timedelta(days=30)
+    sections = [
+        ('user_activity', _user_activity, (thirty_days_ago,)),
+        ('loan_performance', _loan_performance, (thirty_days_ago,)),
+        ('pending_documents', _pending_documents, ()),
+    ]
+    return await _respond(request, 'dashboard/admin/system_reports.html', sections, finish=_system_health)
+
+
+# ── Analytics ────────────────────────────────────────────────────────────────
+
+LOAN_STATUSES = ['pending', 'approved', 'active', 'completed', 'rejected', 'disbursed']
+
+
+def _loan_status_data():
+    counts = dict(
+        Loan.objects.filter(status__in=LOAN_STATUSES)
+        .order_by().values_list('status').annotate(count=Count('id'))
+    )
+    return {'loan_status_data': [
+        {'status': status, 'count': counts[status]} for status in LOAN_STATUSES if counts.get(status)
+    ]}
+
+
+def _payment_performance():
+    totals = PaymentCollection.objects.aggregate(
+        total_due=Sum('expected_amount'),
+        total_paid=Sum('collected_amount'),
+    )
+    total_due, total_paid = totals['total_due'] or 0, totals['total_paid'] or 0
+    return {'payment_performance': {
+        'total_due': total_due,
+        'total_paid': total_paid,
+        'collection_rate': (total_paid / total_due * 100) if total_due > 0 else 0,
+    }}
+
+
+def _disbursement_months(today):
+    # Month windows for the last 12 months, oldest first.
+    for i in range(11, -1, -1):
+        month_start = (today.replace(day=1) - timedelta(days=i * 30)).replace(day=1)
+        if i == 0:
+            month_end = today
+        else:
+            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        yield month_start, month_end
+
+
+def _monthly_disbursements(today):
+    months = list(_disbursement_months(today))
+    aggregates = {}
+    for index, (month_start, month_end) in enumerate(months):
+        # Loans applied in the month (disbursement_date may be null).
+        in_month = Q(application_date__date__gte=month_start, application_date__date__lte=month_end)
+        aggregates[f'count_{index}'] = Count('id', filter=in_month)
+        aggregates[f'total_{index}'] = Sum('principal_amount', filter=in_month)
+    totals = Loan.objects.filter(status__in=['active', 'completed', 'disbursed', 'approved']).aggregate(**aggregates)
+    return {'monthly_disbursements': [
+        {
+            'month': month_start.strftime('%B %Y'),
+            'count': totals[f'count_{index}'],
+            'total': totals[f'total_{index}'] or 0,
+        }
+        for index, (month_start, _) in enumerate(months) if totals[f'count_{index}']
+    ]}
+
+
+@async_role_required('admin', 'manager')
+async def analytics(request):
+    """Analytics Dashboard"""
+    sections = [
+        ('loan_status_data', _loan_status_data, ()),
+        ('payment_performance', _payment_performance, ()),
+        ('monthly_disbursements', _monthly_disbursements, (date.today(),)),
+    ]
+    return await _respond(request, 'dashboard/analytics.html', sections)
+
+
+# ── Financial summary ────────────────────────────────────────────────────────
+
+def _total(queryset, field, name):
+    return {name: queryset.aggregate(total=Sum(field))['total'] or 0}
+
+
+def _branch_row(branch):
+    from expenses.models import VaultTransaction
+    from loans.vault_services import get_vault_balances
+
+    branch_loans = Loan.objects.filter(
+        Q(loan_officer__officer_assignment__branch=branch.name) |
+        Q(borrower__group_memberships__group__branch=branch.name)
+    ).distinct()
+
+    disbursed = branch_loans.filter(
+        status__in=['active', 'completed']
+    ).aggregate(total=Sum('principal_amount'))['total'] or 0
+
+    repaid = PaymentCollection.objects.filter(
+        loan__loan_officer__officer_assignment__branch=branch.name,
+        status='completed'
+    ).distinct().aggregate(total=Sum('collected_amount'))['total'] or 0
+
+    capital = VaultTransaction.objects.filter(
+        transaction_type='capital_injection',
+        branch=branch.name
+    ).aggregate(total=Sum('amount'))['total'] or 0
+
+    return {f'branch_{branch.pk}': {
+        'branch': branch,
+        'vault_balance': get_vault_balances(branch)['total'],
+        'capital_injected': capital,
+        'disbursed': disbursed,
+        'repaid': repaid,
+        'outstanding': (disbursed or 0) - (repaid or 0),
+        'active_loans': branch_loans.filter(status='active').count(),
+    }}
+
+
+def _capital_history(branch_filter, date_from, date_to):
+    from expenses.models import VaultTransaction
+
+    capital_history = VaultTransaction.objects.filter(transaction_type='capital_injection')
+    if branch_filter:
+        capital_history = capital_history.filter(branch=branch_filter)
+    if date_from:
+        try:
+            capital_history = capital_history.filter(
+                transaction_date__gte=datetime.strptime(date_from, '%Y-%m-%d').date()
+            )
+        except ValueError:
+            pass
+    if date_to:
+        try:
+            capital_history = capital_history.filter(
+                transaction_date__lte=datetime.strptime(date_to, '%Y-%m-%d').date()
+            )
+        except ValueError:
+            pass
+    return {'capital_history': list(
+        capital_history.select_related('recorded_by').order_by('-transaction_date')[:100]
+    )}
+
+
+def _active_branches():
+    from clients.models import Branch
+    with use_replica():
+        return list(Branch.objects.filter(is_active=True))
+
+
+def _financial_totals(context):
+    context['total_outstanding'] = (context['total_disbursed'] or 0) - (context['total_repaid'] or 0)
+    context['branch_rows'] = [context.pop(f'branch_{branch.pk}') for branch in context['branches']]
+
+
+@async_role_required('admin')
+async def financial_summary(request):
+    """System-wide financial summary (admin only)."""
+    from expenses.models import VaultTransaction
+    from loans.models import SecurityDeposit
+    from payments.models import DefaultCollection
+
+    # Get filter parameters
+    branch_filter = request.GET.get('branch', '')
+    date_from = request.GET.get('date_from', '')
+    date_to = request.GET.get('date_to', '')
+
+    branches = await sync_to_async(_active_branches)()
+    sections = [
+        ('total_capital', _total, (
+            VaultTransaction.objects.filter(transaction_type='capital_injection'), 'amount', 'total_capital',
+        )),
+        ('total_disbursed', _total, (
+            Loan.objects.filter(status__in=['active', 'completed']), 'principal_amount', 'total_disbursed',
+        )),
+        ('total_repaid', _total, (
+            PaymentCollection.objects.filter(status='completed'), 'collected_amount', 'total_repaid',
+        )),
+        ('total_security', _total, (
+            SecurityDeposit.objects.filter(is_verified=True), 'paid_amount', 'total_security',
+        )),
+        ('total_default_collections', _total, (
+            DefaultCollection.objects.all(), 'amount_paid', 'total_default_collections',
+        )),
+        ('capital_history', _capital_history, (branch_filter, date_from, date_to)),
+        *((f'branch_{branch.pk}', _branch_row, (branch,)) for branch in branches),
+    ]
+    extra_context = {
+        'branches': branches,
+        'branch_filter': branch_filter,
+        'date_from': date_from,
+        'date_to': date_to,
+    }
+    return await _respond(request, 'dashboard/financial_summary.html', sections, extra_context, _financial_totals)
@@ -0,0 +1,318 @@
+"""
+Precomputed metrics for the loan officer dashboard.
+
+OfficerDashboardSnapshot computes every count and total shown on the
+officer dashboard in a handful of grouped queries (conditional aggregates
+for counts by status and type) and caches the result per officer. The
+officer dashboard, acting-as-officer mode and the manager's
+view_officer_dashboard all read the same payload.
+
+Cached payloads are invalidated through a per-officer version number that
+dashboard.signals bumps whenever a payment, loan or security transaction
+for one of the officer's loans is written. The cache timeout
+(OFFICER_DASHBOARD_CACHE_TIMEOUT, default 300 seconds) bounds staleness for
+writes that bypass signals, such as QuerySet.update(). The version only
+reaches every worker through a shared cache, so payloads are cached only
+while settings.OFFICER_DASHBOARD_CACHE is on.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (
+    Count, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum,
+)
+
+from accounts.models import User
+from clients.models import BorrowerGroup, GroupMembership
+from loans.models import Loan, LoanApplication, SecurityDeposit, SecurityTopUpRequest, SecurityTransaction
+from payments.models import DefaultCollection, DefaultProvision, Payment, PaymentCollection, PaymentSchedule
+
+
+CACHE_PREFIX = 'officer_dashboard'
+
+
+def _version_key(officer_id):
+    return f'{CACHE_PREFIX}:version:{officer_id}'
+
+
+def invalidate_officer_dashboard(*officer_ids):
+    """Drop every cached snapshot for the given officers."""
+    for officer_id in {pk for pk in officer_ids if pk}:
+        key = _version_key(officer_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def _officer_loans(officer):
+    return Loan.objects.filter(
+        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer)
+    ).values('id')
+
+
+def _money(value):
+    return value or Decimal('0')
+
+
+class OfficerDashboardSnapshot:
+    """
+    Officer dashboard metrics for one officer, optionally narrowed to one of
+    their groups.
+
+    The "cards" at the top of the dashboard (counts, today's collections,
+    overdue loans) honour the group filter; everything else is officer-wide,
+    as it always has been on the dashboard.
+    """
+
+    def __init__(self, officer, group_id=None, today=None):
+        self.officer = officer
+        self.group_id = int(group_id) if group_id else None
+        self.today = today or date.today()
+        self.month_start = self.today.replace(day=1)
+
+    # ------------------------------------------------------------------
+    # Caching
+    # ------------------------------------------------------------------
+
+    def cache_key(self):
+        version = cache.get(_version_key(self.officer.pk)) or 0
+        return (
+            f'{CACHE_PREFIX}:{self.officer.pk}:{version}:'
+            f'{self.group_id or "all"}:{self.today.isoformat()}'
+        )
+
+    def get(self):
+        """Return the cached payload, computing and storing it on a miss."""
+        if not getattr(settings, 'OFFICER_DASHBOARD_CACHE', False):
+            return self.compute()
+        key = self.cache_key()
+        payload = cache.get(key)
+        if payload is None:
+            payload = self.compute()
+            cache.set(key, payload, getattr(settings, 'OFFICER_DASHBOARD_CACHE_TIMEOUT', 300))
+        return payload
+
+    # ------------------------------------------------------------------
+    # Computation
+    # ------------------------------------------------------------------
+
+    def compute(self):
+        officer_loans = _officer_loans(self.officer)
+        officer_clients = User.objects.filter(
+            Q(assigned_officer=self.officer) | Q(group_memberships__group__assigned_officer=self.officer),
+            role='borrower',
+        ).values('id')
+        officer_groups = BorrowerGroup.objects.filter(assigned_officer=self.officer)
+
+        payload = self._officer_metrics(officer_loans, officer_clients, officer_groups)
+
+        if self.group_id:
+            scoped_loans = Loan.objects.filter(
+                id__in=officer_loans, borrower__group_memberships__group_id=self.group_id
+            ).values('id')
+            scoped_clients = User.objects.filter(
+                group_memberships__group_id=self.group_id, role='borrower'
+            ).values('id')
+            payload['cards'] = self._card_metrics(
+                scoped_loans, scoped_clients, officer_groups.filter(id=self.group_id),
+                overdue_group_id=self.group_id,
+            )
+        else:
+            payload['cards'] = self._card_metrics(
+                officer_loans, officer_clients, officer_groups,
+                overdue=payload['overdue'],
+            )
+        return payload
+
+    def _card_metrics(self, loans, clients, groups, overdue=None, overdue_group_id=None):
+        today = self.today
+        loan_totals = Loan.objects.filter(id__in=loans).aggregate(
+            active_loans_count=Count('id', filter=Q(status='active')),
+            outstanding_balance=Sum(
+                ExpressionWrapper(F('total_amount') - F('amount_paid'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+                filter=Q(status='active'),
+            ),
+            pending_security=Count('id', filter=Q(security_deposit__paid_amount__gt=0, security_deposit__is_verified=False)),
+            ready_to_disburse=Count('id', filter=Q(status='approved', security_deposit__is_verified=True)),
+        )
+        today_totals = PaymentCollection.objects.filter(loan_id__in=loans, collection_date=today).aggregate(
+            today_expected=Sum('expected_amount', filter=Q(loan__status='active')),
+            today_collected=Sum('collected_amount'),
+        )
+        groups_count = groups.count()
+        clients_count = User.objects.filter(id__in=clients, is_active=True).count()
+        if overdue is None:
+            overdue = self._overdue_loans(loans, group_id=overdue_group_id)
+
+        today_expected = _money(today_totals['today_expected'])
+        today_collected = _money(today_totals['today_collected'])
+        return {
+            'groups_count': groups_count,
+            'clients_count': clients_count,
+            'active_loans_count': loan_totals['active_loans_count'],
+            'outstanding_balance': _money(loan_totals['outstanding_balance']),
+            'pending_security': loan_totals['pending_security'],
+            'ready_to_disburse': loan_totals['ready_to_disburse'],
+            'today_expected': today_expected,
+            'today_collected': today_collected,
+            # Never show negative pending — a full payoff means nothing is pending
+            'today_pending': max(Decimal('0'), today_expected - today_collected),
+            'today_defaults': len(overdue),
+            'workload_percentage': (groups_count + clients_count) / 200 * 100,
+            'overdue': overdue,
+        }
+
+    def _overdue_loans(self, loans, group_id=None):
+        """
+        Active loans with an unpaid installment past due, most overdue
+        first, as plain dicts. One query: the oldest overdue installment and
+        the borrower's current group come from correlated subqueries.
+        """
+        oldest = PaymentSchedule.objects.filter(
+            loan=OuterRef('pk'), is_paid=False, due_date__lt=self.today
+        ).order_by('due_date')
+        group_name = GroupMembership.objects.filter(
+            borrower=OuterRef('borrower_id'), is_active=True
+        ).order_by('-joined_date').values('group__name')[:1]
+
+        overdue = Loan.objects.filter(id__in=loans, status='active')
+        if group_id:
+            overdue = overdue.filter(
+                borrower__group_memberships__group_id=group_id,
+                borrower__group_memberships__is_active=True,
+            )
+        rows = overdue.annotate(
+            oldest_due=Subquery(oldest.values('due_date')[:1]),
+            oldest_amount=Subquery(
+                oldest.annotate(
+                    outstanding=ExpressionWrapper(
+                        F('total_amount') - F('amount_paid'),
+                        output_field=DecimalField(max_digits=12, decimal_places=2),
+                    )
+                ).values('outstanding')[:1]
+            ),
+            group_name=Subquery(group_name),
+        ).filter(oldest_due__isnull=False).values(
+            'id', 'balance_remaining', 'oldest_due', 'oldest_amount', 'group_name',
+        )
+
+        result = [
+            {
+                'loan_id': row['id'],
+                'days_overdue': (self.today - row['oldest_due']).days,
+                'overdue_amount': _money(row['oldest_amount']),
+                'balance': _money(row['balance_remaining']),
+                'group_name': row['group_name'] or 'No Group',
+            }
+            for row in rows
+        ]
+        result.sort(key=lambda row: -row['days_overdue'])
+        return result
+
+    def _officer_metrics(self, loans, clients, groups):
+        officer = self.officer
+        today = self.today
+        month_start = self.month_start
+
+        month_loans = Loan.objects.filter(id__in=loans).aggregate(
+            month_disbursed=Count('id', filter=Q(disbursement_date__date__gte=month_start)),
+            month_completed_loans=Count('id', filter=Q(status='completed', updated_at__date__gte=month_start)),
+        )
+        month_collected = PaymentCollection.objects.filter(
+            loan_id__in=loans, collection_date__gte=month_start, collected_amount__gt=0,
+        ).aggregate(t=Sum('collected_amount'))['t']
+        month_new_clients = User.objects.filter(
+            id__in=clients, date_joined__date__gte=month_start,
+        ).count()
+
+        overdue = self._overdue_loans(loans)
+
+        # Security transactions: the summary counts are for the officer's own
+        # loans, the pending-by-type counts include their group members' loans.
+        own = Q(loan__loan_officer=officer)
+        security = SecurityTransaction.objects.filter(loan_id__in=loans).aggregate(
+            sec_deposits_count=Count('id', filter=own & Q(transaction_type='adjustment', status='approved')),
+            sec_topups_count=Count('id', filter=own & Q(transaction_type='carry_forward')),
+            sec_returns_count=Count('id', filter=own & Q(transaction_type='return', status='approved')),
+            sec_withdrawals_count=Count('id', filter=own & Q(transaction_type='withdrawal', status='approved')),
+            sec_pending_count=Count('id', filter=own & Q(status='pending')),
+            pending_sec_returns=Count('id', filter=Q(transaction_type='return', status='pending')),
+            pending_sec_adjustments=Count('id', filter=Q(transaction_type='adjustment', status='pending')),
+            pending_sec_topups=Count('id', filter=Q(transaction_type='top_up', status='pending')),
+            pending_sec_withdrawals=Count('id', filter=Q(transaction_type='withdrawal', status='pending')),
+        )
+        if security['sec_topups_count'] == 0:
+            # Legacy top-ups were recorded as requests only.
+            security['sec_topups_count'] = SecurityTopUpRequest.objects.filter(
+                loan__loan_officer=officer, status='approved'
+            ).count()
+
+        deposits = SecurityDeposit.objects.filter(loan_id__in=loans, is_verified=True).aggregate(
+            total_paid=Sum('paid_amount'),
+            total_used=Sum('security_used'),
+            total_returned=Sum('security_returned'),
+        )
+        held = _money(deposits['total_paid'])
+        used = _money(deposits['total_used'])
+        returned = _money(deposits['total_returned'])
+
+        applications = LoanApplication.objects.filter(loan_officer=officer).aggregate(
+            fees_pending_count=Count('id', filter=Q(processing_fee__gt=0, processing_fee_verified=False)),
+            fees_verified_count=Count('id', filter=Q(processing_fee__gt=0, processing_fee_verified=True)),
+            apps_pending=Count('id', filter=Q(status='pending')),
+            apps_approved=Count('id', filter=Q(status='approved')),
+            apps_rejected=Count('id', filter=Q(status='rejected')),
+        )
+
+        from documents.models import ClientVerification
+        verifications = ClientVerification.objects.filter(
+            client_id__in=self.verification_client_ids()
+        ).aggregate(
+            pending_verification_count=Count('id', filter=Q(status__in=['documents_submitted', 'documents_rejected'])),
+            verified_client_count=Count('id', filter=Q(status='verified')),
+        )
+
+        pending_by_group = dict(
+            Payment.objects.filter(
+                status='pending',
+                loan__borrower__group_memberships__group__in=groups,
+                loan__borrower__group_memberships__is_active=True,
+            ).values_list('loan__borrower__group_memberships__group_id')
+            .annotate(total=Count('id', distinct=True))
+            .order_by()
+        )
+
+        return {
+            'overdue': overdue,
+            'group_pending_payments': pending_by_group,
+            'defaults_to_follow': DefaultProvision.objects.filter(loan_id__in=loans, status='active').count(),
+            'default_loans_count': len(overdue),
+            'default_total_outstanding': sum((row['balance'] for row in overdue), Decimal('0')),
+            'default_collected_this_month': _money(
+                DefaultCollection.objects.filter(
+                    loan_id__in=loans, collection_date__gte=month_start,
+                ).aggregate(t=Sum('amount_paid'))['t']
+            ),
+            'sec_total_held': held,
+            'sec_total_used': used,
+            'sec_total_returned': returned,
+            'sec_total_available': max(Decimal('0'), held - used - returned),
+            'month_disbursed': month_loans['month_disbursed'],
+            'month_completed_loans': month_loans['month_completed_loans'],
+            'month_collected': _money(month_collected),
+            'month_new_clients': month_new_clients,
+            **security,
+            **applications,
+            **verifications,
+        }
+
+    def verification_client_ids(self):
+        """Borrowers in the officer's active groups or directly assigned to them."""
+        return User.objects.filter(
+            Q(group_memberships__group__assigned_officer=self.officer, group_memberships__is_active=True) |
+            Q(assigned_officer=self.officer),
+            role='borrower',
+        ).values('id')
@@ -8,6 +8,7 @@ from django.core.paginator import Paginator
 from loans.models import Loan, SecurityTransaction
 from payments.models import Payment
 from clients.models import OfficerAssignment, BorrowerGroup
+from palmcash.db.routers import use_replica
 
 
 def _get_branch(user):
@@ -32,6 +33,7 @@ def _loan_qs(user):
 
 
 @login_required
+@use_replica
 def security_transactions_report(request):
     qs = SecurityTransaction.objects.select_related(
         'loan__borrower', 'loan__loan_officer__officer_assignment'
@@ -133,6 +135,7 @@ def security_transactions_report(request):
 
 
 @login_required
+@use_replica
 def disbursement_report(request):
     qs = _loan_qs(request.user).filter(
         status__in=['active', 'completed', 'disbursed'],
@@ -213,6 +216,7 @@ def disbursement_report(request):
 
 
 @login_required
+@use_replica
 def client_balances_report(request):
     """
     Hierarchical drill-down report: Branch → Officer → Group → Client
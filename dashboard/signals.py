@@ -0,0 +1,113 @@
+"""
+Signal handlers for dashboard app
+
+Keep cached officer dashboard snapshots in step with the records they are
+computed from. The affected officers are resolved once per transaction
+(or request) from the collected loan and borrower ids.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from clients.models import BorrowerGroup, GroupMembership
+from common.commit_batch import CommitBatch
+from documents.models import ClientVerification
+from loans.models import Loan, LoanApplication, SecurityDeposit, SecurityTopUpRequest, SecurityTransaction
+from payments.models import (
+    DefaultCollection, DefaultProvision, Payment, PaymentCollection, PaymentSchedule,
+)
+
+from .officer_snapshot import invalidate_officer_dashboard
+
+
+def _invalidate(items):
+    """
+    Invalidate the officers behind a batch of ('officer'|'borrower'|'client'|
+    'group'|'loan', pk) items: loan officers, group officers and the officers
+    of every group the borrowers are in; for clients also the officer they
+    are assigned to.
+    """
+    officer_ids = {pk for kind, pk in items if kind == 'officer'}
+    borrower_ids = {pk for kind, pk in items if kind in ('borrower', 'client')}
+    client_ids = {pk for kind, pk in items if kind == 'client'}
+    group_ids = {pk for kind, pk in items if kind == 'group'}
+    loan_ids = {pk for kind, pk in items if kind == 'loan'}
+    if client_ids:
+        officer_ids.update(User.objects.filter(pk__in=client_ids).values_list('assigned_officer_id', flat=True))
+    if group_ids:
+        officer_ids.update(BorrowerGroup.objects.filter(pk__in=group_ids).values_list('assigned_officer_id', flat=True))
+    for loan_officer_id, borrower_id in Loan.objects.filter(pk__in=loan_ids).values_list(
+        'loan_officer_id', 'borrower_id'
+    ):
+        officer_ids.add(loan_officer_id)
+        borrower_ids.add(borrower_id)
+    if borrower_ids:
+        officer_ids.update(GroupMembership.objects.filter(borrower_id__in=borrower_ids).values_list(
+            'group__assigned_officer_id', flat=True
+        ))
+    invalidate_officer_dashboard(*officer_ids)
+
+
+_invalidate_batch = CommitBatch(_invalidate)
+
+
+@receiver(post_save, sender=Loan)
+@receiver(post_delete, sender=Loan)
+def invalidate_for_loan(sender, instance, **kwargs):
+    _invalidate_batch.add(('officer', instance.loan_officer_id), ('borrower', instance.borrower_id))
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=PaymentCollection)
+@receiver(post_delete, sender=PaymentCollection)
+@receiver(post_save, sender=PaymentSchedule)
+@receiver(post_delete, sender=PaymentSchedule)
+@receiver(post_save, sender=SecurityTransaction)
+@receiver(post_delete, sender=SecurityTransaction)
+@receiver(post_save, sender=SecurityDeposit)
+@receiver(post_delete, sender=SecurityDeposit)
+@receiver(post_save, sender=SecurityTopUpRequest)
+@receiver(post_delete, sender=SecurityTopUpRequest)
+@receiver(post_save, sender=DefaultCollection)
+@receiver(post_delete, sender=DefaultCollection)
+@receiver(post_save, sender=DefaultProvision)
+@receiver(post_delete, sender=DefaultProvision)
+def invalidate_for_loan_record(sender, instance, **kwargs):
+    _invalidate_batch.add(('loan', instance.loan_id))
+
+
+@receiver(post_save, sender=LoanApplication)
+@receiver(post_delete, sender=LoanApplication)
+def invalidate_for_application(sender, instance, **kwargs):
+    _invalidate_batch.add(('officer', instance.loan_officer_id), ('borrower', instance.borrower_id))
+
+
+@receiver(post_save, sender=ClientVerification)
+@receiver(post_delete, sender=ClientVerification)
+def invalidate_for_verification(sender, instance, **kwargs):
+    _invalidate_batch.add(('client', instance.client_id))
+
+
+@receiver(post_save, sender=GroupMembership)
+@receiver(post_delete, sender=GroupMembership)
+def invalidate_for_membership(sender, instance, **kwargs):
+    # The group's officer, even once the membership row is gone.
+    _invalidate_batch.add(('group', instance.group_id), ('borrower', instance.borrower_id))
+
+
+@receiver(pre_save, sender=BorrowerGroup)
+def remember_group_officer(sender, instance, raw=False, **kwargs):
+    # A group handed to another officer changes both officers' dashboards.
+    if instance.pk and not raw:
+        instance._previous_officer_id = (
+            BorrowerGroup.objects.filter(pk=instance.pk).values_list('assigned_officer_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=BorrowerGroup)
+@receiver(post_delete, sender=BorrowerGroup)
+def invalidate_for_group(sender, instance, **kwargs):
+    _invalidate_batch.add(
+        ('officer', instance.assigned_officer_id), ('officer', getattr(instance, '_previous_officer_id', None)),
+    )
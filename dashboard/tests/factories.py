@@ -0,0 +1,224 @@
+"""
+Factory-driven data generator for the dashboard benchmark suite.
+
+The factories build a realistic slice of the portfolio (branches, officers,
+groups, borrowers, loans, payment schedules and vault transactions) so the
+benchmarks can measure how each dashboard behaves as the data grows.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import factory
+from django.utils import timezone
+
+from accounts.models import User
+from clients.models import Branch, BorrowerGroup, GroupMembership, OfficerAssignment
+from expenses.models import VaultTransaction
+from loans.models import Loan, LoanType, DailyVault, WeeklyVault
+from payments.models import PaymentSchedule
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: f'bench_user_{n}')
+    first_name = factory.Sequence(lambda n: f'First{n}')
+    last_name = factory.Sequence(lambda n: f'Last{n}')
+    email = factory.LazyAttribute(lambda u: f'{u.username}@example.com')
+    role = 'borrower'
+    is_active = True
+
+
+class AdminFactory(UserFactory):
+    role = 'admin'
+    is_staff = True
+
+
+class ManagerFactory(UserFactory):
+    role = 'manager'
+
+
+class OfficerFactory(UserFactory):
+    role = 'loan_officer'
+    is_approved = True
+
+
+class BorrowerFactory(UserFactory):
+    role = 'borrower'
+
+
+class BranchFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Branch
+
+    name = factory.Sequence(lambda n: f'Bench Branch {n}')
+    code = factory.Sequence(lambda n: f'BB{n}')
+    location = 'Lusaka'
+    manager = factory.SubFactory(ManagerFactory)
+
+
+class OfficerAssignmentFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = OfficerAssignment
+
+    officer = factory.SubFactory(OfficerFactory)
+    branch = factory.LazyAttribute(lambda a: BranchFactory().name)
+
+
+class BorrowerGroupFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = BorrowerGroup
+
+    name = factory.Sequence(lambda n: f'Bench Group {n}')
+    branch = ''
+    assigned_officer = factory.SubFactory(OfficerFactory)
+    created_by = factory.SelfAttribute('assigned_officer')
+    payment_day = 'Monday'
+    is_active = True
+
+
+class GroupMembershipFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = GroupMembership
+
+    borrower = factory.SubFactory(BorrowerFactory)
+    group = factory.SubFactory(BorrowerGroupFactory)
+    added_by = factory.SelfAttribute('group.assigned_officer')
+    is_active = True
+
+
+class LoanTypeFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = LoanType
+        django_get_or_create = ('name',)
+
+    name = 'Weekly Business Loan'
+    description = 'Benchmark loan type'
+    interest_rate = Decimal('45.00')
+    min_amount = Decimal('500.00')
+    max_amount = Decimal('50000.00')
+    repayment_frequency = 'weekly'
+    min_term_weeks = 4
+    max_term_weeks = 24
+
+
+class LoanFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Loan
+
+    borrower = factory.SubFactory(BorrowerFactory)
+    loan_type = factory.SubFactory(LoanTypeFactory)
+    loan_officer = factory.SubFactory(OfficerFactory)
+    principal_amount = Decimal('2000.00')
+    interest_rate = Decimal('45.00')
+    repayment_frequency = 'weekly'
+    term_weeks = 10
+    payment_amount = Decimal('290.00')
+    status = 'active'
+    purpose = 'Stock for market stall'
+    disbursement_date = factory.LazyFunction(lambda: timezone.now() - timedelta(weeks=4))
+
+
+class PaymentScheduleFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = PaymentSchedule
+
+    loan = factory.SubFactory(LoanFactory)
+    installment_number = factory.Sequence(lambda n: n + 1)
+    due_date = factory.LazyFunction(date.today)
+    principal_amount = Decimal('200.00')
+    interest_amount = Decimal('90.00')
+    total_amount = Decimal('290.00')
+
+
+class VaultTransactionFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = VaultTransaction
+
+    transaction_type = 'payment_collection'
+    direction = 'in'
+    branch = 'Bench Branch'
+    vault_type = 'weekly'
+    amount = Decimal('290.00')
+    description = 'Benchmark collection'
+    reference_number = factory.Sequence(lambda n: f'BENCH{n:08d}')
+    transaction_date = factory.LazyFunction(timezone.now)
+
+
+SCALES = {
+    'small': {
+        'branches': 1,
+        'officers_per_branch': 1,
+        'groups_per_officer': 2,
+        'borrowers_per_group': 3,
+        'installments': 6,
+    },
+    'large': {
+        'branches': 3,
+        'officers_per_branch': 2,
+        'groups_per_officer': 4,
+        'borrowers_per_group': 6,
+        'installments': 10,
+    },
+}
+
+
+def build_portfolio(branches=1, officers_per_branch=1, groups_per_officer=2,
+                    borrowers_per_group=3, installments=6, existing=None):
+    """
+    Create a portfolio of the given shape and return handles to the actors.
+
+    When ``existing`` (a previous return value) is passed, the new data is
+    attached to its first branch and officer as well, so the same logged-in
+    users see a larger book of business on the next request.
+    """
+    today = date.today()
+    portfolio = existing or {'admin': AdminFactory(), 'branches': [], 'officers': []}
+    loan_type = LoanTypeFactory()
+
+    new_branches = [BranchFactory() for _ in range(branches)]
+    for branch in new_branches:
+        DailyVault.objects.get_or_create(branch=branch)
+        WeeklyVault.objects.get_or_create(branch=branch)
+    portfolio['branches'].extend(new_branches)
+
+    targets = []
+    for branch in new_branches:
+        for _ in range(officers_per_branch):
+            officer = OfficerFactory()
+            OfficerAssignmentFactory(officer=officer, branch=branch.name)
+            portfolio['officers'].append(officer)
+            targets.append((branch, officer))
+    if existing:
+        targets.append((existing['branches'][0], existing['officers'][0]))
+
+    for branch, officer in targets:
+        for _ in range(groups_per_officer):
+            group = BorrowerGroupFactory(assigned_officer=officer, branch=branch.name)
+            for _ in range(borrowers_per_group):
+                borrower = BorrowerFactory(assigned_officer=officer)
+                GroupMembershipFactory(borrower=borrower, group=group)
+                loan = LoanFactory(
+                    borrower=borrower,
+                    loan_officer=officer,
+                    loan_type=loan_type,
+                    term_weeks=installments,
+                )
+                for number in range(1, installments + 1):
+                    due = today + timedelta(weeks=number - installments // 2)
+                    paid = due < today - timedelta(weeks=1)
+                    PaymentScheduleFactory(
+                        loan=loan,
+                        installment_number=number,
+                        due_date=due,
+                        amount_paid=Decimal('290.00') if paid else Decimal('0'),
+                        is_paid=paid,
+                        paid_date=due if paid else None,
+                    )
+                VaultTransactionFactory(
+                    branch=branch.name,
+                    loan=loan,
+                    recorded_by=officer,
+                )
+    return portfolio
@@ -0,0 +1,153 @@
+"""
+Tests for the UNION ALL activity feed behind the admin performance report.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from dashboard import activity_feed
+from dashboard.tests.factories import (
+    AdminFactory, BorrowerFactory, LoanFactory, OfficerAssignmentFactory,
+)
+from loans.models import Loan, LoanApplication
+from payments.models import DefaultCollection, PaymentCollection
+
+
+def _activity(officer, borrower=None, day=0):
+    """One client's loan with a disbursement, two collections and a default collection."""
+    when = timezone.now() - timedelta(days=day)
+    loan = LoanFactory(borrower=borrower or BorrowerFactory(), loan_officer=officer, disbursement_date=when)
+    PaymentCollection.objects.create(
+        loan=loan, collection_date=when.date(), expected_amount=Decimal('290.00'),
+        collected_amount=Decimal('290.00'),
+    )
+    PaymentCollection.objects.create(
+        loan=loan, collection_date=when.date() - timedelta(days=1), expected_amount=Decimal('290.00'),
+        collected_amount=Decimal('100.00'), is_partial=True,
+    )
+    PaymentCollection.objects.create(
+        loan=loan, collection_date=when.date() - timedelta(days=2), expected_amount=Decimal('290.00'),
+    )
+    DefaultCollection.objects.create(
+        loan=loan, amount_paid=Decimal('50.00'), balance_before=Decimal('500.00'),
+        balance_after=Decimal('450.00'), collection_date=when.date(),
+    )
+    return loan
+
+
+@pytest.fixture
+def feed():
+    officer = OfficerAssignmentFactory(branch='North').officer
+    other = OfficerAssignmentFactory(branch='South').officer
+    loans = [_activity(officer, day=day) for day in range(3)]
+    loans.append(_activity(other, day=1))
+    done = LoanFactory(loan_officer=other, status='completed', disbursement_date=None)
+    LoanApplication.objects.create(
+        borrower=done.borrower, loan_officer=other, application_number='APP-FEED-1',
+        loan_amount=Decimal('1000.00'), duration_days=70, repayment_frequency='weekly',
+        purpose='Stock', processing_fee=Decimal('25.00'),
+    )
+    return {'officer': officer, 'other': other, 'loans': loans, 'completed': done}
+
+
+def _range(**params):
+    today = timezone.localdate()
+    return {'date_from': str(today - timedelta(days=30)), 'date_to': str(today), **params}
+
+
+def _filters(**params):
+    return activity_feed.activity_filters(_range(**params))
+
+
+@pytest.mark.django_db
+class TestActivityFeed:
+
+    def test_summary_and_totals(self, feed):
+        filters = _filters()
+        summary = activity_feed.summary(filters)
+
+        assert summary['disbursed_count'] == 4
+        assert summary['disbursed_amount'] == Decimal('8000.00')
+        assert summary['total_collected'] == Decimal('1560.00')
+        assert summary['total_expected'] == Decimal('2320.00')
+        assert summary['completed_count'] == 1
+        assert summary['defaults_collected'] == Decimal('200.00')
+
+        # 4 loans x (disbursement + 2 collections + default) + completion + fee
+        totals = activity_feed.feed_totals(filters)
+        completed_total = feed['completed'].total_amount
+        assert totals['activity_count'] == 18
+        assert totals['total_amount'] == Decimal('8000.00') + Decimal('1560.00') + Decimal('200.00') \
+            + completed_total + Decimal('25.00')
+        assert totals['client_count'] == 5
+
+        north = activity_feed.feed_totals(_filters(branch='north', activity_type='collection'))
+        assert (north['activity_count'], north['total_amount']) == (6, Decimal('1170.00'))
+
+    def test_keyset_pages_cover_the_feed_in_order(self, feed):
+        filters = _filters()
+        everything, position = activity_feed.activity_page(filters, limit=None)
+        assert position is None
+        keys = [(row['activity_date'], row['kind_rank'], row['row_id']) for row in everything]
+        assert keys == sorted(keys, key=lambda key: (-key[0].toordinal(), key[1], -key[2]))
+
+        paged = list(activity_feed.iter_activities(filters, chunk_size=4))
+        assert [(row['kind'], row['row_id']) for row in paged] == [(row['kind'], row['row_id']) for row in everything]
+
+    def test_client_pages(self, feed):
+        filters = _filters()
+        seen, after = [], None
+        while True:
+            groups, after = activity_feed.client_groups(filters, after=after, limit=2)
+            seen.extend(groups)
+            if after is None:
+                break
+        assert len(seen) == 5
+        assert len({group['client_ref'] for group in seen}) == 5
+        newest = seen[0]
+        assert newest['client_ref'] in {feed['loans'][0].borrower_id, feed['completed'].borrower_id}
+        first = next(group for group in seen if group['client_ref'] == feed['loans'][0].borrower_id)
+        assert first['total'] == Decimal('2440.00')
+        assert first['branch'] == 'North'
+        assert [item['type'] for item in first['items']] == [
+            'Disbursement', 'Collection', 'Default Collection', 'Collection',
+        ]
+        assert {item['status'] for item in first['items']} == {'Disbursed', 'Paid', 'Partial', 'Collected'}
+
+    def test_report_queries_do_not_grow_with_activity(self, client, feed):
+        client.force_login(AdminFactory())
+        url = reverse('dashboard:admin_performance_report')
+
+        def run():
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url, _range())
+            assert response.status_code == 200
+            return len(ctx.captured_queries)
+
+        run()  # warm the cached user
+        before = run()
+        for day in range(3):
+            _activity(feed['officer'], day=day)
+        assert run() == before
+
+    def test_report_view_and_csv(self, client, feed):
+        client.force_login(AdminFactory())
+        response = client.get(reverse('dashboard:admin_performance_report'), _range(branch='South'))
+        assert response.context['activity_count'] == 6
+        assert response.context['client_count'] == 2
+        assert response.context['next_query'] is None
+
+        searched = client.get(reverse('dashboard:admin_performance_report'), _range(search='APP-FEED-1'))
+        assert [group['items'][0]['type'] for group in searched.context['client_groups']] == ['Processing Fee']
+
+        export = client.get(reverse('dashboard:admin_performance_report_export'), _range(branch='South'))
+        assert export.streaming
+        lines = b''.join(export.streaming_content).decode().splitlines()
+        assert lines[0].startswith('Date,Type,Reference')
+        assert len(lines) == 7
+        assert any('Processing Fee' in line and 'APP-FEED-1' in line for line in lines)
@@ -0,0 +1,93 @@
+"""
+Tests for the async report pages (system reports, analytics, financial summary).
+"""
+import json
+import threading
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+
+from dashboard.async_views import _gather_sections
+from loans.models import WeeklyVault
+
+from .factories import (
+    AdminFactory, BorrowerFactory, BranchFactory, LoanFactory, ManagerFactory, VaultTransactionFactory,
+)
+
+
+def _stream(response):
+    assert response['Content-Type'] == 'application/x-ndjson'
+    lines = b''.join(response).decode().splitlines()
+    return {line['section']: line['data'] for line in map(json.loads, lines)}
+
+
+def test_sections_run_concurrently():
+    # Each section waits for the other; run one after another, both would time out.
+    barrier = threading.Barrier(2, timeout=5)
+
+    def section(name):
+        barrier.wait()
+        return {name: threading.get_ident()}
+
+    context = async_to_sync(_gather_sections)([('a', section, ('a',)), ('b', section, ('b',))])
+
+    assert set(context) == {'a', 'b'} and context['a'] != context['b']
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncReports:
+
+    def test_system_reports(self, client):
+        LoanFactory.create_batch(2)
+        client.force_login(AdminFactory())
+
+        response = client.get(reverse('dashboard:system_reports'))
+
+        assert response.status_code == 200
+        assert response.context['system_health']['total_loans'] == 2
+        assert response.context['loan_performance']['applications_30d'] == 2
+
+    def test_analytics_counts_loans_by_status(self, client):
+        LoanFactory.create_batch(2)
+        LoanFactory(status='completed')
+        client.force_login(ManagerFactory())
+
+        response = client.get(reverse('dashboard:analytics'))
+
+        assert response.status_code == 200
+        assert response.context['loan_status_data'] == [
+            {'status': 'active', 'count': 2}, {'status': 'completed', 'count': 1},
+        ]
+        [month] = response.context['monthly_disbursements']
+        assert month['count'] == 3 and month['total'] == Decimal('6000.00')
+
+    def test_financial_summary_streams_sections(self, client):
+        branch = BranchFactory()
+        LoanFactory()
+        VaultTransactionFactory(transaction_type='capital_injection', branch=branch.name, amount=Decimal('500.00'))
+        WeeklyVault.objects.create(branch=branch, balance=Decimal('300.00'))
+        client.force_login(AdminFactory())
+
+        page = client.get(reverse('dashboard:financial_summary'))
+        sections = _stream(client.get(reverse('dashboard:financial_summary'), {'format': 'json'}))
+
+        assert page.status_code == 200
+        assert page.context['total_outstanding'] == Decimal('2000.00')
+        assert [row['capital_injected'] for row in page.context['branch_rows']] == [Decimal('500.00')]
+        assert [row['vault_balance'] for row in page.context['branch_rows']] == [Decimal('300.00')]
+        assert set(sections) == {
+            'total_capital', 'total_disbursed', 'total_repaid', 'total_security', 'total_default_collections',
+            'capital_history', f'branch_{branch.pk}',
+        }
+        assert Decimal(sections['total_capital']['total_capital']) == Decimal('500.00')
+        assert sections[f'branch_{branch.pk}'][f'branch_{branch.pk}']['branch']['name'] == branch.name
+
+    def test_access_is_checked(self, client):
+        url = reverse('dashboard:financial_summary')
+        assert client.get(url).status_code == 302
+
+        client.force_login(BorrowerFactory())
+        response = client.get(url)
+        assert 'dashboard/access_denied.html' in [template.name for template in response.templates]
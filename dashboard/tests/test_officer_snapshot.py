@@ -0,0 +1,116 @@
+"""
+Tests for the cached officer dashboard snapshot.
+"""
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from clients.models import BorrowerGroup
+from dashboard.officer_snapshot import OfficerDashboardSnapshot
+from loans.models import Loan, LoanApplication, SecurityTransaction
+
+from .factories import SCALES, OfficerFactory, PaymentScheduleFactory, build_portfolio
+
+
+@pytest.mark.django_db
+class TestOfficerDashboardSnapshot:
+
+    def test_metrics_match_portfolio(self):
+        portfolio = build_portfolio(**SCALES['small'])
+        officer = portfolio['officers'][0]
+
+        metrics = OfficerDashboardSnapshot(officer).get()
+
+        shape = SCALES['small']
+        loans = shape['groups_per_officer'] * shape['borrowers_per_group']
+        assert metrics['cards']['groups_count'] == shape['groups_per_officer']
+        assert metrics['cards']['clients_count'] == loans
+        assert metrics['cards']['active_loans_count'] == loans
+        # Every loan has an unpaid installment due before today.
+        assert metrics['default_loans_count'] == loans
+        assert len(metrics['overdue']) == loans
+
+    def test_second_read_is_served_from_cache(self):
+        officer = build_portfolio(**SCALES['small'])['officers'][0]
+        OfficerDashboardSnapshot(officer).get()
+
+        with CaptureQueriesContext(connection) as ctx:
+            OfficerDashboardSnapshot(officer).get()
+        assert len(ctx.captured_queries) == 0
+
+    def test_without_shared_cache_every_read_computes(self, settings):
+        settings.OFFICER_DASHBOARD_CACHE = False
+        officer = build_portfolio(**SCALES['small'])['officers'][0]
+        OfficerDashboardSnapshot(officer).get()
+
+        with CaptureQueriesContext(connection) as ctx:
+            OfficerDashboardSnapshot(officer).get()
+        assert len(ctx.captured_queries) > 0
+
+    def test_security_transaction_invalidates(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            officer = build_portfolio(**SCALES['small'])['officers'][0]
+        assert OfficerDashboardSnapshot(officer).get()['sec_pending_count'] == 0
+
+        loan = Loan.objects.filter(loan_officer=officer).first()
+        with django_capture_on_commit_callbacks(execute=True):
+            SecurityTransaction.objects.create(
+                loan=loan, transaction_type='withdrawal', amount=Decimal('50.00'), initiated_by=officer,
+            )
+
+        assert OfficerDashboardSnapshot(officer).get()['sec_pending_count'] == 1
+
+    def test_application_invalidates(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            officer = build_portfolio(**SCALES['small'])['officers'][0]
+        assert OfficerDashboardSnapshot(officer).get()['apps_pending'] == 0
+
+        borrower = Loan.objects.filter(loan_officer=officer).first().borrower
+        with django_capture_on_commit_callbacks(execute=True):
+            LoanApplication.objects.create(
+                borrower=borrower, loan_officer=officer, application_number='APP-SNAP-1',
+                loan_amount=Decimal('1000.00'), duration_days=70, repayment_frequency='weekly', purpose='Stock',
+            )
+
+        assert OfficerDashboardSnapshot(officer).get()['apps_pending'] == 1
+
+    def test_group_handover_invalidates_both_officers(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            officer = build_portfolio(**SCALES['small'])['officers'][0]
+            other = OfficerFactory()
+        groups = SCALES['small']['groups_per_officer']
+        assert OfficerDashboardSnapshot(officer).get()['cards']['groups_count'] == groups
+        assert OfficerDashboardSnapshot(other).get()['cards']['groups_count'] == 0
+
+        group = BorrowerGroup.objects.filter(assigned_officer=officer).first()
+        with django_capture_on_commit_callbacks(execute=True):
+            group.assigned_officer = other
+            group.save()
+
+        assert OfficerDashboardSnapshot(officer).get()['cards']['groups_count'] == groups - 1
+        assert OfficerDashboardSnapshot(other).get()['cards']['groups_count'] == 1
+
+    def test_officers_are_resolved_once_per_transaction(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            portfolio = build_portfolio(**SCALES['small'])
+        loan = Loan.objects.filter(loan_officer=portfolio['officers'][0]).first()
+
+        with CaptureQueriesContext(connection) as ctx:
+            with django_capture_on_commit_callbacks(execute=True):
+                for number in range(100, 110):
+                    PaymentScheduleFactory(loan=loan, installment_number=number)
+
+        lookups = [query for query in ctx.captured_queries if 'clients_groupmembership' in query['sql']]
+        assert len(lookups) == 1
+
+    def test_manager_view_renders_from_snapshot(self, client):
+        portfolio = build_portfolio(**SCALES['small'])
+        client.force_login(portfolio['admin'])
+
+        response = client.get(reverse('dashboard:view_officer_dashboard', args=[portfolio['officers'][0].pk]))
+
+        assert response.status_code == 200
+        assert response.context['active_loans_count'] == 6
@@ -0,0 +1,156 @@
+"""
+Query-count and latency benchmarks for the heaviest dashboard views.
+
+Each view is rendered against a small portfolio, the portfolio is grown in
+place, and the view is rendered again for the same user. A view whose query
+count rises with the data has an N+1 somewhere and fails the benchmark,
+unless its baseline records it as a known one (``scales_with_data``); such
+a view fails when it issues more queries at either size than recorded. A
+view also fails when its small-portfolio render takes more than
+PALMCASH_BENCH_WALL_TOLERANCE (default 3) times its recorded wall time.
+
+Run with:
+    pytest -m slow --nomigrations dashboard/tests/test_query_benchmarks.py
+
+Set PALMCASH_BENCH_SCALE (default 1) to multiply the size of the grown
+portfolio (known N+1s are checked against the ceiling recorded for that
+scale), and PALMCASH_UPDATE_BASELINES=1 to rewrite benchmark_baselines.json
+from the current measurements.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .factories import SCALES, build_portfolio
+
+
+BASELINES_PATH = Path(__file__).with_name('benchmark_baselines.json')
+
+# (benchmark name, url name, which portfolio actor is logged in)
+BENCHMARKED_VIEWS = [
+    ('loan_officer_dashboard', 'dashboard:loan_officer_dashboard', 'officer'),
+    ('manager_dashboard', 'dashboard:manager_dashboard', 'manager'),
+    ('admin_dashboard', 'dashboard:admin_dashboard', 'admin'),
+    ('branch_comparison', 'dashboard:branch_comparison', 'admin'),
+    ('securities_branches', 'securities:branches', 'admin'),
+    ('BulkCollectionView', 'payments:bulk_collection', 'officer'),
+    ('vault_dashboard', 'dashboard:vault', 'manager'),
+]
+
+
+def _load_baselines():
+    if BASELINES_PATH.exists():
+        return json.loads(BASELINES_PATH.read_text())
+    return {}
+
+
+def _save_baseline(name, entry):
+    baselines = _load_baselines()
+    if entry['scales_with_data']:
+        # Keep the ceilings recorded at other scales.
+        entry = {**baselines.get(name, {}), **entry}
+    baselines[name] = entry
+    BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+
+
+def _factor():
+    return max(1, int(os.environ.get('PALMCASH_BENCH_SCALE', '1')))
+
+
+def _large_key():
+    factor = _factor()
+    return 'large_queries' if factor == 1 else f'large_queries_x{factor}'
+
+
+def _scaled(shape):
+    factor = _factor()
+    return {
+        key: value * factor if key != 'installments' else value
+        for key, value in shape.items()
+    }
+
+
+def _actor(portfolio, actor):
+    if actor == 'admin':
+        return portfolio['admin']
+    if actor == 'manager':
+        return portfolio['branches'][0].manager
+    return portfolio['officers'][0]
+
+
+def _measure(client, url):
+    """Return (query count, wall time in ms) for one cold-cache GET of ``url``."""
+    cache.clear()
+    with CaptureQueriesContext(connection) as ctx:
+        started = time.perf_counter()
+        response = client.get(url)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    assert response.status_code == 200, f'{url} returned {response.status_code}'
+    return len(ctx.captured_queries), elapsed_ms
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+@pytest.mark.parametrize('name,url_name,actor', BENCHMARKED_VIEWS, ids=[v[0] for v in BENCHMARKED_VIEWS])
+def test_view_query_count_is_constant(client, record_property, name, url_name, actor):
+    """Query count must not grow when the portfolio behind the view grows."""
+    portfolio = build_portfolio(**SCALES['small'])
+    client.force_login(_actor(portfolio, actor))
+    url = reverse(url_name)
+
+    # Warm-up request so session, content-type and permission caches are
+    # populated and do not count against the first measurement.
+    client.get(url)
+    small_queries, small_ms = _measure(client, url)
+
+    build_portfolio(existing=portfolio, **_scaled(SCALES['large']))
+    large_queries, large_ms = _measure(client, url)
+
+    record_property('small_queries', small_queries)
+    record_property('large_queries', large_queries)
+    record_property('small_ms', round(small_ms, 1))
+    record_property('large_ms', round(large_ms, 1))
+
+    if os.environ.get('PALMCASH_UPDATE_BASELINES'):
+        entry = {
+            'queries': small_queries,
+            'wall_ms': round(small_ms, 1),
+            'scales_with_data': large_queries > small_queries,
+        }
+        if entry['scales_with_data']:
+            entry[_large_key()] = large_queries
+        _save_baseline(name, entry)
+        return
+
+    baseline = _load_baselines().get(name)
+    assert baseline is not None, (
+        f'No baseline for {name}; run with PALMCASH_UPDATE_BASELINES=1 to record one.'
+    )
+    assert small_queries <= baseline['queries'], (
+        f'{name} issues {small_queries} queries, baseline is {baseline["queries"]}.'
+    )
+    if baseline.get('scales_with_data'):
+        ceiling = baseline.get(_large_key())
+        assert ceiling is not None, (
+            f'No {_large_key()} ceiling for {name}; run with PALMCASH_UPDATE_BASELINES=1 to record one.'
+        )
+        assert large_queries <= ceiling, (
+            f'{name} is a known N+1 but grew further: {large_queries} queries on the large portfolio, '
+            f'ceiling is {ceiling}.'
+        )
+    else:
+        assert large_queries <= small_queries, (
+            f'{name} query count grows with data size: {small_queries} -> {large_queries} queries'
+        )
+
+    tolerance = float(os.environ.get('PALMCASH_BENCH_WALL_TOLERANCE', '3'))
+    assert small_ms <= baseline['wall_ms'] * tolerance, (
+        f'{name} took {small_ms:.1f}ms, over {tolerance}x its {baseline["wall_ms"]}ms baseline.'
+    )
@@ -1,5 +1,6 @@
 from django.urls import path
 from . import views
+from . import async_views
 from . import reports_views
 from . import vault_views
 from loans.views import VerifySecurityDepositView
@@ -10,12 +11,14 @@ urlpatterns = [
     # Main dashboard routes
     path('', views.dashboard, name='dashboard'),
     path('borrower/', views.borrower_dashboard, name='borrower_dashboard'),
+    path('borrower/summary.json', views.borrower_summary_api, name='borrower_summary_api'),
     path('loan-officer/', views.loan_officer_dashboard, name='loan_officer_dashboard'),
     path('loan-officer/performance/', views.officer_performance_report, name='officer_performance_report'),
     path('loan-officer/applications/', views.officer_applications, name='officer_applications'),
     path('loan-officer/processing-fees/', views.officer_processing_fees, name='officer_processing_fees'),
     path('manager/performance/', views.manager_performance_report, name='manager_performance_report'),
     path('admin/performance/', views.admin_performance_report, name='admin_performance_report'),
+    path('admin/performance/export/', views.admin_performance_report_export, name='admin_performance_report_export'),
     path('manager/', views.manager_dashboard, name='manager_dashboard'),
     path('manager/collections/', views.manager_collections_hierarchical, name='manager_collections_hierarchical'),
     path('manager/view-officer/<int:officer_id>/', views.view_officer_dashboard, name='view_officer_dashboard'),
@@ -25,6 +28,7 @@ urlpatterns = [
     
     # Action URLs
     path('pending-approvals/', views.pending_approvals, name='pending_approvals'),
+    path('pending-approvals/bulk-approve/', views.bulk_approve_applications, name='bulk_approve_applications'),
     path('security-topup/<int:pk>/action/', views.security_topup_action, name='security_topup_action'),
     path('approved-security-deposits/', views.approved_security_deposits, name='approved_security_deposits'),
     path('collection-details/', views.collection_details, name='collection_details'),
@@ -86,6 +90,7 @@ urlpatterns = [
     path('admin/approvals/loan/<int:loan_id>/', views.admin_loan_approval_detail, name='admin_loan_approval_detail'),
     path('admin/approvals/loan/<int:loan_id>/approve/', views.admin_loan_approve, name='admin_loan_approve'),
     path('admin/approvals/loan/<int:loan_id>/reject/', views.admin_loan_reject, name='admin_loan_reject'),
+    path('admin/approvals/bulk-approve/', views.admin_bulk_loan_approve, name='admin_bulk_loan_approve'),
     
     # Admin Company-Wide Loan Viewing URLs
     path('admin/loans/', views.admin_all_loans, name='admin_all_loans'),
@@ -97,14 +102,14 @@ urlpatterns = [
     path('admin/manager-view/', views.admin_manager_view, name='admin_manager_view'),
     path('manage-loans/', views.admin_all_loans, name='manage_loans'),
     path('groups-permissions/', views.groups_permissions, name='groups_permissions'),
-    path('system-reports/', views.system_reports, name='system_reports'),
-    path('analytics/', views.analytics, name='analytics'),
+    path('system-reports/', async_views.system_reports, name='system_reports'),
+    path('analytics/', async_views.analytics, name='analytics'),
 
     # Reports
     path('reports/security-transactions/', reports_views.security_transactions_report, name='report_security_transactions'),
     path('reports/disbursements/', reports_views.disbursement_report, name='report_disbursements'),
     path('reports/client-balances/', reports_views.client_balances_report, name='report_client_balances'),
-    path('financial-summary/', views.financial_summary, name='financial_summary'),
+    path('financial-summary/', async_views.financial_summary, name='financial_summary'),
     path('branch-comparison/', views.branch_comparison, name='branch_comparison'),
     path('loan-aging/', views.loan_aging, name='loan_aging'),
     path('officer-performance/', views.officer_performance, name='officer_performance'),
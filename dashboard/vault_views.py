@@ -1194,6 +1194,7 @@ def reverse_vault_transaction(request, tx_id):
     
     from expenses.models import VaultTransaction
     from loans.models import DailyVault, WeeklyVault
+    from loans.vault_posting import post
     from clients.models import Branch
     from decimal import Decimal
     from django.contrib import messages
@@ -1227,15 +1228,7 @@ def reverse_vault_transaction(request, tx_id):
             opposite_direction = 'out' if original_tx.direction == 'in' else 'in'
             
             # Update vault balance (reverse the original transaction)
-            if opposite_direction == 'in':
-                vault.balance += original_tx.amount
-                vault.total_inflows += original_tx.amount
-            else:
-                vault.balance -= original_tx.amount
-                vault.total_outflows += original_tx.amount
-            
-            vault.last_transaction_date = timezone.now()
-            vault.save(update_fields=['balance', 'total_inflows', 'total_outflows', 'last_transaction_date', 'updated_at'])
+            post(vault, original_tx.amount, opposite_direction)
             
             # Create reversal transaction
             reversal_tx = VaultTransaction.objects.create(
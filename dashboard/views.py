@@ -9,7 +9,9 @@ from loans.models import Loan, LoanApprovalRequest, LoanType
 from loans.models import SecurityTransaction
 from payments.models import PaymentCollection, DefaultProvision, Payment
 from clients.models import BorrowerGroup, Branch, AdminAuditLog, GroupMembership
-from loans.views import VerifySecurityDepositView
+from clients.group_metrics import annotate_group_metrics
+from common import audit
+from palmcash.db.routers import use_replica
 from accounts.models import User
 
 
@@ -38,12 +40,29 @@ def _get_vault_balances(branch):
         }
 
 
+def _active_memberships_prefetch(borrower_path):
+    """Prefetch each borrower's active memberships for the _group_* helpers."""
+    from django.db.models import Prefetch
+    return Prefetch(
+        f'{borrower_path}__group_memberships',
+        queryset=GroupMembership.objects.filter(is_active=True).select_related('group'),
+        to_attr='active_memberships',
+    )
+
+
+def _primary_membership(borrower):
+    memberships = getattr(borrower, 'active_memberships', None)
+    if memberships is None:
+        return borrower.group_memberships.filter(is_active=True).select_related('group').first()
+    return memberships[0] if memberships else None
+
+
 def _group_loans_by_group(loans):
     """Group loans by their borrower's primary group, no duplicates."""
     from collections import OrderedDict
     groups = OrderedDict()
     for loan in loans:
-        membership = loan.borrower.group_memberships.filter(is_active=True).select_related('group').first()
+        membership = _primary_membership(loan.borrower)
         group_name = membership.group.name if membership else 'No Group'
         group_obj = membership.group if membership else None
         key = group_obj.pk if group_obj else 0
@@ -58,7 +77,7 @@ def _group_collections_by_group(collections):
     from collections import OrderedDict
     groups = OrderedDict()
     for coll in collections:
-        membership = coll.loan.borrower.group_memberships.filter(is_active=True).select_related('group').first()
+        membership = _primary_membership(coll.loan.borrower)
         group_name = membership.group.name if membership else 'No Group'
         group_obj = membership.group if membership else None
         key = group_obj.pk if group_obj else 0
@@ -117,12 +136,16 @@ def dashboard(request):
 @login_required
 def loan_officer_dashboard(request, officer=None):
     """Loan Officer Dashboard"""
+    from dashboard.officer_snapshot import OfficerDashboardSnapshot
+
     # Use provided officer or default to request.user
     if officer is None:
         officer = request.user
     
     # Get filter parameters
     group_filter = request.GET.get('group', '')
+    if not group_filter.isdigit():
+        group_filter = ''
     date_from = request.GET.get('date_from', '')
     date_to = request.GET.get('date_to', '')
     
@@ -145,114 +168,58 @@ def loan_officer_dashboard(request, officer=None):
         date_to_obj = today
         date_from = date_from_obj.strftime('%Y-%m-%d')
         date_to = date_to_obj.strftime('%Y-%m-%d')
-    
-    # Get base querysets
-    groups = BorrowerGroup.objects.filter(assigned_officer=officer)
-    
-    # Apply group filter
-    if group_filter:
-        groups = groups.filter(id=group_filter)
-    
-    # Get clients assigned to this officer - include both directly assigned and group members
+
+    from datetime import date
+    today = date.today()
+
+    # All counts and totals come from one cached snapshot per officer
+    snapshot = OfficerDashboardSnapshot(officer, group_id=group_filter or None, today=today)
+    metrics = snapshot.get()
+    cards = metrics['cards']
+
+    # Query for related models (PaymentCollection, PassbookEntry, etc.) that access through loan
     from django.db.models import Q
-    clients_query = Q(assigned_officer=officer) | Q(group_memberships__group__assigned_officer=officer)
-    if group_filter:
-        clients_query = Q(group_memberships__group_id=group_filter)
-    
-    clients = User.objects.filter(
-        clients_query,
-        role='borrower',
-        is_active=True
-    ).distinct()
-    
-    # Apply filters to loans
-    loans_query = Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer)
+    officer_loans = Loan.objects.filter(
+        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer)
+    ).values('id')
+    scoped_loans = officer_loans
     if group_filter:
-        loans_query = Q(borrower__group_memberships__group_id=group_filter)
-    
-    # Query for related models (PaymentCollection, PaymentSchedule, etc.) that access through loan
-    related_query = Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer)
+        scoped_loans = Loan.objects.filter(
+            id__in=officer_loans, borrower__group_memberships__group_id=group_filter
+        ).values('id')
+
+    # Overdue: unpaid installments past their due date. The snapshot counts
+    # those due before today; only a custom "to" date needs its own count.
+    today_defaults = cards['today_defaults']
+    if date_to_obj != today:
+        from payments.models import PaymentSchedule as PS
+        today_defaults = PS.objects.filter(
+            loan_id__in=scoped_loans,
+            loan__status='active',
+            is_paid=False,
+            due_date__lt=date_to_obj,
+        ).values('loan').distinct().count()
+
+    groups = annotate_group_metrics(BorrowerGroup.objects.filter(assigned_officer=officer))
     if group_filter:
-        related_query = related_query & Q(loan__borrower__group_memberships__group_id=group_filter)
-    
-    active_loans = Loan.objects.filter(
-        loans_query,
-        status='active'
-    ).distinct()
-    
-    # Today's collections - use actual today, not date range filter
-    from datetime import date
-    today = date.today()
-    
-    # For EXPECTED: Only count active loans (loans that still need payment)
-    today_collections_active = PaymentCollection.objects.filter(
-        related_query,
-        collection_date=today,
-        loan__status='active'
-    ).distinct()
-    
-    # For COLLECTED: Count both active loans AND loans completed today
-    # (to show today's collections even if they completed the loan)
-    today_collections_all = PaymentCollection.objects.filter(
-        related_query,
-        collection_date=today
-    ).distinct()
-    
-    today_expected = sum(c.expected_amount for c in today_collections_active) or 0
-    today_collected = sum(c.collected_amount for c in today_collections_all) or 0
-    # Never show negative pending — a full payoff means nothing is pending
-    today_pending = max(0, today_expected - today_collected)
+        groups = groups.filter(id=group_filter)
 
-    # Overdue: unpaid installments past their due date
-    from payments.models import PaymentSchedule as PS
-    today_defaults = PS.objects.filter(
-        related_query,
-        loan__status='active',
-        is_paid=False,
-        due_date__lt=date_to_obj,
-    ).values('loan').distinct().count()  # count distinct loans with overdue installments
-    
-    # Pending actions
-    # Security deposits awaiting verification - loans with paid deposits but not verified
-    pending_security = Loan.objects.filter(
-        loans_query,
-        security_deposit__paid_amount__gt=0,
-        security_deposit__is_verified=False
-    ).distinct().count()
-    
-    # Ready to disburse - approved loans with verified deposits
-    ready_to_disburse = Loan.objects.filter(
-        loans_query,
-        status='approved',
-        security_deposit__is_verified=True
-    ).distinct().count()
-    
     # Get all groups for filter dropdown
     all_groups = BorrowerGroup.objects.filter(assigned_officer=officer).order_by('name')
-    
-    # Outstanding balance — use balance_remaining if set, else fall back to total_amount - amount_paid
-    from django.db.models import F, ExpressionWrapper, DecimalField as DField
-    outstanding_balance = active_loans.aggregate(
-        total=Sum(
-            ExpressionWrapper(
-                F('total_amount') - F('amount_paid'),
-                output_field=DField(max_digits=14, decimal_places=2)
-            )
-        )
-    )['total'] or 0
-    
-    # Workload percentage (assuming max capacity is 100 groups/clients)
-    total_workload = groups.count() + clients.count()
-    workload_percentage = (total_workload / 200 * 100) if total_workload > 0 else 0
-    
+
     # Clients expected to pay today - only show clients with active loans
-    clients_expected_today = today_collections_active.select_related('loan__borrower').order_by('-expected_amount')
+    clients_expected_today = PaymentCollection.objects.filter(
+        loan_id__in=scoped_loans,
+        collection_date=today,
+        loan__status='active'
+    ).select_related('loan__borrower').prefetch_related(
+        _active_memberships_prefetch('loan__borrower')
+    ).order_by('-expected_amount')
     
     # Recent transactions (from passbook/payment records)
-    from payments.models import PaymentCollection as PC
-    recent_transactions = PC.objects.filter(
-        Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer)
-    ).select_related('loan__borrower').order_by('-collection_date').distinct()[:10]
+    recent_transactions = PaymentCollection.objects.filter(
+        loan_id__in=officer_loans
+    ).select_related('loan__borrower').order_by('-collection_date')[:10]
     
     # Format recent transactions for display
     formatted_transactions = []
@@ -268,127 +235,86 @@ def loan_officer_dashboard(request, officer=None):
     # Passbook entries - get recent entries across all loans
     from payments.models import PassbookEntry
     passbook_entries = PassbookEntry.objects.filter(
-        Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer)
-    ).select_related('loan__borrower').order_by('-entry_date').distinct()[:20]
+        loan_id__in=officer_loans
+    ).select_related('loan__borrower').order_by('-entry_date')[:20]
     
-    # Pending documents for review - get clients in officer's groups with pending documents
-    from documents.models import ClientDocument
-    
-    pending_documents = []
-    try:
-        # Get all clients in officer's groups or directly assigned
-        clients_in_groups = User.objects.filter(
-            Q(group_memberships__group__assigned_officer=officer, group_memberships__is_active=True) |
-            Q(assigned_officer=officer),
-            role='borrower'
-        ).values_list('id', flat=True).distinct()
-        
-        # Get pending documents from those clients
-        pending_documents = ClientDocument.objects.filter(
-            client_id__in=clients_in_groups,
-            status='pending'
-        ).select_related('client').distinct()[:10]
-    except Exception as e:
-        print(f"Error fetching pending documents: {e}")
-        pending_documents = []
-    
-    # Document verification - get pending and verified verifications
-    from documents.models import ClientVerification
-    try:
-        # Get all clients in officer's groups or directly assigned
-        clients_in_groups = User.objects.filter(
-            Q(group_memberships__group__assigned_officer=officer, group_memberships__is_active=True) |
-            Q(assigned_officer=officer),
-            role='borrower'
-        ).values_list('id', flat=True).distinct()
-        
-        # Get pending verifications (documents submitted but not yet verified)
-        pending_verifications = ClientVerification.objects.filter(
-            client_id__in=clients_in_groups,
-            status__in=['documents_submitted', 'documents_rejected']
-        ).select_related('client').prefetch_related('client__documents').order_by('-updated_at')
-        
-        # Get verified verifications (approved documents)
-        verified_verifications = ClientVerification.objects.filter(
-            client_id__in=clients_in_groups,
-            status='verified'
-        ).select_related('client').prefetch_related('client__documents').order_by('-updated_at')
-        
-        pending_verification_count = pending_verifications.count()
-        verified_client_count = verified_verifications.count()
-    except Exception as e:
-        print(f"Error fetching document verifications: {e}")
-        pending_verifications = []
-        verified_verifications = []
-        pending_verification_count = 0
-        verified_client_count = 0
+    # Clients in officer's groups or directly assigned, shared by the
+    # document and verification lists below
+    clients_in_groups = snapshot.verification_client_ids()
 
-    # Top-up count: SecurityTransaction carry_forwards + approved SecurityTopUpRequests (for legacy records)
-    from loans.models import SecurityTopUpRequest
-    sec_topups_count = SecurityTransaction.objects.filter(
-        loan__loan_officer=officer, transaction_type='carry_forward'
-    ).count()
-    if sec_topups_count == 0:
-        sec_topups_count = SecurityTopUpRequest.objects.filter(
-            loan__loan_officer=officer, status='approved'
-        ).count()
+    # Pending documents for review
+    from documents.models import ClientDocument, ClientVerification
+    pending_documents = ClientDocument.objects.filter(
+        client_id__in=clients_in_groups,
+        status='pending'
+    ).select_related('client')[:10]
+    
+    # Document verification - pending (submitted but not yet verified) and verified
+    pending_verifications = ClientVerification.objects.filter(
+        client_id__in=clients_in_groups,
+        status__in=['documents_submitted', 'documents_rejected']
+    ).select_related('client').prefetch_related('client__documents').order_by('-updated_at')
+    verified_verifications = ClientVerification.objects.filter(
+        client_id__in=clients_in_groups,
+        status='verified'
+    ).select_related('client').prefetch_related('client__documents').order_by('-updated_at')
 
     # Attach pending payment count to each group
-    from payments.models import Payment as Pmt
     groups_list = list(groups[:5])
     for g in groups_list:
-        member_ids = g.members.filter(is_active=True).values_list('borrower_id', flat=True)
-        g.pending_payments_count = Pmt.objects.filter(
-            loan__borrower_id__in=member_ids,
-            status='pending'
-        ).count()
+        g.pending_payments_count = metrics['group_pending_payments'].get(g.pk, 0)
+
+    security_loans = Loan.objects.filter(
+        id__in=officer_loans,
+        status__in=['active', 'completed'],
+        security_deposit__is_verified=True,
+    ).select_related('borrower', 'security_deposit').prefetch_related(
+        _active_memberships_prefetch('borrower')
+    )
 
     context = {
-        'groups_count': groups.count(),
-        'clients_count': clients.count(),
-        'active_loans_count': active_loans.count(),
-        'today_expected': today_expected,
-        'today_collected': today_collected,
-        'today_pending': today_pending,
+        'groups_count': cards['groups_count'],
+        'clients_count': cards['clients_count'],
+        'active_loans_count': cards['active_loans_count'],
+        'today_expected': cards['today_expected'],
+        'today_collected': cards['today_collected'],
+        'today_pending': cards['today_pending'],
         'today_defaults': today_defaults,
         'groups': groups_list,
-        'pending_security': pending_security,
-        'ready_to_disburse': ready_to_disburse,
-        'defaults_to_follow': DefaultProvision.objects.filter(
-            Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-            status='active'
-        ).distinct().count(),
-        'outstanding_balance': outstanding_balance,
-        'workload_percentage': workload_percentage,
+        'pending_security': cards['pending_security'],
+        'ready_to_disburse': cards['ready_to_disburse'],
+        'defaults_to_follow': metrics['defaults_to_follow'],
+        'outstanding_balance': cards['outstanding_balance'],
+        'workload_percentage': cards['workload_percentage'],
         'clients_expected_today': clients_expected_today,
         'collections_by_group': _group_collections_by_group(clients_expected_today),
         'recent_transactions': formatted_transactions,
         'passbook_entries': passbook_entries,
         'pending_documents': pending_documents,
-        'pending_documents_count': pending_documents.count(),
+        'pending_documents_count': len(pending_documents),
         'pending_verifications': pending_verifications,
         'verified_verifications': verified_verifications,
-        'pending_verification_count': pending_verification_count,
-        'verified_client_count': verified_client_count,
+        'pending_verification_count': metrics['pending_verification_count'],
+        'verified_client_count': metrics['verified_client_count'],
         'pending_upfront_loans': Loan.objects.filter(
-            Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
+            id__in=officer_loans,
             status='approved',
             upfront_payment_verified=False,
             upfront_payment_paid=0,
-        ).select_related('borrower').distinct(),
+        ).select_related('borrower'),
         'awaiting_verification_loans': Loan.objects.filter(
-            Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
+            id__in=officer_loans,
             status='approved',
             upfront_payment_paid__gt=0,
             upfront_payment_verified=False,
-        ).select_related('borrower').distinct(),
+        ).select_related('borrower'),
         'ready_to_disburse_loans': Loan.objects.filter(
-            Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
+            id__in=officer_loans,
             status='approved',
         ).filter(
             # Daily loans don't need upfront payment verification, weekly loans do
             Q(repayment_frequency='daily') | Q(upfront_payment_verified=True)
-        ).select_related('borrower').distinct(),
+        ).select_related('borrower'),
         'pending_security_transactions': SecurityTransaction.objects.filter(
             loan__loan_officer=officer,
             status='pending',
@@ -400,133 +326,36 @@ def loan_officer_dashboard(request, officer=None):
             'date_to': date_to,
         },
         'all_groups': all_groups,
-        'active_loans_with_security': Loan.objects.filter(
-            Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
-            status__in=['active', 'completed'],
-            security_deposit__is_verified=True,
-        ).select_related('borrower', 'security_deposit').distinct(),
-        'security_by_group': _group_loans_by_group(
-            Loan.objects.filter(
-                Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
-                status__in=['active', 'completed'],
-                security_deposit__is_verified=True,
-            ).select_related('borrower', 'security_deposit').distinct()
-        ),
-        # Security summary counts
-        'sec_deposits_count': SecurityTransaction.objects.filter(
-            loan__loan_officer=officer, transaction_type='adjustment', status='approved'
-        ).count(),
-        'sec_topups_count': sec_topups_count,
-        'sec_returns_count': SecurityTransaction.objects.filter(
-            loan__loan_officer=officer, transaction_type='return', status='approved'
-        ).count(),
-        'sec_withdrawals_count': SecurityTransaction.objects.filter(
-            loan__loan_officer=officer, transaction_type='withdrawal', status='approved'
-        ).count(),
-        'sec_pending_count': SecurityTransaction.objects.filter(
-            loan__loan_officer=officer, status='pending'
-        ).count(),
+        'active_loans_with_security': security_loans,
+        'security_by_group': _group_loans_by_group(security_loans),
     }
 
-    # 1. Processing fees status
+    # Security summary counts, processing fees, applications, defaults,
+    # securities amounts and this month's performance
+    for key in (
+        'sec_deposits_count', 'sec_topups_count', 'sec_returns_count',
+        'sec_withdrawals_count', 'sec_pending_count',
+        'fees_pending_count', 'fees_verified_count',
+        'apps_pending', 'apps_approved', 'apps_rejected',
+        'default_loans_count', 'default_total_outstanding', 'default_collected_this_month',
+        'sec_total_held', 'sec_total_used', 'sec_total_returned', 'sec_total_available',
+        'month_disbursed', 'month_collected', 'month_new_clients', 'month_completed_loans',
+    ):
+        context[key] = metrics[key]
+
+    # 1. Processing fees awaiting verification
     from loans.models import LoanApplication
-    officer_apps = LoanApplication.objects.filter(loan_officer=officer, processing_fee__gt=0)
-    context['fees_pending_count'] = officer_apps.filter(processing_fee_verified=False).count()
-    context['fees_verified_count'] = officer_apps.filter(processing_fee_verified=True).count()
-    context['fees_pending_list'] = officer_apps.filter(
-        processing_fee_verified=False
+    context['fees_pending_list'] = LoanApplication.objects.filter(
+        loan_officer=officer, processing_fee__gt=0, processing_fee_verified=False
     ).select_related('borrower').order_by('-created_at')[:10]
 
-    # 2. Overdue clients list
-    from payments.models import PaymentSchedule as PS2
-    overdue_schedules = PS2.objects.filter(
-        Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        loan__status='active', is_paid=False, due_date__lt=today,
-    ).select_related('loan__borrower', 'loan').order_by('due_date').distinct()
-    overdue_clients = {}
-    for sched in overdue_schedules:
-        lid = sched.loan_id
-        if lid not in overdue_clients:
-            overdue_clients[lid] = {
-                'loan': sched.loan,
-                'days_overdue': (today - sched.due_date).days,
-                'overdue_amount': sched.total_amount - sched.amount_paid,
-            }
-    context['overdue_clients_list'] = sorted(overdue_clients.values(), key=lambda x: -x['days_overdue'])[:20]
-
     # 4. Loan applications status
     context['my_applications'] = LoanApplication.objects.filter(
         loan_officer=officer
     ).select_related('borrower').order_by('-created_at')[:15]
-    context['apps_pending'] = LoanApplication.objects.filter(loan_officer=officer, status='pending').count()
-    context['apps_approved'] = LoanApplication.objects.filter(loan_officer=officer, status='approved').count()
-    context['apps_rejected'] = LoanApplication.objects.filter(loan_officer=officer, status='rejected').count()
-
-    # 5. Default collections summary
-    from payments.models import DefaultCollection, PaymentSchedule
-    
-    # Get loans with overdue payments (practical approach)
-    # A loan is considered "defaulted" if it has unpaid schedules past their due date
-    overdue_schedules = PaymentSchedule.objects.filter(
-        Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        loan__status='active',
-        is_paid=False,
-        due_date__lt=today
-    ).select_related('loan').distinct()
-    
-    # Get unique defaulted loan IDs
-    defaulted_loan_ids = overdue_schedules.values_list('loan_id', flat=True).distinct()
-    default_loans = Loan.objects.filter(id__in=defaulted_loan_ids)
-    
-    context['default_loans_count'] = default_loans.count()
-    context['default_total_outstanding'] = default_loans.aggregate(
-        t=Sum('balance_remaining')
-    )['t'] or 0
-    context['default_collected_this_month'] = DefaultCollection.objects.filter(
-        Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        collection_date__gte=today.replace(day=1),
-    ).distinct().aggregate(t=Sum('amount_paid'))['t'] or 0
-
-    # 6. Securities amounts summary
-    from loans.models import SecurityDeposit as SD
-    sec_loans = Loan.objects.filter(
-        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
-        security_deposit__is_verified=True,
-    ).distinct()
-    sec_agg = SD.objects.filter(loan__in=sec_loans).aggregate(
-        total_paid=Sum('paid_amount'),
-        total_used=Sum('security_used'),
-        total_returned=Sum('security_returned'),
-    )
-    context['sec_total_held'] = sec_agg['total_paid'] or 0
-    context['sec_total_used'] = sec_agg['total_used'] or 0
-    context['sec_total_returned'] = sec_agg['total_returned'] or 0
-    context['sec_total_available'] = max(0, (sec_agg['total_paid'] or 0) - (sec_agg['total_used'] or 0) - (sec_agg['total_returned'] or 0))
-
-    # 7. This month's performance
-    month_start = today.replace(day=1)
-    context['month_disbursed'] = Loan.objects.filter(
-        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
-        disbursement_date__date__gte=month_start,
-    ).distinct().count()
-    context['month_collected'] = PaymentCollection.objects.filter(
-        Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        collection_date__gte=month_start,
-        collected_amount__gt=0,
-    ).distinct().aggregate(t=Sum('collected_amount'))['t'] or 0
-    context['month_new_clients'] = User.objects.filter(
-        Q(assigned_officer=officer) | Q(group_memberships__group__assigned_officer=officer),
-        role='borrower',
-        date_joined__date__gte=month_start,
-    ).distinct().count()
-    context['month_completed_loans'] = Loan.objects.filter(
-        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
-        status='completed',
-        updated_at__date__gte=month_start,
-    ).distinct().count()
 
     # Get filter parameters for overdue loans
-    officer_group_filter = request.GET.get('group', '')
+    officer_group_filter = group_filter
     limit = request.GET.get('limit', '5')  # Default to 5 records
     
     # Convert limit to int, handle 'all' case
@@ -538,47 +367,26 @@ def loan_officer_dashboard(request, officer=None):
     except:
         limit_int = 5
 
-    # Build overdue loans list
-    officer_active_loans = Loan.objects.filter(
-        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
-        status='active'
-    ).select_related('borrower', 'loan_officer').distinct()
-    
-    # Apply group filter
-    if officer_group_filter:
-        officer_active_loans = officer_active_loans.filter(
-            borrower__group_memberships__group_id=officer_group_filter,
-            borrower__group_memberships__is_active=True
-        )
-    
-    overdue_loans = []
-    for loan in officer_active_loans:
-        oldest = PS.objects.filter(loan=loan, is_paid=False, due_date__lt=today).order_by('due_date').first()
-        if oldest:
-            # Get borrower's group
-            membership = loan.borrower.group_memberships.filter(is_active=True).first()
-            group_name = membership.group.name if membership else 'No Group'
-            
-            overdue_loans.append({
-                'loan': loan,
-                'days_overdue': (today - oldest.due_date).days,
-                'balance': loan.balance_remaining or 0,
-                'group_name': group_name,
-            })
-    
-    # Always sort by days overdue (descending) - most overdue first
-    overdue_loans.sort(key=lambda x: -x['days_overdue'])
-    
-    # Store total count before limiting
-    total_overdue_count = len(overdue_loans)
-    
-    # Apply limit
+    # 2. Overdue clients list (officer-wide) and the overdue loans table
+    # (honours the group filter), both already sorted most overdue first
+    overdue_clients = metrics['overdue'][:20]
+    overdue_rows = cards['overdue']
+    total_overdue_count = len(overdue_rows)
     if limit_int:
-        overdue_loans_limited = overdue_loans[:limit_int]
-    else:
-        overdue_loans_limited = overdue_loans
-    
-    context['overdue_loans'] = overdue_loans_limited
+        overdue_rows = overdue_rows[:limit_int]
+    loans_by_id = Loan.objects.select_related('borrower', 'loan_officer').in_bulk(
+        {row['loan_id'] for row in overdue_clients} | {row['loan_id'] for row in overdue_rows}
+    )
+
+    context['overdue_clients_list'] = [
+        {'loan': loans_by_id[row['loan_id']], 'days_overdue': row['days_overdue'], 'overdue_amount': row['overdue_amount']}
+        for row in overdue_clients if row['loan_id'] in loans_by_id
+    ]
+    context['overdue_loans'] = [
+        {'loan': loans_by_id[row['loan_id']], 'days_overdue': row['days_overdue'],
+         'balance': row['balance'], 'group_name': row['group_name']}
+        for row in overdue_rows if row['loan_id'] in loans_by_id
+    ]
     context['total_overdue_count'] = total_overdue_count
     context['overdue_filters'] = {
         'group': officer_group_filter,
@@ -589,129 +397,93 @@ def loan_officer_dashboard(request, officer=None):
 
 
 @login_required
+@use_replica
 def admin_performance_report(request):
     """System-wide financial activity log for admins."""
     if request.user.role != 'admin' and not request.user.is_superuser:
         return render(request, 'dashboard/access_denied.html')
 
-    from django.db.models import Q, Sum
-    from loans.models import Loan, LoanApplication
-    from payments.models import PaymentCollection, DefaultCollection
-    from clients.models import Branch
-    from datetime import date, datetime
+    from dashboard import activity_feed
 
-    today = date.today()
-    date_from_str = request.GET.get('date_from', today.replace(day=1).isoformat())
-    date_to_str = request.GET.get('date_to', today.isoformat())
-    activity_type = request.GET.get('activity_type', '')
-    search = request.GET.get('search', '').strip()
-    branch_filter = request.GET.get('branch', '')
-    officer_filter = request.GET.get('officer', '')
-
-    try:
-        date_from = datetime.strptime(date_from_str, '%Y-%m-%d').date()
-        date_to = datetime.strptime(date_to_str, '%Y-%m-%d').date()
-    except Exception:
-        date_from = today.replace(day=1)
-        date_to = today
+    filters = activity_feed.activity_filters(request.GET)
+    after = activity_feed.decode_client_cursor(request.GET.get('after'))
 
     branches = Branch.objects.filter(is_active=True).order_by('name')
     all_officers = User.objects.filter(role='loan_officer', is_active=True).order_by('first_name')
 
-    loan_q = Q()
-    col_q = Q()
-    if branch_filter:
-        loan_q &= Q(loan_officer__officer_assignment__branch__iexact=branch_filter)
-        col_q &= Q(loan__loan_officer__officer_assignment__branch__iexact=branch_filter)
-    if officer_filter:
-        loan_q &= Q(loan_officer_id=officer_filter)
-        col_q &= Q(loan__loan_officer_id=officer_filter)
-
-    def _sl(qs):
-        if search:
-            return qs.filter(
-                Q(borrower__first_name__icontains=search) |
-                Q(borrower__last_name__icontains=search) |
-                Q(application_number__icontains=search)
-            )
-        return qs
+    # Clients are paged newest-activity first with a keyset cursor; totals
+    # and headline figures are grouped queries over the same UNION ALL feed.
+    client_groups, next_position = activity_feed.client_groups(filters, after=after)
+    totals = activity_feed.feed_totals(filters)
+    next_query = None
+    if next_position:
+        query = request.GET.copy()
+        query['after'] = activity_feed.encode_client_cursor(next_position)
+        next_query = query.urlencode()
+    export_query = request.GET.copy()
+    export_query.pop('after', None)
 
-    def _sc(qs):
-        if search:
-            return qs.filter(
-                Q(loan__borrower__first_name__icontains=search) |
-                Q(loan__borrower__last_name__icontains=search) |
-                Q(loan__application_number__icontains=search)
-            )
-        return qs
+    return render(request, 'dashboard/admin_performance_report.html', {
+        'date_from': filters['date_from'], 'date_to': filters['date_to'],
+        'activity_type': filters['activity_type'], 'search': filters['search'],
+        'branch_filter': filters['branch'], 'officer_filter': filters['officer'],
+        'branches': branches, 'all_officers': all_officers,
+        'total_amount': totals['total_amount'],
+        'activity_count': totals['activity_count'],
+        'client_count': totals['client_count'],
+        'client_groups': client_groups,
+        'is_first_page': after is None,
+        'next_query': next_query,
+        'export_query': export_query.urlencode(),
+        **activity_feed.summary(filters),
+    })
 
-    activities = []
 
-    if not activity_type or activity_type == 'disbursement':
-        for loan in _sl(Loan.objects.filter(loan_q, disbursement_date__date__gte=date_from, disbursement_date__date__lte=date_to).distinct().select_related('borrower', 'loan_officer')):
-            activities.append({'date': loan.disbursement_date.date() if loan.disbursement_date else None, 'type': 'Disbursement', 'type_color': 'blue', 'reference': loan.application_number, 'reference_url': f'/loans/{loan.pk}/', 'client': loan.borrower.get_full_name(), 'officer': loan.loan_officer.get_full_name() if loan.loan_officer else '—', 'branch': getattr(getattr(loan.loan_officer, 'officer_assignment', None), 'branch', '—') if loan.loan_officer else '—', 'amount': loan.principal_amount, 'status': 'Disbursed', 'status_color': 'blue'})
+@login_required
+@use_replica
+def admin_performance_report_export(request):
+    """Stream the admin activity log as CSV, in report order."""
+    if request.user.role != 'admin' and not request.user.is_superuser:
+        return render(request, 'dashboard/access_denied.html')
 
-    if not activity_type or activity_type == 'collection':
-        for c in _sc(PaymentCollection.objects.filter(col_q, collection_date__gte=date_from, collection_date__lte=date_to, collected_amount__gt=0).distinct().select_related('loan__borrower', 'loan__loan_officer')):
-            activities.append({'date': c.collection_date, 'type': 'Collection', 'type_color': 'green', 'reference': c.loan.application_number, 'reference_url': f'/loans/{c.loan.pk}/', 'client': c.loan.borrower.get_full_name(), 'officer': c.loan.loan_officer.get_full_name() if c.loan.loan_officer else '—', 'branch': getattr(getattr(c.loan.loan_officer, 'officer_assignment', None), 'branch', '—') if c.loan.loan_officer else '—', 'amount': c.collected_amount, 'status': 'Partial' if c.is_partial else 'Paid', 'status_color': 'yellow' if c.is_partial else 'green'})
+    import csv
+    from django.http import StreamingHttpResponse
+    from dashboard import activity_feed
 
-    if not activity_type or activity_type == 'default':
-        for dc in _sc(DefaultCollection.objects.filter(col_q, collection_date__gte=date_from, collection_date__lte=date_to).distinct().select_related('loan__borrower', 'loan__loan_officer')):
-            activities.append({'date': dc.collection_date, 'type': 'Default Collection', 'type_color': 'red', 'reference': dc.loan.application_number, 'reference_url': f'/loans/{dc.loan.pk}/', 'client': dc.loan.borrower.get_full_name(), 'officer': dc.loan.loan_officer.get_full_name() if dc.loan.loan_officer else '—', 'branch': getattr(getattr(dc.loan.loan_officer, 'officer_assignment', None), 'branch', '—') if dc.loan.loan_officer else '—', 'amount': dc.amount_paid, 'status': 'Collected', 'status_color': 'red'})
+    filters = activity_feed.activity_filters(request.GET)
 
-    if not activity_type or activity_type == 'completion':
-        for loan in _sl(Loan.objects.filter(loan_q, status='completed', updated_at__date__gte=date_from, updated_at__date__lte=date_to).distinct().select_related('borrower', 'loan_officer')):
-            activities.append({'date': loan.updated_at.date() if loan.updated_at else loan.maturity_date, 'type': 'Loan Completion', 'type_color': 'teal', 'reference': loan.application_number, 'reference_url': f'/loans/{loan.pk}/', 'client': loan.borrower.get_full_name(), 'officer': loan.loan_officer.get_full_name() if loan.loan_officer else '—', 'branch': getattr(getattr(loan.loan_officer, 'officer_assignment', None), 'branch', '—') if loan.loan_officer else '—', 'amount': loan.total_amount or loan.principal_amount, 'status': 'Completed', 'status_color': 'teal'})
+    class Echo:
+        def write(self, value):
+            return value
 
-    if not activity_type or activity_type == 'fee':
-        fee_q = Q(processing_fee__gt=0, created_at__date__gte=date_from, created_at__date__lte=date_to)
-        if branch_filter:
-            fee_q &= Q(loan_officer__officer_assignment__branch__iexact=branch_filter)
-        if officer_filter:
-            fee_q &= Q(loan_officer_id=officer_filter)
-        fee_qs = LoanApplication.objects.filter(fee_q).select_related('borrower', 'loan_officer')
-        if search:
-            fee_qs = fee_qs.filter(Q(borrower__first_name__icontains=search) | Q(borrower__last_name__icontains=search) | Q(application_number__icontains=search))
-        for app in fee_qs:
-            activities.append({'date': app.created_at.date(), 'type': 'Processing Fee', 'type_color': 'violet', 'reference': app.application_number, 'reference_url': f'/loans/applications/{app.pk}/approve/', 'client': app.borrower.get_full_name(), 'officer': app.loan_officer.get_full_name() if app.loan_officer else '—', 'branch': getattr(getattr(app.loan_officer, 'officer_assignment', None), 'branch', '—') if app.loan_officer else '—', 'amount': app.processing_fee, 'status': 'Verified' if app.processing_fee_verified else 'Pending', 'status_color': 'green' if app.processing_fee_verified else 'amber'})
+    writer = csv.writer(Echo())
 
-    activities.sort(key=lambda x: x['date'] or date.min, reverse=True)
-    total_amount = sum(a['amount'] for a in activities if a['amount'])
+    def rows():
+        yield writer.writerow(['Date', 'Type', 'Reference', 'Client', 'Officer', 'Branch', 'Amount', 'Status'])
+        chunk = []
+        for row in activity_feed.iter_activities(filters):
+            chunk.append(row)
+            if len(chunk) == 500:
+                yield from _activity_csv_rows(writer, activity_feed.decorate(chunk))
+                chunk = []
+        yield from _activity_csv_rows(writer, activity_feed.decorate(chunk))
 
-    # Group activities by client for expandable dropdown display
-    from collections import OrderedDict
-    client_groups = OrderedDict()
-    for a in activities:
-        key = a['client']
-        if key not in client_groups:
-            client_groups[key] = {'client': key, 'officer': a['officer'], 'branch': a['branch'], 'items': [], 'total': 0}
-        client_groups[key]['items'].append(a)
-        client_groups[key]['total'] += a['amount'] or 0
-    client_groups_list = list(client_groups.values())
+    response = StreamingHttpResponse(rows(), content_type='text/csv')
+    response['Content-Disposition'] = (
+        f'attachment; filename="activity_{filters["date_from"]:%Y%m%d}_{filters["date_to"]:%Y%m%d}.csv"'
+    )
+    return response
 
-    all_col = PaymentCollection.objects.filter(col_q, collection_date__gte=date_from, collection_date__lte=date_to, collected_amount__gt=0).distinct()
-    all_def = DefaultCollection.objects.filter(col_q, collection_date__gte=date_from, collection_date__lte=date_to).distinct()
-    all_dis = Loan.objects.filter(loan_q, disbursement_date__date__gte=date_from, disbursement_date__date__lte=date_to).distinct()
-    all_comp = Loan.objects.filter(loan_q, status='completed', updated_at__date__gte=date_from, updated_at__date__lte=date_to).distinct()
 
-    return render(request, 'dashboard/admin_performance_report.html', {
-        'date_from': date_from, 'date_to': date_to,
-        'activity_type': activity_type, 'search': search,
-        'branch_filter': branch_filter, 'officer_filter': officer_filter,
-        'branches': branches, 'all_officers': all_officers,
-        'activities': activities, 'total_amount': total_amount,
-        'activity_count': len(activities),
-        'client_groups': client_groups_list,
-        'disbursed_count': all_dis.count(),
-        'disbursed_amount': all_dis.aggregate(t=Sum('principal_amount'))['t'] or 0,
-        'total_collected': all_col.aggregate(t=Sum('collected_amount'))['t'] or 0,
-        'total_expected': all_col.aggregate(t=Sum('expected_amount'))['t'] or 0,
-        'completed_count': all_comp.count(),
-        'defaults_collected': all_def.aggregate(t=Sum('amount_paid'))['t'] or 0,
-    })
+def _activity_csv_rows(writer, activities):
+    for a in activities:
+        yield writer.writerow([
+            a['date'], a['type'], a['reference'], a['client'], a['officer'], a['branch'], a['amount'], a['status'],
+        ])
 
 
 @login_required
+@use_replica
 def manager_performance_report(request):
     """Branch-wide financial activity log for managers."""
     if request.user.role not in ['manager', 'admin'] and not request.user.is_superuser:
@@ -932,6 +704,7 @@ def officer_applications(request):
 
 
 @login_required
+@use_replica
 def officer_performance_report(request):
     """Dedicated performance report for loan officers with date filtering."""
     if request.user.role not in ['loan_officer', 'manager', 'admin'] and not request.user.is_superuser:
@@ -1183,87 +956,17 @@ def manager_dashboard(request):
     ).distinct().count()
     
     # Today's collections - include ALL payment types CREATED TODAY
+    # (Payment, PaymentCollection and MultiSchedulePayment, overlap-aware)
     today = date.today()
-    from django.utils import timezone
-    today_start = timezone.make_aware(timezone.datetime.combine(today, timezone.datetime.min.time()))
-    today_end = timezone.make_aware(timezone.datetime.combine(today, timezone.datetime.max.time()))
-    
-    # Method 1: Sum from Payment model (actual payment records created today)
-    from payments.models import Payment
-    today_payments = Payment.objects.filter(
-        loan__loan_officer__officer_assignment__branch=branch.name,
-        created_at__gte=today_start,
-        created_at__lte=today_end,
-        status='completed'
-    )
-    payments_total = today_payments.aggregate(total=Sum('amount'))['total'] or 0
-    
-    # Method 2: Sum from PaymentCollection model (collections created today)
-    today_collections_all = PaymentCollection.objects.filter(
-        loan__loan_officer__officer_assignment__branch=branch.name,
-        created_at__gte=today_start,
-        created_at__lte=today_end
-    ).distinct()
-    collections_total = sum(c.collected_amount for c in today_collections_all) or 0
-    
-    # Method 3: Sum from MultiSchedulePayment model (bulk payments created today)
-    from payments.models import MultiSchedulePayment
-    today_multi_payments = MultiSchedulePayment.objects.filter(
-        loan__loan_officer__officer_assignment__branch=branch.name,
-        created_at__gte=today_start,
-        created_at__lte=today_end,
-        status='approved'
-    )
-    multi_payments_total = today_multi_payments.aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    # Combine all payment sources (avoid double counting)
-    # Check if Payment and PaymentCollection overlap (same loans)
-    payment_loan_ids = set(today_payments.values_list('loan_id', flat=True))
-    collection_loan_ids = set(today_collections_all.values_list('loan_id', flat=True))
-    overlap_loan_ids = payment_loan_ids & collection_loan_ids
-    
-    if overlap_loan_ids:
-        # For overlapping loans, use the higher amount to avoid double-counting
-        overlap_payment_total = Payment.objects.filter(
-            loan_id__in=overlap_loan_ids,
-            created_at__gte=today_start,
-            created_at__lte=today_end,
-            status='completed'
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        overlap_collection_total = sum(
-            c.collected_amount for c in today_collections_all.filter(loan_id__in=overlap_loan_ids)
-        ) or 0
-        
-        # Non-overlapping amounts
-        non_overlap_payment = Payment.objects.filter(
-            loan_id__in=payment_loan_ids - overlap_loan_ids,
-            created_at__gte=today_start,
-            created_at__lte=today_end,
-            status='completed'
-        ).aggregate(total=Sum('amount'))['total'] or 0
-        
-        non_overlap_collection = sum(
-            c.collected_amount for c in today_collections_all.filter(loan_id__in=collection_loan_ids - overlap_loan_ids)
-        ) or 0
-        
-        today_collected = (
-            max(overlap_payment_total, overlap_collection_total) +
-            non_overlap_payment +
-            non_overlap_collection +
-            multi_payments_total
-        )
-    else:
-        # No overlap - simply add all sources
-        today_collected = payments_total + collections_total + multi_payments_total
+    from payments.services import cash_collected
+    today_collected = cash_collected(branch.name, today)
     
     # For EXPECTED: Only count active loans from PaymentCollection
-    today_collections_active = PaymentCollection.objects.filter(
+    today_expected = PaymentCollection.objects.filter(
         loan__loan_officer__officer_assignment__branch=branch.name,
         collection_date=today,
         loan__status='active'
-    ).distinct()
-    today_expected = sum(c.expected_amount for c in today_collections_active) or 0
+    ).aggregate(total=Sum('expected_amount'))['total'] or 0
     
     collection_rate = (today_collected / today_expected * 100) if today_expected > 0 else 0
     today_pending = max(0, today_expected - today_collected)
@@ -1857,6 +1560,14 @@ def admin_dashboard(request):
         date_joined__gte=date.today().replace(day=1)
     ).count()
 
+    # Today's cash collected per branch, one grouped query for all branches
+    from payments.services import cash_collected_by_branch
+    branch_cash = cash_collected_by_branch(date.today())
+    branch_cash_today = [
+        {'branch': name, 'amount': branch_cash.get(name, 0)}
+        for name in Branch.objects.filter(is_active=True).values_list('name', flat=True)
+    ]
+
     context = {
         'today': date.today(),
         'total_users': User.objects.count(),
@@ -1871,6 +1582,7 @@ def admin_dashboard(request):
         'new_signups': new_signups,
         'recent_users': User.objects.all().order_by('-date_joined')[:5],
         'recent_applications': recent_applications,
+        'branch_cash_today': branch_cash_today,
     }
     return render(request, 'dashboard/admin_dashboard.html', context)
 
@@ -1878,143 +1590,86 @@ def admin_dashboard(request):
 @login_required
 def borrower_dashboard(request):
     """Borrower Dashboard"""
+    from loans.account_summary import get_account_summary
+
     borrower = request.user
-    
-    # Get borrower's loans
-    loans = Loan.objects.filter(borrower=borrower)
-    active_loans = loans.filter(status='active').count()
-    completed_loans = loans.filter(status='completed').count()
-    pending_loans = active_loans  # Fix: Use active_loans instead of filtering for 'pending'
-    
-    # Get first active loan for quick payment action
-    first_active_loan = loans.filter(status='active').first()
-    
-    # Get upcoming payments
-    from payments.models import PaymentCollection
-    upcoming_payments = PaymentCollection.objects.filter(
-        loan__borrower=borrower,
-        status='scheduled'
-    ).order_by('collection_date')[:5]
-    
-    # Get total borrowed and repaid
-    total_borrowed = loans.filter(
-        status__in=['active', 'completed']
-    ).aggregate(total=Sum('principal_amount'))['total'] or 0
-    
-    total_repaid = PaymentCollection.objects.filter(
-        loan__borrower=borrower,
-        status='completed'
-    ).aggregate(total=Sum('collected_amount'))['total'] or 0
-    
+    summary = get_account_summary(borrower)
+
     # Get borrower's documents
     from documents.models import ClientDocument
-    borrower_documents = ClientDocument.objects.filter(client=borrower)
-    has_verified_documents = borrower_documents.filter(status='approved').exists()
-    
-    # Get borrower's security deposits for upfront payment tracking
-    from loans.models import SecurityDeposit
-    security_deposits = SecurityDeposit.objects.filter(loan__borrower=borrower).select_related('loan')
-    pending_deposits = security_deposits.filter(is_verified=False, paid_amount__gt=0)
-    verified_deposits = security_deposits.filter(is_verified=True)
-    
-    # Get rejected loans
-    rejected_loans = loans.filter(status='rejected')
-    
-    # Get recent notifications
-    from notifications.models import Notification
-    recent_notifications = Notification.objects.filter(
-        recipient=borrower
-    ).order_by('-created_at')[:5]
-    
-    # Get repayment schedule
-    from payments.models import PaymentSchedule
-    repayment_schedule = PaymentSchedule.objects.filter(
-        loan__borrower=borrower
-    ).order_by('due_date')
-    
-    # Get pending applications
-    pending_applications = loans.filter(status='pending').count()
-    
-    # Get approved loans awaiting upfront payment
-    approved_loans = loans.filter(status='approved')
-    loans_awaiting_upfront = []
-    for loan in approved_loans:
-        if not loan.upfront_payment_verified and loan.upfront_payment_paid == 0:
-            loans_awaiting_upfront.append(loan)
-    
-    # Get overdue payments
-    from payments.models import PaymentSchedule
-    overdue_payments = PaymentSchedule.objects.filter(
-        loan__borrower=borrower,
-        is_paid=False,
-        due_date__lt=timezone.now().date()
-    )
-    
-    # Get next payment due
-    next_payment = PaymentSchedule.objects.filter(
-        loan__borrower=borrower,
-        is_paid=False,
-        due_date__gte=timezone.now().date()
-    ).order_by('due_date').first()
-    
-    # Get loan status summary
-    loan_status_summary = {
-        'pending': loans.filter(status='pending').count(),
-        'approved': loans.filter(status='approved').count(),
-        'active': loans.filter(status='active').count(),
-        'completed': loans.filter(status='completed').count(),
-        'rejected': loans.filter(status='rejected').count(),
-        'defaulted': loans.filter(status='defaulted').count(),
-    }
-    
-    # Get total outstanding balance
-    from django.db.models import F, ExpressionWrapper, DecimalField as DField
-    outstanding_balance = loans.filter(status='active').aggregate(
-        total=Sum(
-            ExpressionWrapper(
-                F('total_amount') - F('amount_paid'),
-                output_field=DField(max_digits=14, decimal_places=2)
-            )
-        )
-    )['total'] or 0
-    
-    # Get recent loan activity (actual loans, not approval requests)
-    recent_approvals = loans.order_by('-application_date')[:5]
-    
-    # Get available loan types
-    available_loan_types = LoanType.objects.filter(is_active=True)
-    
+    has_verified_documents = ClientDocument.objects.filter(
+        client=borrower, status='approved'
+    ).exists()
+
+    user_loans = Loan.objects.filter(borrower=borrower).only(
+        'id', 'application_number', 'status', 'principal_amount', 'application_date'
+    )[:6]
+
     context = {
-        'total_loans': loans.count(),
-        'active_loans': active_loans,
-        'completed_loans': completed_loans,
-        'pending_loans': pending_loans,
-        'upcoming_payments': upcoming_payments,
-        'total_borrowed': total_borrowed,
-        'total_repaid': total_repaid,
+        'today': date.today(),
+        'summary': summary,
+        'total_loans': summary.total_loans,
+        'active_loans': summary.active_loans,
+        'completed_loans': summary.completed_loans,
+        'pending_applications': summary.pending_loans,
+        'total_borrowed': summary.total_borrowed,
+        'total_repaid': summary.total_repaid,
+        'outstanding_balance': summary.outstanding_balance,
         'has_verified_documents': has_verified_documents,
-        'rejected_loans': rejected_loans,
-        'recent_notifications': recent_notifications,
-        'borrower_documents': borrower_documents,
-        'repayment_schedule': repayment_schedule,
-        'pending_applications': pending_applications,
-        'user_loans': loans,
-        'loans_awaiting_upfront': loans_awaiting_upfront,
-        'overdue_payments': overdue_payments,
-        'next_payment': next_payment,
-        'security_deposits': security_deposits,
-        'pending_deposits': pending_deposits,
-        'verified_deposits': verified_deposits,
-        'loan_status_summary': loan_status_summary,
-        'outstanding_balance': outstanding_balance,
-        'recent_approvals': recent_approvals,
-        'available_loan_types': available_loan_types,
-        'first_active_loan': first_active_loan,
+        'user_loans': user_loans,
+        'first_active_loan': summary.first_active_loan,
+        'schedule_page': _borrower_schedule_page(borrower, request.GET.get('schedule_page')),
     }
-    
+
     return render(request, 'dashboard/borrower_dashboard.html', context)
 
 
+def _borrower_schedule_page(borrower, page_number, per_page=10):
+    """One page of the borrower's repayment schedule, earliest due first."""
+    from django.core.paginator import Paginator
+    from payments.models import PaymentSchedule
+
+    schedule = (
+        PaymentSchedule.objects
+        .filter(loan__borrower=borrower)
+        .select_related('loan')
+        .only(
+            'installment_number', 'due_date', 'total_amount', 'amount_paid', 'is_paid',
+            'loan__application_number',
+        )
+        .order_by('due_date', 'id')
+    )
+    return Paginator(schedule, per_page).get_page(page_number)
+
+
+@login_required
+def borrower_summary_api(request):
+    """Borrower account summary and one schedule page as JSON (mobile app)"""
+    from django.http import JsonResponse
+    from loans.account_summary import get_account_summary, summary_as_dict
+
+    summary = get_account_summary(request.user)
+    page = _borrower_schedule_page(request.user, request.GET.get('page'))
+    data = summary_as_dict(summary)
+    data['schedule'] = {
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+        'count': page.paginator.count,
+        'results': [
+            {
+                'loan': item.loan.application_number,
+                'installment_number': item.installment_number,
+                'due_date': item.due_date.isoformat(),
+                'total_amount': str(item.total_amount),
+                'amount_paid': str(item.amount_paid),
+                'is_paid': item.is_paid,
+            }
+            for item in page
+        ],
+    }
+    return JsonResponse(data)
+
+
 # Action Views for Dashboard Links
 
 @login_required
@@ -2178,6 +1833,71 @@ def pending_approvals(request):
     return render(request, 'dashboard/pending_approvals.html', context)
 
 
+def _selected_ids(request, name):
+    """Integer ids ticked in a bulk action form, ignoring anything malformed."""
+    ids = []
+    for value in request.POST.getlist(name):
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def _bulk_results(request, results, back_url, title):
+    """Render the per-item report of a bulk approval."""
+    approved = sum(1 for result in results if result['approved'])
+    return render(request, 'dashboard/bulk_approval_results.html', {
+        'title': title,
+        'results': results,
+        'approved_count': approved,
+        'failed_count': len(results) - approved,
+        'back_url': back_url,
+    })
+
+
+@login_required
+def bulk_approve_applications(request):
+    """Approve the selected pending loan applications in one batch"""
+    from loans.bulk_approval import bulk_approve_applications as approve_batch
+
+    if request.method != 'POST':
+        return redirect('dashboard:pending_approvals')
+    if request.user.role not in ['manager', 'admin']:
+        messages.error(request, 'Only managers and admins can approve loan applications.')
+        return redirect('dashboard:dashboard')
+
+    back_url = 'dashboard:admin_pending_approvals' if request.user.role == 'admin' else 'dashboard:pending_approvals'
+    application_ids = _selected_ids(request, 'application_ids')
+    if not application_ids:
+        messages.warning(request, 'Select at least one application to approve.')
+        return redirect(back_url)
+
+    results = approve_batch(request.user, application_ids, ip_address=get_client_ip(request))
+    return _bulk_results(request, results, back_url, 'Bulk Application Approval')
+
+
+@login_required
+def admin_bulk_loan_approve(request):
+    """Admin view: Approve the selected high-value loans in one batch"""
+    from loans.bulk_approval import bulk_approve_high_value
+
+    if request.user.role != 'admin':
+        return render(request, 'dashboard/access_denied.html')
+    if request.method != 'POST':
+        return redirect('dashboard:admin_pending_approvals')
+
+    loan_ids = _selected_ids(request, 'loan_ids')
+    if not loan_ids:
+        messages.warning(request, 'Select at least one loan to approve.')
+        return redirect('dashboard:admin_pending_approvals')
+
+    results = bulk_approve_high_value(
+        request.user, loan_ids, reason=request.POST.get('reason', ''), ip_address=get_client_ip(request)
+    )
+    return _bulk_results(request, results, 'dashboard:admin_pending_approvals', 'Bulk High-Value Loan Approval')
+
+
 @login_required
 def security_topup_action(request, pk):
     """Approve or reject a SecurityTopUpRequest."""
@@ -3335,6 +3055,7 @@ def delete_expense(request, expense_id):
 
 
 @login_required
+@use_replica
 def expense_report(request):
     """Generate expense report by category and date"""
     from expenses.models import Expense, ExpenseCode
@@ -3685,7 +3406,8 @@ def user_create(request):
             # Log user creation in AdminAuditLog (only for admins - managers skip this)
             if request.user.role == 'admin':
                 try:
-                    AdminAuditLog.objects.create(
+                    audit.record(
+                        AdminAuditLog,
                         admin_user=request.user,
                         action='other',
                         affected_user=new_user,
@@ -3880,7 +3602,7 @@ def admin_branch_detail(request, branch_id):
         officer_assignment__branch=branch.name
     )
     
-    groups = BorrowerGroup.objects.filter(branch=branch.name)
+    groups = list(annotate_group_metrics(BorrowerGroup.objects.filter(branch=branch.name)))
     
     # Calculate client count
     clients_count = sum(g.member_count for g in groups)
@@ -3900,7 +3622,7 @@ def admin_branch_detail(request, branch_id):
         'branch': branch,
         'officers_count': officers.count(),
         'officers': officers,
-        'groups_count': groups.count(),
+        'groups_count': len(groups),
         'groups': groups,
         'clients_count': clients_count,
         'total_disbursed': total_disbursed,
@@ -3971,7 +3693,8 @@ def admin_branch_create(request):
             )
             
             # Log creation in AdminAuditLog
-            AdminAuditLog.objects.create(
+            audit.record(
+                AdminAuditLog,
                 admin_user=user,
                 action='branch_create',
                 affected_branch=branch,
@@ -4087,7 +3810,8 @@ def admin_branch_edit(request, branch_id):
                     changes.append(f'{key}: {old_values[key]} → {new_values[key]}')
             
             if changes:
-                AdminAuditLog.objects.create(
+                audit.record(
+                    AdminAuditLog,
                     admin_user=user,
                     action='branch_update',
                     affected_branch=branch,
@@ -4143,7 +3867,8 @@ def admin_branch_deactivate(request, branch_id):
             branch.save()
             
             # Log deactivation
-            AdminAuditLog.objects.create(
+            audit.record(
+                AdminAuditLog,
                 admin_user=user,
                 action='branch_delete',
                 affected_branch=branch,
@@ -4393,7 +4118,8 @@ def admin_officer_transfer(request, officer_id=None):
             )
             
             # Create AdminAuditLog
-            AdminAuditLog.objects.create(
+            audit.record(
+                AdminAuditLog,
                 admin_user=user,
                 action='officer_transfer',
                 affected_user=officer,
@@ -4421,7 +4147,7 @@ def admin_officer_transfer(request, officer_id=None):
     branches = Branch.objects.filter(is_active=True).order_by('name')
     
     # Get officer's groups
-    officer_groups = officer.managed_groups.filter(is_active=True)
+    officer_groups = annotate_group_metrics(officer.managed_groups.filter(is_active=True))
     
     context = {
         'officer': officer,
@@ -4509,7 +4235,7 @@ def _branch_clients_groups(user):
     else:
         clients = User.objects.filter(role='borrower')
         groups = BorrowerGroup.objects.filter(is_active=True)
-    return clients, groups
+    return clients, annotate_group_metrics(groups)
 
 
 @login_required
@@ -4779,7 +4505,8 @@ def admin_client_transfer(request, client_id=None):
                         transferred_loans.append(loan)
                         
                         # Create loan transfer audit log
-                        AdminAuditLog.objects.create(
+                        audit.record(
+                            AdminAuditLog,
                             admin_user=user,
                             action='loan_transfer',
                             affected_user=client,
@@ -4799,7 +4526,8 @@ def admin_client_transfer(request, client_id=None):
             )
             
             # Create AdminAuditLog
-            AdminAuditLog.objects.create(
+            audit.record(
+                AdminAuditLog,
                 admin_user=user,
                 action='client_transfer',
                 affected_user=client,
@@ -4811,7 +4539,8 @@ def admin_client_transfer(request, client_id=None):
             
             # Add loan transfer info to description if loans were transferred
             if transferred_loans:
-                AdminAuditLog.objects.create(
+                audit.record(
+                    AdminAuditLog,
                     admin_user=user,
                     action='loan_transfer_batch',
                     affected_user=client,
@@ -4928,7 +4657,7 @@ def admin_override_assignment(request):
                 return render(request, 'dashboard/admin_override_assignment_form.html', {
                     'error': 'Client, destination group, and reason are required',
                     'clients': User.objects.filter(role='borrower'),
-                    'groups': BorrowerGroup.objects.filter(is_active=True),
+                    'groups': annotate_group_metrics(BorrowerGroup.objects.filter(is_active=True)),
                 })
             
             # Get client
@@ -4938,7 +4667,7 @@ def admin_override_assignment(request):
                 return render(request, 'dashboard/admin_override_assignment_form.html', {
                     'error': 'Client not found',
                     'clients': User.objects.filter(role='borrower'),
-                    'groups': BorrowerGroup.objects.filter(is_active=True),
+                    'groups': annotate_group_metrics(BorrowerGroup.objects.filter(is_active=True)),
                 })
             
             # Get destination group
@@ -4948,7 +4677,7 @@ def admin_override_assignment(request):
                 return render(request, 'dashboard/admin_override_assignment_form.html', {
                     'error': 'Destination group not found',
                     'clients': User.objects.filter(role='borrower'),
-                    'groups': BorrowerGroup.objects.filter(is_active=True),
+                    'groups': annotate_group_metrics(BorrowerGroup.objects.filter(is_active=True)),
                 })
             
             # Validate destination group is active
@@ -4956,7 +4685,7 @@ def admin_override_assignment(request):
                 return render(request, 'dashboard/admin_override_assignment_form.html', {
                     'error': 'Destination group is not active',
                     'clients': User.objects.filter(role='borrower'),
-                    'groups': BorrowerGroup.objects.filter(is_active=True),
+                    'groups': annotate_group_metrics(BorrowerGroup.objects.filter(is_active=True)),
                 })
             
             # Validate destination group is not at capacity
@@ -4964,7 +4693,7 @@ def admin_override_assignment(request):
                 return render(request, 'dashboard/admin_override_assignment_form.html', {
                     'error': f'Destination group is at capacity ({dest_group.member_count}/{dest_group.max_members})',
                     'clients': User.objects.filter(role='borrower'),
-                    'groups': BorrowerGroup.objects.filter(is_active=True),
+                    'groups': annotate_group_metrics(BorrowerGroup.objects.filter(is_active=True)),
                 })
             
             # Get current group membership
@@ -4988,7 +4717,8 @@ def admin_override_assignment(request):
             )
             
             # Create AdminAuditLog with override reason
-            AdminAuditLog.objects.create(
+            audit.record(
+                AdminAuditLog,
                 admin_user=user,
                 action='override_assignment',
                 affected_user=client,
@@ -5006,12 +4736,12 @@ def admin_override_assignment(request):
             return render(request, 'dashboard/admin_override_assignment_form.html', {
                 'error': f'Error overriding assignment: {str(e)}',
                 'clients': User.objects.filter(role='borrower'),
-                'groups': BorrowerGroup.objects.filter(is_active=True),
+                'groups': annotate_group_metrics(BorrowerGroup.objects.filter(is_active=True)),
             })
     
     context = {
         'clients': User.objects.filter(role='borrower'),
-        'groups': BorrowerGroup.objects.filter(is_active=True),
+        'groups': annotate_group_metrics(BorrowerGroup.objects.filter(is_active=True)),
     }
     return render(request, 'dashboard/admin_override_assignment_form.html', context)
 
@@ -5175,7 +4905,8 @@ def admin_loan_approve(request, loan_id):
         )
         
         # Create AdminAuditLog
-        AdminAuditLog.objects.create(
+        audit.record(
+            AdminAuditLog,
             admin_user=user,
             action='loan_approve',
             affected_user=loan.borrower,
@@ -5242,7 +4973,8 @@ def admin_loan_reject(request, loan_id):
         )
         
         # Create AdminAuditLog
-        AdminAuditLog.objects.create(
+        audit.record(
+            AdminAuditLog,
             admin_user=user,
             action='loan_reject',
             affected_user=loan.borrower,
@@ -5528,135 +5260,6 @@ def groups_permissions(request):
     return render(request, 'dashboard/admin/groups_permissions.html', context)
 
 
-@login_required
-def system_reports(request):
-    """System Reports View"""
-    if request.user.role != 'admin':
-        return render(request, 'dashboard/access_denied.html')
-    
-    from datetime import timedelta
-    from django.db.models import Count, Sum
-    from documents.models import ClientDocument
-    
-    # System health overview
-    total_users = User.objects.count()
-    total_loans = Loan.objects.count()
-    pending_documents = ClientDocument.objects.filter(status='pending').count()
-    
-    system_health = {
-        'total_users': total_users,
-        'total_loans': total_loans,
-        'pending_documents': pending_documents,
-    }
-    
-    # User activity (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    new_users_30d = User.objects.filter(date_joined__gte=thirty_days_ago).count()
-    active_users_30d = User.objects.filter(last_login__gte=thirty_days_ago).count()
-    total_logins = User.objects.filter(last_login__isnull=False).count()
-    
-    user_activity = {
-        'new_users_30d': new_users_30d,
-        'active_users_30d': active_users_30d,
-        'total_logins': total_logins,
-    }
-    
-    # Loan performance (last 30 days)
-    applications_30d = Loan.objects.filter(application_date__gte=thirty_days_ago).count()
-    approvals_30d = Loan.objects.filter(
-        approval_date__gte=thirty_days_ago,
-        approval_date__isnull=False
-    ).count()
-    approval_rate = (approvals_30d / applications_30d * 100) if applications_30d > 0 else 0
-    
-    loan_performance = {
-        'applications_30d': applications_30d,
-        'approvals_30d': approvals_30d,
-        'approval_rate': approval_rate,
-    }
-    
-    context = {
-        'system_health': system_health,
-        'user_activity': user_activity,
-        'loan_performance': loan_performance,
-    }
-    
-    return render(request, 'dashboard/admin/system_reports.html', context)
-
-
-@login_required
-def analytics(request):
-    """Analytics Dashboard"""
-    if request.user.role not in ['admin', 'manager']:
-        return render(request, 'dashboard/access_denied.html')
-    
-    # Get loan status distribution
-    loan_status_data = []
-    statuses = ['pending', 'approved', 'active', 'completed', 'rejected', 'disbursed']
-    for status in statuses:
-        count = Loan.objects.filter(status=status).count()
-        if count > 0:
-            loan_status_data.append({
-                'status': status,
-                'count': count
-            })
-    
-    # Get payment performance
-    from payments.models import PaymentCollection
-    all_collections = PaymentCollection.objects.all()
-    total_due = sum(c.expected_amount for c in all_collections) or 0
-    total_paid = sum(c.collected_amount for c in all_collections) or 0
-    collection_rate = (total_paid / total_due * 100) if total_due > 0 else 0
-    
-    payment_performance = {
-        'total_due': total_due,
-        'total_paid': total_paid,
-        'collection_rate': collection_rate,
-    }
-    
-    # Get monthly disbursements for last 12 months
-    from datetime import datetime, timedelta
-    from django.db.models import Count, Sum
-    
-    monthly_disbursements = []
-    today = date.today()
-    
-    for i in range(11, -1, -1):
-        # Calculate month start and end
-        month_start = today.replace(day=1) - timedelta(days=i*30)
-        month_start = month_start.replace(day=1)
-        
-        if i == 0:
-            month_end = today
-        else:
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        
-        # Get loans created/applied in this month (use application_date since disbursement_date may be null)
-        month_loans = Loan.objects.filter(
-            status__in=['active', 'completed', 'disbursed', 'approved'],
-            application_date__gte=month_start,
-            application_date__lte=month_end
-        )
-        
-        count = month_loans.count()
-        total = month_loans.aggregate(total=Sum('principal_amount'))['total'] or 0
-        
-        if count > 0:
-            monthly_disbursements.append({
-                'month': month_start.strftime('%B %Y'),
-                'count': count,
-                'total': total,
-            })
-    
-    context = {
-        'loan_status_data': loan_status_data,
-        'payment_performance': payment_performance,
-        'monthly_disbursements': monthly_disbursements,
-    }
-    
-    return render(request, 'dashboard/analytics.html', context)
-
-
 @login_required
 def loan_officer_document_verification(request):
     """Document verification dashboard for loan officers only"""
@@ -5870,134 +5473,7 @@ def manager_document_verification(request):
 # ─────────────────────────────────────────────────────────────────────────────
 
 @login_required
-def financial_summary(request):
-    """System-wide financial summary (admin only)."""
-    if request.user.role != 'admin':
-        return render(request, 'dashboard/access_denied.html')
-
-    from loans.models import SecurityDeposit
-    from payments.models import DefaultCollection
-    from expenses.models import VaultTransaction
-    from clients.models import Branch
-    from payments.models import PaymentSchedule
-    from datetime import datetime
-
-    # Get filter parameters
-    branch_filter = request.GET.get('branch', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-
-    # System-wide totals
-    total_capital = VaultTransaction.objects.filter(
-        transaction_type='capital_injection'
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    total_disbursed = Loan.objects.filter(
-        status__in=['active', 'completed']
-    ).aggregate(total=Sum('principal_amount'))['total'] or 0
-
-    total_repaid = PaymentCollection.objects.filter(
-        status='completed'
-    ).aggregate(total=Sum('collected_amount'))['total'] or 0
-
-    total_outstanding = (total_disbursed or 0) - (total_repaid or 0)
-
-    total_security = SecurityDeposit.objects.filter(
-        is_verified=True
-    ).aggregate(total=Sum('paid_amount'))['total'] or 0
-
-    total_default_collections = DefaultCollection.objects.aggregate(
-        total=Sum('amount_paid')
-    )['total'] or 0
-
-    # Per-branch breakdown
-    branches = Branch.objects.filter(is_active=True)
-    branch_rows = []
-    for branch in branches:
-        # FIXED: Use dual vault system - get total from both vaults
-        vault_balance = 0
-        try:
-            from loans.models import DailyVault, WeeklyVault
-            daily = DailyVault.objects.filter(branch=branch).first()
-            weekly = WeeklyVault.objects.filter(branch=branch).first()
-            vault_balance = (daily.balance if daily else 0) + (weekly.balance if weekly else 0)
-        except Exception:
-            pass
-
-        branch_loans = Loan.objects.filter(
-            Q(loan_officer__officer_assignment__branch=branch.name) |
-            Q(borrower__group_memberships__group__branch=branch.name)
-        ).distinct()
-
-        b_disbursed = branch_loans.filter(
-            status__in=['active', 'completed']
-        ).aggregate(total=Sum('principal_amount'))['total'] or 0
-
-        b_repaid = PaymentCollection.objects.filter(
-            loan__loan_officer__officer_assignment__branch=branch.name,
-            status='completed'
-        ).distinct().aggregate(total=Sum('collected_amount'))['total'] or 0
-
-        b_outstanding = (b_disbursed or 0) - (b_repaid or 0)
-        b_active = branch_loans.filter(status='active').count()
-
-        b_capital = VaultTransaction.objects.filter(
-            transaction_type='capital_injection',
-            branch=branch.name
-        ).aggregate(total=Sum('amount'))['total'] or 0
-
-        branch_rows.append({
-            'branch': branch,
-            'vault_balance': vault_balance,
-            'capital_injected': b_capital,
-            'disbursed': b_disbursed,
-            'repaid': b_repaid,
-            'outstanding': b_outstanding,
-            'active_loans': b_active,
-        })
-
-    # Capital injection history with filters
-    capital_history = VaultTransaction.objects.filter(
-        transaction_type='capital_injection'
-    )
-    
-    if branch_filter:
-        capital_history = capital_history.filter(branch=branch_filter)
-    
-    if date_from:
-        try:
-            date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
-            capital_history = capital_history.filter(transaction_date__gte=date_from_obj)
-        except ValueError:
-            pass
-    
-    if date_to:
-        try:
-            date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
-            capital_history = capital_history.filter(transaction_date__lte=date_to_obj)
-        except ValueError:
-            pass
-    
-    capital_history = capital_history.select_related('recorded_by').order_by('-transaction_date')[:100]
-
-    context = {
-        'total_capital': total_capital,
-        'total_disbursed': total_disbursed,
-        'total_repaid': total_repaid,
-        'total_outstanding': total_outstanding,
-        'total_security': total_security,
-        'total_default_collections': total_default_collections,
-        'branch_rows': branch_rows,
-        'capital_history': capital_history,
-        'branches': branches,
-        'branch_filter': branch_filter,
-        'date_from': date_from,
-        'date_to': date_to,
-    }
-    return render(request, 'dashboard/financial_summary.html', context)
-
-
-@login_required
+@use_replica
 def branch_comparison(request):
     """Side-by-side branch comparison (admin only)."""
     if request.user.role != 'admin':
@@ -6140,6 +5616,7 @@ def loan_aging(request):
 
 
 @login_required
+@use_replica
 def officer_performance(request):
     """Officer performance report (admin only)."""
     if request.user.role != 'admin':
@@ -6523,6 +6000,14 @@ def chronic_defaulters(request):
     today = date.today()
     # Borrowers with active loans where ALL overdue installments are unpaid
     active_loans = Loan.objects.filter(status='active').select_related('borrower', 'loan_officer')
+    if search:
+        # Match on the loan/borrower or on the borrower's group name
+        from search.services import filter_ids
+        active_loans = active_loans.filter(
+            Q(pk__in=filter_ids(search, 'loan')) |
+            Q(borrower__group_memberships__group_id__in=filter_ids(search, 'group'),
+              borrower__group_memberships__is_active=True)
+        ).distinct()
     
     defaulters = []
     for loan in active_loans:
@@ -6539,13 +6024,6 @@ def chronic_defaulters(request):
             
             group_name = membership.group.name if membership else 'No Group'
             
-            # Apply search filter
-            if search:
-                if not (search.lower() in group_name.lower() or
-                        search.lower() in loan.borrower.get_full_name().lower() or
-                        search.lower() in loan.application_number.lower()):
-                    continue
-            
             defaulters.append({
                 'loan': loan,
                 'overdue_count': overdue,
@@ -6703,6 +6181,7 @@ def manager_processing_fees(request):
 
 
 @login_required
+@use_replica
 def processing_fees_summary(request):
     """Processing fees collected per branch and officer."""
     if request.user.role != 'admin' and not request.user.is_superuser:
@@ -7142,173 +6621,85 @@ def view_officer_dashboard(request, officer_id):
             return redirect('dashboard:manager_dashboard')
     
     today = date.today()
+
+    # Counts and totals come from the same cached snapshot as the officer's
+    # own dashboard
+    from dashboard.officer_snapshot import OfficerDashboardSnapshot
+    metrics = OfficerDashboardSnapshot(officer, today=today).get()
+    cards = metrics['cards']
+
+    officer_loans = Loan.objects.filter(
+        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer)
+    ).values('id')
     
     # Get officer's groups
-    groups = BorrowerGroup.objects.filter(
+    groups = annotate_group_metrics(BorrowerGroup.objects.filter(
         assigned_officer=officer,
         is_active=True
-    ).order_by('-created_at')[:5]
-    
-    # Get officer's clients
-    clients = User.objects.filter(
-        Q(group_memberships__group__assigned_officer=officer, group_memberships__is_active=True) |
-        Q(assigned_officer=officer),
-        role='borrower'
-    ).distinct()
-    
-    # Get active loans
-    active_loans = Loan.objects.filter(
-        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
-        status='active'
-    ).distinct()
-    
-    # Today's collections
-    today_collections = PaymentCollection.objects.filter(
-        loan__loan_officer=officer,
-        collection_date=today
-    )
-    today_expected = today_collections.aggregate(t=Sum('expected_amount'))['t'] or 0
-    today_collected = today_collections.filter(status='completed').aggregate(t=Sum('collected_amount'))['t'] or 0
+    )).order_by('-created_at')[:5]
     
     # Overdue loans
-    from payments.models import PaymentSchedule
-    overdue_schedules = PaymentSchedule.objects.filter(
-        Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        loan__status='active',
-        is_paid=False,
-        due_date__lt=today
-    ).select_related('loan__borrower', 'loan').order_by('due_date').distinct()
-    
-    overdue_clients = {}
-    for sched in overdue_schedules:
-        lid = sched.loan_id
-        if lid not in overdue_clients:
-            overdue_clients[lid] = {
-                'loan': sched.loan,
-                'days_overdue': (today - sched.due_date).days,
-                'overdue_amount': sched.total_amount - sched.amount_paid,
-            }
-    overdue_loans_list = sorted(overdue_clients.values(), key=lambda x: -x['days_overdue'])[:10]
-    
-    # Outstanding balance
-    outstanding_balance = active_loans.aggregate(t=Sum('balance_remaining'))['t'] or 0
+    overdue_rows = metrics['overdue'][:10]
+    loans_by_id = Loan.objects.select_related('borrower').in_bulk([row['loan_id'] for row in overdue_rows])
+    overdue_loans_list = [
+        {'loan': loans_by_id[row['loan_id']], 'days_overdue': row['days_overdue'], 'overdue_amount': row['overdue_amount']}
+        for row in overdue_rows if row['loan_id'] in loans_by_id
+    ]
     
     # Pending security deposits
     pending_security = Loan.objects.filter(
-        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
+        id__in=officer_loans,
         status='approved',
         security_deposit__isnull=False,
         security_deposit__is_verified=False,
-    ).select_related('borrower', 'security_deposit').distinct()
+    ).select_related('borrower', 'security_deposit')
     
     # Ready to disburse
     ready_to_disburse = Loan.objects.filter(
-        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
+        id__in=officer_loans,
         status='approved',
         upfront_payment_verified=True,
-    ).select_related('borrower').distinct()
-    
-    # Default collections summary
-    overdue_schedules_for_default = PaymentSchedule.objects.filter(
-        Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        loan__status='active',
-        is_paid=False,
-        due_date__lt=today
-    ).select_related('loan').distinct()
-    
-    defaulted_loan_ids = overdue_schedules_for_default.values_list('loan_id', flat=True).distinct()
-    default_loans = Loan.objects.filter(id__in=defaulted_loan_ids)
-    
-    from payments.models import DefaultCollection
-    default_loans_count = default_loans.count()
-    default_total_outstanding = default_loans.aggregate(t=Sum('balance_remaining'))['t'] or 0
-    default_collected_this_month = DefaultCollection.objects.filter(
-        Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        collection_date__gte=today.replace(day=1),
-    ).distinct().aggregate(t=Sum('amount_paid'))['t'] or 0
-    
-    # This month's performance
-    month_start = today.replace(day=1)
-    month_disbursed = Loan.objects.filter(
-        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
-        disbursement_date__date__gte=month_start,
-    ).distinct().count()
-    
-    month_collected = PaymentCollection.objects.filter(
-        Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        collection_date__gte=month_start,
-        status='completed'
-    ).distinct().aggregate(t=Sum('collected_amount'))['t'] or 0
+    ).select_related('borrower')
     
     # Loans pending upfront payment (approved but no upfront paid yet)
     pending_upfront = Loan.objects.filter(
-        Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer),
+        id__in=officer_loans,
         status='approved',
         upfront_payment_paid=0,
-    ).select_related('borrower').distinct()
-    
-    # Security management counts
-    from loans.models import SecurityTransaction
-    pending_sec_returns = SecurityTransaction.objects.filter(
-        Q(loan__loan_officer=officer) | 
-        Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        transaction_type='return',
-        status='pending'
-    ).distinct().count()
-    
-    pending_sec_adjustments = SecurityTransaction.objects.filter(
-        Q(loan__loan_officer=officer) |
-        Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        transaction_type='adjustment',
-        status='pending'
-    ).distinct().count()
-    
-    pending_sec_topups = SecurityTransaction.objects.filter(
-        Q(loan__loan_officer=officer) |
-        Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        transaction_type='top_up',
-        status='pending'
-    ).distinct().count()
-    
-    pending_sec_withdrawals = SecurityTransaction.objects.filter(
-        Q(loan__loan_officer=officer) |
-        Q(loan__borrower__group_memberships__group__assigned_officer=officer),
-        transaction_type='withdrawal',
-        status='pending'
-    ).distinct().count()
+    ).select_related('borrower')
     
     # Clients expected to pay today
     clients_expected_today = PaymentCollection.objects.filter(
-        Q(loan__loan_officer=officer) | Q(loan__borrower__group_memberships__group__assigned_officer=officer),
+        loan_id__in=officer_loans,
         collection_date=today,
         status__in=['pending', 'partial']
-    ).select_related('loan__borrower').distinct()[:10]
+    ).select_related('loan__borrower')[:10]
     
     context = {
         'officer': officer,
         'viewing_as_manager': True,
-        'groups_count': groups.count(),
-        'clients_count': clients.count(),
-        'active_loans_count': active_loans.count(),
-        'today_expected': today_expected,
-        'today_collected': today_collected,
-        'today_pending': today_expected - today_collected,
-        'today_defaults': len(overdue_clients),
+        'groups_count': cards['groups_count'],
+        'clients_count': cards['clients_count'],
+        'active_loans_count': cards['active_loans_count'],
+        'today_expected': cards['today_expected'],
+        'today_collected': cards['today_collected'],
+        'today_pending': cards['today_pending'],
+        'today_defaults': cards['today_defaults'],
         'groups': groups,
         'pending_security': pending_security,
         'ready_to_disburse': ready_to_disburse,
         'pending_upfront': pending_upfront,
-        'outstanding_balance': outstanding_balance,
+        'outstanding_balance': cards['outstanding_balance'],
         'overdue_clients_list': overdue_loans_list,
-        'default_loans_count': default_loans_count,
-        'default_total_outstanding': default_total_outstanding,
-        'default_collected_this_month': default_collected_this_month,
-        'month_disbursed': month_disbursed,
-        'month_collected': month_collected,
-        'pending_sec_returns': pending_sec_returns,
-        'pending_sec_adjustments': pending_sec_adjustments,
-        'pending_sec_topups': pending_sec_topups,
-        'pending_sec_withdrawals': pending_sec_withdrawals,
+        'default_loans_count': metrics['default_loans_count'],
+        'default_total_outstanding': metrics['default_total_outstanding'],
+        'default_collected_this_month': metrics['default_collected_this_month'],
+        'month_disbursed': metrics['month_disbursed'],
+        'month_collected': metrics['month_collected'],
+        'pending_sec_returns': metrics['pending_sec_returns'],
+        'pending_sec_adjustments': metrics['pending_sec_adjustments'],
+        'pending_sec_topups': metrics['pending_sec_topups'],
+        'pending_sec_withdrawals': metrics['pending_sec_withdrawals'],
         'clients_expected_today': clients_expected_today,
         'today': today,
     }
@@ -0,0 +1,207 @@
+"""
+Expense analytics.
+
+monthly_totals() returns approved expense totals per (category, month,
+branch) from one GROUP BY; the report view rolls those rows up for its
+category and overall figures. branch_flows() returns vault inflows and
+outflows per branch from one conditional-sum query.
+
+With settings.EXPENSES_MONTHLY_SUMMARY enabled, months that are closed
+(before the current month) and lie wholly inside the requested date range
+are read from ExpenseMonthlySummary rows; only the remaining days hit the
+expense table. The summarize_expenses command rebuilds the summary and is
+meant to run nightly (or after back-dated expenses are approved).
+"""
+
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+# Transaction types counted by the branch balance report.
+INFLOW_TYPES = ('deposit', 'payment_collection')
+OUTFLOW_TYPES = ('withdrawal', 'loan_disbursement')
+
+# Columns of the streamed CSV export: (header, Expense value path)
+EXPORT_COLUMNS = (
+    ('Date', 'expense_date'),
+    ('Title', 'title'),
+    ('Category', 'category__name'),
+    ('Expense Code', 'expense_code__code'),
+    ('Branch', 'branch'),
+    ('Amount', 'amount'),
+    ('Status', 'status'),
+    ('Recorded By', 'recorded_by__username'),
+)
+
+
+def _parse_date(value):
+    if isinstance(value, date) or not value:
+        return value or None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def expense_filters(params):
+    """
+    Normalise report filters from a GET dict: start_date/end_date as dates
+    (invalid values are ignored), category as an id and branch as given.
+    """
+    category = params.get('category')
+    return {
+        'start_date': _parse_date(params.get('start_date')),
+        'end_date': _parse_date(params.get('end_date')),
+        'category': int(category) if category and str(category).isdigit() else None,
+        'branch': params.get('branch') or None,
+    }
+
+
+def approved_expenses(filters):
+    """Approved expenses matching the expense_filters() dict."""
+    from .models import Expense
+
+    queryset = Expense.objects.filter(status='approved')
+    if filters['start_date']:
+        queryset = queryset.filter(expense_date__gte=filters['start_date'])
+    if filters['end_date']:
+        queryset = queryset.filter(expense_date__lte=filters['end_date'])
+    if filters['category']:
+        queryset = queryset.filter(category_id=filters['category'])
+    if filters['branch']:
+        queryset = queryset.filter(branch=filters['branch'])
+    return queryset
+
+
+def _summary_months(filters, today):
+    """
+    [first, last) month starts that can be read from the summary: closed
+    months wholly inside the date range. None when the summary is disabled
+    or no such month exists.
+    """
+    if not getattr(settings, 'EXPENSES_MONTHLY_SUMMARY', False):
+        return None
+    start, end = filters['start_date'], filters['end_date']
+    first = None if start is None else (start if start.day == 1 else _next_month(start))
+    last = _month_start(today)
+    if end is not None:
+        after_end = end + timedelta(days=1)
+        last = min(last, after_end if after_end.day == 1 else _month_start(end))
+    if first is not None and first >= last:
+        return None
+    return first, last
+
+
+def monthly_totals(filters, today=None):
+    """
+    Approved expense totals grouped by category, month and branch.
+
+    Returns dicts with category_id, category_name, month (first day),
+    branch, total and count, ordered by month, category name and branch.
+    """
+    from .models import ExpenseMonthlySummary
+
+    today = today or timezone.localdate()
+    live = approved_expenses(filters)
+    rows = []
+
+    months = _summary_months(filters, today)
+    if months:
+        first, last = months
+        summaries = ExpenseMonthlySummary.objects.filter(month__lt=last)
+        if first:
+            summaries = summaries.filter(month__gte=first)
+            live = live.filter(Q(expense_date__lt=first) | Q(expense_date__gte=last))
+        else:
+            live = live.filter(expense_date__gte=last)
+        if filters['category']:
+            summaries = summaries.filter(category_id=filters['category'])
+        if filters['branch']:
+            summaries = summaries.filter(branch=filters['branch'])
+        rows.extend(summaries.values(
+            'category_id', 'month', 'branch', 'total',
+            category_name=Coalesce('category__name', Value('')),
+            count=F('expense_count'),
+        ))
+
+    rows.extend(
+        live.order_by()
+        .values('category_id', 'branch', month=TruncMonth('expense_date'))
+        .annotate(
+            category_name=Coalesce('category__name', Value('')),
+            total=Sum('amount'),
+            count=Count('id'),
+        )
+    )
+    rows.sort(key=lambda row: (row['month'], row['category_name'], row['branch']))
+    return rows
+
+
+def branch_flows():
+    """
+    {branch: {'inflows', 'outflows', 'balance'}} over all vault
+    transactions, in one grouped query ordered by branch.
+    """
+    from .models import VaultTransaction
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    zero = Value(0, output_field=money)
+    rows = (
+        VaultTransaction.objects.order_by('branch').values('branch')
+        .annotate(
+            inflows=Coalesce(Sum('amount', filter=Q(transaction_type__in=INFLOW_TYPES)), zero),
+            outflows=Coalesce(Sum('amount', filter=Q(transaction_type__in=OUTFLOW_TYPES)), zero),
+        )
+    )
+    return {
+        row['branch']: {
+            'inflows': row['inflows'],
+            'outflows': row['outflows'],
+            'balance': row['inflows'] - row['outflows'],
+        }
+        for row in rows
+    }
+
+
+def refresh_monthly_summaries(today=None, batch_size=1000):
+    """
+    Rebuild ExpenseMonthlySummary for every closed month from approved
+    expenses; returns the number of summary rows written.
+    """
+    from .models import Expense, ExpenseMonthlySummary
+
+    today = today or timezone.localdate()
+    closed = Expense.objects.filter(status='approved', expense_date__lt=_month_start(today))
+    rows = (
+        closed.order_by()
+        .values('category_id', 'branch', month=TruncMonth('expense_date'))
+        .annotate(total=Sum('amount'), expense_count=Count('id'))
+    )
+    now = timezone.now()
+    summaries = [
+        ExpenseMonthlySummary(
+            month=row['month'],
+            category_id=row['category_id'],
+            branch=row['branch'],
+            total=row['total'],
+            expense_count=row['expense_count'],
+            computed_at=now,
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        ExpenseMonthlySummary.objects.all().delete()
+        ExpenseMonthlySummary.objects.bulk_create(summaries, batch_size=batch_size)
+    return len(summaries)
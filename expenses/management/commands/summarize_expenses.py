@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from expenses.analytics import refresh_monthly_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the per-month expense totals read by the expense report for '
+        'closed months when EXPENSES_MONTHLY_SUMMARY is enabled (run nightly)'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Summary rows per bulk insert (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        count = refresh_monthly_summaries(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Expense monthly summary rebuilt with {count} row(s)'))
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0015_add_processing_fee_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('branch', models.CharField(max_length=100)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense_count', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='expenses.expensecategory')),
+            ],
+            options={
+                'verbose_name': 'Expense Monthly Summary',
+                'verbose_name_plural': 'Expense Monthly Summaries',
+                'ordering': ['-month', 'branch'],
+                'unique_together': {('month', 'branch', 'category')},
+            },
+        ),
+    ]
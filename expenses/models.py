@@ -269,6 +269,32 @@ class VaultTransaction(models.Model):
 
 
 
+class ExpenseMonthlySummary(models.Model):
+    """Approved expense totals per closed month, branch and category, rebuilt by summarize_expenses"""
+    
+    month = models.DateField(help_text='First day of the month')
+    branch = models.CharField(max_length=100)
+    category = models.ForeignKey(
+        ExpenseCategory,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='monthly_summaries'
+    )
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_count = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-month', 'branch']
+        unique_together = ['month', 'branch', 'category']
+        verbose_name = 'Expense Monthly Summary'
+        verbose_name_plural = 'Expense Monthly Summaries'
+    
+    def __str__(self):
+        return f"{self.month:%b %Y} - {self.branch} - {self.category or 'Uncategorised'}: K{self.total}"
+
+
 class ExpenseApprovalLog(models.Model):
     """Log all expense approvals and rejections"""
     
@@ -0,0 +1,119 @@
+"""
+Tests for grouped expense analytics, the monthly summary and the CSV export.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from dashboard.tests.factories import AdminFactory, VaultTransactionFactory
+from expenses.models import Expense, ExpenseCategory, ExpenseMonthlySummary
+
+
+def _expense(category, amount, day, branch='Main', status='approved'):
+    return Expense.objects.create(
+        category=category, title='Expense', description='Expense', amount=Decimal(amount),
+        branch=branch, expense_date=day, status=status,
+    )
+
+
+@pytest.fixture
+def expenses():
+    rent, fuel = (ExpenseCategory.objects.create(name=name) for name in ('Rent', 'Fuel'))
+    retired = ExpenseCategory.objects.create(name='Retired', is_active=False)
+    this_month = timezone.localdate().replace(day=1)
+    last_month = (this_month - timedelta(days=1)).replace(day=1)
+    _expense(rent, '500.00', last_month)
+    _expense(rent, '250.00', last_month + timedelta(days=3), branch='East')
+    _expense(fuel, '80.00', last_month + timedelta(days=9))
+    _expense(fuel, '20.00', this_month)
+    _expense(retired, '40.00', this_month)
+    _expense(rent, '900.00', this_month, status='pending')
+    return {'rent': rent, 'fuel': fuel, 'last_month': last_month, 'this_month': this_month}
+
+
+def _report(client, **params):
+    return client.get(reverse('expenses:report'), params).context
+
+
+@pytest.mark.django_db
+class TestExpenseAnalytics:
+
+    def test_report_totals(self, client, expenses):
+        client.force_login(AdminFactory())
+        context = _report(client)
+
+        assert context['category_totals'] == {'Fuel': Decimal('100.00'), 'Rent': Decimal('750.00')}
+        assert context['total_expenses'] == Decimal('850.00')
+        assert context['average_expense'] == Decimal('170.00')
+        rows = {(row['category_name'], row['month'], row['branch']): row['total'] for row in context['monthly_rows']}
+        assert rows[('Rent', expenses['last_month'], 'East')] == Decimal('250.00')
+        assert len(rows) == 5
+
+        filtered = _report(client, branch='East', start_date=str(expenses['last_month']))
+        assert filtered['category_totals'] == {'Rent': Decimal('250.00')}
+
+    def test_report_queries_do_not_grow_with_categories(self, client, expenses):
+        client.force_login(AdminFactory())
+
+        def run():
+            with CaptureQueriesContext(connection) as ctx:
+                client.get(reverse('expenses:report'))
+            return len(ctx.captured_queries)
+
+        run()  # warm the cached user
+        before = run()
+        for index in range(4):
+            category = ExpenseCategory.objects.create(name=f'Category {index}')
+            _expense(category, '10.00', expenses['last_month'], branch=f'Branch {index}')
+        assert run() == before
+
+    def test_closed_months_read_from_summary(self, client, expenses):
+        client.force_login(AdminFactory())
+        live = _report(client)['monthly_rows']
+
+        call_command('summarize_expenses', stdout=StringIO())
+        assert ExpenseMonthlySummary.objects.count() == 3
+
+        with override_settings(EXPENSES_MONTHLY_SUMMARY=True):
+            assert _report(client)['monthly_rows'] == live
+            # Closed-month totals come from the summary, not the live rows.
+            Expense.objects.filter(expense_date__lt=expenses['this_month']).update(amount=Decimal('1.00'))
+            assert _report(client)['category_totals'] == {'Fuel': Decimal('100.00'), 'Rent': Decimal('750.00')}
+            # A partial month is always read live.
+            partial = _report(client, start_date=str(expenses['last_month'] + timedelta(days=1)))
+            assert partial['category_totals'] == {'Fuel': Decimal('21.00'), 'Rent': Decimal('1.00')}
+
+    def test_branch_balance(self, client):
+        client.force_login(AdminFactory())
+        VaultTransactionFactory(branch='Main', transaction_type='deposit', amount=Decimal('300.00'))
+        VaultTransactionFactory(branch='Main', transaction_type='loan_disbursement', amount=Decimal('120.00'))
+        VaultTransactionFactory(branch='East', transaction_type='expense', amount=Decimal('50.00'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            context = client.get(reverse('expenses:branch-balance')).context
+        balances = context['branch_balances']
+
+        assert balances['Main'] == {
+            'inflows': Decimal('300.00'), 'outflows': Decimal('120.00'), 'balance': Decimal('180.00'),
+        }
+        assert balances['East']['balance'] == 0
+        assert context['total_balance'] == Decimal('180.00')
+        assert sum('expenses_vaulttransaction' in query['sql'] for query in ctx.captured_queries) == 1
+
+    def test_csv_export_streams_filtered_rows(self, client, expenses):
+        client.force_login(AdminFactory())
+        response = client.get(reverse('expenses:report-export'), {'category': expenses['rent'].pk})
+
+        assert response.streaming
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0].startswith('Date,Title,Category')
+        assert len(lines) == 3
+        assert all(',Rent,' in line for line in lines[1:])
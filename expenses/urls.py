@@ -10,6 +10,7 @@ urlpatterns = [
     path('<int:pk>/edit/', views.ExpenseUpdateView.as_view(), name='edit'),
     path('<int:pk>/delete/', views.ExpenseDeleteView.as_view(), name='delete'),
     path('report/', views.ExpenseReportView.as_view(), name='report'),
+    path('report/export/', views.ExpenseExportView.as_view(), name='report-export'),
     
     # Vault Transaction URLs
     path('vault-transactions/', views.VaultTransactionListView.as_view(), name='vault-transactions'),
@@ -1,6 +1,8 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required, permission_required
+from django.http import StreamingHttpResponse
+from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
 from django.contrib import messages
 from django.urls import reverse_lazy
@@ -169,40 +171,32 @@ class ExpenseReportView(LoginRequiredMixin, TemplateView):
     template_name = 'expenses/expense_report.html'
     
     def get_context_data(self, **kwargs):
+        from .analytics import approved_expenses, expense_filters, monthly_totals
+
         context = super().get_context_data(**kwargs)
+        filters = expense_filters(self.request.GET)
         
-        # Get filter parameters
-        start_date = self.request.GET.get('start_date')
-        end_date = self.request.GET.get('end_date')
-        category_id = self.request.GET.get('category')
-        branch = self.request.GET.get('branch')
-        
-        # Build queryset
-        queryset = Expense.objects.filter(is_approved=True)
+        # Category x month x branch totals in one grouped query
+        monthly_rows = monthly_totals(filters)
+        categories = ExpenseCategory.objects.filter(is_active=True)
+        active = {category.pk: category.name for category in categories}
         
-        if start_date:
-            queryset = queryset.filter(expense_date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(expense_date__lte=end_date)
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        if branch:
-            queryset = queryset.filter(branch=branch)
-        
-        # Aggregate by category
+        # Roll up by category (active categories only, in name order)
         category_totals = {}
-        for category in ExpenseCategory.objects.filter(is_active=True):
-            total = queryset.filter(category=category).aggregate(Sum('amount'))['amount__sum'] or Decimal('0')
-            if total > 0:
-                category_totals[category.name] = total
+        for row in sorted(monthly_rows, key=lambda row: row['category_name']):
+            if row['category_id'] in active:
+                name = active[row['category_id']]
+                category_totals[name] = category_totals.get(name, Decimal('0')) + row['total']
+        category_totals = {name: total for name, total in category_totals.items() if total > 0}
         
         context['category_totals'] = category_totals
+        context['monthly_rows'] = monthly_rows
         context['total_expenses'] = sum(category_totals.values()) if category_totals else Decimal('0')
-        context['categories'] = ExpenseCategory.objects.filter(is_active=True)
-        context['expenses'] = queryset
+        context['categories'] = categories
+        context['expenses'] = approved_expenses(filters).select_related('category')
         
         # Calculate average expense
-        expense_count = queryset.count()
+        expense_count = sum(row['count'] for row in monthly_rows)
         if expense_count > 0:
             context['average_expense'] = context['total_expenses'] / expense_count
         else:
@@ -211,6 +205,37 @@ class ExpenseReportView(LoginRequiredMixin, TemplateView):
         return context
 
 
+class ExpenseExportView(LoginRequiredMixin, View):
+    """Stream the filtered report rows as CSV without loading them into memory"""
+    
+    def get(self, request):
+        import csv
+        from .analytics import EXPORT_COLUMNS, approved_expenses, expense_filters
+
+        class Echo:
+            def write(self, value):
+                return value
+
+        writer = csv.writer(Echo())
+        rows = (
+            approved_expenses(expense_filters(request.GET))
+            .order_by('-expense_date', '-id')
+            .values_list(*(path for _header, path in EXPORT_COLUMNS))
+            .iterator(chunk_size=2000)
+        )
+
+        def stream():
+            yield writer.writerow([header for header, _path in EXPORT_COLUMNS])
+            for row in rows:
+                yield writer.writerow(row)
+
+        response = StreamingHttpResponse(stream(), content_type='text/csv')
+        response['Content-Disposition'] = (
+            f'attachment; filename="expenses_{timezone.localdate():%Y%m%d}.csv"'
+        )
+        return response
+
+
 class VaultTransactionListView(LoginRequiredMixin, ListView):
     """List all vault transactions"""
     model = VaultTransaction
@@ -277,30 +302,12 @@ class BranchBalanceView(LoginRequiredMixin, TemplateView):
     template_name = 'expenses/branch_balance.html'
     
     def get_context_data(self, **kwargs):
+        from .analytics import branch_flows
+
         context = super().get_context_data(**kwargs)
         
-        # Get all unique branches
-        branches = VaultTransaction.objects.values_list('branch', flat=True).distinct()
-        
-        branch_balances = {}
-        for branch in branches:
-            # Calculate inflows and outflows
-            inflows = VaultTransaction.objects.filter(
-                branch=branch,
-                transaction_type__in=['deposit', 'payment_collection']
-            ).aggregate(Sum('amount'))['amount__sum'] or Decimal('0')
-            
-            outflows = VaultTransaction.objects.filter(
-                branch=branch,
-                transaction_type__in=['withdrawal', 'loan_disbursement']
-            ).aggregate(Sum('amount'))['amount__sum'] or Decimal('0')
-            
-            balance = inflows - outflows
-            branch_balances[branch] = {
-                'inflows': inflows,
-                'outflows': outflows,
-                'balance': balance
-            }
+        # Inflows and outflows for every branch in one grouped query
+        branch_balances = branch_flows()
         
         context['branch_balances'] = branch_balances
         context['total_balance'] = sum(b['balance'] for b in branch_balances.values())
@@ -0,0 +1,173 @@
+"""
+Borrower account summaries - the per-borrower totals behind the borrower
+dashboard and its JSON endpoint.
+
+The summary row is recomputed from a handful of aggregate queries whenever
+one of the borrower's loans, payments, collections or schedules changes
+(see loans.signals). Refreshes are deferred to transaction commit (or the
+end of the request) and de-duplicated, so recording a payment - which also
+touches the collection, the schedule and the loan - recomputes the summary
+once.
+
+Next-due and overdue figures depend on the date, so a row computed on an
+earlier day is refreshed when it is next read.
+"""
+
+from decimal import Decimal
+
+from django.db import IntegrityError
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum
+from django.utils import timezone
+
+from common.commit_batch import CommitBatch
+
+LOAN_STATUSES = ('pending', 'approved', 'active', 'completed', 'rejected', 'defaulted')
+
+
+def compute_account_summary(borrower_id, today=None):
+    """Field values for a borrower's summary row (four queries)."""
+    from payments.models import PaymentCollection, PaymentSchedule
+    from .models import Loan
+
+    today = today or timezone.now().date()
+    outstanding = ExpressionWrapper(
+        F('total_amount') - F('amount_paid'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+    loan_totals = Loan.objects.filter(borrower_id=borrower_id).aggregate(
+        total_loans=Count('id'),
+        loans_awaiting_upfront=Count('id', filter=Q(
+            status='approved', upfront_payment_verified=False, upfront_payment_paid=0,
+        )),
+        total_borrowed=Sum('principal_amount', filter=Q(status__in=['active', 'completed'])),
+        outstanding_balance=Sum(outstanding, filter=Q(status='active')),
+        # Loans are listed newest first, so the latest active loan is the "first" one.
+        first_active_loan_id=Max('id', filter=Q(status='active')),
+        **{
+            f'{status}_loans': Count('id', filter=Q(status=status))
+            for status in LOAN_STATUSES
+        },
+    )
+
+    total_repaid = PaymentCollection.objects.filter(
+        loan__borrower_id=borrower_id, status='completed'
+    ).aggregate(total=Sum('collected_amount'))['total']
+
+    unpaid = PaymentSchedule.objects.filter(loan__borrower_id=borrower_id, is_paid=False)
+    overdue_count = unpaid.filter(due_date__lt=today).count()
+    next_due = unpaid.filter(due_date__gte=today).order_by('due_date').values(
+        'due_date', 'total_amount'
+    ).first()
+
+    values = dict(loan_totals)
+    values.update(
+        total_borrowed=values['total_borrowed'] or Decimal('0'),
+        outstanding_balance=values['outstanding_balance'] or Decimal('0'),
+        total_repaid=total_repaid or Decimal('0'),
+        overdue_count=overdue_count,
+        next_due_date=next_due['due_date'] if next_due else None,
+        next_due_amount=next_due['total_amount'] if next_due else None,
+        computed_on=today,
+    )
+    return values
+
+
+def refresh_account_summary(borrower_id, today=None):
+    """Recompute and store a borrower's summary row; returns it."""
+    from .models import BorrowerAccountSummary
+
+    values = compute_account_summary(borrower_id, today=today)
+    try:
+        summary, _ = BorrowerAccountSummary.objects.update_or_create(borrower_id=borrower_id, defaults=values)
+    except IntegrityError:
+        # Two first loads raced to insert the row; the other one's is just as fresh.
+        summary = BorrowerAccountSummary.objects.get(borrower_id=borrower_id)
+    return summary
+
+
+def get_account_summary(borrower):
+    """The borrower's summary row, (re)computed if missing or from an earlier day."""
+    from .models import BorrowerAccountSummary
+
+    today = timezone.now().date()
+    summary = (
+        BorrowerAccountSummary.objects
+        .filter(borrower=borrower)
+        .select_related('first_active_loan')
+        .first()
+    )
+    if summary is None or summary.computed_on != today:
+        summary = refresh_account_summary(borrower.pk, today=today)
+    return summary
+
+
+def discard_account_summaries(borrower_ids):
+    """
+    Drop summary rows after bulk updates that bypass the model signals.
+
+    The rows are rebuilt by get_account_summary on the borrower's next visit,
+    which keeps set-based jobs from recomputing every affected borrower.
+    """
+    from .models import BorrowerAccountSummary
+
+    return BorrowerAccountSummary.objects.filter(borrower_id__in=borrower_ids).delete()[0]
+
+
+def schedule_refresh(borrower_id=None, loan_id=None):
+    """
+    Refresh a summary once the current transaction commits (or the current
+    request finishes; see common.commit_batch).
+
+    Pass the borrower when it is known, otherwise the loan; loans are
+    resolved to borrowers in one query when the batch is flushed.
+    """
+    if borrower_id:
+        _refresh_batch.add(('borrower', borrower_id))
+    if loan_id:
+        _refresh_batch.add(('loan', loan_id))
+
+
+def _flush(items):
+    from django.contrib.auth import get_user_model
+    from .models import Loan
+
+    borrower_ids = {pk for kind, pk in items if kind == 'borrower'}
+    loan_ids = {pk for kind, pk in items if kind == 'loan'}
+    if loan_ids:
+        borrower_ids.update(
+            Loan.objects.filter(pk__in=loan_ids).values_list('borrower_id', flat=True)
+        )
+    if not borrower_ids:
+        return
+    # Skip borrowers deleted in the same transaction.
+    existing = get_user_model().objects.filter(pk__in=borrower_ids).values_list('pk', flat=True)
+    for borrower_id in sorted(existing):
+        refresh_account_summary(borrower_id)
+
+
+_refresh_batch = CommitBatch(_flush)
+
+
+def summary_as_dict(summary):
+    """JSON-ready representation of a summary row."""
+    def money(value):
+        return None if value is None else str(value)
+
+    return {
+        'loans': {
+            **{status: getattr(summary, f'{status}_loans') for status in LOAN_STATUSES},
+            'total': summary.total_loans,
+            'awaiting_upfront': summary.loans_awaiting_upfront,
+            'first_active_loan_id': summary.first_active_loan_id,
+        },
+        'total_borrowed': money(summary.total_borrowed),
+        'total_repaid': money(summary.total_repaid),
+        'outstanding_balance': money(summary.outstanding_balance),
+        'next_payment': {
+            'due_date': summary.next_due_date.isoformat(),
+            'amount': money(summary.next_due_amount),
+        } if summary.next_due_date else None,
+        'overdue_count': summary.overdue_count,
+        'updated_at': summary.updated_at.isoformat(),
+    }
@@ -0,0 +1,431 @@
+"""
+Bulk approval of loan applications and high-value loans.
+
+Approving one item at a time costs a loan insert, the security deposit
+signal, log and audit inserts and a notification per item. These
+functions validate a selected batch up front and then write each kind of
+row with one bulk_create (or one UPDATE) inside a single transaction.
+Work normally done by Loan/SecurityDeposit signals - account summaries,
+officer dashboard caches and the search index - is done once for the
+whole batch. Borrower notifications are inserted with the batch; approval
+emails go out from a background thread after the transaction commits.
+
+Both functions return one result per requested id, in request order:
+
+    {'id': ..., 'reference': ..., 'approved': True/False, 'message': ...}
+"""
+
+import logging
+import threading
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DateTimeField, DecimalField, F, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SECURITY_RATE = Decimal('0.10')
+
+
+def _result(pk, reference, approved, message):
+    return {'id': pk, 'reference': reference, 'approved': approved, 'message': message}
+
+
+def _report(ids, results):
+    """Order results like the request; ids that matched nothing are reported as not found."""
+    by_id = {result['id']: result for result in results}
+    return [by_id.get(pk) or _result(pk, '', False, 'Not found.') for pk in ids]
+
+
+def _officer_branch(officer):
+    try:
+        return officer.officer_assignment.branch
+    except Exception:
+        return None
+
+
+def _manager_branch(user):
+    try:
+        return user.managed_branch
+    except Exception:
+        return None
+
+
+def _case(values, output_field):
+    """CASE pk WHEN ... THEN ... for a per-row value in a single UPDATE."""
+    return Case(
+        *[When(pk=pk, then=Value(value)) for pk, value in values.items()],
+        output_field=output_field,
+    )
+
+
+def _default_loan_type():
+    """The loan type applications are booked under (same fallback as the single approval)."""
+    from .models import LoanType
+
+    loan_type = LoanType.objects.filter(is_active=True).first()
+    if loan_type is None:
+        loan_type = LoanType.objects.create(
+            name='Standard',
+            description='Standard loan',
+            interest_rate=Decimal('45.00'),
+            min_amount=Decimal('100.00'),
+            max_amount=Decimal('1000000.00'),
+            repayment_frequency='daily',
+            is_active=True,
+        )
+    return loan_type
+
+
+def _carry_forward_sources(borrower_ids):
+    """Each borrower's most recently updated completed loan with verified security."""
+    from .models import Loan
+
+    sources = {}
+    previous_loans = (
+        Loan.objects
+        .filter(borrower_id__in=borrower_ids, status='completed', security_deposit__is_verified=True)
+        .select_related('security_deposit')
+        .order_by('-updated_at')
+    )
+    for loan in previous_loans:
+        sources.setdefault(loan.borrower_id, loan)
+    return sources
+
+
+def _loan_for_application(application, loan_type, number, now):
+    """An unsaved Loan with the terms ApproveLoanApplicationView books."""
+    from .models import Loan
+
+    frequency = application.repayment_frequency
+    loan = Loan(
+        application_number=number,
+        borrower=application.borrower,
+        loan_officer=application.loan_officer,
+        loan_type=loan_type,
+        principal_amount=application.loan_amount,
+        purpose=application.purpose,
+        status='approved',
+        repayment_frequency=frequency,
+        interest_rate=Decimal('40.00') if frequency == 'daily' else Decimal('45.00'),
+        term_days=application.duration_days if frequency == 'daily' else None,
+        term_weeks=(application.duration_days // 7) if frequency == 'weekly' else None,
+        payment_amount=Decimal('0'),
+        approval_date=application.created_at,
+        approval_recorded_at=now,
+    )
+    loan.calculate_amounts()
+    return loan
+
+
+def _notify(loans, now):
+    """Insert in-app notifications now and send approval emails once the batch commits."""
+    from notifications.models import Notification, NotificationTemplate
+
+    template = NotificationTemplate.objects.filter(notification_type='loan_approved', is_active=True).first()
+    notifications = []
+    for loan in loans:
+        if template:
+            subject = template.subject
+            message = template.message_template.format(
+                loan_number=loan.application_number, amount=loan.principal_amount
+            )
+        else:
+            subject = 'Loan Approved'
+            message = f'Your loan application {loan.application_number} for K{loan.principal_amount} has been approved.'
+        notifications.append(Notification(
+            recipient=loan.borrower,
+            template=template,
+            subject=subject,
+            message=message,
+            channel='in_app',
+            recipient_address=loan.borrower.email or '',
+            scheduled_at=now,
+            loan=loan,
+            status='sent',
+        ))
+    Notification.objects.bulk_create(notifications)
+
+    recipients = [loan for loan in loans if loan.borrower.email]
+    if recipients:
+        transaction.on_commit(
+            lambda: threading.Thread(target=_send_approval_emails, args=(recipients,), daemon=True).start()
+        )
+
+
+def _send_approval_emails(loans):
+    from django.db import connection
+    from common.email_utils import send_loan_approved_email
+
+    try:
+        for loan in loans:
+            try:
+                send_loan_approved_email(loan)
+            except Exception:
+                logger.exception('Error sending approval email for loan %s', loan.application_number)
+    finally:
+        connection.close()
+
+
+def _after_loan_changes(loan_ids, borrower_ids):
+    """What the Loan/SecurityDeposit signals would have done for each saved row."""
+    from dashboard.officer_snapshot import invalidate_officer_dashboard
+    from .account_summary import schedule_refresh
+    from .models import Loan
+
+    for borrower_id in borrower_ids:
+        schedule_refresh(borrower_id=borrower_id)
+    officer_ids = set()
+    for loan_officer_id, group_officer_id in Loan.objects.filter(pk__in=loan_ids).values_list(
+        'loan_officer_id', 'borrower__group_memberships__group__assigned_officer_id'
+    ):
+        officer_ids.update((loan_officer_id, group_officer_id))
+    invalidate_officer_dashboard(*officer_ids)
+
+
+def bulk_approve_applications(user, application_ids, ip_address=None):
+    """
+    Approve pending loan applications and book their loans in one transaction.
+
+    Mirrors ApproveLoanApplicationView for every application in the batch:
+    managers may only approve applications from their branch, a recorded
+    processing fee must be verified, daily loans get a verified zero
+    security deposit and weekly loans carry forward security from the
+    borrower's last completed loan where available.
+    """
+    from clients.models import AdminAuditLog
+    from search.documents import index_new_loans
+    from .models import ApprovalLog, Loan, LoanApplication, SecurityDeposit, SecurityTransaction
+
+    ids = list(dict.fromkeys(application_ids))
+    branch = _manager_branch(user) if user.role == 'manager' else None
+    now = timezone.now()
+    results = []
+
+    with transaction.atomic():
+        applications = (
+            LoanApplication.objects
+            .select_for_update()
+            .filter(pk__in=ids)
+            .select_related('borrower', 'loan_officer__officer_assignment')
+            .order_by('created_at', 'pk')
+        )
+        batch = []
+        for application in applications:
+            reference = application.application_number
+            if application.status != 'pending':
+                results.append(_result(
+                    application.pk, reference, False,
+                    f'Application is already {application.get_status_display().lower()}.'
+                ))
+            elif user.role == 'manager' and (
+                branch is None or _officer_branch(application.loan_officer) != branch.name
+            ):
+                results.append(_result(
+                    application.pk, reference, False, 'You can only approve applications from your branch.'
+                ))
+            elif application.processing_fee and not application.processing_fee_verified:
+                results.append(_result(
+                    application.pk, reference, False,
+                    f'Processing fee of K{application.processing_fee:,.2f} has not been verified.'
+                ))
+            else:
+                batch.append(application)
+
+        if not batch:
+            return _report(ids, results)
+
+        loan_type = _default_loan_type()
+        sources = _carry_forward_sources({application.borrower_id for application in batch})
+        available = {loan.pk: loan.security_deposit.available_security for loan in sources.values()}
+        numbers = Loan.next_application_numbers(len(batch))
+
+        loans, carries = [], []
+        for application, number in zip(batch, numbers):
+            loan = _loan_for_application(application, loan_type, number, now)
+            previous, carry = None, Decimal('0')
+            if loan.repayment_frequency == 'daily':
+                loan.upfront_payment_verified = True
+            elif application.borrower_id in sources:
+                previous = sources[application.borrower_id]
+                carry = min(available[previous.pk], loan.upfront_payment_required)
+                available[previous.pk] -= carry
+                if carry > 0 and carry >= loan.upfront_payment_required:
+                    loan.upfront_payment_paid = carry
+                    loan.upfront_payment_verified = True
+            loans.append(loan)
+            carries.append((previous, carry))
+
+        Loan.objects.bulk_create(loans)
+        # Not every backend returns primary keys from a bulk insert.
+        loan_ids = dict(Loan.objects.filter(application_number__in=numbers).values_list('application_number', 'id'))
+        for loan in loans:
+            loan.pk = loan_ids[loan.application_number]
+
+        # Loans are dated from their application, as in the single approval.
+        created = _case({loan.pk: application.created_at for loan, application in zip(loans, batch)}, DateTimeField())
+        Loan.objects.filter(pk__in=loan_ids.values()).update(application_date=created, created_at=created)
+
+        SecurityDeposit.objects.bulk_create([
+            SecurityDeposit(
+                loan=loan,
+                required_amount=loan.upfront_payment_required or Decimal('0'),
+                paid_amount=carry,
+                is_verified=loan.upfront_payment_verified,
+                verification_date=now if loan.upfront_payment_verified else None,
+            )
+            for loan, (previous, carry) in zip(loans, carries)
+        ])
+
+        carried = [(loan, application, previous, carry) for loan, application, (previous, carry)
+                   in zip(loans, batch, carries) if carry > 0]
+        if carried:
+            SecurityTransaction.objects.bulk_create([
+                SecurityTransaction(
+                    loan=previous,
+                    transaction_type='carry_forward',
+                    amount=carry,
+                    notes=f'Carried forward to top-up loan {loan.application_number}',
+                    initiated_by=application.loan_officer,
+                    status='approved',
+                    approved_by=application.loan_officer,
+                    approved_at=now,
+                )
+                for loan, application, previous, carry in carried
+            ])
+            used = {}
+            for loan, application, previous, carry in carried:
+                used[previous.security_deposit.pk] = used.get(previous.security_deposit.pk, Decimal('0')) + carry
+            SecurityDeposit.objects.filter(pk__in=used).update(
+                security_used=F('security_used') + _case(used, DecimalField(max_digits=12, decimal_places=2)),
+                updated_at=now,
+            )
+
+        LoanApplication.objects.filter(pk__in=[application.pk for application in batch]).update(
+            status='approved', approved_by=user, approval_date=now, updated_at=now,
+        )
+
+        branch_name = branch.name if branch else ''
+        ApprovalLog.objects.bulk_create([
+            ApprovalLog(
+                approval_type='loan_approval',
+                loan=loan,
+                manager=user,
+                action='approve',
+                comments=f'Bulk approval of application {application.application_number}',
+                branch=branch_name or _officer_branch(application.loan_officer) or '',
+            )
+            for loan, application in zip(loans, batch)
+        ])
+        if user.role == 'admin':
+            AdminAuditLog.objects.bulk_create([
+                AdminAuditLog(
+                    admin_user=user,
+                    action='loan_approve',
+                    affected_user=application.borrower,
+                    description=(
+                        f'Approved application {application.application_number} as loan '
+                        f'{loan.application_number} for K{loan.principal_amount}'
+                    ),
+                    new_value='status: approved',
+                    ip_address=ip_address,
+                )
+                for loan, application in zip(loans, batch)
+            ])
+
+        _notify(loans, now)
+        index_new_loans(loans)
+        _after_loan_changes(
+            list(loan_ids.values()) + [previous.pk for previous, carry in carries if carry > 0],
+            {loan.borrower_id for loan in loans},
+        )
+
+    for loan, application in zip(loans, batch):
+        if loan.repayment_frequency == 'daily':
+            message = f'Loan {loan.application_number} created (daily loan - no security required).'
+        elif loan.upfront_payment_verified:
+            message = f'Loan {loan.application_number} created - security carried forward, ready to disburse.'
+        else:
+            message = f'Loan {loan.application_number} created - awaiting 10% upfront payment.'
+        results.append(_result(application.pk, application.application_number, True, message))
+    return _report(ids, results)
+
+
+def bulk_approve_high_value(user, loan_ids, reason='', ip_address=None):
+    """
+    Approve high-value loans waiting in the admin approval queue.
+
+    Mirrors admin_loan_approve for every loan in the batch: the queue entry
+    is decided, the loan moves to approved (creating the security deposit
+    its save signal would have), and approval and admin audit rows are
+    written.
+    """
+    from clients.models import AdminAuditLog, ApprovalAuditLog, LoanApprovalQueue
+    from .models import Loan, SecurityDeposit
+
+    ids = list(dict.fromkeys(loan_ids))
+    now = timezone.now()
+    results = []
+
+    with transaction.atomic():
+        entries = (
+            LoanApprovalQueue.objects
+            .select_for_update()
+            .filter(loan_id__in=ids)
+            .select_related('loan__borrower', 'loan__security_deposit')
+        )
+        batch = []
+        for entry in entries:
+            if entry.status != 'pending':
+                results.append(_result(
+                    entry.loan_id, entry.loan.application_number, False,
+                    f'Loan is already {entry.get_status_display().lower()}.'
+                ))
+            else:
+                batch.append(entry)
+
+        if not batch:
+            return _report(ids, results)
+
+        loans = [entry.loan for entry in batch]
+        batch_loan_ids = [loan.pk for loan in loans]
+        LoanApprovalQueue.objects.filter(pk__in=[entry.pk for entry in batch]).update(
+            status='approved', decided_by=user, decision_date=now, decision_reason=reason,
+        )
+        Loan.objects.filter(pk__in=batch_loan_ids).update(status='approved', updated_at=now)
+
+        SecurityDeposit.objects.bulk_create([
+            SecurityDeposit(
+                loan=loan,
+                required_amount=loan.principal_amount * SECURITY_RATE,
+                paid_amount=loan.upfront_payment_paid or Decimal('0'),
+                payment_date=loan.upfront_payment_date,
+                is_verified=loan.upfront_payment_verified,
+            )
+            for loan in loans
+            if loan.repayment_frequency != 'daily' and not hasattr(loan, 'security_deposit')
+        ])
+
+        ApprovalAuditLog.objects.bulk_create([
+            ApprovalAuditLog(loan=loan, action='approved', performed_by=user, reason=reason, ip_address=ip_address)
+            for loan in loans
+        ])
+        AdminAuditLog.objects.bulk_create([
+            AdminAuditLog(
+                admin_user=user,
+                action='loan_approve',
+                affected_user=loan.borrower,
+                description=f'Approved high-value loan {loan.id} for K{loan.principal_amount}',
+                new_value=f'status: approved, reason: {reason}',
+                ip_address=ip_address,
+            )
+            for loan in loans
+        ])
+
+        _notify(loans, now)
+        _after_loan_changes(batch_loan_ids, {loan.borrower_id for loan in loans})
+
+    for loan in loans:
+        results.append(_result(loan.pk, loan.application_number, True, 'Approved for disbursement.'))
+    return _report(ids, results)
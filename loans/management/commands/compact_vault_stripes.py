@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from loans.vault_posting import compact_stripes, stripe_count
+
+
+class Command(BaseCommand):
+    help = (
+        'Fold striped vault balance counters back into the daily/weekly vault rows '
+        '(run every few minutes when VAULT_BALANCE_STRIPES is above 1)'
+    )
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        count = compact_stripes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Compacted stripes into {count} vault(s) ({stripe_count()} stripe(s) per vault configured)'
+        ))
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from loans.vault_backfill import (
+    SOURCES, apply_backfill, current_vault_balances, plan_backfill, summarize_plan,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Find verified security deposits and completed payments missing from the '
+        'vault ledger and backfill them in bulk (idempotent)'
+    )
+
+    # Subclasses pin the source types they reconcile.
+    sources = SOURCES
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show the rows and balance changes that would be made without writing anything'
+        )
+        if len(self.sources) > 1:
+            parser.add_argument(
+                '--source',
+                action='append',
+                choices=SOURCES,
+                help='Only reconcile this source type (repeatable; default: all)'
+            )
+        parser.add_argument(
+            '--branch',
+            action='append',
+            default=[],
+            help='Only reconcile this branch (repeatable)'
+        )
+        parser.add_argument(
+            '--since',
+            help='Only reconcile source records dated on or after YYYY-MM-DD'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Vault rows per bulk insert (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        sources = options.get('source') or self.sources
+        since = None
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        plan = plan_backfill(sources=sources, since=since, branches=options['branch'])
+        entries = plan['entries']
+        self.stdout.write(
+            f'Missing vault rows: {len(entries)} '
+            f'({", ".join(s.replace("_", " ") for s in sources)})'
+        )
+
+        for entry in plan['unresolved']:
+            self.stdout.write(self.style.ERROR(
+                f'FAILED: {entry["application_number"]} {entry["source"]} '
+                f'K{entry["amount"]:,.2f} — branch not found'
+            ))
+
+        if dry_run or options['verbosity'] >= 2:
+            prefix = '[DRY RUN] + ' if dry_run else '+ '
+            for entry in entries:
+                date = entry['date'].strftime('%Y-%m-%d') if entry['date'] else 'today'
+                self.stdout.write(
+                    f'{prefix}{date} {entry["reference_number"]} {entry["application_number"]} '
+                    f'K{entry["amount"]:,.2f} -> {entry["branch"].name} {entry["vault_type"]} vault'
+                )
+
+        if dry_run:
+            summary = summarize_plan(plan, current_vault_balances())
+        else:
+            summary = apply_backfill(plan, batch_size=options['batch_size'])
+
+        for (branch, vault_type), stats in summary.items():
+            self.stdout.write(self.style.SUCCESS(
+                f'{"[DRY RUN] " if dry_run else ""}{branch} {vault_type} vault: '
+                f'{stats["count"]} row(s), +K{stats["amount"]:,.2f}, '
+                f'balance K{stats["balance_before"]:,.2f} -> K{stats["balance_after"]:,.2f}'
+            ))
+
+        if not entries:
+            self.stdout.write(self.style.SUCCESS('Vault ledger is up to date'))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING('This was a dry run. Run without --dry-run to apply changes.'))
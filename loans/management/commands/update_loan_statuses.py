@@ -1,12 +1,28 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
 from django.utils import timezone
 from datetime import date, timedelta
+from accounts.models import User
+from clients.models import GroupMembership
+from common import fragment_cache
+from dashboard.officer_snapshot import invalidate_officer_dashboard
+from loans.account_summary import discard_account_summaries
 from loans.models import Loan
 from payments.models import PaymentSchedule
 
 
 class Command(BaseCommand):
     help = 'Update loan statuses based on payment history and overdue status'
+    requires_system_checks = []
+
+    # Fields loaded for each loan that changes status; enough to build the
+    # notification without touching the Loan or User rows again.
+    LOAN_FIELDS = (
+        'id', 'application_number', 'total_amount', 'balance_remaining',
+        'loan_officer_id', 'borrower_id', 'borrower__first_name', 'borrower__last_name',
+        'borrower__email', 'borrower__phone_number',
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -20,51 +36,88 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be updated without making changes'
         )
+        parser.add_argument(
+            '--branch',
+            action='append',
+            default=[],
+            help='Only process loans of officers assigned to this branch (repeatable, for sharding the nightly job)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of loans updated per UPDATE statement (default: 1000)'
+        )
 
     def handle(self, *args, **options):
         days_overdue_threshold = options['days_overdue']
         dry_run = options['dry_run']
-        
+        chunk_size = options['chunk_size']
+        today = date.today()
+
         self.stdout.write(
             self.style.SUCCESS(f'Checking loan statuses (dry run: {dry_run})...')
         )
-        
-        # Get active loans
+
         active_loans = Loan.objects.filter(status='active')
-        
-        updated_completed = 0
-        updated_defaulted = 0
-        
-        for loan in active_loans:
-            # Check if loan should be marked as completed
-            if self._is_loan_completed(loan):
-                if not dry_run:
-                    loan.status = 'completed'
-                    loan.save()
-                    self._create_completion_notification(loan)
-                
-                updated_completed += 1
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'{"[DRY RUN] " if dry_run else ""}Loan {loan.application_number} marked as COMPLETED'
-                    )
-                )
-            
-            # Check if loan should be marked as defaulted
-            elif self._is_loan_defaulted(loan, days_overdue_threshold):
-                if not dry_run:
-                    loan.status = 'defaulted'
-                    loan.save()
-                    self._create_default_notification(loan)
-                
-                updated_defaulted += 1
-                self.stdout.write(
-                    self.style.WARNING(
-                        f'{"[DRY RUN] " if dry_run else ""}Loan {loan.application_number} marked as DEFAULTED '
-                        f'(overdue by {self._get_days_overdue(loan)} days)'
-                    )
-                )
-        
+        if options['branch']:
+            branch_filter = Q()
+            for branch in options['branch']:
+                branch_filter |= Q(loan_officer__officer_assignment__branch__iexact=branch)
+            active_loans = active_loans.filter(branch_filter)
+            self.stdout.write(f'Branches: {", ".join(options["branch"])}')
+
+        unpaid = PaymentSchedule.objects.filter(loan=OuterRef('pk'), is_paid=False)
+
+        # A loan is completed when nothing is left unpaid on its schedule or
+        # its balance has been cleared.
+        completed = list(
+            active_loans
+            .annotate(has_unpaid=Exists(unpaid))
+            .filter(Q(has_unpaid=False) | Q(balance_remaining__lte=0))
+            .values(*self.LOAN_FIELDS)
+        )
+        completed_ids = {loan['id'] for loan in completed}
+
+        # A loan is defaulted when its oldest overdue installment is at least
+        # the threshold number of days old.
+        oldest_overdue = (
+            unpaid.filter(due_date__lt=today)
+            .order_by('due_date')
+            .values('due_date')[:1]
+        )
+        defaulted = [
+            loan for loan in
+            active_loans
+            .annotate(oldest_overdue=Subquery(oldest_overdue))
+            .filter(oldest_overdue__lte=today - timedelta(days=days_overdue_threshold))
+            .values(*self.LOAN_FIELDS, 'oldest_overdue')
+            if loan['id'] not in completed_ids
+        ]
+        for loan in defaulted:
+            loan['days_overdue'] = (today - loan['oldest_overdue']).days
+
+        if options['verbosity'] >= 2:
+            prefix = '[DRY RUN] ' if dry_run else ''
+            for loan in completed:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{prefix}Loan {loan["application_number"]} marked as COMPLETED'
+                ))
+            for loan in defaulted:
+                self.stdout.write(self.style.WARNING(
+                    f'{prefix}Loan {loan["application_number"]} marked as DEFAULTED '
+                    f'(overdue by {loan["days_overdue"]} days)'
+                ))
+
+        if not dry_run:
+            with transaction.atomic():
+                updated_completed = self._apply_status(completed, 'completed', chunk_size)
+                updated_defaulted = self._apply_status(defaulted, 'defaulted', chunk_size)
+                self._create_notifications(completed, defaulted)
+        else:
+            updated_completed = len(completed)
+            updated_defaulted = len(defaulted)
+
         # Summary
         self.stdout.write(
             self.style.SUCCESS(
@@ -74,99 +127,110 @@ class Command(BaseCommand):
                 f'- Total loans processed: {updated_completed + updated_defaulted}'
             )
         )
-        
+
         if dry_run:
             self.stdout.write(
                 self.style.WARNING(
-                    '\nThis was a dry run. Use --dry-run=False to apply changes.'
+                    '\nThis was a dry run. Run without --dry-run to apply changes.'
                 )
             )
 
-    def _is_loan_completed(self, loan):
-        """Check if loan is fully paid"""
-        # Check if all payment schedules are paid
-        unpaid_schedules = PaymentSchedule.objects.filter(loan=loan, is_paid=False).count()
-        
-        # Also check if balance is zero or negative
-        balance_cleared = loan.balance_remaining is not None and loan.balance_remaining <= 0
-        
-        return unpaid_schedules == 0 or balance_cleared
-
-    def _is_loan_defaulted(self, loan, days_threshold):
-        """Check if loan should be marked as defaulted"""
-        days_overdue = self._get_days_overdue(loan)
-        return days_overdue >= days_threshold
-
-    def _get_days_overdue(self, loan):
-        """Get the number of days the loan is overdue"""
-        # Find the oldest unpaid payment that's overdue
-        overdue_payments = PaymentSchedule.objects.filter(
-            loan=loan,
-            is_paid=False,
-            due_date__lt=date.today()
-        ).order_by('due_date')
-        
-        if overdue_payments.exists():
-            oldest_overdue = overdue_payments.first()
-            return (date.today() - oldest_overdue.due_date).days
-        
-        return 0
-
-    def _create_completion_notification(self, loan):
-        """Create notification for loan completion"""
+    def _apply_status(self, loans, status, chunk_size):
+        """
+        Move the given loans to ``status`` with one UPDATE per chunk.
+
+        Loan.save() only recalculates amounts that do not change here, so a
+        plain UPDATE is equivalent. The status='active' guard keeps the sweep
+        safe if a loan was changed by someone else since it was selected.
+        """
+        ids = [loan['id'] for loan in loans]
+        borrower_ids = [loan['borrower_id'] for loan in loans]
+        now = timezone.now()
+        updated = 0
+        for start in range(0, len(ids), chunk_size):
+            updated += Loan.objects.filter(
+                id__in=ids[start:start + chunk_size], status='active'
+            ).update(status=status, updated_at=now)
+            # UPDATE skips the signals that maintain borrower summaries,
+            # officer dashboards and template fragments.
+            discard_account_summaries(borrower_ids[start:start + chunk_size])
+            self._expire_caches(loans[start:start + chunk_size])
+        return updated
+
+    def _expire_caches(self, loans):
+        """
+        Invalidate the dashboards of the loans' officers (loan officers and
+        the officers of the borrowers' groups) and the fragments showing the
+        loans, once the sweep commits.
+        """
+        loan_ids = [loan['id'] for loan in loans]
+        borrower_ids = {loan['borrower_id'] for loan in loans}
+        officer_ids = {loan['loan_officer_id'] for loan in loans}
+        officer_ids.update(GroupMembership.objects.filter(borrower_id__in=borrower_ids).values_list(
+            'group__assigned_officer_id', flat=True
+        ))
+
+        def expire():
+            invalidate_officer_dashboard(*officer_ids)
+            for loan_id in loan_ids:
+                fragment_cache.bump(Loan, loan_id)
+            for borrower_id in borrower_ids:
+                fragment_cache.bump(User, borrower_id)
+
+        transaction.on_commit(expire)
+
+    def _create_notifications(self, completed, defaulted):
+        """Create completion and default notifications with bulk_create"""
         try:
             from notifications.models import Notification, NotificationTemplate
-            
-            try:
-                template = NotificationTemplate.objects.get(notification_type='loan_completed')
-                
-                message = template.message_template.format(
-                    borrower_name=loan.borrower.full_name,
-                    loan_number=loan.application_number,
-                    total_amount=f"{loan.total_amount:,.2f}" if loan.total_amount else "0.00"
-                )
-                
-                Notification.objects.create(
-                    recipient=loan.borrower,
-                    template=template,
-                    subject=template.subject,
-                    message=message,
-                    channel=template.channel,
-                    recipient_address=loan.borrower.email or str(loan.borrower.phone_number),
-                    scheduled_at=timezone.now(),
-                    loan=loan
-                )
-            except NotificationTemplate.DoesNotExist:
-                pass  # Template not configured
         except ImportError:
-            pass  # Notifications app not available
+            return  # Notifications app not available
 
-    def _create_default_notification(self, loan):
-        """Create notification for loan default"""
-        try:
-            from notifications.models import Notification, NotificationTemplate
-            
-            try:
-                template = NotificationTemplate.objects.get(notification_type='loan_defaulted')
-                
+        templates = {
+            template.notification_type: template
+            for template in NotificationTemplate.objects.filter(
+                notification_type__in=['loan_completed', 'loan_defaulted']
+            )
+        }
+        now = timezone.now()
+        notifications = []
+
+        template = templates.get('loan_completed')
+        if template:
+            for loan in completed:
                 message = template.message_template.format(
-                    borrower_name=loan.borrower.full_name,
-                    loan_number=loan.application_number,
-                    days_overdue=self._get_days_overdue(loan),
-                    balance_remaining=f"{loan.balance_remaining:,.2f}" if loan.balance_remaining else "0.00"
+                    borrower_name=self._borrower_name(loan),
+                    loan_number=loan['application_number'],
+                    total_amount=f"{loan['total_amount']:,.2f}" if loan['total_amount'] else "0.00"
                 )
-                
-                Notification.objects.create(
-                    recipient=loan.borrower,
-                    template=template,
-                    subject=template.subject,
-                    message=message,
-                    channel=template.channel,
-                    recipient_address=loan.borrower.email or str(loan.borrower.phone_number),
-                    scheduled_at=timezone.now(),
-                    loan=loan
+                notifications.append(self._notification(Notification, template, loan, message, now))
+
+        template = templates.get('loan_defaulted')
+        if template:
+            for loan in defaulted:
+                message = template.message_template.format(
+                    borrower_name=self._borrower_name(loan),
+                    loan_number=loan['application_number'],
+                    days_overdue=loan['days_overdue'],
+                    balance_remaining=f"{loan['balance_remaining']:,.2f}" if loan['balance_remaining'] else "0.00"
                 )
-            except NotificationTemplate.DoesNotExist:
-                pass  # Template not configured
-        except ImportError:
-            pass  # Notifications app not available
+                notifications.append(self._notification(Notification, template, loan, message, now))
+
+        Notification.objects.bulk_create(notifications, batch_size=1000)
+
+    @staticmethod
+    def _borrower_name(loan):
+        return f"{loan['borrower__first_name']} {loan['borrower__last_name']}".strip()
+
+    @staticmethod
+    def _notification(model, template, loan, message, now):
+        return model(
+            recipient_id=loan['borrower_id'],
+            template=template,
+            subject=template.subject,
+            message=message,
+            channel=template.channel,
+            recipient_address=loan['borrower__email'] or str(loan['borrower__phone_number']),
+            scheduled_at=now,
+            loan_id=loan['id'],
+        )
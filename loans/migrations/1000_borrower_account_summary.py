@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('loans', '0999_add_audit_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BorrowerAccountSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pending_loans', models.PositiveIntegerField(default=0)),
+                ('approved_loans', models.PositiveIntegerField(default=0)),
+                ('active_loans', models.PositiveIntegerField(default=0)),
+                ('completed_loans', models.PositiveIntegerField(default=0)),
+                ('rejected_loans', models.PositiveIntegerField(default=0)),
+                ('defaulted_loans', models.PositiveIntegerField(default=0)),
+                ('total_loans', models.PositiveIntegerField(default=0)),
+                ('loans_awaiting_upfront', models.PositiveIntegerField(default=0)),
+                ('total_borrowed', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_repaid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('outstanding_balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('next_due_date', models.DateField(blank=True, null=True)),
+                ('next_due_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('overdue_count', models.PositiveIntegerField(default=0)),
+                ('computed_on', models.DateField(help_text='Date the due/overdue figures were computed for')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('borrower', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='account_summary', to=settings.AUTH_USER_MODEL)),
+                ('first_active_loan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='loans.loan')),
+            ],
+            options={
+                'verbose_name': 'Borrower Account Summary',
+                'verbose_name_plural': 'Borrower Account Summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '1000_borrower_account_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VaultBalanceStripe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vault_type', models.CharField(choices=[('daily', 'Daily Vault'), ('weekly', 'Weekly Vault')], max_length=10)),
+                ('stripe', models.PositiveSmallIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_inflows', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_outflows', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vault_stripes', to='clients.branch')),
+            ],
+            options={
+                'verbose_name': 'Vault Balance Stripe',
+                'verbose_name_plural': 'Vault Balance Stripes',
+                'unique_together': {('branch', 'vault_type', 'stripe')},
+            },
+        ),
+    ]
@@ -189,19 +189,20 @@ class Loan(models.Model):
     def __str__(self):
         return f"Loan {self.application_number} - {self.borrower.full_name}"
     
-    def save(self, *args, **kwargs):
+    @classmethod
+    def next_application_numbers(cls, count=1):
+        """The next ``count`` loan numbers (LV-000001, ...) after the newest loan"""
+        last_loan = cls.objects.order_by('-id').only('application_number').first()
+        if last_loan:
+            last_number = int(last_loan.application_number.split('-')[1])
+        else:
+            last_number = 0
+        return [f"LV-{number:06d}" for number in range(last_number + 1, last_number + count + 1)]
+    
+    def calculate_amounts(self):
+        """Fill in the upfront requirement, totals and maturity that save() maintains"""
         from decimal import Decimal  # Import at the top of the method
         
-        if not self.application_number:
-            # Generate unique application number
-            last_loan = Loan.objects.order_by('-id').first()
-            if last_loan:
-                last_number = int(last_loan.application_number.split('-')[1])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-            self.application_number = f"LV-{new_number:06d}"
-        
         # Calculate upfront payment (10% of principal) - NOT for daily loans
         if self.principal_amount and not self.upfront_payment_required and self.repayment_frequency != 'daily':
             principal = Decimal(str(self.principal_amount))
@@ -236,7 +237,13 @@ class Loan(models.Model):
                 self.maturity_date = (self.disbursement_date + timedelta(days=self.term_days)).date()
             elif self.repayment_frequency == 'weekly' and self.term_weeks:
                 self.maturity_date = (self.disbursement_date + timedelta(weeks=self.term_weeks)).date()
-            
+    
+    def save(self, *args, **kwargs):
+        if not self.application_number:
+            # Generate unique application number
+            self.application_number = Loan.next_application_numbers()[0]
+        
+        self.calculate_amounts()
         super().save(*args, **kwargs)
     
     @property
@@ -1060,6 +1067,37 @@ class WeeklyVault(models.Model):
         ordering = ['branch__name']
 
 
+class VaultBalanceStripe(models.Model):
+    """
+    One sub-balance of a daily or weekly vault. With VAULT_BALANCE_STRIPES
+    above 1 postings are spread over N stripes per vault so concurrent
+    postings update different rows; the vault's balance is its own row plus
+    the sum of its stripes until compact_vault_stripes folds them back in.
+    """
+    VAULT_TYPE_CHOICES = [
+        ('daily', 'Daily Vault'),
+        ('weekly', 'Weekly Vault'),
+    ]
+
+    branch = models.ForeignKey(
+        'clients.Branch', on_delete=models.CASCADE, related_name='vault_stripes'
+    )
+    vault_type = models.CharField(max_length=10, choices=VAULT_TYPE_CHOICES)
+    stripe = models.PositiveSmallIntegerField()
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_inflows = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_outflows = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_vault_type_display()} stripe {self.stripe} — {self.branch_id} (K{self.balance})"
+
+    class Meta:
+        verbose_name = "Vault Balance Stripe"
+        verbose_name_plural = "Vault Balance Stripes"
+        unique_together = ['branch', 'vault_type', 'stripe']
+
+
 class BranchSavings(models.Model):
     """Savings account per branch — money parked from vault for safekeeping."""
     branch = models.OneToOneField(
@@ -1070,3 +1108,48 @@ class BranchSavings(models.Model):
 
     def __str__(self):
         return f"Savings — {self.branch.name} (K{self.balance})"
+
+
+class BorrowerAccountSummary(models.Model):
+    """
+    One row per borrower with the totals shown on the borrower dashboard.
+
+    Kept up to date by loans.account_summary whenever a loan, payment,
+    collection or schedule for the borrower changes.
+    """
+    borrower = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='account_summary'
+    )
+
+    # Loan counts by status
+    pending_loans = models.PositiveIntegerField(default=0)
+    approved_loans = models.PositiveIntegerField(default=0)
+    active_loans = models.PositiveIntegerField(default=0)
+    completed_loans = models.PositiveIntegerField(default=0)
+    rejected_loans = models.PositiveIntegerField(default=0)
+    defaulted_loans = models.PositiveIntegerField(default=0)
+    total_loans = models.PositiveIntegerField(default=0)
+    loans_awaiting_upfront = models.PositiveIntegerField(default=0)
+    first_active_loan = models.ForeignKey(
+        Loan, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+
+    # Money
+    total_borrowed = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_repaid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    outstanding_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    # Schedule
+    next_due_date = models.DateField(null=True, blank=True)
+    next_due_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    overdue_count = models.PositiveIntegerField(default=0)
+
+    computed_on = models.DateField(help_text="Date the due/overdue figures were computed for")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Borrower Account Summary'
+        verbose_name_plural = 'Borrower Account Summaries'
+
+    def __str__(self):
+        return f"Account summary — {self.borrower}"
@@ -1,10 +1,13 @@
 """
 Signal handlers for loans app
 """
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from decimal import Decimal
 
+from payments.models import Payment, PaymentCollection, PaymentSchedule
+
+from .account_summary import schedule_refresh
 from .models import Loan, SecurityDeposit
 
 
@@ -49,3 +52,21 @@ def calculate_upfront_payment(sender, instance, **kwargs):
         instance.upfront_payment_required = Decimal('0')
     elif instance.principal_amount and not instance.upfront_payment_required:
         instance.upfront_payment_required = instance.principal_amount * Decimal('0.10')
+
+
+@receiver(post_save, sender=Loan)
+@receiver(post_delete, sender=Loan)
+def refresh_summary_for_loan(sender, instance, **kwargs):
+    """Keep the borrower's account summary in step with status changes and disbursement"""
+    schedule_refresh(borrower_id=instance.borrower_id)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=PaymentCollection)
+@receiver(post_delete, sender=PaymentCollection)
+@receiver(post_save, sender=PaymentSchedule)
+@receiver(post_delete, sender=PaymentSchedule)
+def refresh_summary_for_repayment(sender, instance, **kwargs):
+    """Keep the borrower's account summary in step with payments and the schedule"""
+    schedule_refresh(loan_id=instance.loan_id)
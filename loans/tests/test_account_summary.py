@@ -0,0 +1,198 @@
+"""
+Tests for borrower account summaries and the borrower dashboard built on them.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.core.signals import request_finished, request_started
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dashboard.tests.factories import BorrowerFactory, LoanFactory, PaymentScheduleFactory
+from loans import account_summary
+from loans.account_summary import get_account_summary, refresh_account_summary
+from loans.models import BorrowerAccountSummary, Loan
+from loans.utils import generate_payment_schedule
+
+
+def _loan(borrower, due_offsets, **kwargs):
+    """Loan with one 290.00 installment per offset (days from today)."""
+    loan = LoanFactory(borrower=borrower, **kwargs)
+    for number, offset in enumerate(due_offsets, start=1):
+        PaymentScheduleFactory(
+            loan=loan, installment_number=number, due_date=date.today() + timedelta(days=offset),
+        )
+    return loan
+
+
+@pytest.mark.django_db
+class TestBorrowerAccountSummary:
+
+    def test_totals(self):
+        borrower = BorrowerFactory()
+        active = _loan(borrower, [-3, 4, 11])
+        LoanFactory(borrower=borrower, status='pending')
+        LoanFactory(borrower=borrower, status='rejected')
+
+        summary = refresh_account_summary(borrower.pk)
+
+        assert (summary.active_loans, summary.pending_loans, summary.rejected_loans) == (1, 1, 1)
+        assert summary.total_loans == 3
+        assert summary.total_borrowed == Decimal('2000.00')
+        assert summary.outstanding_balance == active.total_amount
+        assert summary.overdue_count == 1
+        assert summary.next_due_date == date.today() + timedelta(days=4)
+        assert summary.next_due_amount == Decimal('290.00')
+        assert summary.first_active_loan_id == active.pk
+
+    def test_refreshed_once_on_commit(self, django_capture_on_commit_callbacks):
+        borrower = BorrowerFactory()
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            loan = _loan(borrower, [4, 11])
+            loan.status = 'completed'
+            loan.save()
+
+        # Every save in the transaction shares one deferred refresh.
+        assert len([
+            callback for callback in callbacks
+            if getattr(callback, 'batch', None) is account_summary._refresh_batch
+        ]) == 1
+        summary = BorrowerAccountSummary.objects.get(borrower=borrower)
+        assert (summary.active_loans, summary.completed_loans) == (0, 1)
+        assert summary.next_due_date == date.today() + timedelta(days=4)
+
+    def test_stale_day_is_recomputed_on_read(self):
+        borrower = BorrowerFactory()
+        _loan(borrower, [1])
+        refresh_account_summary(borrower.pk, today=date.today() - timedelta(days=2))
+
+        summary = get_account_summary(borrower)
+
+        assert summary.computed_on == date.today()
+        assert summary.overdue_count == 0
+
+    def test_concurrent_first_load_reads_the_other_row(self, monkeypatch):
+        borrower = BorrowerFactory()
+        _loan(borrower, [4])
+        insert = BorrowerAccountSummary.objects.update_or_create
+
+        def racing(**kwargs):
+            # Another request inserts the row first; this insert then collides.
+            insert(**kwargs)
+            raise IntegrityError('UNIQUE constraint failed: loans_borroweraccountsummary.borrower_id')
+
+        monkeypatch.setattr(BorrowerAccountSummary.objects, 'update_or_create', racing)
+        summary = get_account_summary(borrower)
+
+        assert summary.pk and summary.active_loans == 1
+
+    def test_status_sweep_discards_summaries(self):
+        borrower = BorrowerFactory()
+        loan = _loan(borrower, [-120])
+        refresh_account_summary(borrower.pk)
+
+        call_command('update_loan_statuses', verbosity=0)
+
+        assert Loan.objects.get(pk=loan.pk).status == 'defaulted'
+        assert get_account_summary(borrower).defaulted_loans == 1
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    """Borrower ids passed to refresh_account_summary, in call order."""
+    calls = []
+    original = account_summary.refresh_account_summary
+
+    def record(borrower_id, today=None):
+        calls.append(borrower_id)
+        return original(borrower_id, today=today)
+
+    monkeypatch.setattr(account_summary, 'refresh_account_summary', record)
+    return calls
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDeferredRefresh:
+
+    def test_schedule_generation_refreshes_once(self, refreshes):
+        loan = LoanFactory(repayment_frequency='daily', term_days=60, payment_amount=Decimal('40.00'))
+        refreshes.clear()
+
+        generate_payment_schedule(loan)
+
+        assert loan.payment_schedule.count() == 60
+        assert refreshes == [loan.borrower_id]
+
+    def test_autocommit_saves_in_a_request_refresh_once_at_the_end(self, refreshes):
+        loan = LoanFactory()
+        refreshes.clear()
+
+        request_started.send(sender=None)
+        for number in range(1, 4):
+            PaymentScheduleFactory(loan=loan, installment_number=number)
+        assert refreshes == []
+        request_finished.send(sender=None)
+
+        assert refreshes == [loan.borrower_id]
+
+    def test_rolled_back_transaction_does_not_suppress_the_next_refresh(self, refreshes):
+        loan = LoanFactory()
+
+        @transaction.atomic
+        def add_installment(number, fail=False):
+            PaymentScheduleFactory(loan=loan, installment_number=number)
+            if fail:
+                raise ValueError
+
+        with pytest.raises(ValueError):
+            add_installment(1, fail=True)
+        refreshes.clear()
+        add_installment(2)
+
+        assert refreshes == [loan.borrower_id]
+
+
+@pytest.mark.django_db
+class TestBorrowerDashboard:
+
+    def _get(self, client, borrower, url_name, **params):
+        client.force_login(borrower)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse(url_name), params)
+        assert response.status_code == 200
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_loans(self, client):
+        borrower = BorrowerFactory()
+        _loan(borrower, [-3, 4])
+        refresh_account_summary(borrower.pk)
+        self._get(client, borrower, 'dashboard:borrower_dashboard')  # warm the cached user
+        _, small = self._get(client, borrower, 'dashboard:borrower_dashboard')
+
+        for _ in range(5):
+            _loan(borrower, range(-14, 30, 7))
+        refresh_account_summary(borrower.pk)
+        response, large = self._get(client, borrower, 'dashboard:borrower_dashboard')
+
+        assert large == small
+        assert response.context['active_loans'] == 6
+        assert len(response.context['schedule_page'].object_list) == 10
+
+    def test_summary_api(self, client):
+        borrower = BorrowerFactory()
+        _loan(borrower, range(-7, 70, 7))
+
+        response, _ = self._get(client, borrower, 'dashboard:borrower_summary_api', page=2)
+
+        data = response.json()
+        assert data['loans']['active'] == 1
+        assert data['overdue_count'] == 1
+        assert data['next_payment'] == {
+            'due_date': date.today().isoformat(), 'amount': '290.00',
+        }
+        assert data['schedule']['page'] == 2
+        assert data['schedule']['count'] == 11
+        assert len(data['schedule']['results']) == 1
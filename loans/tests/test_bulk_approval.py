@@ -0,0 +1,135 @@
+"""
+Tests for bulk approval of loan applications and high-value loans.
+"""
+from decimal import Decimal
+from itertools import count
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from clients.models import AdminAuditLog, ApprovalAuditLog, LoanApprovalQueue
+from dashboard.tests.factories import (
+    AdminFactory, BorrowerFactory, BranchFactory, LoanFactory, LoanTypeFactory, OfficerAssignmentFactory,
+)
+from loans.bulk_approval import bulk_approve_applications, bulk_approve_high_value
+from loans.models import ApprovalLog, Loan, LoanApplication, SecurityDeposit, SecurityTransaction
+from notifications.models import Notification
+
+_numbers = count(1)
+
+
+def _application(officer, borrower=None, frequency='weekly', amount='2000.00', **kwargs):
+    return LoanApplication.objects.create(
+        borrower=borrower or BorrowerFactory(),
+        loan_officer=officer,
+        application_number=f'APP-BULK-{next(_numbers):05d}',
+        loan_amount=Decimal(amount),
+        duration_days=70 if frequency == 'weekly' else 30,
+        repayment_frequency=frequency,
+        purpose='Stock',
+        **kwargs
+    )
+
+
+@pytest.fixture
+def branch_staff():
+    branch = BranchFactory()
+    officer = OfficerAssignmentFactory(branch=branch.name).officer
+    return branch.manager, officer
+
+
+@pytest.mark.django_db
+class TestBulkApproveApplications:
+
+    def test_batch_report(self, branch_staff):
+        manager, officer = branch_staff
+        returning = BorrowerFactory()
+        previous = LoanFactory(borrower=returning, loan_officer=officer, status='completed')
+        SecurityDeposit.objects.create(
+            loan=previous, required_amount=Decimal('200.00'), paid_amount=Decimal('300.00'), is_verified=True,
+        )
+        daily = _application(officer, frequency='daily', amount='1000.00')
+        new_weekly = _application(officer)
+        carried = _application(officer, borrower=returning)
+        unpaid_fee = _application(officer, processing_fee=Decimal('50.00'))
+        other_branch = _application(OfficerAssignmentFactory().officer)
+
+        results = bulk_approve_applications(
+            manager, [daily.pk, new_weekly.pk, carried.pk, unpaid_fee.pk, other_branch.pk, 999999],
+        )
+
+        assert [result['approved'] for result in results] == [True, True, True, False, False, False]
+        assert 'ready to disburse' in results[2]['message']
+        assert results[5]['message'] == 'Not found.'
+        assert set(LoanApplication.objects.filter(status='approved').values_list('pk', flat=True)) == {
+            daily.pk, new_weekly.pk, carried.pk,
+        }
+
+        approved = Loan.objects.filter(status='approved').select_related('security_deposit')
+        loans = {loan.borrower_id: loan for loan in approved}
+        assert len(loans) == 3
+        assert loans[daily.borrower_id].security_deposit.is_verified
+        assert loans[daily.borrower_id].upfront_payment_required == 0
+        assert not loans[new_weekly.borrower_id].security_deposit.is_verified
+        assert loans[new_weekly.borrower_id].security_deposit.required_amount == Decimal('200.00')
+        assert loans[returning.pk].upfront_payment_verified
+        assert loans[returning.pk].security_deposit.paid_amount == Decimal('200.00')
+        assert loans[new_weekly.borrower_id].created_at == new_weekly.created_at
+
+        previous.security_deposit.refresh_from_db()
+        assert previous.security_deposit.security_used == Decimal('200.00')
+        assert SecurityTransaction.objects.get(transaction_type='carry_forward').loan_id == previous.pk
+        assert ApprovalLog.objects.filter(manager=manager, action='approve').count() == 3
+        assert Notification.objects.filter(loan__in=loans.values()).count() == 3
+        assert not AdminAuditLog.objects.exists()
+
+    def test_queries_do_not_grow_with_batch(self, branch_staff):
+        manager, officer = branch_staff
+        LoanTypeFactory()
+
+        def approve(size):
+            ids = [_application(officer).pk for _ in range(size)]
+            with CaptureQueriesContext(connection) as ctx:
+                results = bulk_approve_applications(manager, ids)
+            assert all(result['approved'] for result in results)
+            return len(ctx.captured_queries)
+
+        assert approve(6) == approve(2)
+
+    def test_view(self, client, branch_staff):
+        manager, officer = branch_staff
+        application = _application(officer)
+        client.force_login(manager)
+
+        response = client.post(
+            reverse('dashboard:bulk_approve_applications'), {'application_ids': [application.pk, 'x']},
+        )
+
+        assert response.status_code == 200
+        assert response.context['approved_count'] == 1
+        assert Loan.objects.filter(borrower=application.borrower, status='approved').exists()
+
+
+@pytest.mark.django_db
+class TestBulkApproveHighValue:
+
+    def test_batch(self):
+        admin = AdminFactory()
+        weekly = LoanFactory(status='pending', principal_amount=Decimal('8000.00'))
+        daily = LoanFactory(status='pending', principal_amount=Decimal('7000.00'), repayment_frequency='daily')
+        decided = LoanFactory(status='pending', principal_amount=Decimal('9000.00'))
+        for loan in (weekly, daily):
+            LoanApprovalQueue.objects.create(loan=loan)
+        LoanApprovalQueue.objects.create(loan=decided, status='rejected')
+
+        results = bulk_approve_high_value(admin, [weekly.pk, daily.pk, decided.pk], reason='Reviewed')
+
+        assert [result['approved'] for result in results] == [True, True, False]
+        assert set(Loan.objects.filter(status='approved').values_list('pk', flat=True)) == {weekly.pk, daily.pk}
+        assert SecurityDeposit.objects.get().loan_id == weekly.pk
+        assert SecurityDeposit.objects.get().required_amount == Decimal('800.00')
+        assert LoanApprovalQueue.objects.filter(status='approved', decided_by=admin).count() == 2
+        assert ApprovalAuditLog.objects.filter(action='approved', reason='Reviewed').count() == 2
+        assert AdminAuditLog.objects.filter(action='loan_approve').count() == 2
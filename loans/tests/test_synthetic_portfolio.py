@@ -0,0 +1,42 @@
+"""
+Smoke test for the generate_synthetic_portfolio load-test data generator.
+"""
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Max
+
+from clients.models import Branch, BorrowerGroup, GroupMembership
+from loans.models import DailyVault, Loan, WeeklyVault
+from payments.models import PaymentSchedule
+
+
+@pytest.mark.django_db
+def test_small_portfolio():
+    call_command(
+        'generate_synthetic_portfolio', branches=2, officers_per_branch=2, groups_per_officer=2,
+        min_group_size=5, max_group_size=5, seed=7, stdout=StringIO(),
+    )
+
+    loans = Loan.objects.filter(application_number__startswith='SYN-')
+    assert Branch.objects.filter(code__startswith='SYN').count() == 2
+    assert BorrowerGroup.objects.filter(name__startswith='SYN Group ').count() == 8
+    assert GroupMembership.objects.filter(group__name__startswith='SYN Group ').count() == 40
+    assert loans.count() == 40
+    assert DailyVault.objects.count() == WeeklyVault.objects.count() == 2
+
+    disbursed = loans.exclude(disbursement_date=None)
+    for loan in disbursed.annotate(last_due=Max('payment_schedule__due_date')):
+        assert loan.payment_schedule.count() == (loan.term_days or loan.term_weeks)
+        assert loan.maturity_date == loan.last_due
+
+    completed = loans.filter(status='completed')
+    assert completed.exists()
+    for loan in completed:
+        assert loan.maturity_date < date.today()
+        assert loan.balance_remaining == Decimal('0')
+        assert loan.amount_paid == loan.total_amount
+    assert not PaymentSchedule.objects.filter(loan__in=completed, is_paid=False).exists()
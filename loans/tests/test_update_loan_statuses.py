@@ -0,0 +1,120 @@
+"""
+Tests for the set-based update_loan_statuses sweep.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from clients.models import OfficerAssignment
+from common import fragment_cache
+from dashboard.officer_snapshot import _version_key
+from dashboard.tests.factories import GroupMembershipFactory, LoanFactory, OfficerFactory, PaymentScheduleFactory
+from loans.models import Loan
+from notifications.models import Notification, NotificationTemplate
+
+
+def _loan(officer, due_offsets, paid=()):
+    """Active loan with one installment per offset (days from today)."""
+    loan = LoanFactory(loan_officer=officer)
+    for number, offset in enumerate(due_offsets, start=1):
+        PaymentScheduleFactory(
+            loan=loan,
+            installment_number=number,
+            due_date=date.today() + timedelta(days=offset),
+            is_paid=number in paid,
+        )
+    return loan
+
+
+@pytest.fixture
+def officers():
+    north, south = OfficerFactory(), OfficerFactory()
+    OfficerAssignment.objects.create(officer=north, branch='North')
+    OfficerAssignment.objects.create(officer=south, branch='South')
+    return north, south
+
+
+@pytest.mark.django_db
+class TestUpdateLoanStatuses:
+
+    def test_marks_completed_and_defaulted(self, officers):
+        north, _ = officers
+        paid_off = _loan(north, [-30, -20], paid=(1, 2))
+        long_overdue = _loan(north, [-120, 10])
+        recently_overdue = _loan(north, [-5, 10])
+        cleared = _loan(north, [-120])
+        Loan.objects.filter(pk=cleared.pk).update(balance_remaining=Decimal('0'))
+
+        call_command('update_loan_statuses', verbosity=0)
+
+        statuses = dict(Loan.objects.values_list('pk', 'status'))
+        assert statuses[paid_off.pk] == 'completed'
+        assert statuses[long_overdue.pk] == 'defaulted'
+        assert statuses[recently_overdue.pk] == 'active'
+        # A cleared balance wins over an overdue installment.
+        assert statuses[cleared.pk] == 'completed'
+
+    def test_dry_run_changes_nothing(self, officers):
+        north, _ = officers
+        loan = _loan(north, [-120])
+
+        call_command('update_loan_statuses', dry_run=True, verbosity=0)
+
+        loan.refresh_from_db()
+        assert loan.status == 'active'
+
+    def test_branch_limits_the_sweep(self, officers):
+        north, south = officers
+        north_loan = _loan(north, [-120])
+        south_loan = _loan(south, [-120])
+
+        call_command('update_loan_statuses', branch=['north'], verbosity=0)
+
+        assert Loan.objects.get(pk=north_loan.pk).status == 'defaulted'
+        assert Loan.objects.get(pk=south_loan.pk).status == 'active'
+
+    def test_expires_dashboards_and_fragments(self, officers, django_capture_on_commit_callbacks):
+        north, _ = officers
+        with django_capture_on_commit_callbacks(execute=True):
+            loan = _loan(north, [-120])
+            group_officer = GroupMembershipFactory(borrower=loan.borrower).group.assigned_officer
+        keys = [_version_key(north.pk), _version_key(group_officer.pk)]
+        dashboards = cache.get_many(keys)
+        before = fragment_cache.versions([loan, loan.borrower])
+
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('update_loan_statuses', verbosity=0)
+
+        assert cache.get_many(keys) == {key: dashboards.get(key, 0) + 1 for key in keys}
+        loan.refresh_from_db()
+        after = fragment_cache.versions([loan, loan.borrower])
+        assert after[0] != before[0] and after[1] != before[1]
+
+    def test_query_count_does_not_grow_with_loans(self, officers):
+        north, _ = officers
+        NotificationTemplate.objects.create(
+            notification_type='loan_defaulted',
+            channel='in_app',
+            subject='Loan defaulted',
+            message_template='{borrower_name}: {loan_number} overdue {days_overdue} days, {balance_remaining} left',
+        )
+
+        def run():
+            with CaptureQueriesContext(connection) as ctx:
+                call_command('update_loan_statuses', chunk_size=1000, verbosity=0)
+            return len(ctx.captured_queries)
+
+        for _ in range(2):
+            _loan(north, [-120])
+        small = run()
+        for _ in range(10):
+            _loan(north, [-120])
+        large = run()
+
+        assert large == small
+        assert Notification.objects.filter(loan__status='defaulted').count() == 12
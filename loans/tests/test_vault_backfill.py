@@ -0,0 +1,97 @@
+"""
+Tests for the bulk vault reconciliation behind reconcile_vault.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from clients.models import OfficerAssignment
+from dashboard.tests.factories import BranchFactory, LoanFactory, OfficerFactory, VaultTransactionFactory
+from expenses.models import VaultTransaction
+from loans.models import SecurityDeposit, WeeklyVault
+from payments.models import Payment
+
+
+@pytest.fixture
+def branch_loan():
+    branch = BranchFactory(name='Central')
+    officer = OfficerFactory()
+    OfficerAssignment.objects.create(officer=officer, branch='central')
+    loan = LoanFactory(loan_officer=officer)
+    return branch, loan
+
+
+def _payment(loan, number, amount='290.00'):
+    # Payments cannot be recorded on Sundays; spread them over Mon-Wed.
+    now = timezone.now()
+    monday = now - timedelta(days=now.weekday() + 7)
+    return Payment.objects.create(
+        loan=loan,
+        payment_number=f'PAY-T{number}',
+        amount=Decimal(amount),
+        payment_date=monday + timedelta(days=number - 1),
+        payment_method='cash',
+        status='completed',
+    )
+
+
+@pytest.mark.django_db
+class TestReconcileVault:
+
+    def test_backfills_missing_rows_once(self, branch_loan):
+        branch, loan = branch_loan
+        SecurityDeposit.objects.create(
+            loan=loan, required_amount=Decimal('200.00'), paid_amount=Decimal('200.00'),
+            is_verified=True, payment_date=timezone.now(),
+        )
+        # Three equal installments, one of which already reached the vault.
+        for number in range(1, 4):
+            _payment(loan, number)
+        VaultTransactionFactory(loan=loan, branch='Central', amount=Decimal('290.00'))
+
+        call_command('reconcile_vault', verbosity=0)
+
+        rows = VaultTransaction.objects.filter(reference_number__startswith='BF-')
+        assert sorted(rows.values_list('transaction_type', flat=True)) == [
+            'payment_collection', 'payment_collection', 'security_deposit',
+        ]
+        vault = WeeklyVault.objects.get(branch=branch)
+        assert vault.balance == Decimal('780.00')
+        assert vault.total_inflows == Decimal('780.00')
+
+        call_command('reconcile_vault', verbosity=0)
+        assert VaultTransaction.objects.filter(reference_number__startswith='BF-').count() == 3
+        assert WeeklyVault.objects.get(branch=branch).balance == Decimal('780.00')
+
+    def test_since_counts_payments_recorded_before_it(self, branch_loan):
+        _, loan = branch_loan
+        payments = [_payment(loan, number) for number in range(1, 6)]
+        # The three older payments reached the vault; the two newer ones did not.
+        for _ in range(3):
+            VaultTransactionFactory(loan=loan, branch='Central', amount=Decimal('290.00'))
+
+        call_command('reconcile_vault', since=str(payments[3].payment_date.date()), verbosity=0)
+
+        rows = VaultTransaction.objects.filter(reference_number__startswith='BF-')
+        assert set(rows.values_list('reference_number', flat=True)) == {
+            f'BF-PAY-{payment.pk}' for payment in payments[3:]
+        }
+
+    def test_dry_run_writes_nothing(self, branch_loan):
+        _, loan = branch_loan
+        _payment(loan, 1)
+
+        call_command('reconcile_vault', dry_run=True, verbosity=0)
+
+        assert not VaultTransaction.objects.filter(reference_number__startswith='BF-').exists()
+
+    def test_backfill_vault_only_handles_deposits(self, branch_loan):
+        _, loan = branch_loan
+        _payment(loan, 1)
+
+        call_command('backfill_vault', verbosity=0)
+
+        assert not VaultTransaction.objects.filter(reference_number__startswith='BF-').exists()
@@ -0,0 +1,98 @@
+"""
+Tests for the F()-based vault posting engine and its striped counters.
+"""
+import threading
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+
+from clients.models import OfficerAssignment
+from dashboard.tests.factories import AdminFactory, BranchFactory, LoanFactory, OfficerFactory
+from expenses.models import VaultTransaction
+from loans.models import VaultBalanceStripe, WeeklyVault
+from loans.vault_posting import live_balance
+from loans.vault_services import (
+    get_vault_balances, record_branch_transfer, record_capital_injection, record_payment_collection,
+)
+
+
+@pytest.fixture
+def branch_loan():
+    branch = BranchFactory(name='Central')
+    officer = OfficerFactory()
+    OfficerAssignment.objects.create(officer=officer, branch='central')
+    loan = LoanFactory(loan_officer=officer)
+    return branch, loan
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(VAULT_BALANCE_STRIPES=4, VAULT_POSTING_RETRIES=1000)
+def test_parallel_collections_keep_exact_balance(branch_loan):
+    branch, loan = branch_loan
+    threads, per_thread = 8, 250
+    errors = []
+
+    def collect():
+        try:
+            for _ in range(per_thread):
+                record_payment_collection(loan, Decimal('10.05'), None)
+        except Exception as exc:  # pragma: no cover - surfaced by the assertion below
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=collect) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    expected = Decimal('10.05') * threads * per_thread
+    vault = WeeklyVault.objects.get(branch=branch)
+    assert VaultTransaction.objects.filter(transaction_type='payment_collection').count() == threads * per_thread
+    assert live_balance(vault) == expected
+    assert vault.total_inflows == expected
+    assert get_vault_balances(branch)['weekly'] == expected
+
+    call_command('compact_vault_stripes', verbosity=0)
+
+    vault = WeeklyVault.objects.get(branch=branch)
+    assert vault.balance == expected
+    assert vault.total_inflows == expected
+    # SQLite stores decimals as REAL, so compare at cent precision.
+    stripes = VaultBalanceStripe.objects.values_list('balance', flat=True)
+    assert {Decimal(str(balance)).quantize(Decimal('0.01')) for balance in stripes} == {Decimal('0.00')}
+
+
+@pytest.mark.django_db
+@override_settings(VAULT_BALANCE_STRIPES=4)
+def test_guarded_debit_counts_uncompacted_stripes(branch_loan):
+    branch, loan = branch_loan
+    other = BranchFactory(name='North')
+    record_payment_collection(loan, Decimal('300.00'), None)
+    record_payment_collection(loan, Decimal('200.00'), None)
+    assert WeeklyVault.objects.get(branch=branch).balance == 0
+
+    with pytest.raises(ValueError, match='Available: K500.00'):
+        record_branch_transfer(branch, other, Decimal('600.00'), '', None)
+
+    record_branch_transfer(branch, other, Decimal('450.00'), '', None)
+    balances = get_vault_balances(branch)
+    assert balances['weekly'] == Decimal('50.00')
+    assert get_vault_balances(other)['weekly'] == Decimal('450.00')
+    assert VaultTransaction.objects.get(transaction_type='branch_transfer_out').balance_after == Decimal('50.00')
+
+
+@pytest.mark.django_db
+def test_single_stripe_posts_to_vault_row(branch_loan):
+    branch, _loan = branch_loan
+    tx = record_capital_injection(branch, Decimal('1000.00'), '', AdminFactory())
+
+    vault = WeeklyVault.objects.get(branch=branch)
+    assert vault.balance == Decimal('1000.00')
+    assert tx.balance_after == Decimal('1000.00')
+    assert not VaultBalanceStripe.objects.exists()
@@ -1,9 +1,16 @@
 from datetime import datetime, timedelta
 from decimal import Decimal
+from django.db import transaction
 from payments.models import PaymentSchedule
 
+@transaction.atomic
 def generate_payment_schedule(loan):
-    """Generate payment schedule for a loan"""
+    """
+    Generate payment schedule for a loan
+
+    One transaction, so the signal work for the installments (account
+    summary, dashboard and fragment invalidation) runs once at commit.
+    """
     if loan.status not in ['disbursed', 'active']:
         return
     
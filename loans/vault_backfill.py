@@ -0,0 +1,289 @@
+"""
+Vault reconciliation - find source records that never reached the vault
+ledger and backfill them in bulk.
+
+Sources are verified SecurityDeposits and completed Payments. Each source
+type is anti-joined against VaultTransaction in a single query, branches
+are resolved from maps loaded once up front (mirroring
+vault_services._get_branch_for_loan), the missing ledger rows are written
+with bulk_create and each affected vault gets one F() balance update.
+
+Running the reconciliation twice never records a source twice: a
+backfilled row is an ordinary ledger row, so the anti-join finds its
+source recorded the next time. The deterministic reference numbers
+(BF-SD-<id> and BF-PAY-<id>) only make backfilled rows easy to tell apart.
+"""
+
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+
+SOURCES = ('security_deposit', 'payment_collection')
+
+
+class BranchResolver:
+    """
+    Resolve the branch for a loan without per-loan queries.
+
+    Same rules as vault_services._get_branch_for_loan: the loan officer's
+    assignment first, then the fallback user's assignment, then the branch
+    the fallback user manages.
+    """
+
+    def __init__(self):
+        from clients.models import Branch, OfficerAssignment
+
+        branches = list(Branch.objects.all())
+        self.by_name = {branch.name.lower(): branch for branch in branches}
+        self.by_manager = {branch.manager_id: branch for branch in branches if branch.manager_id}
+        self.officer_branch = {
+            officer_id: (name or '').lower()
+            for officer_id, name in OfficerAssignment.objects.values_list('officer_id', 'branch')
+        }
+
+    def _assigned(self, user_id):
+        name = self.officer_branch.get(user_id)
+        return self.by_name.get(name) if name else None
+
+    def resolve(self, officer_id, fallback_user_id=None):
+        branch = self._assigned(officer_id)
+        if branch is None and fallback_user_id:
+            if fallback_user_id in self.officer_branch:
+                branch = self._assigned(fallback_user_id)
+            else:
+                branch = self.by_manager.get(fallback_user_id)
+        return branch
+
+
+def missing_security_deposits(since=None):
+    """Verified security deposits without a security_deposit vault row."""
+    from expenses.models import VaultTransaction
+    from .models import SecurityDeposit
+
+    recorded = VaultTransaction.objects.filter(
+        loan_id=OuterRef('loan_id'), transaction_type='security_deposit'
+    )
+    deposits = SecurityDeposit.objects.filter(is_verified=True, paid_amount__gt=0)
+    if since:
+        deposits = deposits.filter(payment_date__date__gte=since)
+    rows = (
+        deposits
+        .annotate(recorded=Exists(recorded))
+        .filter(recorded=False)
+        .order_by('payment_date', 'id')
+        .values(
+            'id', 'loan_id', 'paid_amount', 'payment_date', 'verified_by_id',
+            'loan__application_number', 'loan__repayment_frequency', 'loan__loan_officer_id',
+        )
+    )
+    for row in rows:
+        yield {
+            'source': 'security_deposit',
+            'source_id': row['id'],
+            'reference_number': f'BF-SD-{row["id"]}',
+            'loan_id': row['loan_id'],
+            'application_number': row['loan__application_number'],
+            'vault_type': 'daily' if row['loan__repayment_frequency'] == 'daily' else 'weekly',
+            'amount': row['paid_amount'],
+            'date': row['payment_date'],
+            'officer_id': row['loan__loan_officer_id'],
+            'recorded_by_id': row['verified_by_id'] or row['loan__loan_officer_id'],
+            'description': f'Security deposit for {row["loan__application_number"]}',
+        }
+
+
+def missing_payment_collections(since=None):
+    """
+    Completed payments without a matching payment_collection vault row.
+
+    Payments carry no link to their vault row, so they are matched by loan
+    and amount. Installments on a loan are usually the same amount, so the
+    n-th payment of a given amount on a loan is only considered recorded
+    when at least n vault rows of that amount exist for the loan. The
+    ranking runs over all of the loan's payments; ``since`` only narrows
+    the result, since the vault rows are counted whatever their date.
+    """
+    from expenses.models import VaultTransaction
+    from payments.models import Payment
+
+    recorded_count = (
+        VaultTransaction.objects
+        .filter(loan_id=OuterRef('loan_id'), transaction_type='payment_collection', amount=OuterRef('amount'))
+        .order_by()
+        .values('loan_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    unrecorded = (
+        Payment.objects.filter(status='completed')
+        .annotate(
+            nth=Window(RowNumber(), partition_by=[F('loan_id'), F('amount')], order_by=F('id').asc()),
+            recorded=Coalesce(Subquery(recorded_count), Value(0)),
+        )
+        .filter(nth__gt=F('recorded'))
+        .values('id')
+    )
+    payments = Payment.objects.filter(id__in=unrecorded)
+    if since:
+        payments = payments.filter(payment_date__date__gte=since)
+    rows = (
+        payments
+        .order_by('payment_date', 'id')
+        .values(
+            'id', 'loan_id', 'amount', 'payment_date', 'payment_number', 'processed_by_id',
+            'loan__application_number', 'loan__repayment_frequency', 'loan__loan_officer_id',
+        )
+    )
+    for row in rows:
+        yield {
+            'source': 'payment_collection',
+            'source_id': row['id'],
+            'reference_number': f'BF-PAY-{row["id"]}',
+            'loan_id': row['loan_id'],
+            'application_number': row['loan__application_number'],
+            'vault_type': 'daily' if row['loan__repayment_frequency'] == 'daily' else 'weekly',
+            'amount': row['amount'],
+            'date': row['payment_date'],
+            'officer_id': row['loan__loan_officer_id'],
+            'recorded_by_id': row['processed_by_id'] or row['loan__loan_officer_id'],
+            'description': f'Loan repayment {row["payment_number"]} for {row["loan__application_number"]}',
+        }
+
+
+FINDERS = {
+    'security_deposit': missing_security_deposits,
+    'payment_collection': missing_payment_collections,
+}
+
+
+def plan_backfill(sources=SOURCES, since=None, branches=None):
+    """
+    Work out which vault rows are missing and where they belong.
+
+    Returns a dict with ``entries`` (candidates with a resolved branch, in
+    date order) and ``unresolved`` (candidates whose branch could not be
+    determined). ``branches`` optionally limits the plan to branch names.
+    """
+    resolver = BranchResolver()
+    wanted = {name.lower() for name in branches} if branches else None
+    entries, unresolved = [], []
+    for source in sources:
+        for candidate in FINDERS[source](since=since):
+            branch = resolver.resolve(candidate['officer_id'], candidate['recorded_by_id'])
+            if branch is None:
+                unresolved.append(candidate)
+                continue
+            if wanted is not None and branch.name.lower() not in wanted:
+                continue
+            candidate['branch'] = branch
+            entries.append(candidate)
+    entries.sort(key=lambda entry: (entry['date'] or timezone.now(), entry['reference_number']))
+    return {'entries': entries, 'unresolved': unresolved}
+
+
+def _locked_vaults(keys):
+    """Fetch (creating if needed) and lock the vaults for (branch, vault_type) keys."""
+    from .models import DailyVault, WeeklyVault
+
+    vaults = {}
+    for vault_type, model in (('daily', DailyVault), ('weekly', WeeklyVault)):
+        branches = {branch.id: branch for branch, kind in keys if kind == vault_type}
+        if not branches:
+            continue
+        existing = set(model.objects.filter(branch_id__in=branches).values_list('branch_id', flat=True))
+        model.objects.bulk_create(
+            [model(branch_id=branch_id) for branch_id in branches if branch_id not in existing],
+            ignore_conflicts=True,
+        )
+        for vault in model.objects.select_for_update().filter(branch_id__in=branches):
+            vaults[(branches[vault.branch_id], vault_type)] = vault
+    return vaults
+
+
+def apply_backfill(plan, batch_size=1000):
+    """
+    Write the planned vault rows and apply one balance delta per vault.
+
+    Returns an ordered dict keyed by (branch name, vault type) with the row
+    count, amount added and the balance before/after for each vault.
+    """
+    from expenses.models import VaultTransaction
+
+    entries = plan['entries']
+    summary = OrderedDict()
+    if not entries:
+        return summary
+
+    now = timezone.now()
+    with db_transaction.atomic():
+        keys = OrderedDict(((entry['branch'], entry['vault_type']), None) for entry in entries)
+        vaults = _locked_vaults(keys)
+
+        running = {key: vault.balance for key, vault in vaults.items()}
+        rows = []
+        for entry in entries:
+            key = (entry['branch'], entry['vault_type'])
+            running[key] += Decimal(str(entry['amount']))
+            rows.append(VaultTransaction(
+                transaction_type=entry['source'],
+                direction='in',
+                branch=entry['branch'].name,
+                vault_type=entry['vault_type'],
+                amount=entry['amount'],
+                balance_after=running[key],
+                description=f'{entry["description"]} ({entry["vault_type"]} vault, backfilled)',
+                reference_number=entry['reference_number'],
+                loan_id=entry['loan_id'],
+                recorded_by_id=entry['recorded_by_id'],
+                transaction_date=entry['date'] or now,
+            ))
+            stats = summary.setdefault((entry['branch'].name, entry['vault_type']), {
+                'count': 0, 'amount': Decimal('0'), 'balance_before': vaults[key].balance,
+            })
+            stats['count'] += 1
+            stats['amount'] += Decimal(str(entry['amount']))
+
+        VaultTransaction.objects.bulk_create(rows, batch_size=batch_size)
+
+        for key, vault in vaults.items():
+            delta = running[key] - vault.balance
+            type(vault).objects.filter(pk=vault.pk).update(
+                balance=F('balance') + delta,
+                total_inflows=F('total_inflows') + delta,
+                last_transaction_date=now,
+                updated_at=now,
+            )
+            summary[(key[0].name, key[1])]['balance_after'] = running[key]
+
+    return summary
+
+
+def summarize_plan(plan, vault_balances=None):
+    """Per-vault totals for a plan, without writing anything (for --dry-run)."""
+    summary = OrderedDict()
+    for entry in plan['entries']:
+        stats = summary.setdefault((entry['branch'].name, entry['vault_type']), {
+            'count': 0, 'amount': Decimal('0'),
+        })
+        stats['count'] += 1
+        stats['amount'] += Decimal(str(entry['amount']))
+    for key, stats in summary.items():
+        before = (vault_balances or {}).get(key, Decimal('0'))
+        stats['balance_before'] = before
+        stats['balance_after'] = before + stats['amount']
+    return summary
+
+
+def current_vault_balances():
+    """{(branch name, vault type): balance} for every existing vault."""
+    from .models import DailyVault, WeeklyVault
+
+    balances = {}
+    for vault_type, model in (('daily', DailyVault), ('weekly', WeeklyVault)):
+        for name, balance in model.objects.values_list('branch__name', 'balance'):
+            balances[(name, vault_type)] = balance
+    return balances
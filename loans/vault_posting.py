@@ -0,0 +1,237 @@
+"""
+Vault posting engine.
+
+post() applies one movement to a DailyVault or WeeklyVault with F()
+expressions, so concurrent postings never overwrite each other's balance.
+
+With settings.VAULT_BALANCE_STRIPES = N (default 1) above 1, unguarded
+postings (collections, deposits, returns...) go to one of N
+VaultBalanceStripe rows chosen at random instead of the vault row itself,
+so a morning burst of collections for one branch updates N rows rather
+than queueing on one. A vault's live balance is its own row plus its
+stripes; live_balance()/live_balances() read it in one query.
+compact_stripes() (the compact_vault_stripes command, run every few
+minutes when striping is on) folds the stripes back into the vault row,
+which is what the rest of the code reads as ``vault.balance``.
+
+Postings that must not overdraw the vault (disbursements, transfers out,
+savings deposits) lock the vault row, check the live balance and post to
+the row. Credits to stripes cannot invalidate that check, so only guarded
+debits are serialised.
+
+retry_on_contention() re-runs a posting function when the database
+reports a deadlock or lock timeout, as long as it is not nested in an
+outer transaction that the failure has already doomed.
+"""
+
+import random
+import time
+from decimal import Decimal
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# MySQL lock wait timeout / deadlock
+CONTENTION_ERRORS = (1205, 1213)
+
+
+class InsufficientVaultFunds(ValueError):
+    """A guarded posting would take the vault below zero."""
+
+    def __init__(self, available, required):
+        self.available = available
+        self.required = required
+        super().__init__(f'Insufficient vault balance. Available: K{available:,.2f}, Required: K{required:,.2f}')
+
+
+def stripe_count():
+    return max(1, int(getattr(settings, 'VAULT_BALANCE_STRIPES', 1)))
+
+
+def vault_type_of(vault):
+    from .models import DailyVault
+
+    return 'daily' if isinstance(vault, DailyVault) else 'weekly'
+
+
+def vault_model(vault_type):
+    from .models import DailyVault, WeeklyVault
+
+    return DailyVault if vault_type == 'daily' else WeeklyVault
+
+
+def cents(value):
+    """Round a live figure to cents (SQLite sums decimals as floats)."""
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def _is_contention(exc):
+    code = exc.args[0] if exc.args else None
+    return code in CONTENTION_ERRORS or 'locked' in str(exc).lower()
+
+
+def retry_on_contention(func):
+    """
+    Retry ``func`` with jittered backoff on deadlocks and lock timeouts,
+    up to settings.VAULT_POSTING_RETRIES (default 5) attempts.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = max(1, int(getattr(settings, 'VAULT_POSTING_RETRIES', 5)))
+        for attempt in range(attempts):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if connection.in_atomic_block or attempt == attempts - 1 or not _is_contention(exc):
+                    raise
+                time.sleep(random.uniform(0, 0.005 * 2 ** min(attempt, 6)))
+    return wrapper
+
+
+def _stripe_totals(vault_type, field):
+    from .models import VaultBalanceStripe
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    stripes = (
+        VaultBalanceStripe.objects.filter(branch_id=OuterRef('branch_id'), vault_type=vault_type)
+        .order_by().values('branch_id').annotate(total=Sum(field)).values('total')
+    )
+    return Coalesce(Subquery(stripes, output_field=money), Value(0, output_field=money))
+
+
+def with_live_figures(queryset, vault_type):
+    """Annotate vaults with live balance and flow totals (row plus stripes)."""
+    money = DecimalField(max_digits=14, decimal_places=2)
+    return queryset.annotate(**{
+        f'live_{name}': ExpressionWrapper(F(field) + _stripe_totals(vault_type, field), output_field=money)
+        for name, field in (('balance', 'balance'), ('inflows', 'total_inflows'), ('outflows', 'total_outflows'))
+    })
+
+
+def _refresh(vault, for_update=False):
+    """Reload ``vault`` with live figures in place; returns the live balance."""
+    vault_type = vault_type_of(vault)
+    queryset = type(vault).objects.filter(pk=vault.pk)
+    if for_update:
+        # Lock the vault row only; the stripes are read, not locked.
+        queryset.select_for_update().values_list('pk').get()
+    row = with_live_figures(queryset, vault_type).values(
+        'live_balance', 'live_inflows', 'live_outflows', 'last_transaction_date',
+    ).get()
+    vault.balance = cents(row['live_balance'])
+    vault.total_inflows = cents(row['live_inflows'])
+    vault.total_outflows = cents(row['live_outflows'])
+    vault.last_transaction_date = row['last_transaction_date']
+    return vault.balance
+
+
+def live_balance(vault):
+    """The vault's balance including stripes not yet compacted."""
+    return _refresh(vault)
+
+
+def live_balances(branch):
+    """{'daily': Decimal, 'weekly': Decimal} live balances for a branch (missing vaults count as 0)."""
+    balances = {}
+    for vault_type in ('daily', 'weekly'):
+        row = with_live_figures(vault_model(vault_type).objects.filter(branch=branch), vault_type).values('live_balance').first()
+        balances[vault_type] = cents(row['live_balance']) if row else Decimal('0')
+    return balances
+
+
+def _post_to_stripe(vault, vault_type, delta, flows, now):
+    from .models import VaultBalanceStripe
+
+    stripe = random.randrange(stripe_count())
+    rows = VaultBalanceStripe.objects.filter(branch_id=vault.branch_id, vault_type=vault_type, stripe=stripe)
+    changes = {'balance': F('balance') + delta, 'updated_at': now, **flows}
+    if not rows.update(**changes):
+        VaultBalanceStripe.objects.get_or_create(branch_id=vault.branch_id, vault_type=vault_type, stripe=stripe)
+        rows.update(**changes)
+
+
+def post(vault, amount, direction, when=None, require_funds=False):
+    """
+    Apply one movement of ``amount`` ('in' or 'out') to ``vault`` and
+    return the vault's live balance afterwards; ``vault`` is refreshed with
+    the live figures.
+
+    With ``require_funds`` the vault row is locked and
+    InsufficientVaultFunds is raised if the live balance is below
+    ``amount``. Call inside transaction.atomic() together with the
+    VaultTransaction that records the movement.
+    """
+    amount = Decimal(str(amount))
+    when = when or timezone.now()
+    now = timezone.now()
+    vault_type = vault_type_of(vault)
+    delta = amount if direction == 'in' else -amount
+    flow_field = 'total_inflows' if direction == 'in' else 'total_outflows'
+    flows = {flow_field: F(flow_field) + amount}
+
+    if require_funds:
+        available = _refresh(vault, for_update=True)
+        if available < amount:
+            raise InsufficientVaultFunds(available, amount)
+
+    if require_funds or stripe_count() == 1:
+        type(vault).objects.filter(pk=vault.pk).update(
+            balance=F('balance') + delta, last_transaction_date=when, updated_at=now, **flows,
+        )
+    else:
+        _post_to_stripe(vault, vault_type, delta, flows, now)
+    return _refresh(vault)
+
+
+def compact_stripes():
+    """
+    Fold every non-empty stripe into its vault row; returns the number of
+    vaults compacted. Each vault is compacted in its own transaction under
+    the vault row lock; stripes are decremented by the amounts read, so
+    postings that land meanwhile are kept for the next run.
+    """
+    from .models import VaultBalanceStripe
+
+    pending = (
+        VaultBalanceStripe.objects
+        .exclude(balance=0, total_inflows=0, total_outflows=0)
+        .order_by().values_list('branch_id', 'vault_type').distinct()
+    )
+    compacted = 0
+    for branch_id, vault_type in list(pending):
+        with transaction.atomic():
+            model = vault_model(vault_type)
+            vault, _ = model.objects.get_or_create(branch_id=branch_id)
+            model.objects.select_for_update().filter(pk=vault.pk).values_list('pk').get()
+            stripes = list(
+                VaultBalanceStripe.objects.filter(branch_id=branch_id, vault_type=vault_type)
+                .values('pk', 'balance', 'total_inflows', 'total_outflows', 'updated_at')
+            )
+            totals = {
+                field: sum((row[field] for row in stripes), Decimal('0'))
+                for field in ('balance', 'total_inflows', 'total_outflows')
+            }
+            latest = max(row['updated_at'] for row in stripes)
+            model.objects.filter(pk=vault.pk).update(
+                balance=F('balance') + totals['balance'],
+                total_inflows=F('total_inflows') + totals['total_inflows'],
+                total_outflows=F('total_outflows') + totals['total_outflows'],
+                last_transaction_date=Case(
+                    When(last_transaction_date__gte=latest, then=F('last_transaction_date')),
+                    default=Value(latest),
+                ),
+                updated_at=timezone.now(),
+            )
+            VaultBalanceStripe.objects.filter(pk__in=[row['pk'] for row in stripes]).update(**{
+                field: F(field) - Case(
+                    *[When(pk=row['pk'], then=Value(row[field])) for row in stripes],
+                    output_field=DecimalField(max_digits=14, decimal_places=2),
+                )
+                for field in ('balance', 'total_inflows', 'total_outflows')
+            })
+        compacted += 1
+    return compacted
@@ -3,13 +3,22 @@ Dual-Vault Services - Updated vault operations for Daily/Weekly separation.
 
 This module replaces vault_services.py with dual-vault support.
 All operations now route to the correct vault based on loan type.
+
+Balances are moved with loans.vault_posting.post(), which applies F()
+deltas (optionally across striped counters) instead of read-add-save, so
+concurrent postings to one vault cannot lose updates.
 """
 
 from decimal import Decimal
 from django.db import transaction as db_transaction
+from django.db.models import F
 from django.utils import timezone
 import uuid
 
+from .vault_posting import (
+    InsufficientVaultFunds, cents, live_balances, post, retry_on_contention, with_live_figures,
+)
+
 
 def _get_vault_for_loan(loan, branch=None):
     """
@@ -113,6 +122,7 @@ def _ref():
     return uuid.uuid4().hex[:12].upper()
 
 
+@retry_on_contention
 def record_security_deposit(loan, amount, initiated_by):
     """Record security deposit - routes to correct vault based on loan type"""
     branch = _get_branch_for_loan(loan, fallback_user=initiated_by)
@@ -121,10 +131,7 @@ def record_security_deposit(loan, amount, initiated_by):
     
     with db_transaction.atomic():
         vault, vault_type = _get_vault_for_loan(loan, branch)
-        vault.balance += Decimal(str(amount))
-        vault.last_transaction_date = timezone.now()
-        vault.total_inflows += Decimal(str(amount))
-        vault.save(update_fields=['balance', 'last_transaction_date', 'total_inflows', 'updated_at'])
+        post(vault, Decimal(str(amount)), 'in')
         
         from expenses.models import VaultTransaction
         return VaultTransaction.objects.create(
@@ -142,6 +149,7 @@ def record_security_deposit(loan, amount, initiated_by):
         )
 
 
+@retry_on_contention
 def record_loan_disbursement(loan, approved_by):
     """Record loan disbursement - routes to correct vault based on loan type"""
     import logging
@@ -160,21 +168,17 @@ def record_loan_disbursement(loan, approved_by):
         with db_transaction.atomic():
             vault, vault_type = _get_vault_for_loan(loan, branch)
             
-            # Check sufficient balance
-            if vault.balance < Decimal(str(loan.principal_amount)):
+            # Update vault balance, refusing to overdraw it
+            try:
+                post(vault, Decimal(str(loan.principal_amount)), 'out', require_funds=True)
+            except InsufficientVaultFunds as exc:
                 error_msg = (
                     f'Insufficient balance in {vault_type} vault for {branch.name}. '
-                    f'Available: K{vault.balance:,.2f}, Required: K{loan.principal_amount:,.2f}'
+                    f'Available: K{exc.available:,.2f}, Required: K{loan.principal_amount:,.2f}'
                 )
                 logger.error(f"Disbursement failed for {loan.application_number}: {error_msg}")
                 raise ValueError(error_msg)
             
-            # Update vault balance
-            vault.balance -= Decimal(str(loan.principal_amount))
-            vault.last_transaction_date = timezone.now()
-            vault.total_outflows += Decimal(str(loan.principal_amount))
-            vault.save(update_fields=['balance', 'last_transaction_date', 'total_outflows', 'updated_at'])
-            
             # Create vault transaction record
             from expenses.models import VaultTransaction
             vault_tx = VaultTransaction.objects.create(
@@ -208,6 +212,7 @@ def record_loan_disbursement(loan, approved_by):
         raise
 
 
+@retry_on_contention
 def record_security_return(loan, amount, approved_by):
     """Record a full security return to client"""
     branch = _get_branch_for_loan(loan, fallback_user=approved_by)
@@ -216,10 +221,7 @@ def record_security_return(loan, amount, approved_by):
     
     with db_transaction.atomic():
         vault, vault_type = _get_vault_for_loan(loan, branch)
-        vault.balance -= Decimal(str(amount))
-        vault.last_transaction_date = timezone.now()
-        vault.total_outflows += Decimal(str(amount))
-        vault.save(update_fields=['balance', 'last_transaction_date', 'total_outflows', 'updated_at'])
+        post(vault, Decimal(str(amount)), 'out')
         
         from expenses.models import VaultTransaction
         return VaultTransaction.objects.create(
@@ -238,6 +240,7 @@ def record_security_return(loan, amount, approved_by):
         )
 
 
+@retry_on_contention
 def record_security_withdrawal(loan, amount, approved_by):
     """Record a partial security withdrawal"""
     branch = _get_branch_for_loan(loan, fallback_user=approved_by)
@@ -246,10 +249,7 @@ def record_security_withdrawal(loan, amount, approved_by):
     
     with db_transaction.atomic():
         vault, vault_type = _get_vault_for_loan(loan, branch)
-        vault.balance -= Decimal(str(amount))
-        vault.last_transaction_date = timezone.now()
-        vault.total_outflows += Decimal(str(amount))
-        vault.save(update_fields=['balance', 'last_transaction_date', 'total_outflows', 'updated_at'])
+        post(vault, Decimal(str(amount)), 'out')
         
         from expenses.models import VaultTransaction
         return VaultTransaction.objects.create(
@@ -268,6 +268,7 @@ def record_security_withdrawal(loan, amount, approved_by):
         )
 
 
+@retry_on_contention
 def record_payment_collection(loan, amount, recorded_by):
     """Record payment collection - routes to correct vault based on loan type"""
     branch = _get_branch_for_loan(loan, fallback_user=recorded_by)
@@ -276,10 +277,7 @@ def record_payment_collection(loan, amount, recorded_by):
     
     with db_transaction.atomic():
         vault, vault_type = _get_vault_for_loan(loan, branch)
-        vault.balance += Decimal(str(amount))
-        vault.last_transaction_date = timezone.now()
-        vault.total_inflows += Decimal(str(amount))
-        vault.save(update_fields=['balance', 'last_transaction_date', 'total_inflows', 'updated_at'])
+        post(vault, Decimal(str(amount)), 'in')
         
         from expenses.models import VaultTransaction
         return VaultTransaction.objects.create(
@@ -297,16 +295,14 @@ def record_payment_collection(loan, amount, recorded_by):
         )
 
 
+@retry_on_contention
 def record_capital_injection(branch, amount, notes, recorded_by, vault_type='weekly', transaction_date=None):
     """Admin injects capital - must specify vault type"""
     tx_date = transaction_date or timezone.now()
     
     with db_transaction.atomic():
         vault = _get_vault_by_type(branch, vault_type)
-        vault.balance += Decimal(str(amount))
-        vault.last_transaction_date = tx_date
-        vault.total_inflows += Decimal(str(amount))
-        vault.save(update_fields=['balance', 'last_transaction_date', 'total_inflows', 'updated_at'])
+        post(vault, Decimal(str(amount)), 'in', when=tx_date)
         
         from expenses.models import VaultTransaction
         return VaultTransaction.objects.create(
@@ -330,19 +326,11 @@ def get_vault_balance(branch, vault_type=None):
     If not specified, return total of both vaults.
     """
     try:
-        from .models import DailyVault, WeeklyVault
-        
-        if vault_type == 'daily':
-            return DailyVault.objects.get(branch=branch).balance
-        elif vault_type == 'weekly':
-            return WeeklyVault.objects.get(branch=branch).balance
-        else:
-            # Return total of both vaults
-            daily = DailyVault.objects.filter(branch=branch).first()
-            weekly = WeeklyVault.objects.filter(branch=branch).first()
-            daily_balance = daily.balance if daily else Decimal('0')
-            weekly_balance = weekly.balance if weekly else Decimal('0')
-            return daily_balance + weekly_balance
+        balances = live_balances(branch)
+        if vault_type in balances:
+            return balances[vault_type]
+        # Return total of both vaults
+        return balances['daily'] + balances['weekly']
     except Exception:
         return Decimal('0')
 
@@ -351,18 +339,21 @@ def get_vault_balances(branch):
     """Return both vault balances as a dict"""
     from .models import DailyVault, WeeklyVault
     
-    daily = DailyVault.objects.filter(branch=branch).first()
-    weekly = WeeklyVault.objects.filter(branch=branch).first()
+    daily = with_live_figures(DailyVault.objects.filter(branch=branch), 'daily').first()
+    weekly = with_live_figures(WeeklyVault.objects.filter(branch=branch), 'weekly').first()
+    daily_balance = cents(daily.live_balance) if daily else Decimal('0')
+    weekly_balance = cents(weekly.live_balance) if weekly else Decimal('0')
     
     return {
-        'daily': daily.balance if daily else Decimal('0'),
-        'weekly': weekly.balance if weekly else Decimal('0'),
-        'total': (daily.balance if daily else Decimal('0')) + (weekly.balance if weekly else Decimal('0')),
+        'daily': daily_balance,
+        'weekly': weekly_balance,
+        'total': daily_balance + weekly_balance,
         'daily_vault': daily,
         'weekly_vault': weekly,
     }
 
 
+@retry_on_contention
 def record_bank_withdrawal(branch, amount, notes, recorded_by, vault_type='weekly', transaction_date=None):
     """Record bank withdrawal - must specify vault type"""
     amount = Decimal(str(amount))
@@ -370,10 +361,7 @@ def record_bank_withdrawal(branch, amount, notes, recorded_by, vault_type='weekl
     
     with db_transaction.atomic():
         vault = _get_vault_by_type(branch, vault_type)
-        vault.balance += amount
-        vault.last_transaction_date = tx_date
-        vault.total_inflows += amount
-        vault.save(update_fields=['balance', 'last_transaction_date', 'total_inflows', 'updated_at'])
+        post(vault, amount, 'in', when=tx_date)
         
         from expenses.models import VaultTransaction
         return VaultTransaction.objects.create(
@@ -390,6 +378,7 @@ def record_bank_withdrawal(branch, amount, notes, recorded_by, vault_type='weekl
         )
 
 
+@retry_on_contention
 def record_fund_deposit(branch, amount, source, notes, recorded_by, vault_type='weekly', transaction_date=None):
     """Record fund deposit - must specify vault type"""
     amount = Decimal(str(amount))
@@ -397,10 +386,7 @@ def record_fund_deposit(branch, amount, source, notes, recorded_by, vault_type='
     
     with db_transaction.atomic():
         vault = _get_vault_by_type(branch, vault_type)
-        vault.balance += amount
-        vault.last_transaction_date = tx_date
-        vault.total_inflows += amount
-        vault.save(update_fields=['balance', 'last_transaction_date', 'total_inflows', 'updated_at'])
+        post(vault, amount, 'in', when=tx_date)
         
         from expenses.models import VaultTransaction
         return VaultTransaction.objects.create(
@@ -417,6 +403,7 @@ def record_fund_deposit(branch, amount, source, notes, recorded_by, vault_type='
         )
 
 
+@retry_on_contention
 def record_branch_transfer(from_branch, to_branch, amount, notes, recorded_by, vault_type='weekly', transaction_date=None):
     """Transfer funds between branches - must specify vault type"""
     amount = Decimal(str(amount))
@@ -424,10 +411,12 @@ def record_branch_transfer(from_branch, to_branch, amount, notes, recorded_by, v
     
     with db_transaction.atomic():
         from_vault = _get_vault_by_type(from_branch, vault_type)
-        if from_vault.balance < amount:
+        try:
+            post(from_vault, amount, 'out', when=tx_date, require_funds=True)
+        except InsufficientVaultFunds as exc:
             raise ValueError(
                 f'Insufficient {vault_type} vault balance in {from_branch.name}. '
-                f'Available: K{from_vault.balance:,.2f}'
+                f'Available: K{exc.available:,.2f}'
             )
 
         to_vault = _get_vault_by_type(to_branch, vault_type)
@@ -435,10 +424,6 @@ def record_branch_transfer(from_branch, to_branch, amount, notes, recorded_by, v
         from expenses.models import VaultTransaction
 
         # Deduct from sender
-        from_vault.balance -= amount
-        from_vault.last_transaction_date = tx_date
-        from_vault.total_outflows += amount
-        from_vault.save(update_fields=['balance', 'last_transaction_date', 'total_outflows', 'updated_at'])
         
         out_tx = VaultTransaction.objects.create(
             transaction_type='branch_transfer_out',
@@ -454,10 +439,7 @@ def record_branch_transfer(from_branch, to_branch, amount, notes, recorded_by, v
         )
 
         # Add to receiver
-        to_vault.balance += amount
-        to_vault.last_transaction_date = tx_date
-        to_vault.total_inflows += amount
-        to_vault.save(update_fields=['balance', 'last_transaction_date', 'total_inflows', 'updated_at'])
+        post(to_vault, amount, 'in', when=tx_date)
         
         in_tx = VaultTransaction.objects.create(
             transaction_type='branch_transfer_in',
@@ -475,6 +457,7 @@ def record_branch_transfer(from_branch, to_branch, amount, notes, recorded_by, v
         return out_tx, in_tx
 
 
+@retry_on_contention
 def record_bank_deposit(branch, gross_amount, charges, notes, recorded_by, vault_type='weekly', transaction_date=None):
     """Record bank deposit - must specify vault type"""
     gross_amount = Decimal(str(gross_amount))
@@ -487,10 +470,7 @@ def record_bank_deposit(branch, gross_amount, charges, notes, recorded_by, vault
         txns = []
 
         # Gross outflow
-        vault.balance -= gross_amount
-        vault.last_transaction_date = tx_date
-        vault.total_outflows += gross_amount
-        vault.save(update_fields=['balance', 'last_transaction_date', 'total_outflows', 'updated_at'])
+        post(vault, gross_amount, 'out', when=tx_date)
         
         txns.append(VaultTransaction.objects.create(
             transaction_type='bank_deposit_out',
@@ -507,9 +487,7 @@ def record_bank_deposit(branch, gross_amount, charges, notes, recorded_by, vault
 
         # Charges outflow
         if charges > 0:
-            vault.balance -= charges
-            vault.total_outflows += charges
-            vault.save(update_fields=['balance', 'total_outflows', 'updated_at'])
+            post(vault, charges, 'out')
             
             txns.append(VaultTransaction.objects.create(
                 transaction_type='bank_charges',
@@ -527,6 +505,7 @@ def record_bank_deposit(branch, gross_amount, charges, notes, recorded_by, vault
         return txns
 
 
+@retry_on_contention
 def record_savings_deposit(branch, amount, notes, recorded_by, vault_type='weekly', transaction_date=None):
     """Move money from vault to savings - must specify vault type"""
     amount = Decimal(str(amount))
@@ -534,21 +513,16 @@ def record_savings_deposit(branch, amount, notes, recorded_by, vault_type='weekl
     
     with db_transaction.atomic():
         vault = _get_vault_by_type(branch, vault_type)
-        if vault.balance < amount:
+        try:
+            post(vault, amount, 'out', when=tx_date, require_funds=True)
+        except InsufficientVaultFunds as exc:
             raise ValueError(
-                f'Insufficient {vault_type} vault balance. Available: K{vault.balance:,.2f}'
+                f'Insufficient {vault_type} vault balance. Available: K{exc.available:,.2f}'
             )
         
         from loans.models import BranchSavings
         savings, _ = BranchSavings.objects.get_or_create(branch=branch)
-        
-        vault.balance -= amount
-        vault.last_transaction_date = tx_date
-        vault.total_outflows += amount
-        vault.save(update_fields=['balance', 'last_transaction_date', 'total_outflows', 'updated_at'])
-        
-        savings.balance += amount
-        savings.save(update_fields=['balance', 'updated_at'])
+        BranchSavings.objects.filter(pk=savings.pk).update(balance=F('balance') + amount, updated_at=timezone.now())
         
         from expenses.models import VaultTransaction
         return VaultTransaction.objects.create(
@@ -565,6 +539,7 @@ def record_savings_deposit(branch, amount, notes, recorded_by, vault_type='weekl
         )
 
 
+@retry_on_contention
 def record_savings_withdrawal(branch, amount, notes, recorded_by, vault_type='weekly', transaction_date=None):
     """Move money from savings to vault - must specify vault type"""
     amount = Decimal(str(amount))
@@ -573,18 +548,17 @@ def record_savings_withdrawal(branch, amount, notes, recorded_by, vault_type='we
     with db_transaction.atomic():
         from loans.models import BranchSavings
         savings, _ = BranchSavings.objects.get_or_create(branch=branch)
-        if savings.balance < amount:
+        # Conditional decrement: two concurrent withdrawals cannot both pass the check.
+        withdrawn = BranchSavings.objects.filter(pk=savings.pk, balance__gte=amount).update(
+            balance=F('balance') - amount, updated_at=timezone.now(),
+        )
+        if not withdrawn:
+            savings.refresh_from_db(fields=['balance'])
             raise ValueError(f'Insufficient savings balance. Available: K{savings.balance:,.2f}')
         
         vault = _get_vault_by_type(branch, vault_type)
         
-        savings.balance -= amount
-        savings.save(update_fields=['balance', 'updated_at'])
-        
-        vault.balance += amount
-        vault.last_transaction_date = tx_date
-        vault.total_inflows += amount
-        vault.save(update_fields=['balance', 'last_transaction_date', 'total_inflows', 'updated_at'])
+        post(vault, amount, 'in', when=tx_date)
         
         from expenses.models import VaultTransaction
         return VaultTransaction.objects.create(
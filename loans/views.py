@@ -105,12 +105,8 @@ class LoanListView(LoginRequiredMixin, ListView):
             )
         
         if client_filter:
-            from django.db.models import Q
-            qs = qs.filter(
-                Q(borrower__first_name__icontains=client_filter) |
-                Q(borrower__last_name__icontains=client_filter) |
-                Q(application_number__icontains=client_filter)
-            )
+            from search.services import filter_ids
+            qs = qs.filter(pk__in=filter_ids(client_filter, 'loan'))
         
         return qs.distinct().order_by('-created_at')
     
@@ -178,9 +174,10 @@ class LoanDetailView(LoginRequiredMixin, DetailView):
     context_object_name = 'loan'
     
     def get_queryset(self):
+        related = ('security_deposit', 'borrower', 'loan_type', 'loan_officer')
         if self.request.user.role == 'borrower':
-            return Loan.objects.filter(borrower=self.request.user).select_related('security_deposit', 'borrower')
-        return Loan.objects.all().select_related('security_deposit', 'borrower')
+            return Loan.objects.filter(borrower=self.request.user).select_related(*related)
+        return Loan.objects.all().select_related(*related)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -205,34 +205,45 @@ def loans_hierarchical(request):
         elif user.role == 'loan_officer':
             breadcrumbs = [{'name': 'My Groups', 'url': '?level=group'}]
         
-        group_data = defaultdict(lambda: {
-            'group': None,
-            'group_id': None,
-            'group_name': None,
-            'member_count': 0,
-            'capacity': 0,
-            'total_loans': 0,
-            'total_amount': 0,
-            'total_outstanding': 0,
-        })
-        
-        for loan in loan_qs:
-            membership = loan.borrower.group_memberships.filter(is_active=True).first()
-            group = membership.group if membership else None
+        # Group each loan under the borrower's most recent active membership
+        # and total in SQL; member counts come from annotate_group_metrics.
+        from django.db.models import OuterRef, Subquery
+        from clients.group_metrics import annotate_group_metrics
+        from clients.models import GroupMembership
+
+        current_group = GroupMembership.objects.filter(
+            borrower=OuterRef('borrower_id'), is_active=True
+        ).order_by('-joined_date').values('group_id')[:1]
+        rows = (
+            Loan.objects.filter(pk__in=loan_qs.values('pk'))
+            .annotate(group_key=Subquery(current_group))
+            .order_by()
+            .values('group_key')
+            .annotate(
+                total_loans=Count('id'),
+                total_amount=Sum('principal_amount'),
+                total_outstanding=Sum('balance_remaining'),
+            )
+        )
+        rows = list(rows)
+        groups = annotate_group_metrics(BorrowerGroup.objects.all()).in_bulk(
+            [row['group_key'] for row in rows if row['group_key']]
+        )
+
+        group_data = {}
+        for row in rows:
+            group = groups.get(row['group_key'])
             group_key = group.id if group else 0
-            group_name = group.name if group else 'No Group'
-            
-            if group_data[group_key]['group'] is None:
-                group_data[group_key]['group'] = group
-                group_data[group_key]['group_id'] = group_key
-                group_data[group_key]['group_name'] = group_name
-                if group:
-                    group_data[group_key]['member_count'] = group.active_member_count
-                    group_data[group_key]['capacity'] = group.max_members or 0
-            
-            group_data[group_key]['total_loans'] += 1
-            group_data[group_key]['total_amount'] += loan.principal_amount or 0
-            group_data[group_key]['total_outstanding'] += loan.balance_remaining or 0
+            group_data[group_key] = {
+                'group': group,
+                'group_id': group_key,
+                'group_name': group.name if group else 'No Group',
+                'member_count': group.active_member_count if group else 0,
+                'capacity': (group.max_members or 0) if group else 0,
+                'total_loans': row['total_loans'],
+                'total_amount': row['total_amount'] or 0,
+                'total_outstanding': row['total_outstanding'] or 0,
+            }
         
         data_list = sorted(group_data.values(), key=lambda x: x['group_name'])
         grand_total_loans = sum(g['total_loans'] for g in data_list)
@@ -3,7 +3,8 @@ Custom Django Admin Site for PalmCash.
 Adds dashboard navigation and customizations.
 """
 from django.contrib.admin import AdminSite
-from django.urls import reverse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils.html import format_html
 
 
@@ -41,6 +42,47 @@ class PalmCashAdminSite(AdminSite):
         
         return context
 
+    def get_urls(self):
+        """
+        Add the SQL profiling "hot paths" report to the admin URLs.
+        """
+        urls = [
+            path('hot-paths/', self.admin_view(self.hot_path_report), name='hot_path_report'),
+        ]
+        return urls + super().get_urls()
+
+    def hot_path_report(self, request):
+        """
+        Rank profiled views by p95 latency or query count.
+        """
+        from palmcash import profiling
+
+        if request.method == 'POST' and request.POST.get('action') == 'clear':
+            profiling.clear_samples()
+
+        sort_options = {
+            'p95_ms': 'p95 latency',
+            'max_queries': 'Max queries',
+            'avg_queries': 'Average queries',
+            'avg_db_ms': 'Average DB time',
+            'requests': 'Requests',
+        }
+        order_by = request.GET.get('o', 'p95_ms')
+        if order_by not in sort_options:
+            order_by = 'p95_ms'
+
+        samples = profiling.get_samples()
+        context = {
+            **self.each_context(request),
+            'title': 'Hot paths',
+            'config': profiling.get_config(),
+            'rows': profiling.hot_paths(samples, order_by=order_by),
+            'sample_count': len(samples),
+            'sort_options': sort_options,
+            'order_by': order_by,
+        }
+        return TemplateResponse(request, 'admin/hot_path_report.html', context)
+
 
 # Create the custom admin site instance
 palm_cash_admin_site = PalmCashAdminSite(name='palmcash_admin')
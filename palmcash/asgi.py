@@ -3,6 +3,15 @@ ASGI config for palmcash project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The ASGI profile serves the same URLs as WSGI; the async report pages
+(dashboard/async_views.py) only run their sections concurrently here:
+
+    uvicorn palmcash.asgi:application --workers 4 --host 0.0.0.0 --port 8000
+
+ASYNC_REPORT_CONCURRENCY caps the worker threads (and database connections)
+one report request uses; size the database's connection limit for
+workers x concurrent requests x ASYNC_REPORT_CONCURRENCY.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -14,3 +23,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "palmcash.settings")
 
 application = get_asgi_application()
+
+# Compile the templates before the first request (settings.TEMPLATE_PRECOMPILE).
+from common.template_warmup import warm_up  # noqa: E402
+
+warm_up()
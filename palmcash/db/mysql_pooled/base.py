@@ -0,0 +1,35 @@
+"""
+MySQL backend that takes its connections from palmcash.db.pool.
+
+Use it with CONN_MAX_AGE = 0: Django then "closes" the connection at the
+end of each request, which returns it to the process pool for the next
+request on any thread. Enabled from settings when DB_POOL_SIZE > 0.
+"""
+
+from django.db.backends.mysql import base
+
+from palmcash.db.pool import pool_for
+
+
+def _ping(conn):
+    conn.ping(False)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        return pool_for(self.alias, self.settings_dict, check=_ping)
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Django keeps a reference after closing inside atomic(); never share it.
+                self.pool.discard(self.connection)
+            else:
+                self.pool.release(self.connection)
@@ -0,0 +1,101 @@
+"""
+In-process database connection pool.
+
+Django keeps one connection per thread and, with CONN_MAX_AGE, holds it
+open across requests. Worker models that churn threads (gunicorn gthread,
+ASGI thread pools) still open a fresh connection for every new thread. A
+ConnectionPool keeps up to ``size`` idle DB-API connections per process
+and hands them to whichever thread connects next.
+
+Idle connections older than ``recycle`` seconds are closed instead of
+reused (set it below MySQL's wait_timeout), and every checkout is
+validated with ``check`` so a connection the server dropped is never
+handed out. Connections are rolled back when they are returned.
+"""
+
+import threading
+import time
+
+
+class ConnectionPool:
+
+    def __init__(self, size, recycle=None, check=None):
+        self.size = size
+        self.recycle = recycle
+        self.check = check
+        self._idle = []  # [(connection, opened_at)], most recently returned last
+        self._opened_at = {}
+        self._lock = threading.Lock()
+        self.stats = {'opened': 0, 'reused': 0, 'discarded': 0}
+
+    def acquire(self, connect):
+        """Return an idle connection that passes ``check``, or ``connect()`` a new one."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, opened_at = self._idle.pop()
+            if self.recycle is not None and time.monotonic() - opened_at > self.recycle:
+                self.discard(conn)
+                continue
+            if self.check is not None:
+                try:
+                    self.check(conn)
+                except Exception:
+                    self.discard(conn)
+                    continue
+            with self._lock:
+                self.stats['reused'] += 1
+            return conn
+
+        conn = connect()
+        with self._lock:
+            self._opened_at[id(conn)] = time.monotonic()
+            self.stats['opened'] += 1
+        return conn
+
+    def release(self, conn):
+        """Return ``conn`` to the pool, or close it if the pool is full or it cannot roll back."""
+        try:
+            conn.rollback()
+        except Exception:
+            self.discard(conn)
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((conn, self._opened_at.get(id(conn), time.monotonic())))
+                return
+        self.discard(conn)
+
+    def discard(self, conn):
+        with self._lock:
+            self._opened_at.pop(id(conn), None)
+            self.stats['discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def clear(self):
+        """Close every idle connection (e.g. after fork)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _opened_at in idle:
+            self.discard(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_for(alias, settings_dict, check=None):
+    """The process-wide pool for database ``alias``, created from settings_dict['POOL']."""
+    with _pools_lock:
+        if alias not in _pools:
+            options = settings_dict.get('POOL') or {}
+            _pools[alias] = ConnectionPool(
+                size=int(options.get('SIZE', 5)),
+                recycle=options.get('RECYCLE'),
+                check=check,
+            )
+        return _pools[alias]
@@ -0,0 +1,133 @@
+"""
+Read-replica routing.
+
+Inside use_replica() (a view decorator and context manager) reads go to
+the first reachable alias in settings.DATABASE_REPLICAS. Writes always go
+to the primary ('default'), and once the block has written, its later
+reads stay on the primary too so they see their own changes. Reads inside
+a transaction on the primary also stay there. Outside use_replica() the
+router leaves everything on the primary. Raw SQL wrapped around a queryset
+picks its database with compile_for_read().
+
+A replica that cannot be reached is skipped for
+settings.DATABASE_REPLICA_RETRY seconds (default 30) and reads fall back
+to the primary.
+"""
+
+import logging
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router
+
+logger = logging.getLogger(__name__)
+
+# {'wrote': bool, 'replica': alias or None once chosen} while use_replica() is active
+_state = ContextVar('palmcash_replica_state', default=None)
+_down_until = {}
+
+
+def replica_alias():
+    """The first configured replica that accepts connections, or None."""
+    for alias in getattr(settings, 'DATABASE_REPLICAS', []):
+        if alias not in settings.DATABASES or _down_until.get(alias, 0) > time.monotonic():
+            continue
+        try:
+            connections[alias].ensure_connection()
+        except Exception:
+            retry = getattr(settings, 'DATABASE_REPLICA_RETRY', 30)
+            _down_until[alias] = time.monotonic() + retry
+            logger.warning('Replica %r unavailable, reading from the primary for %ss', alias, retry, exc_info=True)
+            continue
+        return alias
+    return None
+
+
+class _ReplicaContext:
+
+    def __enter__(self):
+        state = _state.get()
+        self.state = state if state is not None else {'wrote': False}
+        self._token = _state.set(self.state)
+        return self
+
+    def __exit__(self, *exc_info):
+        _state.reset(self._token)
+        return False
+
+
+def _iterate_in(state, iterator):
+    # Streaming responses are consumed after the view returns, possibly one
+    # chunk per context (ASGI); re-enter the state around every chunk.
+    iterator = iter(iterator)
+    while True:
+        token = _state.set(state)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _state.reset(token)
+        yield chunk
+
+
+def use_replica(view=None):
+    """
+    ``with use_replica(): ...`` or ``@use_replica`` on a view.
+
+    As a decorator, TemplateResponses are rendered and streaming content is
+    consumed inside the replica context as well, since both happen after
+    the view function returns.
+    """
+    if view is None:
+        return _ReplicaContext()
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with _ReplicaContext() as context:
+            response = view(*args, **kwargs)
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()
+        if getattr(response, 'streaming', False):
+            response.streaming_content = _iterate_in(context.state, response.streaming_content)
+        return response
+    return wrapper
+
+
+def compile_for_read(queryset):
+    """
+    (alias, sql, params) for raw SQL built around ``queryset``: the alias
+    the router reads its model from and the queryset compiled for it. Run
+    the statement on connections[alias] so it follows use_replica() like
+    the ORM reads around it.
+    """
+    alias = router.db_for_read(queryset.model)
+    sql, params = queryset.query.get_compiler(using=alias).as_sql()
+    return alias, sql, params
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state['wrote'] or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if 'replica' not in state:
+            state['replica'] = replica_alias()
+        return state['replica'] or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state['wrote'] = True
+        # Explicit, so instances read from a replica are saved to the primary.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so rows read from either may be related.
+        databases = {DEFAULT_DB_ALIAS, *getattr(settings, 'DATABASE_REPLICAS', [])}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,92 @@
+"""
+Import-time audit for PalmCash processes.
+
+audit() runs a target in a fresh interpreter under ``python -X importtime``
+and parses the report Python writes to stderr: one line per imported
+module with its own (self) and cumulative time in microseconds, indented
+by import depth, a module's line following those of the modules it pulled
+in. The result gives the wall time of the process, the slowest imports and
+the chain of importers behind every HEAVY library that was loaded, which is
+what to move into the function that needs it.
+
+Targets:
+
+    check    ``manage.py check`` (settings, apps, models and the URLconf)
+    worker   importing palmcash.wsgi with template precompilation off
+             (bench_startup measures precompilation separately)
+
+or any module name.
+"""
+import re
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+# Libraries that should never be imported while a process starts.
+HEAVY = ('xhtml2pdf', 'reportlab', 'PIL', 'pkg_resources', 'openpyxl', 'celery')
+
+TARGETS = {
+    'check': ['manage.py', 'check'],
+    'worker': ['-c', 'import palmcash.wsgi'],
+}
+
+Record = namedtuple('Record', 'name self_us cumulative_us depth')
+Audit = namedtuple('Audit', 'target wall records')
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse(lines):
+    """Records for the module lines of an ``-X importtime`` report, in report order."""
+    records = []
+    for line in lines:
+        match = LINE.match(line.rstrip('\n'))
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append(Record(name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+def importers(records, index):
+    """Names of the modules that imported ``records[index]``, outermost first."""
+    chain = []
+    depth = records[index].depth
+    for record in records[index + 1:]:
+        if record.depth < depth:
+            chain.append(record.name)
+            depth = record.depth
+            if depth == 0:
+                break
+    return chain[::-1]
+
+
+def heavy_imports(records):
+    """(record, importers) for the first import of each HEAVY top-level package."""
+    found = []
+    for index, record in enumerate(records):
+        if record.name in HEAVY:
+            found.append((record, importers(records, index)))
+    return found
+
+
+def slowest(records, count=15, key='cumulative_us'):
+    return sorted(records, key=lambda record: getattr(record, key), reverse=True)[:count]
+
+
+def audit(target, env=None):
+    """Run ``target`` (a TARGETS key or a module name) under -X importtime."""
+    args = TARGETS.get(target, ['-c', f'import {target}'])
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        # The report precedes any traceback; keep only the traceback.
+        error = '\n'.join(line for line in result.stderr.splitlines() if not line.startswith('import time:'))
+        raise RuntimeError(f'{target} failed:\n{error}')
+    return Audit(target, wall, parse(result.stderr.splitlines()))
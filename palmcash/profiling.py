@@ -0,0 +1,322 @@
+"""
+Opt-in SQL and render profiling for PalmCash requests.
+
+When enabled, QueryProfilingMiddleware records for each sampled request:
+the number of queries, total DB time, duplicated SQL fingerprints (the
+signature of an N+1), template render time and peak Python memory.
+Samples are kept in an in-process ring buffer (shown in the admin under
+"Hot paths") and can also be appended to a rotating JSON-lines log file.
+
+Configuration lives in settings.PALMCASH_PROFILING, which reads these
+environment variables by default:
+
+    PALMCASH_PROFILING=1             turn the middleware on
+    PALMCASH_PROFILING_SAMPLE_RATE   fraction of users to sample (0.0 - 1.0)
+    PALMCASH_PROFILING_USER_IDS      comma-separated user ids always sampled
+    PALMCASH_PROFILING_BUFFER_SIZE   samples kept in memory (default 2000)
+    PALMCASH_PROFILING_LOG_FILE      optional path of the rolling log file
+    PALMCASH_PROFILING_TRACE_MEMORY  set to 1 to record peak memory
+
+When disabled, the middleware raises MiddlewareNotUsed at startup so Django
+drops it from the chain entirely and requests pay nothing.
+"""
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger('palmcash.profiling')
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 1.0,
+    'USER_IDS': [],
+    'BUFFER_SIZE': 2000,
+    'LOG_FILE': '',
+    'LOG_MAX_BYTES': 10 * 1024 * 1024,
+    'LOG_BACKUP_COUNT': 5,
+    'TRACE_MEMORY': False,
+}
+
+_samples = deque(maxlen=DEFAULTS['BUFFER_SIZE'])
+_samples_lock = threading.Lock()
+
+# The sample being collected for the current request, if any. A context
+# variable keeps concurrent requests (threads or async tasks) apart.
+_active = contextvars.ContextVar('palmcash_profiling_sample', default=None)
+
+_template_patch_installed = False
+_log_handler_installed = False
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_PLACEHOLDER = re.compile(r'%s')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'PALMCASH_PROFILING', {}) or {})
+    return config
+
+
+def fingerprint(sql):
+    """
+    Reduce an SQL statement to its shape, so the same query issued with
+    different parameters (the N+1 pattern) collapses to one fingerprint.
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def should_sample(user, config):
+    """
+    Per-user sampling: listed user ids are always profiled, everyone else is
+    bucketed by a stable hash of their id so a user is either always or
+    never sampled, which keeps their sessions comparable over time.
+    """
+    if not getattr(user, 'is_authenticated', False):
+        return config['SAMPLE_RATE'] >= 1.0
+    if user.pk in config['USER_IDS']:
+        return True
+    rate = config['SAMPLE_RATE']
+    if rate <= 0:
+        return False
+    if rate >= 1:
+        return True
+    bucket = zlib.crc32(str(user.pk).encode()) % 10000
+    return bucket < rate * 10000
+
+
+def record_sample(sample):
+    with _samples_lock:
+        _samples.append(sample)
+    if _log_handler_installed:
+        logger.info(json.dumps(sample, default=str))
+
+
+def get_samples():
+    with _samples_lock:
+        return list(_samples)
+
+
+def clear_samples():
+    with _samples_lock:
+        _samples.clear()
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def hot_paths(samples=None, order_by='p95_ms'):
+    """
+    Aggregate samples per view and rank them.
+
+    Returns a list of dicts with request count, p50/p95/max latency, mean
+    and max query count, mean DB and template time, the worst duplicated
+    fingerprint and peak memory for each view.
+    """
+    samples = get_samples() if samples is None else samples
+    by_view = {}
+    for sample in samples:
+        by_view.setdefault(sample['view'], []).append(sample)
+
+    rows = []
+    for view, view_samples in by_view.items():
+        durations = [s['duration_ms'] for s in view_samples]
+        queries = [s['queries'] for s in view_samples]
+        duplicates = Counter()
+        for s in view_samples:
+            for item in s['duplicates']:
+                duplicates[item['sql']] = max(duplicates[item['sql']], item['count'])
+        worst = duplicates.most_common(1)
+        rows.append({
+            'view': view,
+            'requests': len(view_samples),
+            'p50_ms': round(_percentile(durations, 50), 1),
+            'p95_ms': round(_percentile(durations, 95), 1),
+            'max_ms': round(max(durations), 1),
+            'avg_queries': round(sum(queries) / len(queries), 1),
+            'max_queries': max(queries),
+            'avg_db_ms': round(sum(s['db_ms'] for s in view_samples) / len(view_samples), 1),
+            'avg_template_ms': round(sum(s['template_ms'] for s in view_samples) / len(view_samples), 1),
+            'peak_memory_kb': max((s['peak_memory_kb'] or 0) for s in view_samples),
+            'worst_duplicate': worst[0][0] if worst else '',
+            'worst_duplicate_count': worst[0][1] if worst else 0,
+        })
+    rows.sort(key=lambda row: row.get(order_by, 0), reverse=True)
+    return rows
+
+
+class _QueryRecorder:
+    """connection.execute_wrapper hook that times every query."""
+
+    def __init__(self, sample):
+        self.sample = sample
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sample['db_ms'] += (time.perf_counter() - started) * 1000
+            self.sample['queries'] += 1
+            self.sample['_fingerprints'][fingerprint(sql)] += 1
+
+
+def _install_template_patch():
+    """
+    Wrap Template.render once so render time is attributed to the active
+    sample. Nested renders ({% include %}) only count at the outermost level.
+    """
+    global _template_patch_installed
+    if _template_patch_installed:
+        return
+    from django.template.base import Template
+
+    original_render = Template.render
+
+    def render(self, context):
+        sample = _active.get()
+        if sample is None or sample['_template_depth']:
+            return original_render(self, context)
+        sample['_template_depth'] += 1
+        started = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            sample['template_ms'] += (time.perf_counter() - started) * 1000
+            sample['_template_depth'] -= 1
+
+    Template.render = render
+    _template_patch_installed = True
+
+
+def _install_log_handler(config):
+    global _log_handler_installed
+    if _log_handler_installed or not config['LOG_FILE']:
+        return
+    handler = RotatingFileHandler(
+        config['LOG_FILE'],
+        maxBytes=config['LOG_MAX_BYTES'],
+        backupCount=config['LOG_BACKUP_COUNT'],
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _log_handler_installed = True
+
+
+class QueryProfilingMiddleware:
+    """
+    Record per-request query and render statistics for sampled users.
+
+    Must come after AuthenticationMiddleware so the sampling decision can
+    look at request.user.
+    """
+
+    def __init__(self, get_response):
+        self.config = get_config()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed('PALMCASH_PROFILING is disabled')
+        global _samples
+        if _samples.maxlen != self.config['BUFFER_SIZE']:
+            with _samples_lock:
+                _samples = deque(_samples, maxlen=self.config['BUFFER_SIZE'])
+        _install_template_patch()
+        _install_log_handler(self.config)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_sample(getattr(request, 'user', None), self.config):
+            return self.get_response(request)
+
+        sample = {
+            'path': request.path,
+            'method': request.method,
+            'user_id': getattr(request.user, 'pk', None),
+            'queries': 0,
+            'db_ms': 0.0,
+            'template_ms': 0.0,
+            'peak_memory_kb': None,
+            '_fingerprints': Counter(),
+            '_template_depth': 0,
+        }
+        recorder = _QueryRecorder(sample)
+        token = _active.set(sample)
+
+        tracemalloc = None
+        if self.config['TRACE_MEMORY']:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+
+        started = time.perf_counter()
+        try:
+            with _wrap_all_connections(recorder):
+                response = self.get_response(request)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            _active.reset(token)
+
+        if tracemalloc is not None:
+            sample['peak_memory_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+
+        match = getattr(request, 'resolver_match', None)
+        fingerprints = sample.pop('_fingerprints')
+        sample.pop('_template_depth')
+        sample.update({
+            'view': (match.view_name or match._func_path) if match else request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 2),
+            'db_ms': round(sample['db_ms'], 2),
+            'template_ms': round(sample['template_ms'], 2),
+            'duplicates': [
+                {'sql': sql, 'count': count}
+                for sql, count in fingerprints.most_common(10) if count > 1
+            ],
+            'timestamp': time.time(),
+        })
+        record_sample(sample)
+        return response
+
+
+class _wrap_all_connections:
+    """Install one execute_wrapper on every configured database alias."""
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.contexts = []
+
+    def __enter__(self):
+        for alias in connections:
+            context = connections[alias].execute_wrapper(self.recorder)
+            context.__enter__()
+            self.contexts.append(context)
+        return self
+
+    def __exit__(self, *exc_info):
+        while self.contexts:
+            self.contexts.pop().__exit__(*exc_info)
+        return False
@@ -114,14 +114,17 @@ INSTALLED_APPS = [
     "expenses",
     "securities",
     "payroll",
+    "search",
 ]                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                           
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "common.middleware.AuditBufferMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "palmcash.profiling.QueryProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "palmcash.admin_auth.AdminAccessMiddleware",
@@ -132,10 +135,18 @@ ROOT_URLCONF = "palmcash.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "common.template_guard.DjangoTemplates",
+        "NAME": "django",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Compiled templates are kept for the life of the worker (runserver's
+            # autoreloader still resets them when a template is edited).
+            "loaders": [
+                ("django.template.loaders.cached.Loader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -143,12 +154,37 @@ TEMPLATES = [
                 "django.contrib.messages.context_processors.messages",
                 "common.context_processors.unread_notifications",
                 "common.context_processors.acting_as_officer",
+                "common.context_processors.navigation",
             ],
         },
     },
 ]
 
+# Template caching and checks. {% cachefragment %} blocks expire after
+# TEMPLATE_FRAGMENT_TIMEOUT seconds at the latest; TEMPLATE_FRAGMENT_RELEASE
+# (default: derived from the template files) keys them to a deploy.
+# TEMPLATE_QUERY_GUARD makes any database query run while a template renders
+# raise TemplateQueryError (development and tests only).
+# TEMPLATE_PRECOMPILE compiles the project's templates into the cached loader
+# when a WSGI/ASGI worker starts, so first requests do not pay for parsing.
+TEMPLATE_FRAGMENT_TIMEOUT = int(os.environ.get('TEMPLATE_FRAGMENT_TIMEOUT', '600'))
+TEMPLATE_FRAGMENT_RELEASE = os.environ.get('TEMPLATE_FRAGMENT_RELEASE', '')
+TEMPLATE_QUERY_GUARD = os.environ.get('TEMPLATE_QUERY_GUARD', '') == '1'
+TEMPLATE_PRECOMPILE = os.environ.get('TEMPLATE_PRECOMPILE', '1') == '1'
+
+# Startup targets (wall milliseconds of a fresh process) checked by
+# `manage.py audit_imports <target> --enforce`.
+STARTUP_BUDGET_MS = {
+    'check': int(os.environ.get('STARTUP_BUDGET_CHECK_MS', '1000')),
+    'worker': int(os.environ.get('STARTUP_BUDGET_WORKER_MS', '1000')),
+}
+
 WSGI_APPLICATION = "palmcash.wsgi.application"
+ASGI_APPLICATION = "palmcash.asgi.application"
+
+# Sections an async report page (dashboard/async_views.py) queries at once,
+# each on its own worker thread and database connection.
+ASYNC_REPORT_CONCURRENCY = int(os.environ.get('ASYNC_REPORT_CONCURRENCY', '4'))
 
 
 # Database
@@ -174,6 +210,62 @@ DATABASES = {
     }
 }
 
+# Connection reuse. DB_CONN_MAX_AGE keeps each worker's connection open
+# across requests for that many seconds (0 closes it after every request,
+# "none" keeps it forever); DB_CONN_HEALTH_CHECKS pings a reused connection
+# before the request uses it, so one dropped by MySQL's wait_timeout is
+# replaced instead of failing the request.
+#
+# DB_POOL_SIZE > 0 switches to the pooled backend in palmcash/db instead:
+# connections are returned to an in-process pool at the end of every
+# request (CONN_MAX_AGE is forced to 0) and shared by all worker threads.
+# DB_POOL_RECYCLE closes pooled connections older than that many seconds.
+if not TESTING:
+    _conn_max_age = os.environ.get('DB_CONN_MAX_AGE', '60')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '0'))
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": None if _conn_max_age.lower() == 'none' else int(_conn_max_age),
+        "CONN_HEALTH_CHECKS": os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+    })
+    if DB_POOL_SIZE > 0:
+        DATABASES["default"].update({
+            "ENGINE": "palmcash.db.mysql_pooled",
+            "CONN_MAX_AGE": 0,
+            "POOL": {
+                "SIZE": DB_POOL_SIZE,
+                "RECYCLE": int(os.environ.get('DB_POOL_RECYCLE', '1800')),
+            },
+        })
+
+# Read replica for reports, exports and dashboards (palmcash/db/routers.py).
+# Views wrapped in use_replica read from DATABASE_REPLICAS when one is
+# reachable and fall back to the primary otherwise. DB_REPLICA_HOST enables
+# the replica; the other DB_REPLICA_* settings default to the primary's.
+# Tests get a second SQLite database but route to it only when a test sets
+# DATABASE_REPLICAS.
+DATABASE_ROUTERS = ['palmcash.db.routers.ReplicaRouter']
+DATABASE_REPLICA_RETRY = int(os.environ.get('DB_REPLICA_RETRY', '30'))
+if TESTING:
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_replica.sqlite3",
+    }
+    DATABASE_REPLICAS = []
+elif os.environ.get('DB_REPLICA_HOST'):
+    _primary = DATABASES["default"]
+    DATABASES["replica"] = {
+        **_primary,
+        "HOST": os.environ['DB_REPLICA_HOST'],
+        "PORT": os.environ.get('DB_REPLICA_PORT', _primary["PORT"]),
+        "USER": os.environ.get('DB_REPLICA_USER', _primary["USER"]),
+        "PASSWORD": os.environ.get('DB_REPLICA_PASSWORD', _primary["PASSWORD"]),
+        "OPTIONS": dict(_primary["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS = ["replica"]
+else:
+    DATABASE_REPLICAS = []
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -256,8 +348,52 @@ PASSWORD_RESET_TIMEOUT = 3600  # 1 hour in seconds
 CELERY_BROKER_URL = 'redis://localhost:6379'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379'
 
+# SQL / render profiling (see palmcash/profiling.py). Off unless
+# PALMCASH_PROFILING=1; when off the middleware removes itself at startup.
+PALMCASH_PROFILING = {
+    'ENABLED': os.environ.get('PALMCASH_PROFILING', '') == '1',
+    'SAMPLE_RATE': float(os.environ.get('PALMCASH_PROFILING_SAMPLE_RATE', '1.0')),
+    'USER_IDS': [
+        int(user_id) for user_id in
+        os.environ.get('PALMCASH_PROFILING_USER_IDS', '').split(',') if user_id.strip()
+    ],
+    'BUFFER_SIZE': int(os.environ.get('PALMCASH_PROFILING_BUFFER_SIZE', '2000')),
+    'LOG_FILE': os.environ.get('PALMCASH_PROFILING_LOG_FILE', ''),
+    'TRACE_MEMORY': os.environ.get('PALMCASH_PROFILING_TRACE_MEMORY', '') == '1',
+}
+
+# Cache. REDIS_CACHE_URL (e.g. redis://localhost:6379/1) shares one cache
+# between all workers; without it (and always in tests) each process uses
+# local memory.
+REDIS_CACHE_URL = os.environ.get('REDIS_CACHE_URL', '')
+if REDIS_CACHE_URL and not TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Audit logging (common/audit.py). AUDIT_LOG_WRITER is "request" (write a
+# request's audit rows in one bulk insert once the response is ready) or
+# "background" (hand them to a writer thread). archive_audit_logs moves rows
+# older than AUDIT_LOG_RETENTION_MONTHS into per-month archive tables.
+AUDIT_LOG_WRITER = os.environ.get('AUDIT_LOG_WRITER', 'request')
+AUDIT_LOG_RETENTION_MONTHS = int(os.environ.get('AUDIT_LOG_RETENTION_MONTHS', '12'))
+
 # Session Configuration
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# SESSION_STORE: "db" (a django_session query per request), "cached_db"
+# (read from the cache, written through to the table) or "cache" (cache
+# only). Cached modes need a shared cache, so the default is cached_db only
+# when Redis is configured. Purge expired rows with purge_expired_sessions.
+SESSION_STORE = os.environ.get('SESSION_STORE', 'cached_db' if REDIS_CACHE_URL else 'db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_STORE}'
 SESSION_COOKIE_AGE = 1209600  # 2 weeks in seconds
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SECURE = True  # Force HTTPS for session cookies
@@ -277,9 +413,27 @@ LOGOUT_REDIRECT_URL = '/'  # Redirect to home page after logout
 AUTH_USER_MODEL = 'accounts.User'
 
 # Authentication Backends
+# CachedModelBackend serves request.user from the cache (accounts/user_cache.py)
+# when USER_CACHE is "1". A deactivation only reaches every worker through a
+# shared cache, so like SESSION_STORE it is on by default only when Redis is
+# configured (and in tests, which run in one process). Turned off, the backend
+# loads users like ModelBackend. ModelBackend stays listed so sessions created
+# before the switch remain valid.
 AUTHENTICATION_BACKENDS = [
+    'accounts.backends.CachedModelBackend',
     'django.contrib.auth.backends.ModelBackend',
 ]
+USER_CACHE = os.environ.get('USER_CACHE', '1' if REDIS_CACHE_URL or TESTING else '0') == '1'
+USER_CACHE_TIMEOUT = int(os.environ.get('USER_CACHE_TIMEOUT', '300'))
+
+# Officer dashboard snapshots (dashboard/officer_snapshot.py) are cached when
+# OFFICER_DASHBOARD_CACHE is "1". Like USER_CACHE, invalidation only reaches
+# every worker through a shared cache, so it defaults to on only with Redis
+# (and in tests); turned off, every dashboard load computes its snapshot.
+OFFICER_DASHBOARD_CACHE = os.environ.get(
+    'OFFICER_DASHBOARD_CACHE', '1' if REDIS_CACHE_URL or TESTING else '0'
+) == '1'
+OFFICER_DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('OFFICER_DASHBOARD_CACHE_TIMEOUT', '300'))
 
 # Palm Cash Specific Settings
 LOAN_INTEREST_RATE_DEFAULT = 15.0  # Default annual interest rate
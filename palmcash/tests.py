@@ -0,0 +1,236 @@
+"""
+Tests for the opt-in SQL profiling middleware, the admin hot-path report,
+the in-process database connection pool, read-replica routing and the
+import-time audit.
+"""
+from io import StringIO
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import OperationalError, connections
+from django.http import StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from palmcash import profiling
+from palmcash.db import routers
+from palmcash.db.pool import ConnectionPool
+from palmcash.db.routers import use_replica
+from palmcash.import_audit import heavy_imports, importers, parse
+from palmcash.profiling import QueryProfilingMiddleware, fingerprint, should_sample
+
+
+class TestFingerprint:
+
+    def test_literals_collapse_to_one_shape(self):
+        a = fingerprint("SELECT * FROM loans_loan WHERE id = 12 AND status = 'active'")
+        b = fingerprint("SELECT * FROM loans_loan WHERE id = 907 AND status = 'defaulted'")
+        assert a == b
+
+    def test_in_lists_of_any_length_match(self):
+        a = fingerprint('SELECT * FROM loans_loan WHERE id IN (%s, %s)')
+        b = fingerprint('SELECT * FROM loans_loan WHERE id IN (%s, %s, %s, %s)')
+        assert a == b
+
+
+class TestSampling:
+
+    def test_listed_users_always_sampled(self, django_user_model):
+        user = django_user_model(pk=7)
+        assert should_sample(user, {'SAMPLE_RATE': 0.0, 'USER_IDS': [7]})
+
+    def test_sampling_is_stable_per_user(self, django_user_model):
+        config = {'SAMPLE_RATE': 0.5, 'USER_IDS': []}
+        for pk in range(1, 50):
+            user = django_user_model(pk=pk)
+            assert should_sample(user, config) == should_sample(user, config)
+
+
+def test_disabled_middleware_removes_itself(settings):
+    settings.PALMCASH_PROFILING = {'ENABLED': False}
+    with pytest.raises(MiddlewareNotUsed):
+        QueryProfilingMiddleware(lambda request: None)
+
+
+@pytest.mark.django_db
+def test_samples_feed_hot_path_report(client, settings, django_user_model):
+    settings.PALMCASH_PROFILING = {'ENABLED': True}
+    profiling.clear_samples()
+    admin = django_user_model.objects.create_user(
+        username='profiler', password='x', role='admin', is_staff=True, is_superuser=True,
+    )
+    client.force_login(admin)
+
+    client.get(reverse('admin:index'))
+    samples = profiling.get_samples()
+    assert samples and samples[-1]['view'].endswith(':index')
+    assert samples[-1]['queries'] > 0
+
+    response = client.get(reverse('admin:hot_path_report') + '?o=max_queries')
+    assert response.status_code == 200
+    assert b'admin:index<' in response.content
+
+
+class FakeConnection:
+
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = False
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def _ping(conn):
+    if not conn.alive:
+        raise OSError('server has gone away')
+
+
+class TestConnectionPool:
+
+    def test_released_connection_is_reused_after_rollback(self):
+        pool = ConnectionPool(size=2, check=_ping)
+        conn = pool.acquire(FakeConnection)
+        pool.release(conn)
+
+        assert pool.acquire(FakeConnection) is conn
+        assert conn.rollbacks == 1
+        assert pool.stats == {'opened': 1, 'reused': 1, 'discarded': 0}
+
+    def test_dead_connection_is_replaced(self):
+        pool = ConnectionPool(size=2, check=_ping)
+        dead = pool.acquire(FakeConnection)
+        pool.release(dead)
+        dead.alive = False
+
+        assert pool.acquire(FakeConnection) is not dead
+        assert dead.closed
+
+    def test_expired_connection_is_replaced(self, monkeypatch):
+        pool = ConnectionPool(size=2, recycle=60)
+        old = pool.acquire(FakeConnection)
+        pool.release(old)
+        monkeypatch.setattr('palmcash.db.pool.time.monotonic', lambda: 10 ** 9)
+
+        assert pool.acquire(FakeConnection) is not old
+        assert old.closed
+
+    def test_connections_beyond_size_are_closed(self):
+        pool = ConnectionPool(size=1)
+        first, second = pool.acquire(FakeConnection), pool.acquire(FakeConnection)
+        pool.release(first)
+        pool.release(second)
+        assert not first.closed and second.closed
+
+
+@pytest.mark.django_db(transaction=True)
+def test_connection_benchmark_reports_each_mode():
+    out = StringIO()
+    call_command('bench_db_connections', requests=5, stdout=out)
+    lines = out.getvalue().splitlines()
+    assert [line.split()[0] for line in lines[1:]] == ['per-request', 'persistent']
+
+
+@pytest.fixture
+def replica(settings, monkeypatch, django_user_model):
+    """Two SQLite databases holding different users, with the replica enabled."""
+    settings.DATABASE_REPLICAS = ['replica']
+    monkeypatch.setattr(routers, '_down_until', {})
+    django_user_model.objects.create(username='on-primary')
+    django_user_model.objects.using('replica').create(username='on-replica')
+    return django_user_model
+
+
+def _usernames(user_model):
+    return sorted(user_model.objects.values_list('username', flat=True))
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+class TestReplicaRouting:
+
+    def test_reads_go_to_replica_only_inside_use_replica(self, replica):
+        assert _usernames(replica) == ['on-primary']
+        with use_replica():
+            assert _usernames(replica) == ['on-replica']
+        assert _usernames(replica) == ['on-primary']
+
+    def test_writes_go_to_primary_and_stick(self, replica):
+        with use_replica():
+            assert replica.objects.filter(username='on-replica').exists()
+            replica.objects.create(username='written')
+            assert _usernames(replica) == ['on-primary', 'written']
+        assert _usernames(replica) == ['on-primary', 'written']
+
+    def test_unreachable_replica_falls_back_to_primary(self, replica, monkeypatch):
+        def refuse():
+            raise OperationalError('replica down')
+
+        monkeypatch.setattr(connections['replica'], 'ensure_connection', refuse)
+        with use_replica():
+            assert _usernames(replica) == ['on-primary']
+        assert 'replica' in routers._down_until
+
+    def test_streamed_response_is_read_from_replica(self, replica, rf):
+        @use_replica
+        def export(request):
+            return StreamingHttpResponse(
+                f'{username}\n' for username in replica.objects.values_list('username', flat=True)
+            )
+
+        response = export(rf.get('/'))
+        assert b''.join(response.streaming_content) == b'on-replica\n'
+
+    def test_report_raw_sql_follows_the_replica(self, replica, client):
+        from dashboard.tests.factories import AdminFactory, LoanFactory
+
+        LoanFactory(disbursement_date=timezone.now())  # on the primary only
+        client.force_login(AdminFactory())
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as secondary:
+            response = client.get(reverse('dashboard:admin_performance_report'))
+
+        assert response.status_code == 200
+        assert response.context['activity_count'] == 0
+        assert not [query for query in primary.captured_queries if 'UNION' in query['sql']]
+        assert [query for query in secondary.captured_queries if 'UNION' in query['sql']]
+
+
+IMPORTTIME_REPORT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |       pkg_resources.extern
+import time:     29000 |      29500 |     pkg_resources
+import time:       300 |      29800 |   widget_tweaks
+import time:       150 |        150 |   django.conf
+import time:       500 |      30450 | palmcash.settings
+import time:        40 |         40 | json
+"""
+
+
+class TestImportAudit:
+
+    def test_report_is_parsed_with_depths(self):
+        records = parse(IMPORTTIME_REPORT.splitlines())
+        assert [(record.name, record.depth) for record in records] == [
+            ('pkg_resources.extern', 3), ('pkg_resources', 2), ('widget_tweaks', 1),
+            ('django.conf', 1), ('palmcash.settings', 0), ('json', 0),
+        ]
+        assert records[1].self_us == 29000 and records[1].cumulative_us == 29500
+
+    def test_heavy_imports_name_their_importers(self):
+        records = parse(IMPORTTIME_REPORT.splitlines())
+        assert importers(records, 0) == ['palmcash.settings', 'widget_tweaks', 'pkg_resources']
+        [(record, chain)] = heavy_imports(records)
+        assert record.name == 'pkg_resources'
+        assert chain == ['palmcash.settings', 'widget_tweaks']
+
+    def test_command_reports_a_module(self):
+        out = StringIO()
+        call_command('audit_imports', 'json', top=3, stdout=out)
+        assert out.getvalue().startswith('json: ')
+        assert 'Heavy libraries loaded at startup\n  none' in out.getvalue()
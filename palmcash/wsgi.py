@@ -15,4 +15,9 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "palmcash.palmcash.settings")
 
 application = get_wsgi_application()
 
+# Compile the templates before the first request (settings.TEMPLATE_PRECOMPILE).
+from common.template_warmup import warm_up  # noqa: E402
+
+warm_up()
+
 
@@ -37,3 +37,91 @@ def distribute_payment(loan, amount, payment_date=None):
         applied.append((schedule, apply))
 
     return applied
+
+
+def _day_bounds(start_date, end_date):
+    from django.utils import timezone
+    from datetime import datetime, time
+    start = timezone.make_aware(datetime.combine(start_date, time.min))
+    end = timezone.make_aware(datetime.combine(end_date or start_date, time.max))
+    return start, end
+
+
+def _cash_rows(start, end, branch=None):
+    """
+    Per (branch, loan) totals of the three cash sources created in a window.
+
+    Completed Payments, PaymentCollections and approved MultiSchedulePayments
+    are combined with UNION ALL and grouped once in SQL, so the cost does not
+    depend on how many rows each source has.
+    """
+    from django.db import connections
+    from django.db.models import CharField, DecimalField, F, Value
+    from palmcash.db.routers import compile_for_read
+    from .models import Payment, PaymentCollection, MultiSchedulePayment
+
+    branch_field = 'loan__loan_officer__officer_assignment__branch'
+
+    def source(queryset, code, amount_field):
+        queryset = queryset.filter(created_at__gte=start, created_at__lte=end)
+        if branch:
+            queryset = queryset.filter(**{branch_field: branch})
+        return queryset.order_by().annotate(
+            branch_name=F(branch_field),
+            loan_ref=F('loan_id'),
+            src=Value(code, output_field=CharField()),
+            val=F(amount_field),
+        ).values_list('branch_name', 'loan_ref', 'src', 'val')
+
+    union = source(Payment.objects.filter(status='completed'), 'p', 'amount').union(
+        source(PaymentCollection.objects.all(), 'c', 'collected_amount'),
+        source(MultiSchedulePayment.objects.filter(status='approved'), 'm', 'total_amount'),
+        all=True,
+    )
+    alias, union_sql, params = compile_for_read(union)
+
+    columns = []
+    for code in ('p', 'c', 'm'):
+        columns.append(f"SUM(CASE WHEN u.src = '{code}' THEN u.val ELSE 0 END)")
+        columns.append(f"SUM(CASE WHEN u.src = '{code}' THEN 1 ELSE 0 END)")
+    sql = (
+        f"SELECT u.branch_name, u.loan_ref, {', '.join(columns)} "
+        f"FROM ({union_sql}) u GROUP BY u.branch_name, u.loan_ref"
+    )
+    with connections[alias].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def cash_collected_by_branch(start_date, end_date=None, branch=None):
+    """
+    Cash collected per branch between two dates (inclusive), by creation time.
+
+    A loan repaid through both a Payment and a PaymentCollection is counted
+    once: across all such overlapping loans the larger of the two totals is
+    used. Everything else (non-overlapping payments and collections, and all
+    bulk MultiSchedulePayments) is added as is. Returns {branch name: Decimal}.
+    """
+    start, end = _day_bounds(start_date, end_date)
+    branches = {}
+    for branch_name, _loan_id, paid, paid_n, collected, collected_n, multi, _multi_n in _cash_rows(start, end, branch):
+        totals = branches.setdefault(branch_name, {
+            'overlap_paid': Decimal('0'), 'overlap_collected': Decimal('0'), 'other': Decimal('0'),
+        })
+        paid, collected, multi = (Decimal(str(value or 0)) for value in (paid, collected, multi))
+        if paid_n and collected_n:
+            totals['overlap_paid'] += paid
+            totals['overlap_collected'] += collected
+        else:
+            totals['other'] += paid + collected
+        totals['other'] += multi
+
+    return {
+        branch_name: max(t['overlap_paid'], t['overlap_collected']) + t['other']
+        for branch_name, t in branches.items()
+    }
+
+
+def cash_collected(branch, start_date, end_date=None):
+    """Overlap-aware cash collected for one branch (name) over a date range."""
+    return cash_collected_by_branch(start_date, end_date, branch=branch).get(branch, Decimal('0'))
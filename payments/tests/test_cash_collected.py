@@ -0,0 +1,78 @@
+"""
+Tests for the overlap-aware cash collected service.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from clients.models import OfficerAssignment
+from dashboard.tests.factories import LoanFactory, OfficerFactory
+from payments.models import MultiSchedulePayment, Payment, PaymentCollection
+from payments.services import cash_collected, cash_collected_by_branch
+
+
+def _officer(branch):
+    officer = OfficerFactory()
+    OfficerAssignment.objects.create(officer=officer, branch=branch)
+    return officer
+
+
+def _payment(loan, amount):
+    # Payments cannot be dated on a Sunday; only created_at matters here.
+    payment_date = timezone.now()
+    if payment_date.weekday() == 6:
+        payment_date -= timedelta(days=1)
+    return Payment.objects.create(
+        loan=loan, payment_number=f'PAY-{Payment.objects.count() + 1:05d}',
+        amount=Decimal(amount), payment_date=payment_date,
+        payment_method='cash', status='completed',
+    )
+
+
+def _collection(loan, amount):
+    # Completed payments already open today's collection row for their loan.
+    collection, _ = PaymentCollection.objects.update_or_create(
+        loan=loan, collection_date=date.today(),
+        defaults={'expected_amount': Decimal(amount), 'collected_amount': Decimal(amount)},
+    )
+    return collection
+
+
+@pytest.mark.django_db
+class TestCashCollected:
+
+    def test_overlap_counted_once(self):
+        officer = _officer('Central')
+        overlap, payment_only, collection_only = (LoanFactory(loan_officer=officer) for _ in range(3))
+        _payment(overlap, '100.00')
+        _collection(overlap, '80.00')
+        _payment(payment_only, '50.00')
+        _collection(collection_only, '30.00')
+        MultiSchedulePayment.objects.create(
+            loan=overlap, total_amount=Decimal('20.00'), payment_date=timezone.now(),
+            payment_method='cash', status='approved',
+        )
+
+        # max(100, 80) + 50 + 30 + 20
+        assert cash_collected('Central', date.today()) == Decimal('200.00')
+
+    def test_date_range_and_branches(self):
+        central = LoanFactory(loan_officer=_officer('Central'))
+        east = LoanFactory(loan_officer=_officer('East'))
+        old = _payment(central, '40.00')
+        Payment.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=3))
+        _payment(central, '10.00')
+        _payment(east, '25.00')
+
+        today = date.today()
+        assert cash_collected('Central', today) == Decimal('10.00')
+        assert cash_collected('Central', today - timedelta(days=3), today) == Decimal('50.00')
+
+        with CaptureQueriesContext(connection) as ctx:
+            totals = cash_collected_by_branch(today)
+        assert len(ctx.captured_queries) == 1
+        assert totals == {'Central': Decimal('10.00'), 'East': Decimal('25.00')}
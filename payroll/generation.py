@@ -0,0 +1,144 @@
+"""
+Payroll period generation.
+
+generate_periods() creates the periods for a run of months and one
+PayrollRecord per active, salaried employee in each of them with a single
+bulk_create, then refreshes every period's totals in one UPDATE. Due dates
+are worked out once per distinct payment_day for each month rather than
+per employee.
+
+mark_overdue() is the daily sweep: unpaid records past their due date are
+flagged 'overdue' in one UPDATE.
+"""
+
+from calendar import monthrange
+from datetime import date
+
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def month_range(year, month, count=1):
+    """``count`` consecutive (year, month) pairs starting at year/month."""
+    start = year * 12 + month - 1
+    return [(index // 12, index % 12 + 1) for index in range(start, start + count)]
+
+
+def due_dates(year, month, payment_days):
+    """
+    {payment_day: due date} for one month. Days past the end of the month
+    fall on its last day, so 31 always means "last day of the month".
+    """
+    last_day = monthrange(year, month)[1]
+    return {day: date(year, month, min(day, last_day)) for day in set(payment_days)}
+
+
+def refresh_totals(periods):
+    """Recompute total_expected/total_paid for several periods in one UPDATE."""
+    from .models import PayrollPeriod, PayrollRecord
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+
+    def total(field):
+        records = (
+            PayrollRecord.objects.filter(period=OuterRef('pk')).order_by()
+            .values('period').annotate(total=Sum(field)).values('total')
+        )
+        return Coalesce(Subquery(records, output_field=money), Value(0, output_field=money))
+
+    return PayrollPeriod.objects.filter(pk__in=[period.pk for period in periods]).update(
+        total_expected=total('expected_amount'), total_paid=total('amount_paid'),
+    )
+
+
+def _periods(months):
+    """{(year, month): PayrollPeriod} for the existing periods among ``months``."""
+    from .models import PayrollPeriod
+
+    wanted = set(months)
+    periods = PayrollPeriod.objects.filter(
+        year__in={year for year, _month in wanted}, month__in={month for _year, month in wanted},
+    )
+    return {
+        (period.year, period.month): period for period in periods if (period.year, period.month) in wanted
+    }
+
+
+def generate_periods(months, force=False, batch_size=500):
+    """
+    Generate payroll for each (year, month) in ``months``.
+
+    Existing periods are left alone unless ``force`` is set, in which case
+    their records are deleted and regenerated. Returns a list of dicts
+    ``{'period', 'created' (bool), 'records' (int)}`` in month order;
+    'records' is 0 for periods that were skipped.
+    """
+    from .models import Employee, PayrollPeriod, PayrollRecord
+
+    employees = list(
+        Employee.objects.filter(is_active=True, monthly_salary__gt=0)
+        .values_list('pk', 'monthly_salary', 'payment_day')
+    )
+    payment_days = [payment_day for _pk, _salary, payment_day in employees]
+
+    with transaction.atomic():
+        existing = _periods(months)
+        new = [
+            PayrollPeriod(year=year, month=month, status='open')
+            for year, month in months if (year, month) not in existing
+        ]
+        if new:
+            PayrollPeriod.objects.bulk_create(new)
+            # MySQL does not return primary keys from bulk_create.
+            existing = _periods(months)
+        created = {(period.year, period.month) for period in new}
+
+        targets = [
+            (year, month) for year, month in months if (year, month) in created or force
+        ]
+        if force:
+            PayrollRecord.objects.filter(
+                period__in=[existing[key] for key in targets if key not in created]
+            ).delete()
+
+        records = []
+        counts = {}
+        for year, month in targets:
+            period = existing[(year, month)]
+            dates = due_dates(year, month, payment_days)
+            records.extend(
+                PayrollRecord(
+                    period=period,
+                    employee_id=pk,
+                    expected_amount=salary,
+                    due_date=dates[payment_day],
+                    status='pending',
+                )
+                for pk, salary, payment_day in employees
+            )
+            counts[(year, month)] = len(employees)
+        PayrollRecord.objects.bulk_create(records, batch_size=batch_size)
+        refresh_totals([existing[key] for key in targets])
+
+    periods = _periods(months)
+    return [
+        {'period': periods[key], 'created': key in created, 'records': counts.get(key, 0)}
+        for key in months
+    ]
+
+
+def generate_period(year, month, force=False):
+    """generate_periods() for a single month; returns its result dict."""
+    return generate_periods([(year, month)], force=force)[0]
+
+
+def mark_overdue(today=None):
+    """Flag unpaid records past their due date as overdue; returns the row count."""
+    from .models import PayrollRecord
+
+    today = today or timezone.now().date()
+    return PayrollRecord.objects.filter(
+        status='pending', amount_paid=0, due_date__lt=today,
+    ).update(status='overdue', updated_at=timezone.now())
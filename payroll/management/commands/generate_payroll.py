@@ -1,13 +1,14 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import date
-from calendar import monthrange
-from payroll.models import Employee, PayrollPeriod, PayrollRecord
+from payroll.generation import generate_periods, mark_overdue, month_range
+from payroll.models import Employee
 
 
 class Command(BaseCommand):
     help = 'Generate monthly payroll records for all active employees'
-    
+    requires_system_checks = []
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--month',
@@ -19,106 +20,79 @@ class Command(BaseCommand):
             type=int,
             help='Year (e.g., 2026). Defaults to current year'
         )
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=1,
+            help='Number of consecutive months to generate starting at --month (e.g. 12 for a whole year)'
+        )
         parser.add_argument(
             '--force',
             action='store_true',
             help='Force regeneration even if period already exists'
         )
-    
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of payroll records inserted per INSERT statement (default: 500)'
+        )
+        parser.add_argument(
+            '--mark-overdue',
+            action='store_true',
+            help='Only run the daily sweep that marks unpaid records past their due date as overdue'
+        )
+
     def handle(self, *args, **options):
+        if options['mark_overdue']:
+            updated = mark_overdue()
+            self.stdout.write(self.style.SUCCESS(f'✓ Marked {updated} payroll records as overdue'))
+            return
+
         # Get month and year
         today = timezone.now().date()
         month = options.get('month') or today.month
         year = options.get('year') or today.year
         force = options.get('force', False)
-        
+
         # Validate month
         if month < 1 or month > 12:
             self.stdout.write(self.style.ERROR('Month must be between 1 and 12'))
             return
-        
-        self.stdout.write(f'\nGenerating payroll for {date(year, month, 1).strftime("%B %Y")}...\n')
-        
-        # Check if period already exists
-        period, created = PayrollPeriod.objects.get_or_create(
-            month=month,
-            year=year,
-            defaults={'status': 'open'}
-        )
-        
-        if not created and not force:
-            self.stdout.write(
-                self.style.WARNING(f'Payroll period already exists. Use --force to regenerate.')
-            )
-            self.stdout.write(f'Period ID: {period.id}')
-            self.stdout.write(f'Status: {period.get_status_display()}')
-            self.stdout.write(f'Total Expected: K{period.total_expected:,.2f}')
-            self.stdout.write(f'Total Paid: K{period.total_paid:,.2f}')
+        if options['months'] < 1:
+            self.stdout.write(self.style.ERROR('--months must be at least 1'))
             return
-        
-        if not created and force:
-            # Delete existing records
-            deleted_count = period.payroll_records.count()
-            period.payroll_records.all().delete()
-            self.stdout.write(f'Deleted {deleted_count} existing records')
-        
-        # Get all active employees
-        employees = Employee.objects.filter(is_active=True, monthly_salary__gt=0)
-        
-        if not employees.exists():
+
+        months = month_range(year, month, options['months'])
+        first, last = (date(y, m, 1).strftime('%B %Y') for y, m in (months[0], months[-1]))
+        self.stdout.write(f'\nGenerating payroll for {first}{f" to {last}" if len(months) > 1 else ""}...\n')
+
+        if not Employee.objects.filter(is_active=True, monthly_salary__gt=0).exists():
             self.stdout.write(self.style.WARNING('No active employees with salary found'))
             return
-        
+
+        results = generate_periods(months, force=force, batch_size=options['batch_size'])
+
         created_count = 0
-        skipped_count = 0
-        total_expected = 0
-        
-        for employee in employees:
-            # Calculate due date based on employee's payment_day
-            payment_day = employee.payment_day
-            last_day = monthrange(year, month)[1]
-            
-            # If payment_day is greater than last day of month, use last day
-            if payment_day > last_day:
-                payment_day = last_day
-            
-            due_date = date(year, month, payment_day)
-            
-            # Create payroll record
-            record, record_created = PayrollRecord.objects.get_or_create(
-                period=period,
-                employee=employee,
-                defaults={
-                    'expected_amount': employee.monthly_salary,
-                    'due_date': due_date,
-                    'status': 'pending',
-                }
-            )
-            
-            if record_created:
-                created_count += 1
-                total_expected += employee.monthly_salary
+        for result in results:
+            period = result['period']
+            if not result['created'] and not force:
                 self.stdout.write(
-                    f'  ✓ {employee.employee_id} - {employee.user.get_full_name()}: '
-                    f'K{employee.monthly_salary:,.2f} (Due: {due_date.strftime("%b %d")})'
+                    self.style.WARNING(f'  - {period}: already exists (ID {period.id}). Use --force to regenerate.')
                 )
-            else:
-                skipped_count += 1
-        
-        # Update period totals
-        period.update_totals()
-        
+                continue
+            created_count += result['records']
+            self.stdout.write(
+                f'  ✓ {period}: {result["records"]} records, '
+                f'Total Expected: K{period.total_expected:,.2f}, Outstanding: K{period.outstanding:,.2f}'
+            )
+
         self.stdout.write('\n' + '='*70)
         self.stdout.write(self.style.SUCCESS(f'✓ Payroll generation completed!'))
-        self.stdout.write(f'\nPeriod: {period}')
-        self.stdout.write(f'Status: {period.get_status_display()}')
-        self.stdout.write(f'\nRecords created: {created_count}')
-        self.stdout.write(f'Records skipped: {skipped_count}')
-        self.stdout.write(f'\nTotal Expected: K{period.total_expected:,.2f}')
-        self.stdout.write(f'Total Paid: K{period.total_paid:,.2f}')
-        self.stdout.write(f'Outstanding: K{period.outstanding:,.2f}')
-        
+        self.stdout.write(f'\nPeriods: {len(results)}')
+        self.stdout.write(f'Records created: {created_count}')
+
         if created_count > 0:
             self.stdout.write(
-                self.style.SUCCESS(f'\n✓ {created_count} employees ready for payment')
+                self.style.SUCCESS(f'\n✓ {created_count} payroll records ready for payment')
             )
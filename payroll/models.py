@@ -98,10 +98,10 @@ class PayrollPeriod(models.Model):
     def update_totals(self):
         """Recalculate totals from payroll records"""
         from django.db.models import Sum
-        records = self.payroll_records.all()
-        self.total_expected = records.aggregate(Sum('expected_amount'))['expected_amount__sum'] or 0
-        self.total_paid = records.aggregate(Sum('amount_paid'))['amount_paid__sum'] or 0
-        self.save()
+        totals = self.payroll_records.aggregate(expected=Sum('expected_amount'), paid=Sum('amount_paid'))
+        self.total_expected = totals['expected'] or 0
+        self.total_paid = totals['paid'] or 0
+        self.save(update_fields=['total_expected', 'total_paid'])
 
 
 class PayrollRecord(models.Model):
@@ -144,8 +144,14 @@ class PayrollRecord(models.Model):
             return False
         return self.due_date < timezone.now().date()
     
-    def update_status(self):
-        """Auto-update status based on payment"""
+    def update_status(self, save=True):
+        """
+        Auto-update status based on payment.
+
+        Pass save=False to only set the status when the caller saves the
+        record itself. Marking records overdue in bulk is done by
+        payroll.generation.mark_overdue() in a single UPDATE.
+        """
         from django.utils import timezone
         
         if self.amount_paid >= self.expected_amount:
@@ -157,7 +163,8 @@ class PayrollRecord(models.Model):
         else:
             self.status = 'pending'
         
-        self.save()
+        if save:
+            self.save()
 
 
 class SalaryRecord(models.Model):
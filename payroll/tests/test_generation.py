@@ -0,0 +1,95 @@
+"""
+Tests for bulk payroll generation, period totals and the overdue sweep.
+"""
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from itertools import count
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from dashboard.tests.factories import UserFactory
+from payroll.generation import generate_periods, mark_overdue, month_range
+from payroll.models import Employee, PayrollPeriod, PayrollRecord
+
+_numbers = count(1)
+
+
+def _employee(salary='1000.00', payment_day=30, **kwargs):
+    return Employee.objects.create(
+        user=UserFactory(),
+        employee_id=f'EMP{next(_numbers):04d}',
+        position='Officer',
+        hire_date=date(2025, 1, 1),
+        monthly_salary=Decimal(salary),
+        payment_day=payment_day,
+        **kwargs
+    )
+
+
+@pytest.mark.django_db
+class TestGeneratePayroll:
+
+    def test_month_range_crosses_years(self):
+        assert month_range(2026, 11, 3) == [(2026, 11), (2026, 12), (2027, 1)]
+
+    def test_whole_year_in_one_pass(self):
+        end_of_month = _employee('1500.00', payment_day=31)
+        _employee('500.00', payment_day=15)
+        _employee('900.00', is_active=False)
+        _employee('0')
+
+        call_command('generate_payroll', month=1, year=2026, months=12, stdout=StringIO())
+
+        assert PayrollPeriod.objects.count() == 12
+        assert PayrollRecord.objects.count() == 24
+        february = PayrollPeriod.objects.get(year=2026, month=2)
+        assert february.total_expected == Decimal('2000.00')
+        assert february.total_paid == 0
+        assert february.payroll_records.get(employee=end_of_month).due_date == date(2026, 2, 28)
+
+    def test_existing_periods_need_force(self):
+        employee = _employee('1000.00')
+        generate_periods([(2026, 3)])
+        PayrollRecord.objects.update(expected_amount=Decimal('1.00'))
+
+        results = generate_periods([(2026, 3), (2026, 4)])
+        assert [result['records'] for result in results] == [0, 1]
+        assert PayrollRecord.objects.get(period__month=3).expected_amount == Decimal('1.00')
+
+        employee.monthly_salary = Decimal('1200.00')
+        employee.save()
+        generate_periods([(2026, 3)], force=True)
+        assert PayrollRecord.objects.get(period__month=3).expected_amount == Decimal('1200.00')
+        assert PayrollPeriod.objects.get(month=3).total_expected == Decimal('1200.00')
+
+    def test_queries_do_not_grow_with_employees(self):
+        def generate(employees, year):
+            for _ in range(employees):
+                _employee()
+            with CaptureQueriesContext(connection) as ctx:
+                generate_periods(month_range(year, 1, 12))
+            return len(ctx.captured_queries)
+
+        # Kept under SQLite's per-INSERT parameter limit.
+        assert generate(1, 2026) == generate(3, 2027)
+
+    def test_update_totals_and_overdue_sweep(self):
+        _employee('1000.00', payment_day=5)
+        _employee('800.00', payment_day=5)
+        period = generate_periods([(2026, 3)])[0]['period']
+        paid, unpaid = period.payroll_records.order_by('expected_amount')
+        paid.amount_paid = Decimal('800.00')
+        paid.update_status()
+        period.update_totals()
+
+        assert period.total_paid == Decimal('800.00')
+        assert PayrollPeriod.objects.get().outstanding == Decimal('1000.00')
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert mark_overdue(today=date(2026, 3, 6)) == 1
+        assert len(ctx.captured_queries) == 1
+        assert set(PayrollRecord.objects.values_list('status', flat=True)) == {'paid', 'overdue'}
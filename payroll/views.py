@@ -368,10 +368,9 @@ def edit_salary(request, employee_id):
 @payroll_permission_required
 def generate_period(request):
     """Generate a new payroll period"""
-    from .models import PayrollPeriod, PayrollRecord
+    from .models import PayrollPeriod
+    from .generation import generate_period as generate_payroll_period
     from django.utils import timezone
-    from datetime import date
-    from calendar import monthrange
     
     if request.method == 'POST':
         month = int(request.POST.get('month'))
@@ -412,24 +411,9 @@ def generate_period(request):
             period.delete()
             return redirect('payroll:employee_list')
         
-        # Generate records for each employee
-        records_created = 0
-        for employee in employees:
-            # Calculate due date
-            payment_day = min(employee.payment_day, monthrange(year, month)[1])
-            due_date = date(year, month, payment_day)
-            
-            PayrollRecord.objects.create(
-                period=period,
-                employee=employee,
-                expected_amount=employee.monthly_salary,
-                due_date=due_date,
-                status='pending'
-            )
-            records_created += 1
-        
-        # Update period totals
-        period.update_totals()
+        # Generate records for every employee in one batch; this also
+        # refreshes the period totals
+        records_created = generate_payroll_period(year, month, force=True)['records']
         
         # Log the action
         log_payroll_access(
@@ -1,5 +1,6 @@
 from django.shortcuts import render
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 from django.db.models import Sum, Count, Q, Avg
 from django.db.models.functions import TruncMonth, TruncDate
@@ -8,6 +9,7 @@ from loans.models import Loan
 from payments.models import Payment, PaymentSchedule
 from accounts.models import User
 from documents.models import ClientDocument
+from palmcash.db.routers import use_replica
 from common.utils import (
     get_system_launch_date, 
     get_monthly_periods_since_launch, 
@@ -15,6 +17,7 @@ from common.utils import (
     get_system_age_description
 )
 
+@method_decorator(use_replica, name='dispatch')
 class ReportListView(LoginRequiredMixin, TemplateView):
     template_name = 'reports/report_list.html'
     
@@ -91,6 +94,7 @@ class ReportListView(LoginRequiredMixin, TemplateView):
         
         return context
 
+@method_decorator(use_replica, name='dispatch')
 class MonthlyCollectionTrendView(LoginRequiredMixin, TemplateView):
     template_name = 'reports/monthly_collection_trend.html'
     
@@ -250,6 +254,7 @@ class MonthlyCollectionTrendView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(use_replica, name='dispatch')
 class SystemStatisticsView(LoginRequiredMixin, TemplateView):
     template_name = 'reports/system_statistics_tailwind.html'
     
@@ -318,6 +323,7 @@ class SystemStatisticsView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(use_replica, name='dispatch')
 class LoanReportView(LoginRequiredMixin, TemplateView):
     template_name = 'reports/loan_report.html'
     
@@ -381,6 +387,7 @@ class LoanReportView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(use_replica, name='dispatch')
 class LoanExportView(LoginRequiredMixin, TemplateView):
     def dispatch(self, request, *args, **kwargs):
         # Only admins and managers can access system reports
@@ -392,6 +399,7 @@ class LoanExportView(LoginRequiredMixin, TemplateView):
         return super().dispatch(request, *args, **kwargs)
 
 
+@method_decorator(use_replica, name='dispatch')
 class PaymentReportView(LoginRequiredMixin, TemplateView):
     template_name = 'reports/payment_report.html'
     
@@ -452,6 +460,7 @@ class PaymentReportView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(use_replica, name='dispatch')
 class PaymentExportView(LoginRequiredMixin, TemplateView):
     def dispatch(self, request, *args, **kwargs):
         # Only admins and managers can access system reports
@@ -463,6 +472,7 @@ class PaymentExportView(LoginRequiredMixin, TemplateView):
         return super().dispatch(request, *args, **kwargs)
 
 
+@method_decorator(use_replica, name='dispatch')
 class FinancialReportView(LoginRequiredMixin, TemplateView):
     template_name = 'reports/financial_report.html'
     
@@ -589,6 +599,7 @@ class FinancialReportView(LoginRequiredMixin, TemplateView):
         return context
 
 
+@method_decorator(use_replica, name='dispatch')
 class FinancialExportView(LoginRequiredMixin, TemplateView):
     def dispatch(self, request, *args, **kwargs):
         # Only admins and managers can access system reports
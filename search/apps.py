@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+    verbose_name = 'Search'
+
+    def ready(self):
+        """Import signal handlers and make sure the full-text index exists"""
+        import search.signals  # noqa
+        from .backends import ensure_index_after_migrate
+        post_migrate.connect(ensure_index_after_migrate, sender=self)
@@ -0,0 +1,146 @@
+"""
+Database-specific full-text matching for SearchDocument.body.
+
+MySQL gets a FULLTEXT index queried in boolean mode. SQLite gets an FTS5
+table that mirrors the body column through triggers. Any other database -
+or an SQLite build without FTS5 - falls back to LIKE over the (narrow)
+document table, which is still cheaper than the joins the views used to
+search across.
+"""
+
+from django.db import DatabaseError, connections
+from django.db.models.expressions import RawSQL
+
+TABLE = 'search_searchdocument'
+MYSQL_INDEX = 'search_doc_body_fulltext'
+FTS_TABLE = 'search_searchdocument_fts'
+
+SQLITE_SETUP = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    f"USING fts5(body, content='{TABLE}', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body); "
+    f"INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def ensure_index(connection):
+    """Create the full-text index for this connection if it is missing."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+                [TABLE, MYSQL_INDEX],
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(f"ALTER TABLE {TABLE} ADD FULLTEXT INDEX {MYSQL_INDEX} (body)")
+        elif connection.vendor == 'sqlite':
+            try:
+                for statement in SQLITE_SETUP:
+                    cursor.execute(statement)
+            except DatabaseError:
+                # SQLite built without FTS5: search() falls back to LIKE.
+                pass
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(f"ALTER TABLE {TABLE} DROP INDEX {MYSQL_INDEX}")
+        elif connection.vendor == 'sqlite':
+            for suffix in ('_ai', '_ad', '_au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def ensure_index_after_migrate(sender, using='default', **kwargs):
+    """
+    post_migrate hook. Test databases are often built without running
+    migrations, so the index is (re)checked after every migrate.
+    """
+    connection = connections[using]
+    if TABLE in connection.introspection.table_names():
+        ensure_index(connection)
+
+
+def fulltext_ids(terms, scope, limit=None, using='default'):
+    """
+    Object ids in ``scope`` whose body contains every term as a word
+    prefix, best match first.
+    """
+    connection = connections[using]
+    if connection.vendor == 'mysql':
+        expression = ' '.join(f'+{term}*' for term in terms)
+        sql = (
+            f"SELECT object_id FROM {TABLE} "
+            f"WHERE scope = %s AND MATCH(body) AGAINST (%s IN BOOLEAN MODE) "
+            f"ORDER BY MATCH(body) AGAINST (%s IN BOOLEAN MODE) DESC, id"
+        )
+        params = [scope, expression, expression]
+    elif connection.vendor == 'sqlite':
+        expression = ' '.join(f'"{term}"*' for term in terms)
+        sql = (
+            f"SELECT d.object_id FROM {FTS_TABLE} f JOIN {TABLE} d ON d.id = f.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND d.scope = %s ORDER BY bm25({FTS_TABLE}), d.id"
+        )
+        params = [expression, scope]
+    else:
+        return _like_ids(terms, scope, limit, using)
+
+    if limit:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+    except DatabaseError:
+        if connection.vendor != 'sqlite':
+            raise
+        # No FTS5 table (SQLite built without it).
+        return _like_ids(terms, scope, limit, using)
+
+
+def _has_fts_table(connection):
+    # Checked once per connection; an SQLite build without FTS5 never gets the table.
+    if not hasattr(connection, 'search_fts_table'):
+        connection.search_fts_table = FTS_TABLE in connection.introspection.table_names()
+    return connection.search_fts_table
+
+
+def fulltext_filter(documents, terms, using='default'):
+    """
+    ``documents`` narrowed to those whose body contains every term as a
+    word prefix. Unranked and unlimited: the match is a self-contained
+    subquery, so the result can itself be used as a subquery.
+    """
+    connection = connections[using]
+    if connection.vendor == 'mysql':
+        expression = ' '.join(f'+{term}*' for term in terms)
+        return documents.filter(id__in=RawSQL(
+            f"SELECT id FROM {TABLE} WHERE MATCH(body) AGAINST (%s IN BOOLEAN MODE)", [expression],
+        ))
+    if connection.vendor == 'sqlite' and _has_fts_table(connection):
+        expression = ' '.join(f'"{term}"*' for term in terms)
+        return documents.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression],
+        ))
+    for term in terms:
+        documents = documents.filter(body__contains=term)
+    return documents
+
+
+def _like_ids(terms, scope, limit, using):
+    from .models import SearchDocument
+
+    documents = SearchDocument.objects.using(using).filter(scope=scope)
+    for term in terms:
+        documents = documents.filter(body__contains=term)
+    ids = documents.order_by('title', 'id').values_list('object_id', flat=True)
+    return list(ids[:limit] if limit else ids)
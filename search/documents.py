@@ -0,0 +1,185 @@
+"""
+Building and syncing SearchDocument rows for users, loans and groups.
+"""
+
+import re
+
+from django.db import transaction
+
+USER_FIELDS = {'first_name', 'last_name', 'username', 'email', 'phone_number', 'national_id'}
+LOAN_FIELDS = {'application_number', 'borrower', 'borrower_id'}
+GROUP_FIELDS = {'name', 'description', 'assigned_officer', 'assigned_officer_id'}
+
+
+def normalize_text(*values):
+    return ' '.join(' '.join(str(value) for value in values if value).lower().split())
+
+
+def normalize_phone(value):
+    """Digits only, with the Zambian country code folded into the local 0 prefix."""
+    digits = re.sub(r'\D', '', str(value or ''))
+    if digits.startswith('260') and len(digits) > 9:
+        digits = '0' + digits[3:]
+    return digits
+
+
+def normalize_identifier(value):
+    """Lowercase letters and digits only (NRC and application numbers)."""
+    return re.sub(r'[^0-9a-z]', '', str(value or '').lower())
+
+
+def user_document(user):
+    phone = normalize_phone(user.phone_number)
+    national_id = normalize_identifier(user.national_id)
+    return {
+        'title': user.get_full_name() or user.username,
+        'body': normalize_text(
+            user.first_name, user.last_name, user.username, user.email,
+            phone, user.phone_number, user.national_id, national_id,
+        ),
+        'phone': phone,
+        'national_id': national_id,
+        'reference': '',
+    }
+
+
+def loan_document(loan, borrower):
+    """A loan is found by its number and by its borrower's name and identifiers."""
+    phone = normalize_phone(borrower.phone_number)
+    national_id = normalize_identifier(borrower.national_id)
+    reference = normalize_identifier(loan.application_number)
+    return {
+        'title': loan.application_number,
+        'body': normalize_text(
+            loan.application_number, reference,
+            borrower.first_name, borrower.last_name, phone, national_id,
+        ),
+        'phone': phone,
+        'national_id': national_id,
+        'reference': reference,
+    }
+
+
+def group_document(group, officer):
+    return {
+        'title': group.name,
+        'body': normalize_text(
+            group.name, group.description,
+            officer.first_name if officer else '', officer.last_name if officer else '',
+        ),
+        'phone': '',
+        'national_id': '',
+        'reference': '',
+    }
+
+
+def _save(scope, object_id, fields):
+    from .models import SearchDocument
+
+    if not SearchDocument.objects.filter(scope=scope, object_id=object_id).update(**fields):
+        SearchDocument.objects.create(scope=scope, object_id=object_id, **fields)
+
+
+def index_user(user, related=True):
+    """
+    Index a user. With ``related``, also re-index the loans they borrowed
+    and the groups they manage, whose documents carry their name.
+    """
+    from clients.models import BorrowerGroup
+    from loans.models import Loan
+
+    _save('user', user.pk, user_document(user))
+    if not related:
+        return
+    for loan in Loan.objects.filter(borrower=user).only('id', 'application_number'):
+        _save('loan', loan.pk, loan_document(loan, user))
+    for group in BorrowerGroup.objects.filter(assigned_officer=user).only('id', 'name', 'description'):
+        _save('group', group.pk, group_document(group, user))
+
+
+def index_loan(loan):
+    _save('loan', loan.pk, loan_document(loan, loan.borrower))
+
+
+def index_new_loans(loans):
+    """Index freshly inserted loans (borrower loaded) with one bulk insert."""
+    from .models import SearchDocument
+
+    SearchDocument.objects.bulk_create(
+        [SearchDocument(scope='loan', object_id=loan.pk, **loan_document(loan, loan.borrower)) for loan in loans],
+        ignore_conflicts=True,
+    )
+
+
+def index_group(group):
+    _save('group', group.pk, group_document(group, group.assigned_officer))
+
+
+def index_groups(group_ids):
+    """Re-index groups changed with QuerySet.update(), in a fixed number of queries."""
+    from clients.models import BorrowerGroup
+    from .models import SearchDocument
+
+    groups = BorrowerGroup.objects.filter(pk__in=group_ids).select_related('assigned_officer').only(
+        'id', 'name', 'description', 'assigned_officer__first_name', 'assigned_officer__last_name',
+    )
+    documents = [
+        SearchDocument(scope='group', object_id=group.pk, **group_document(group, group.assigned_officer))
+        for group in groups
+    ]
+    with transaction.atomic():
+        SearchDocument.objects.filter(scope='group', object_id__in=group_ids).delete()
+        SearchDocument.objects.bulk_create(documents)
+
+
+def remove(scope, object_id):
+    from .models import SearchDocument
+
+    SearchDocument.objects.filter(scope=scope, object_id=object_id).delete()
+
+
+def rebuild(batch_size=1000):
+    """Rebuild every document with bulk inserts; returns {scope: count}."""
+    from accounts.models import User
+    from clients.models import BorrowerGroup
+    from loans.models import Loan
+    from .models import SearchDocument
+
+    sources = {
+        'user': (
+            User.objects.only(
+                'id', 'first_name', 'last_name', 'username', 'email', 'phone_number', 'national_id'
+            ),
+            user_document,
+        ),
+        'loan': (
+            Loan.objects.select_related('borrower').only(
+                'id', 'application_number', 'borrower__first_name', 'borrower__last_name',
+                'borrower__phone_number', 'borrower__national_id',
+            ),
+            lambda loan: loan_document(loan, loan.borrower),
+        ),
+        'group': (
+            BorrowerGroup.objects.select_related('assigned_officer').only(
+                'id', 'name', 'description',
+                'assigned_officer__first_name', 'assigned_officer__last_name',
+            ),
+            lambda group: group_document(group, group.assigned_officer),
+        ),
+    }
+
+    counts = {}
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for scope, (queryset, build) in sources.items():
+            batch = []
+            counts[scope] = 0
+            for obj in queryset.order_by('pk').iterator(chunk_size=batch_size):
+                batch.append(SearchDocument(scope=scope, object_id=obj.pk, **build(obj)))
+                if len(batch) >= batch_size:
+                    SearchDocument.objects.bulk_create(batch)
+                    counts[scope] += len(batch)
+                    batch = []
+            SearchDocument.objects.bulk_create(batch)
+            counts[scope] += len(batch)
+    return counts
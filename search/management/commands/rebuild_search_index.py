@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from search.backends import ensure_index
+from search.documents import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the search index for users, loans and groups '
+        '(after bulk imports or updates that bypass model signals)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Documents per bulk insert (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        ensure_index(connection)
+        counts = rebuild(batch_size=options['batch_size'])
+        for scope, count in counts.items():
+            self.stdout.write(f'{scope}: {count} document(s)')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
@@ -0,0 +1,44 @@
+from django.db import migrations, models
+
+
+def create_fulltext_index(apps, schema_editor):
+    from search.backends import ensure_index
+    ensure_index(schema_editor.connection)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    from search.backends import drop_index
+    drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('user', 'User'), ('loan', 'Loan'), ('group', 'Group')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('national_id', models.CharField(blank=True, max_length=50)),
+                ('reference', models.CharField(blank=True, max_length=50)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('scope', 'object_id')},
+                'indexes': [
+                    models.Index(fields=['scope', 'phone'], name='search_doc_phone_idx'),
+                    models.Index(fields=['scope', 'national_id'], name='search_doc_nrc_idx'),
+                    models.Index(fields=['scope', 'reference'], name='search_doc_ref_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Normalised search text for one borrower/user, loan or group.
+
+    ``body`` carries the full-text index (FULLTEXT on MySQL, an FTS5 table
+    on SQLite); ``phone``, ``national_id`` and ``reference`` hold normalised
+    identifiers for indexed prefix lookups.
+    """
+
+    SCOPE_CHOICES = [
+        ('user', 'User'),
+        ('loan', 'Loan'),
+        ('group', 'Group'),
+    ]
+
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField()
+    phone = models.CharField(max_length=20, blank=True)
+    national_id = models.CharField(max_length=50, blank=True)
+    reference = models.CharField(max_length=50, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['scope', 'object_id']
+        indexes = [
+            models.Index(fields=['scope', 'phone'], name='search_doc_phone_idx'),
+            models.Index(fields=['scope', 'national_id'], name='search_doc_nrc_idx'),
+            models.Index(fields=['scope', 'reference'], name='search_doc_ref_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_scope_display()} #{self.object_id}: {self.title}"
@@ -0,0 +1,99 @@
+"""
+Search API used by the list views.
+
+    from search.services import filter_ids
+    loans = loans.filter(pk__in=filter_ids(query, 'loan'))
+
+filter_ids() returns the matching ids as a subquery, so the caller's own
+scoping (role, branch, officer) and ordering apply in the same statement
+and no match is cut off before them. search() returns a ranked list.
+
+A single-token query that looks like a phone number, NRC or application
+number is first matched as an indexed prefix of those identifiers; the
+words of the query are then matched against the full-text index. Both
+sets of ids are returned ranked, identifier hits first.
+"""
+
+import re
+
+from .backends import fulltext_filter, fulltext_ids
+from .documents import normalize_identifier, normalize_phone
+
+SCOPES = ('user', 'loan', 'group')
+
+
+def _identifier_lookups(query):
+    """Prefix lookups on the identifier columns for a single-token query, or None."""
+    from django.db.models import Q
+
+    token = query.strip()
+    if not token or ' ' in token:
+        return None
+
+    lookups = Q()
+    identifier = normalize_identifier(token)
+    if len(identifier) >= 3:
+        lookups |= Q(national_id__startswith=identifier) | Q(reference__startswith=identifier)
+    phone = normalize_phone(token)
+    if len(phone) >= 3 and identifier.isdigit():
+        lookups |= Q(phone__startswith=phone)
+    return lookups or None
+
+
+def identifier_ids(query, scope, limit=None):
+    """Ids whose phone, NRC or application number starts with the query."""
+    from .models import SearchDocument
+
+    lookups = _identifier_lookups(query)
+    if lookups is None:
+        return []
+
+    ids = (
+        SearchDocument.objects
+        .filter(lookups, scope=scope)
+        .order_by('reference', 'phone', 'national_id', 'id')
+        .values_list('object_id', flat=True)
+    )
+    return list(ids[:limit] if limit else ids)
+
+
+def search(query, scope, limit=None):
+    """
+    Ranked ids of objects in ``scope`` ('user', 'loan' or 'group') that
+    match ``query``. Every word must match the start of a word in the
+    indexed text, so "jo ban" finds "John Banda".
+    """
+    if scope not in SCOPES:
+        raise ValueError(f'Unknown search scope: {scope}')
+    terms = re.findall(r'\w+', (query or '').lower())
+    if not terms:
+        return []
+
+    ranked = identifier_ids(query, scope, limit)
+    seen = set(ranked)
+    for object_id in fulltext_ids(terms, scope, limit):
+        if object_id not in seen:
+            seen.add(object_id)
+            ranked.append(object_id)
+    return ranked[:limit] if limit else ranked
+
+
+def filter_ids(query, scope):
+    """
+    Ids of every object in ``scope`` that matches ``query``, as an
+    unevaluated subquery for filtering a queryset with ``pk__in``.
+    """
+    from .models import SearchDocument
+
+    if scope not in SCOPES:
+        raise ValueError(f'Unknown search scope: {scope}')
+    terms = re.findall(r'\w+', (query or '').lower())
+    if not terms:
+        return SearchDocument.objects.none().values_list('object_id', flat=True)
+
+    documents = SearchDocument.objects.filter(scope=scope)
+    matches = fulltext_filter(documents, terms)
+    lookups = _identifier_lookups(query)
+    if lookups is not None:
+        matches = matches | documents.filter(lookups)
+    return matches.values_list('object_id', flat=True)
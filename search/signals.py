@@ -0,0 +1,53 @@
+"""
+Signal handlers for search app
+
+Keep SearchDocument rows in step with the users, loans and groups they
+describe. Saves that only touch unindexed fields (last_login, loan
+balances, ...) are skipped when the caller passes update_fields.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from clients.models import BorrowerGroup
+from loans.models import Loan
+
+from .documents import GROUP_FIELDS, LOAN_FIELDS, USER_FIELDS, index_group, index_loan, index_user, remove
+
+
+def _indexed_change(update_fields, indexed):
+    return update_fields is None or bool(indexed.intersection(update_fields))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def index_user_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if _indexed_change(update_fields, USER_FIELDS):
+        # A new user has no loans or groups yet.
+        index_user(instance, related=not created)
+
+
+@receiver(post_save, sender=Loan)
+def index_loan_on_save(sender, instance, update_fields=None, **kwargs):
+    if _indexed_change(update_fields, LOAN_FIELDS):
+        index_loan(instance)
+
+
+@receiver(post_save, sender=BorrowerGroup)
+def index_group_on_save(sender, instance, update_fields=None, **kwargs):
+    if _indexed_change(update_fields, GROUP_FIELDS):
+        index_group(instance)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def remove_user(sender, instance, **kwargs):
+    remove('user', instance.pk)
+
+
+@receiver(post_delete, sender=Loan)
+def remove_loan(sender, instance, **kwargs):
+    remove('loan', instance.pk)
+
+
+@receiver(post_delete, sender=BorrowerGroup)
+def remove_group(sender, instance, **kwargs):
+    remove('group', instance.pk)
@@ -0,0 +1,108 @@
+"""
+Tests for the search index and the search() API.
+"""
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from dashboard.tests.factories import (
+    AdminFactory, BorrowerFactory, BorrowerGroupFactory, LoanFactory, OfficerFactory,
+)
+from loans.models import Loan
+from search.models import SearchDocument
+from search.services import filter_ids, search
+
+
+@pytest.fixture
+def borrowers():
+    john = BorrowerFactory(
+        first_name='John', last_name='Banda', phone_number='+260977123456', national_id='123456/78/1',
+    )
+    jane = BorrowerFactory(
+        first_name='Jane', last_name='Phiri', phone_number='+260966000111', national_id='654321/10/1',
+    )
+    return john, jane
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    def test_word_prefixes(self, borrowers):
+        john, jane = borrowers
+
+        assert search('jo ban', 'user') == [john.pk]
+        assert search('PHIRI', 'user') == [jane.pk]
+        assert search('john phiri', 'user') == []
+
+    def test_identifier_prefixes(self, borrowers):
+        john, jane = borrowers
+        loan = LoanFactory(borrower=john)
+
+        assert search('0977123', 'user') == [john.pk]
+        assert search('+26096600', 'user') == [jane.pk]
+        assert search('654321/10', 'user') == [jane.pk]
+        assert search(loan.application_number[:-1], 'loan') == [loan.pk]
+        assert search('0977123', 'loan') == [loan.pk]
+
+    def test_scopes_are_separate(self, borrowers):
+        john, _ = borrowers
+        officer = OfficerFactory(first_name='Mutale', last_name='Zulu')
+        group = BorrowerGroupFactory(name='Chilenje Traders', assigned_officer=officer)
+        loan = LoanFactory(borrower=john, loan_officer=officer)
+
+        assert search('banda', 'loan') == [loan.pk]
+        assert search('chilenje', 'group') == [group.pk]
+        assert search('zulu', 'group') == [group.pk]
+        assert search('chilenje', 'loan') == []
+
+    def test_documents_follow_changes(self, borrowers):
+        john, _ = borrowers
+        loan = LoanFactory(borrower=john)
+
+        john.last_name = 'Mwale'
+        john.save()
+        assert search('mwale', 'loan') == [loan.pk]
+        assert search('banda', 'user') == []
+
+        # Saves that do not touch indexed fields leave the document alone.
+        john.first_name = 'Jonathan'
+        john.save(update_fields=['last_login'])
+        assert search('jonathan', 'user') == []
+
+        loan.delete()
+        assert not SearchDocument.objects.filter(scope='loan', object_id=loan.pk).exists()
+
+    def test_rebuild(self, borrowers):
+        john, _ = borrowers
+        SearchDocument.objects.all().delete()
+
+        call_command('rebuild_search_index', verbosity=0)
+
+        assert search('banda', 'user') == [john.pk]
+
+    def test_filter_ids_are_not_cut_off_before_scoping(self, borrowers):
+        john, _ = borrowers
+        SearchDocument.objects.bulk_create([
+            SearchDocument(scope='loan', object_id=10 ** 6 + n, title=f'OTHER-{n}', body=f'other-{n} banda')
+            for n in range(600)
+        ])
+        officer = OfficerFactory()
+        loan = LoanFactory(borrower=john, loan_officer=officer)
+
+        in_book = Loan.objects.filter(loan_officer=officer, pk__in=filter_ids('banda', 'loan'))
+        assert list(in_book) == [loan]
+        assert list(Loan.objects.filter(pk__in=filter_ids('0977123', 'loan'))) == [loan]
+        assert not Loan.objects.filter(pk__in=filter_ids('  ', 'loan')).exists()
+
+    def test_unknown_scope(self):
+        with pytest.raises(ValueError):
+            search('john', 'payments')
+
+    def test_users_manage_view(self, client, borrowers):
+        john, _ = borrowers
+        client.force_login(AdminFactory())
+
+        response = client.get(reverse('accounts:manage_users'), {'search': 'banda'})
+
+        assert response.status_code == 200
+        assert list(response.context['users']) == [john]
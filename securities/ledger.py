@@ -0,0 +1,255 @@
+"""
+Securities ledger.
+
+ledger_entries() normalises every security movement into one signed row
+per movement, keyed by loan and client (borrower):
+
+    upfront         verified security deposits                       +
+    topup           approved top-up requests                         +
+    carry_forward   approved carry-forward transactions              +
+    adjustment      approved adjustments (applied to the loan)       -
+    return          approved returns                                 -
+    withdrawal      approved withdrawals                             -
+
+Drilldown totals are a single GROUP BY: the ledger is rolled up per loan
+and joined to a distinct set of (loan, key) pairs for the level being
+shown - a loan can belong to several officers or groups (its own officer
+and the officers of its borrower's groups), so those keys live in the
+pairs rather than on the entry.
+
+With settings.SECURITIES_LEDGER_SUMMARY enabled, all-time totals are read
+from LoanSecuritySummary rows instead of the live ledger; the
+refresh_security_ledger command rebuilds them and is meant to run nightly.
+Date-filtered totals always come from the live ledger.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Case, CharField, DecimalField, F, Value, When
+from django.db.models.functions import Coalesce, Lower
+from django.utils import timezone
+
+from palmcash.db.routers import compile_for_read
+
+# (entry kind, total column)
+KINDS = (
+    ('upfront', 'upfront'),
+    ('topup', 'topups'),
+    ('carry_forward', 'carry_forwards'),
+    ('adjustment', 'adjustments'),
+    ('return', 'returned'),
+    ('withdrawal', 'withdrawals'),
+)
+COLUMNS = tuple(column for _kind, column in KINDS) + ('balance',)
+INCREASES = ('upfront', 'topup', 'carry_forward')
+
+CENT = Decimal('0.01')
+
+
+def zero_totals():
+    return {column: Decimal('0') for column in COLUMNS}
+
+
+def _money(value):
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def ledger_entries(date_from=None, date_to=None):
+    """
+    Signed security movements as a UNION ALL queryset of
+    (loan_ref, client_ref, entry_kind, entry_amount, signed_amount, moved_at).
+
+    Deposits are dated by payment date (falling back to creation), top-ups
+    by request date and transactions by creation. Both dates are needed to
+    filter; otherwise every movement is returned.
+    """
+    from loans.models import SecurityDeposit, SecurityTopUpRequest, SecurityTransaction
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+
+    def source(queryset, kind, amount, signed, moved_at):
+        queryset = queryset.order_by().annotate(
+            loan_ref=F('loan_id'),
+            client_ref=F('loan__borrower_id'),
+            entry_kind=kind,
+            entry_amount=amount,
+            signed_amount=signed,
+            moved_at=moved_at,
+        )
+        if date_from and date_to:
+            queryset = queryset.filter(moved_at__date__range=[date_from, date_to])
+        return queryset.values_list(
+            'loan_ref', 'client_ref', 'entry_kind', 'entry_amount', 'signed_amount', 'moved_at'
+        )
+
+    deposits = source(
+        SecurityDeposit.objects.filter(is_verified=True),
+        Value('upfront', output_field=CharField()),
+        F('paid_amount'), F('paid_amount'),
+        Coalesce('payment_date', 'created_at'),
+    )
+    topups = source(
+        SecurityTopUpRequest.objects.filter(status='approved'),
+        Value('topup', output_field=CharField()),
+        F('requested_amount'), F('requested_amount'),
+        F('requested_date'),
+    )
+    transactions = source(
+        SecurityTransaction.objects.filter(
+            status='approved', transaction_type__in=[kind for kind, _column in KINDS[2:]],
+        ),
+        F('transaction_type'),
+        F('amount'),
+        Case(
+            When(transaction_type__in=INCREASES, then=F('amount')),
+            default=-F('amount'),
+            output_field=money,
+        ),
+        F('created_at'),
+    )
+    return deposits.union(topups, transactions, all=True)
+
+
+def _summary_enabled(date_from, date_to):
+    return getattr(settings, 'SECURITIES_LEDGER_SUMMARY', False) and not (date_from and date_to)
+
+
+def _per_loan_sql(alias, date_from=None, date_to=None, live=False):
+    """SQL for one row per loan on database ``alias``: loan_ref plus every total column."""
+    if not live and _summary_enabled(date_from, date_to):
+        from .models import LoanSecuritySummary
+
+        table = connections[alias].ops.quote_name(LoanSecuritySummary._meta.db_table)
+        return f"SELECT loan_id AS loan_ref, {', '.join(COLUMNS)} FROM {table}", []
+
+    entries_sql, params = ledger_entries(date_from, date_to).query.get_compiler(using=alias).as_sql()
+    sums = ', '.join(
+        f"SUM(CASE WHEN e.entry_kind = '{kind}' THEN e.entry_amount ELSE 0 END) AS {column}"
+        for kind, column in KINDS
+    )
+    return (
+        f"SELECT e.loan_ref, {sums}, SUM(e.signed_amount) AS balance "
+        f"FROM ({entries_sql}) e GROUP BY e.loan_ref"
+    ), list(params)
+
+
+def security_totals(pairs, date_from=None, date_to=None):
+    """
+    Security totals per key for a (loan_key, group_key) pairs queryset.
+
+    One statement: the per-loan ledger joined to the pairs and grouped by
+    key, run on the database the router reads ``pairs`` from. Returns
+    {key: {column: Decimal}}; keys without movements are absent.
+    """
+    alias, pairs_sql, pairs_params = compile_for_read(pairs)
+    loans_sql, loans_params = _per_loan_sql(alias, date_from, date_to)
+    sums = ', '.join(f'SUM(l.{column})' for column in COLUMNS)
+    sql = (
+        f"SELECT k.group_key, {sums} FROM ({loans_sql}) l "
+        f"INNER JOIN ({pairs_sql}) k ON k.loan_key = l.loan_ref "
+        f"GROUP BY k.group_key"
+    )
+    with connections[alias].cursor() as cursor:
+        cursor.execute(sql, loans_params + list(pairs_params))
+        rows = cursor.fetchall()
+    return {row[0]: dict(zip(COLUMNS, (_money(value) for value in row[1:]))) for row in rows}
+
+
+def count_by_key(pairs):
+    """{key: distinct item count} for an (item_key, group_key) pairs queryset."""
+    alias, pairs_sql, params = compile_for_read(pairs)
+    sql = f"SELECT k.group_key, COUNT(DISTINCT k.item_key) FROM ({pairs_sql}) k GROUP BY k.group_key"
+    with connections[alias].cursor() as cursor:
+        cursor.execute(sql, params)
+        return dict(cursor.fetchall())
+
+
+def _pairs(queryset, item, key):
+    return queryset.order_by().annotate(item_key=item, group_key=key).values_list('item_key', 'group_key')
+
+
+def _loan_pairs(queryset, key):
+    return queryset.order_by().annotate(loan_key=F('pk'), group_key=key).values_list('loan_key', 'group_key')
+
+
+def officer_loan_pairs(officers, group_id=None, by_branch=False):
+    """
+    (loan, officer) pairs - or (loan, lower-cased branch name) with
+    ``by_branch`` - for loans an officer made or whose borrower is in one of
+    the officer's groups. ``group_id`` keeps only borrowers in that group.
+    """
+    from loans.models import Loan
+
+    def pairs(officer_path):
+        filters = {f'{officer_path}__in': officers}
+        if group_id:
+            filters['borrower__group_memberships__group_id'] = group_id
+        key = Lower(f'{officer_path}__officer_assignment__branch') if by_branch else F(officer_path)
+        return _loan_pairs(Loan.objects.filter(**filters), key)
+
+    return pairs('loan_officer').union(pairs('borrower__group_memberships__group__assigned_officer'))
+
+
+def officer_client_pairs(officers, group_id=None, by_branch=False):
+    """(borrower, officer or branch) pairs for active group members and directly assigned clients."""
+    from accounts.models import User
+
+    def pairs(officer_path, **filters):
+        filters[f'{officer_path}__in'] = officers
+        if group_id:
+            filters['group_memberships__group_id'] = group_id
+        key = Lower(f'{officer_path}__officer_assignment__branch') if by_branch else F(officer_path)
+        return _pairs(User.objects.filter(role='borrower', **filters), F('pk'), key)
+
+    return pairs('group_memberships__group__assigned_officer', group_memberships__is_active=True).union(
+        pairs('assigned_officer')
+    )
+
+
+def group_loan_pairs(groups):
+    """(loan, group) pairs for loans of each group's active members."""
+    from loans.models import Loan
+
+    loans = Loan.objects.filter(
+        borrower__group_memberships__group__in=groups, borrower__group_memberships__is_active=True,
+    )
+    return _loan_pairs(loans, F('borrower__group_memberships__group')).distinct()
+
+
+def client_loan_pairs(client_ids):
+    from loans.models import Loan
+
+    return _loan_pairs(Loan.objects.filter(borrower_id__in=client_ids), F('borrower_id'))
+
+
+def loan_pairs(loan_ids):
+    from loans.models import Loan
+
+    return _loan_pairs(Loan.objects.filter(pk__in=loan_ids), F('pk'))
+
+
+def refresh_summaries(batch_size=1000):
+    """Rebuild LoanSecuritySummary from the live ledger; returns the row count."""
+    from .models import LoanSecuritySummary
+
+    # Rebuilt from the database the summaries are written to, never from a
+    # replica that may lag behind it.
+    alias = router.db_for_write(LoanSecuritySummary)
+    sql, params = _per_loan_sql(alias, live=True)
+    with connections[alias].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    now = timezone.now()
+    summaries = [
+        LoanSecuritySummary(
+            loan_id=row[0], computed_at=now, **dict(zip(COLUMNS, (_money(value) for value in row[1:])))
+        )
+        for row in rows
+    ]
+    with transaction.atomic(using=alias):
+        LoanSecuritySummary.objects.using(alias).all().delete()
+        LoanSecuritySummary.objects.using(alias).bulk_create(summaries, batch_size=batch_size)
+    return len(summaries)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from securities.ledger import refresh_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the per-loan all-time security totals used by the securities '
+        'drilldown when SECURITIES_LEDGER_SUMMARY is enabled (run nightly)'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Summary rows per bulk insert (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        count = refresh_summaries(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Security ledger summary rebuilt for {count} loan(s)'))
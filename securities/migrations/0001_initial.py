@@ -0,0 +1,33 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('loans', '1000_borrower_account_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanSecuritySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upfront', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('topups', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('carry_forwards', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('adjustments', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('returned', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('withdrawals', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('computed_at', models.DateTimeField()),
+                ('loan', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='security_summary', to='loans.loan')),
+            ],
+            options={
+                'verbose_name': 'Loan Security Summary',
+                'verbose_name_plural': 'Loan Security Summaries',
+            },
+        ),
+    ]
@@ -1,3 +1,22 @@
 from django.db import models
 
-# Create your models here.
+
+class LoanSecuritySummary(models.Model):
+    """All-time security totals per loan, rebuilt nightly from the securities ledger"""
+
+    loan = models.OneToOneField('loans.Loan', on_delete=models.CASCADE, related_name='security_summary')
+    upfront = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    topups = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    carry_forwards = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    adjustments = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    returned = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    withdrawals = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Loan Security Summary'
+        verbose_name_plural = 'Loan Security Summaries'
+
+    def __str__(self):
+        return f"Security summary for loan {self.loan_id}: K{self.balance}"
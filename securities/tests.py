@@ -1,3 +1,150 @@
-from django.test import TestCase
+"""
+Tests for the securities ledger and the drilldown views built on it.
+"""
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q, Sum
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from clients.models import GroupMembership
+from dashboard.tests.factories import (
+    AdminFactory, BorrowerGroupFactory, BranchFactory, GroupMembershipFactory, LoanFactory,
+    OfficerAssignmentFactory,
+)
+from loans.models import Loan, SecurityDeposit, SecurityTopUpRequest, SecurityTransaction
+from securities.models import LoanSecuritySummary
+
+STATS = ('upfront', 'topups', 'adjustments', 'returned', 'balance')
+
+
+def _reference(loans):
+    """The per-type aggregates the drilldown used to run for each row."""
+    def total(queryset, field):
+        return queryset.filter(loan__in=loans).aggregate(total=Sum(field))['total'] or Decimal('0')
+
+    approved = SecurityTransaction.objects.filter(status='approved')
+    upfront = total(SecurityDeposit.objects.filter(is_verified=True), 'paid_amount')
+    topups = total(SecurityTopUpRequest.objects.filter(status='approved'), 'requested_amount')
+    adjustments = total(approved.filter(transaction_type='adjustment'), 'amount')
+    returned = total(approved.filter(transaction_type='return'), 'amount')
+    carried = total(approved.filter(transaction_type='carry_forward'), 'amount')
+    withdrawals = total(approved.filter(transaction_type='withdrawal'), 'amount')
+    return {
+        'upfront': upfront, 'topups': topups, 'adjustments': adjustments, 'returned': returned,
+        'balance': upfront + topups + carried - adjustments - returned - withdrawals,
+    }
+
+
+def _securities(loan, deposit, topup='0', **movements):
+    SecurityDeposit.objects.create(
+        loan=loan, required_amount=deposit, paid_amount=Decimal(deposit), is_verified=True,
+    )
+    if topup != '0':
+        SecurityTopUpRequest.objects.create(loan=loan, requested_amount=Decimal(topup), status='approved')
+    SecurityTopUpRequest.objects.create(loan=loan, requested_amount=Decimal('999'), status='pending')
+    for kind, amount in movements.items():
+        SecurityTransaction.objects.create(
+            loan=loan, transaction_type=kind, amount=Decimal(amount), status='approved',
+        )
+    SecurityTransaction.objects.create(loan=loan, transaction_type='return', amount=Decimal('999'))
+
+
+@pytest.fixture
+def portfolio():
+    branch = BranchFactory()
+    first, second = (OfficerAssignmentFactory(branch=branch.name).officer for _ in range(2))
+    elsewhere = OfficerAssignmentFactory().officer
+    group = BorrowerGroupFactory(assigned_officer=first)
+    other_group = BorrowerGroupFactory(assigned_officer=second)
+    members = [GroupMembershipFactory(group=group).borrower for _ in range(2)]
+    former = GroupMembershipFactory(group=group, is_active=False).borrower
+    outsider = GroupMembershipFactory(group=other_group).borrower
+
+    # Second member borrows from another officer: the loan counts for both.
+    _securities(LoanFactory(borrower=members[0], loan_officer=first), '200.00', '50.00', adjustment='30.00')
+    _securities(LoanFactory(borrower=members[1], loan_officer=second), '300.00', carry_forward='100.00')
+    _securities(LoanFactory(borrower=former, loan_officer=first), '150.00', withdrawal='20.00', **{'return': '40'})
+    _securities(LoanFactory(borrower=outsider, loan_officer=elsewhere), '500.00', '75.00')
+    return {
+        'branch': branch, 'officers': [first, second, elsewhere], 'groups': [group, other_group],
+        'members': members,
+    }
+
+
+def _officer_loans(*officers):
+    return Loan.objects.filter(
+        Q(loan_officer__in=officers) | Q(borrower__group_memberships__group__assigned_officer__in=officers)
+    ).distinct()
+
+
+def _stats(row):
+    return {key: row[key] for key in STATS}
+
+
+@pytest.mark.django_db
+class TestSecuritiesLedger:
+
+    def test_drilldown_matches_per_row_aggregates(self, client, portfolio):
+        first, second, elsewhere = portfolio['officers']
+        group = portfolio['groups'][0]
+        client.force_login(AdminFactory())
+
+        branches = {row['branch'].pk: row for row in client.get(reverse('securities:branches')).context['rows']}
+        branch_row = branches[portfolio['branch'].pk]
+        assert _stats(branch_row) == _reference(_officer_loans(first, second))
+        assert (branch_row['officer_count'], branch_row['group_count'], branch_row['client_count']) == (2, 2, 3)
+
+        officers = client.get(reverse('securities:branch_officers', args=[portfolio['branch'].pk])).context['rows']
+        for row in officers:
+            assert _stats(row) == _reference(_officer_loans(row['officer']))
+
+        groups = client.get(reverse('securities:officer_groups', args=[first.pk])).context['rows']
+        active = GroupMembership.objects.filter(group=group, is_active=True).values('borrower')
+        assert [row['client_count'] for row in groups] == [2]
+        assert _stats(groups[0]) == _reference(Loan.objects.filter(borrower__in=active))
+
+        clients = client.get(reverse('securities:group_clients', args=[group.pk])).context['rows']
+        for row in clients:
+            assert _stats(row) == _reference(Loan.objects.filter(borrower=row['client']))
+            assert row['loan_count'] == 1
+
+        detail = client.get(reverse('securities:client_detail', args=[portfolio['members'][1].pk])).context
+        assert detail['totals']['balance'] == Decimal('400.00')
+        assert len(detail['loan_rows'][0]['transactions']) == 4
+
+    def test_queries_do_not_grow_with_rows(self, client, portfolio):
+        client.force_login(AdminFactory())
+        url = reverse('securities:branch_officers', args=[portfolio['branch'].pk])
+
+        def run():
+            with CaptureQueriesContext(connection) as ctx:
+                client.get(url)
+            return len(ctx.captured_queries)
+
+        run()  # warm the cached user
+        before = run()
+        for _ in range(3):
+            officer = OfficerAssignmentFactory(branch=portfolio['branch'].name).officer
+            _securities(LoanFactory(loan_officer=officer), '100.00', adjustment='10.00')
+
+        assert run() == before
+
+    def test_nightly_summary(self, client, portfolio):
+        client.force_login(AdminFactory())
+        url = reverse('securities:branches')
+        live = [_stats(row) for row in client.get(url).context['rows']]
+
+        call_command('refresh_security_ledger', stdout=StringIO())
+        assert LoanSecuritySummary.objects.count() == 4
+
+        with override_settings(SECURITIES_LEDGER_SUMMARY=True):
+            assert [_stats(row) for row in client.get(url).context['rows']] == live
+            # Date ranges still read the live ledger.
+            dated = client.get(url, {'date_from': '2000-01-01', 'date_to': '2000-01-31'}).context['rows']
+            assert all(row['balance'] == 0 for row in dated)
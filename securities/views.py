@@ -1,91 +1,29 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Count, Q
+from django.db.models import Count, Prefetch, Q
+from django.db.models.functions import Lower
 from decimal import Decimal
 
 from accounts.models import User
 from clients.models import BorrowerGroup, GroupMembership
-from loans.models import Loan, SecurityDeposit, SecurityTopUpRequest, SecurityReturnRequest, SecurityTransaction
+from loans.models import Loan, SecurityTopUpRequest, SecurityTransaction
+from palmcash.db.routers import use_replica
+
+from .ledger import (
+    client_loan_pairs, count_by_key, group_loan_pairs, loan_pairs, officer_client_pairs,
+    officer_loan_pairs, security_totals, zero_totals,
+)
 
 
 def _zero():
     return Decimal('0')
 
 
-def _security_stats_for_loans(loans_qs, date_from=None, date_to=None):
-    """
-    Given a queryset of Loans, compute the 4 security columns + balance.
-    Returns a dict with upfront, topups, adjustments, returned, balance.
-    Optionally filter transactions by date range (date objects).
-    If date_from and date_to are None, show all-time data.
-    """
-    deposit_qs = SecurityDeposit.objects.filter(loan__in=loans_qs, is_verified=True)
-    if date_from and date_to:
-        deposit_qs = deposit_qs.filter(created_at__date__range=[date_from, date_to])
-    upfront = deposit_qs.aggregate(total=Sum('paid_amount'))['total'] or _zero()
-
-    topup_qs = SecurityTopUpRequest.objects.filter(loan__in=loans_qs, status='approved')
-    if date_from and date_to:
-        topup_qs = topup_qs.filter(requested_date__date__range=[date_from, date_to])
-    topups = topup_qs.aggregate(total=Sum('requested_amount'))['total'] or _zero()
-
-    # Adjustments - used to apply security toward loan completion (decreases balance)
-    adj_qs = SecurityTransaction.objects.filter(
-        loan__in=loans_qs, status='approved', transaction_type='adjustment',
-    )
-    if date_from and date_to:
-        adj_qs = adj_qs.filter(created_at__date__range=[date_from, date_to])
-    adjustments = adj_qs.aggregate(total=Sum('amount'))['total'] or _zero()
-
-    ret_qs = SecurityTransaction.objects.filter(
-        loan__in=loans_qs, status='approved', transaction_type='return',
-    )
-    if date_from and date_to:
-        ret_qs = ret_qs.filter(created_at__date__range=[date_from, date_to])
-    returned = ret_qs.aggregate(total=Sum('amount'))['total'] or _zero()
-
-    cf_qs = SecurityTransaction.objects.filter(
-        loan__in=loans_qs, status='approved', transaction_type='carry_forward',
-    )
-    if date_from and date_to:
-        cf_qs = cf_qs.filter(created_at__date__range=[date_from, date_to])
-    carry_forwards = cf_qs.aggregate(total=Sum('amount'))['total'] or _zero()
-
-    # Withdrawals should decrease the balance
-    wd_qs = SecurityTransaction.objects.filter(
-        loan__in=loans_qs, status='approved', transaction_type='withdrawal',
-    )
-    if date_from and date_to:
-        wd_qs = wd_qs.filter(created_at__date__range=[date_from, date_to])
-    withdrawals = wd_qs.aggregate(total=Sum('amount'))['total'] or _zero()
-
-    # Correct balance calculation:
-    # INCREASES: upfront + topups + carry_forwards
-    # DECREASES: adjustments + returned + withdrawals
-    balance = (upfront + topups + carry_forwards) - (adjustments + returned + withdrawals)
-
-    return {
-        'upfront': upfront,
-        'topups': topups,
-        'adjustments': adjustments,
-        'returned': returned,
-        'balance': balance,
-    }
-
-
-def _client_security_stats(client):
-    """Security stats for a single borrower (all their loans)."""
-    loans = Loan.objects.filter(borrower=client)
-    stats = _security_stats_for_loans(loans)
-    stats['loan_count'] = loans.count()
-    # Latest loan for display
-    latest = loans.order_by('-application_date').first()
-    stats['loan_id'] = latest.application_number if latest else '—'
-    stats['loan_status'] = latest.get_status_display() if latest else '—'
-    return stats
+STAT_KEYS = ('upfront', 'topups', 'adjustments', 'returned', 'balance')
 
 
 @login_required
+@use_replica
 def securities_summary(request):
     """
     Hierarchical securities view.
@@ -112,6 +50,7 @@ def securities_summary(request):
 
 
 @login_required
+@use_replica
 def securities_branches(request):
     """
     Branch-level summary for admins.
@@ -166,50 +105,32 @@ def securities_branches(request):
               'upfront': _zero(), 'topups': _zero(), 'adjustments': _zero(),
               'returned': _zero(), 'balance': _zero()}
     
+    # Every active officer, keyed to their branch by lower-cased name
+    officers = User.objects.filter(role='loan_officer', is_active=True)
+    if officer_filter:
+        officers = officers.filter(id=officer_filter)
+
+    stats_by_branch = security_totals(
+        officer_loan_pairs(officers, group_filter, by_branch=True), date_from_obj, date_to_obj
+    )
+    client_counts = count_by_key(officer_client_pairs(officers, group_filter, by_branch=True))
+    officer_counts = dict(
+        officers.order_by().values_list(Lower('officer_assignment__branch')).annotate(n=Count('id', distinct=True))
+    )
+    groups_query = BorrowerGroup.objects.filter(assigned_officer__in=officers, is_active=True)
+    if group_filter:
+        groups_query = groups_query.filter(id=group_filter)
+    group_counts = dict(
+        groups_query.order_by().values_list(Lower('assigned_officer__officer_assignment__branch')).annotate(n=Count('id'))
+    )
+
     for branch in branches:
-        # Get officers in this branch
-        officers = User.objects.filter(
-            role='loan_officer',
-            officer_assignment__branch__iexact=branch.name,
-            is_active=True
-        ).distinct()
-        
-        # Apply officer filter
-        if officer_filter:
-            officers = officers.filter(id=officer_filter)
-        
-        officer_count = officers.count()
-        
-        # Get all loans for officers in this branch
-        loans_query = Q(loan_officer__in=officers) | Q(borrower__group_memberships__group__assigned_officer__in=officers)
-        
-        # Apply group filter
-        if group_filter:
-            loans_query = loans_query & Q(borrower__group_memberships__group_id=group_filter)
-        
-        loans = Loan.objects.filter(loans_query).distinct()
-        
-        stats = _security_stats_for_loans(loans, date_from_obj, date_to_obj)
-        
-        # Get groups count (apply group filter)
-        groups_query = BorrowerGroup.objects.filter(
-            assigned_officer__in=officers,
-            is_active=True
-        )
-        if group_filter:
-            groups_query = groups_query.filter(id=group_filter)
-        group_count = groups_query.count()
-        
-        # Get clients count (apply group filter)
-        clients_query = Q(group_memberships__group__assigned_officer__in=officers, group_memberships__is_active=True) | Q(assigned_officer__in=officers)
-        if group_filter:
-            clients_query = clients_query & Q(group_memberships__group_id=group_filter)
-        
-        client_count = User.objects.filter(
-            clients_query,
-            role='borrower'
-        ).distinct().count()
-        
+        key = branch.name.lower()
+        stats = stats_by_branch.get(key) or zero_totals()
+        officer_count = officer_counts.get(key, 0)
+        group_count = group_counts.get(key, 0)
+        client_count = client_counts.get(key, 0)
+
         rows.append({
             'branch': branch,
             'officer_count': officer_count,
@@ -221,7 +142,7 @@ def securities_branches(request):
         totals['officer_count'] += officer_count
         totals['group_count'] += group_count
         totals['client_count'] += client_count
-        for k in ('upfront', 'topups', 'adjustments', 'returned', 'balance'):
+        for k in STAT_KEYS:
             totals[k] += stats[k]
     
     return render(request, 'securities/branch_summary.html', {
@@ -242,6 +163,7 @@ def securities_branches(request):
 
 
 @login_required
+@use_replica
 def securities_officers(request, branch_id=None):
     """
     Officer-level summary.
@@ -327,36 +249,17 @@ def securities_officers(request, branch_id=None):
     totals = {'group_count': 0, 'client_count': 0, 'upfront': _zero(), 'topups': _zero(),
               'adjustments': _zero(), 'returned': _zero(), 'balance': _zero()}
 
+    stats_by_officer = security_totals(officer_loan_pairs(officers, group_filter), date_from_obj, date_to_obj)
+    client_counts = count_by_key(officer_client_pairs(officers, group_filter))
+    groups_query = BorrowerGroup.objects.filter(assigned_officer__in=officers, is_active=True)
+    if group_filter:
+        groups_query = groups_query.filter(id=group_filter)
+    group_counts = dict(groups_query.order_by().values_list('assigned_officer').annotate(n=Count('id')))
+
     for officer in officers:
-        # Base loans query
-        loans_query = Q(loan_officer=officer) | Q(borrower__group_memberships__group__assigned_officer=officer)
-        
-        # Apply group filter
-        if group_filter:
-            loans_query = loans_query & Q(borrower__group_memberships__group_id=group_filter)
-        
-        loans = Loan.objects.filter(loans_query).distinct()
-        
-        stats = _security_stats_for_loans(loans, date_from_obj, date_to_obj)
-        
-        # Get groups count (apply group filter)
-        groups_query = BorrowerGroup.objects.filter(
-            assigned_officer=officer,
-            is_active=True
-        )
-        if group_filter:
-            groups_query = groups_query.filter(id=group_filter)
-        group_count = groups_query.count()
-        
-        # Get clients count (apply group filter)
-        clients_query = Q(group_memberships__group__assigned_officer=officer, group_memberships__is_active=True) | Q(assigned_officer=officer)
-        if group_filter:
-            clients_query = clients_query & Q(group_memberships__group_id=group_filter)
-        
-        client_count = User.objects.filter(
-            clients_query,
-            role='borrower'
-        ).distinct().count()
+        stats = stats_by_officer.get(officer.pk) or zero_totals()
+        group_count = group_counts.get(officer.pk, 0)
+        client_count = client_counts.get(officer.pk, 0)
         
         rows.append({
             'officer': officer,
@@ -366,7 +269,7 @@ def securities_officers(request, branch_id=None):
         })
         totals['group_count'] += group_count
         totals['client_count'] += client_count
-        for k in ('upfront', 'topups', 'adjustments', 'returned', 'balance'):
+        for k in STAT_KEYS:
             totals[k] += stats[k]
 
     return render(request, 'securities/officer_summary.html', {
@@ -386,6 +289,7 @@ def securities_officers(request, branch_id=None):
 
 
 @login_required
+@use_replica
 def officer_groups(request, officer_id):
     """Groups managed by a specific officer."""
     user = request.user
@@ -437,23 +341,19 @@ def officer_groups(request, officer_id):
     totals = {'client_count': 0, 'upfront': _zero(), 'topups': _zero(),
               'adjustments': _zero(), 'returned': _zero(), 'balance': _zero()}
 
+    stats_by_group = security_totals(group_loan_pairs(groups.values('pk')), date_from_obj, date_to_obj)
+    groups = groups.annotate(client_count=Count('members', filter=Q(members__is_active=True)))
+
     for group in groups:
-        borrower_ids = GroupMembership.objects.filter(
-            group=group, is_active=True
-        ).values_list('borrower_id', flat=True)
-        
-        loans = Loan.objects.filter(borrower_id__in=borrower_ids).distinct()
-        
-        stats = _security_stats_for_loans(loans, date_from_obj, date_to_obj)
-        client_count = borrower_ids.count()
+        stats = stats_by_group.get(group.pk) or zero_totals()
         
         rows.append({
             'group': group,
-            'client_count': client_count,
+            'client_count': group.client_count,
             **stats,
         })
-        totals['client_count'] += client_count
-        for k in ('upfront', 'topups', 'adjustments', 'returned', 'balance'):
+        totals['client_count'] += group.client_count
+        for k in STAT_KEYS:
             totals[k] += stats[k]
 
     return render(request, 'securities/officer_groups.html', {
@@ -471,6 +371,7 @@ def officer_groups(request, officer_id):
 
 
 @login_required
+@use_replica
 def group_clients(request, group_id):
     """Clients in a specific group."""
     user = request.user
@@ -515,18 +416,25 @@ def group_clients(request, group_id):
     totals = {'upfront': _zero(), 'topups': _zero(),
               'adjustments': _zero(), 'returned': _zero(), 'balance': _zero()}
 
+    client_ids = [membership.borrower_id for membership in memberships]
+    stats_by_client = security_totals(client_loan_pairs(client_ids), date_from_obj, date_to_obj)
+    loan_counts = dict(
+        Loan.objects.filter(borrower_id__in=client_ids).order_by()
+        .values_list('borrower_id').annotate(n=Count('id'))
+    )
+    latest_loans = {}
+    for loan in Loan.objects.filter(borrower_id__in=client_ids).only(
+        'id', 'borrower_id', 'application_number', 'status', 'application_date'
+    ).order_by('-application_date'):
+        latest_loans.setdefault(loan.borrower_id, loan)
+
     for membership in memberships:
         client = membership.borrower
-        
-        # Get client's loans
-        loans = Loan.objects.filter(borrower=client)
-        
-        # Calculate stats with date filter
-        stats = _security_stats_for_loans(loans, date_from_obj, date_to_obj)
-        stats['loan_count'] = loans.count()
+        stats = dict(stats_by_client.get(client.pk) or zero_totals())
+        stats['loan_count'] = loan_counts.get(client.pk, 0)
         
         # Latest loan for display
-        latest = loans.order_by('-application_date').first()
+        latest = latest_loans.get(client.pk)
         stats['loan_id'] = latest.application_number if latest else '—'
         stats['loan_status'] = latest.get_status_display() if latest else '—'
         
@@ -534,7 +442,7 @@ def group_clients(request, group_id):
             'client': client,
             **stats,
         })
-        for k in ('upfront', 'topups', 'adjustments', 'returned', 'balance'):
+        for k in STAT_KEYS:
             totals[k] += stats[k]
 
     return render(request, 'securities/group_clients.html', {
@@ -550,6 +458,7 @@ def group_clients(request, group_id):
 
 
 @login_required
+@use_replica
 def client_detail(request, client_id):
     """Full transaction breakdown for a single client."""
     user = request.user
@@ -586,79 +495,27 @@ def client_detail(request, client_id):
             date_from = ''
             date_to = ''
 
-    loans = Loan.objects.filter(borrower=client).order_by('-application_date')
+    loans = list(
+        Loan.objects.filter(borrower=client).order_by('-application_date')
+        .select_related('security_deposit')
+        .prefetch_related(
+            Prefetch('security_topup_requests', queryset=SecurityTopUpRequest.objects.order_by('-requested_date')),
+            Prefetch('security_transactions', queryset=SecurityTransaction.objects.order_by('-created_at')),
+        )
+    )
+    stats_by_loan = security_totals(loan_pairs([loan.pk for loan in loans]), date_from_obj, date_to_obj)
 
     loan_rows = []
     totals = {'upfront': _zero(), 'topups': _zero(),
               'adjustments': _zero(), 'returned': _zero(), 'balance': _zero()}
 
     for loan in loans:
-        try:
-            deposit = loan.security_deposit
-            # Check if deposit is within date range
-            if deposit.is_verified:
-                dep_date = deposit.payment_date or deposit.created_at
-                if date_from_obj and date_to_obj and dep_date and (dep_date.date() < date_from_obj or dep_date.date() > date_to_obj):
-                    upfront = _zero()
-                else:
-                    upfront = deposit.paid_amount
-            else:
-                upfront = _zero()
-        except Exception:
-            upfront = _zero()
-
-        # Apply date filter to all security transactions (only if dates are specified)
-        if date_from_obj and date_to_obj:
-            topups = SecurityTopUpRequest.objects.filter(
-                loan=loan, status='approved',
-                requested_date__date__range=[date_from_obj, date_to_obj]
-            ).aggregate(total=Sum('requested_amount'))['total'] or _zero()
-
-            adjustments = SecurityTransaction.objects.filter(
-                loan=loan, status='approved', transaction_type='adjustment',
-                created_at__date__range=[date_from_obj, date_to_obj]
-            ).aggregate(total=Sum('amount'))['total'] or _zero()
-
-            returned = SecurityTransaction.objects.filter(
-                loan=loan, status='approved', transaction_type='return',
-                created_at__date__range=[date_from_obj, date_to_obj]
-            ).aggregate(total=Sum('amount'))['total'] or _zero()
-
-            carry_fwd = SecurityTransaction.objects.filter(
-                loan=loan, status='approved', transaction_type='carry_forward',
-                created_at__date__range=[date_from_obj, date_to_obj]
-            ).aggregate(total=Sum('amount'))['total'] or _zero()
-
-            withdrawals = SecurityTransaction.objects.filter(
-                loan=loan, status='approved', transaction_type='withdrawal',
-                created_at__date__range=[date_from_obj, date_to_obj]
-            ).aggregate(total=Sum('amount'))['total'] or _zero()
-        else:
-            # No date filter - show all time
-            topups = SecurityTopUpRequest.objects.filter(
-                loan=loan, status='approved'
-            ).aggregate(total=Sum('requested_amount'))['total'] or _zero()
-
-            adjustments = SecurityTransaction.objects.filter(
-                loan=loan, status='approved', transaction_type='adjustment'
-            ).aggregate(total=Sum('amount'))['total'] or _zero()
-
-            returned = SecurityTransaction.objects.filter(
-                loan=loan, status='approved', transaction_type='return'
-            ).aggregate(total=Sum('amount'))['total'] or _zero()
-
-            carry_fwd = SecurityTransaction.objects.filter(
-                loan=loan, status='approved', transaction_type='carry_forward'
-            ).aggregate(total=Sum('amount'))['total'] or _zero()
-
-            withdrawals = SecurityTransaction.objects.filter(
-                loan=loan, status='approved', transaction_type='withdrawal'
-            ).aggregate(total=Sum('amount'))['total'] or _zero()
-
-        # Correct balance calculation:
-        # INCREASES: upfront + topups + carry_forwards  
-        # DECREASES: adjustments + returned + withdrawals
-        balance = (upfront + topups + carry_fwd) - (adjustments + returned + withdrawals)
+        stats = stats_by_loan.get(loan.pk) or zero_totals()
+        upfront = stats['upfront']
+        topups = stats['topups']
+        adjustments = stats['adjustments']
+        returned = stats['returned']
+        balance = stats['balance']
 
         # Transactions list for this loan (apply date filter)
         transactions = []
@@ -679,7 +536,7 @@ def client_detail(request, client_id):
         except Exception:
             pass
 
-        for tu in SecurityTopUpRequest.objects.filter(loan=loan).order_by('-requested_date'):
+        for tu in loan.security_topup_requests.all():
             # Apply date filter (only if dates are specified)
             if not date_from_obj or not date_to_obj or (tu.requested_date and tu.requested_date.date() >= date_from_obj and tu.requested_date.date() <= date_to_obj):
                 transactions.append({
@@ -690,7 +547,7 @@ def client_detail(request, client_id):
                     'notes': tu.reason,
                 })
 
-        for adj in SecurityTransaction.objects.filter(loan=loan).order_by('-created_at'):
+        for adj in loan.security_transactions.all():
             # Apply date filter (only if dates are specified)
             if not date_from_obj or not date_to_obj or (adj.created_at and adj.created_at.date() >= date_from_obj and adj.created_at.date() <= date_to_obj):
                 transactions.append({